@@ -0,0 +1,200 @@
+import os
+
+import boto3
+
+from accfactory import logs, metrics, org_cache, pool, throttling, timeline, warmup
+from accfactory.export import plain
+
+LOGGER = logs.get_logger()
+
+DYNO = boto3.client("dynamodb")
+ORG = boto3.client("organizations")
+ACCOUNT = boto3.client("account")
+SSO_ADMIN = boto3.client("sso-admin")
+IDENTITY_STORE = boto3.client("identitystore")
+ORG_LIMITER = throttling.for_service("organizations")
+DYNAMO_TABLE = os.environ.get("DYNAMO_TABLE")
+if not DYNAMO_TABLE:
+    raise RuntimeError("Missing required environment variable DYNAMO_TABLE")
+CONTROL_TABLE = os.environ.get("CONTROL_TABLE")
+if not CONTROL_TABLE:
+    raise RuntimeError("Missing required environment variable CONTROL_TABLE")
+
+# Usuário SSO dono das contas enquanto estão no pool
+POOL_OWNER = {
+    "email": os.environ.get("ACCOUNT_POOL_OWNER_EMAIL", ""),
+    "first_name": os.environ.get("ACCOUNT_POOL_OWNER_FIRST_NAME", "Account"),
+    "last_name": os.environ.get("ACCOUNT_POOL_OWNER_LAST_NAME", "Pool"),
+}
+# Atribuição do solicitante na conta entregue (mesmo papel que o Control Tower dá)
+SSO_INSTANCE_ARN = os.environ.get("SSO_INSTANCE_ARN")
+IDENTITY_STORE_ID = os.environ.get("IDENTITY_STORE_ID")
+PERMISSION_SET_ARN = os.environ.get("ACCOUNT_POOL_PERMISSION_SET_ARN")
+
+
+def _update(email, fields):
+    names, values, parts = {}, {}, []
+    for i, (name, value) in enumerate(fields.items()):
+        names[f"#f{i}"] = name
+        values[f":v{i}"] = {"S": str(value)}
+        parts.append(f"#f{i} = :v{i}")
+    DYNO.update_item(
+        TableName=DYNAMO_TABLE,
+        Key={"AccountEmail": {"S": email}},
+        UpdateExpression="SET " + ", ".join(parts),
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+    )
+
+
+# ---------------- Claim ----------------
+def _sso_user_id(record):
+    email = record["SSOUserEmail"]
+    users = IDENTITY_STORE.list_users(
+        IdentityStoreId=IDENTITY_STORE_ID,
+        Filters=[{"AttributePath": "UserName", "AttributeValue": email}],
+    ).get("Users", [])
+    if users:
+        return users[0]["UserId"]
+    first, last = record["SSOUserFirstName"], record["SSOUserLastName"]
+    return IDENTITY_STORE.create_user(
+        IdentityStoreId=IDENTITY_STORE_ID,
+        UserName=email,
+        DisplayName=f"{first} {last}",
+        Name={"GivenName": first, "FamilyName": last},
+        Emails=[{"Value": email, "Type": "work", "Primary": True}],
+    )["UserId"]
+
+
+def assign_sso_user(account_id, record):
+    if not (SSO_INSTANCE_ARN and IDENTITY_STORE_ID and PERMISSION_SET_ARN):
+        LOGGER.warning(
+            "SSO do pool não configurado; acesso de %s não atribuído", account_id
+        )
+        return False
+    SSO_ADMIN.create_account_assignment(
+        InstanceArn=SSO_INSTANCE_ARN,
+        TargetId=account_id,
+        TargetType="AWS_ACCOUNT",
+        PermissionSetArn=PERMISSION_SET_ARN,
+        PrincipalType="USER",
+        PrincipalId=_sso_user_id(record),
+    )
+    return True
+
+
+def apply_request(record):
+    """Move a conta para a OU pedida e aplica nome, tags e usuário SSO."""
+    account_id = record["AccountId"]
+    destination = org_cache.resolve_ou(ORG, ORG_LIMITER, record["OrgUnit"])
+    if destination is None:
+        raise ValueError(f"OrgUnit {record['OrgUnit']} não encontrada")
+    parents = ORG_LIMITER.call(ORG.list_parents, ChildId=account_id)["Parents"]
+    if parents[0]["Id"] != destination:
+        ORG_LIMITER.call(
+            ORG.move_account,
+            AccountId=account_id,
+            SourceParentId=parents[0]["Id"],
+            DestinationParentId=destination,
+        )
+    ACCOUNT.put_account_name(AccountId=account_id, AccountName=record["AccountName"])
+    if record.get("Tags"):
+        ORG_LIMITER.call(ORG.tag_resource, ResourceId=account_id, Tags=record["Tags"])
+    assign_sso_user(account_id, record)
+
+
+def finish_claim(email):
+    item = DYNO.get_item(
+        TableName=DYNAMO_TABLE,
+        Key={"AccountEmail": {"S": email}},
+        ConsistentRead=True,
+    ).get("Item")
+    record = {name: plain(value) for name, value in (item or {}).items()}
+    if record.get("Status") != pool.CLAIMING:
+        LOGGER.warning("Conta %s não está em %s; nada a fazer", email, pool.CLAIMING)
+        return {"AccountEmail": email, "Status": record.get("Status")}
+
+    now = timeline.now_iso()
+    try:
+        apply_request(record)
+    except Exception as error:
+        LOGGER.error("Falha ao entregar conta do pool para %s: %s", email, error)
+        metrics.put_metric("PoolClaimFailures")
+        _update(
+            email,
+            {
+                "Status": "FAILED",
+                "ErrorMessage": str(error),
+                "ErrorType": "PoolClaimError",
+                "FailedAt": now,
+                "UpdatedAt": now,
+                "LastUpdateDate": now,
+            },
+        )
+        return {"AccountEmail": email, "Status": "FAILED"}
+
+    _update(
+        email,
+        {
+            "Status": "ACTIVE",
+            timeline.ACTIVATED: now,
+            "UpdatedAt": now,
+            "LastUpdateDate": now,
+        },
+    )
+    LOGGER.info("Conta %s (%s) entregue pelo pool", email, record["AccountId"])
+    return {"AccountEmail": email, "AccountId": record["AccountId"], "Status": "ACTIVE"}
+
+
+# ---------------- Reposição ----------------
+def refill():
+    """Cria pedidos de reposição até o pool (prontos + em criação) voltar ao alvo."""
+    if not pool.enabled() or not POOL_OWNER["email"]:
+        LOGGER.warning("Pool desabilitado ou sem ACCOUNT_POOL_OWNER_EMAIL")
+        return {"requested": 0}
+    current = pool.members(DYNO, CONTROL_TABLE)
+    missing = max(0, pool.POOL_SIZE - len(current))
+    for _ in range(missing):
+        request = pool.new_request(POOL_OWNER)
+        # Membro antes do registro: o stream dispara o workflow assim que o
+        # registro é gravado e o update_succeed_status espera achar o membro.
+        pool.register(
+            DYNO, CONTROL_TABLE, request["AccountEmail"], request["AccountName"]
+        )
+        DYNO.put_item(
+            TableName=DYNAMO_TABLE,
+            Item={
+                name: {"BOOL": value} if isinstance(value, bool) else {"S": value}
+                for name, value in request.items()
+            },
+            ConditionExpression="attribute_not_exists(AccountEmail)",
+        )
+    if missing:
+        metrics.put_metric("PoolRefills", missing)
+    LOGGER.info(
+        "Pool: %s membros, alvo %s, %s reposições pedidas",
+        len(current),
+        pool.POOL_SIZE,
+        missing,
+    )
+    return {"requested": missing}
+
+
+# ---------------- Lambda Handler ----------------
+@logs.handler
+def lambda_handler(event, context):
+    """``{"claim": <e-mail>}`` (API, assíncrono) ou ``{"refill": true}`` (agendado)."""
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+
+    result = {}
+    if event.get("claim"):
+        logs.bind(correlationId=event["claim"])
+        result = finish_claim(event["claim"])
+    result["refill"] = refill()
+    return result
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {"ou_tree": lambda: org_cache.ou_tree(ORG, ORG_LIMITER)}
+warmup.on_init(WARMERS)
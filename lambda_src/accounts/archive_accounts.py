@@ -0,0 +1,62 @@
+import os
+from datetime import datetime, timezone
+
+import boto3
+
+from accfactory import archive, logs, warmup
+
+LOGGER = logs.get_logger()
+
+DDB = boto3.resource("dynamodb")
+TABLE_NAME = os.environ.get("DYNAMO_TABLE")
+if not TABLE_NAME:
+    raise RuntimeError("Missing required environment variable DYNAMO_TABLE")
+ARCHIVE_TABLE = os.environ.get("ARCHIVE_TABLE")
+if not ARCHIVE_TABLE:
+    raise RuntimeError("Missing required environment variable ARCHIVE_TABLE")
+TABLE = DDB.Table(TABLE_NAME)
+ARCHIVE = DDB.Table(ARCHIVE_TABLE)
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "90"))
+# Abaixo disso a execução para; a próxima continua de onde o Scan encontrar
+SAFETY_MARGIN_MS = 60_000
+
+
+@logs.handler
+def lambda_handler(event, context):
+    """Arquiva registros terminais antigos (execução diária via SSM).
+
+    Evento (opcional): ``afterDays`` sobrescreve ``ARCHIVE_AFTER_DAYS``.
+    """
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+
+    days = int(event.get("afterDays", ARCHIVE_AFTER_DAYS))
+    before = archive.cutoff(days)
+    archived_at = datetime.now(timezone.utc).isoformat()
+    LOGGER.info("Arquivando registros terminais anteriores a %s", before)
+
+    archived = changed = 0
+    complete = True
+    for item in archive.candidates(TABLE, before):
+        if archive.archive_record(TABLE, ARCHIVE, item, archived_at):
+            archived += 1
+        else:
+            changed += 1
+        if (
+            context is not None
+            and context.get_remaining_time_in_millis() < SAFETY_MARGIN_MS
+        ):
+            LOGGER.info("Tempo esgotado; a próxima execução continua")
+            complete = False
+            break
+
+    LOGGER.info(
+        "Arquivamento: %s arquivados, %s alterados no caminho", archived, changed
+    )
+    return {"archived": archived, "changed": changed, "complete": complete}
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {}
+warmup.on_init(WARMERS)
@@ -0,0 +1,336 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import boto3
+from botocore.exceptions import ClientError
+
+from accfactory import archive, bulk, logs, org_cache, throttling, warmup
+from accfactory.export import plain
+
+LOGGER = logs.get_logger()
+
+ORG = boto3.client("organizations")
+DYNO = boto3.client("dynamodb")
+LAMBDA = boto3.client("lambda")
+ORG_LIMITER = throttling.for_service("organizations")
+DYNAMO_TABLE = os.environ.get("DYNAMO_TABLE")
+if not DYNAMO_TABLE:
+    raise RuntimeError("Missing required environment variable DYNAMO_TABLE")
+CONTROL_TABLE = os.environ.get("CONTROL_TABLE")
+if not CONTROL_TABLE:
+    raise RuntimeError("Missing required environment variable CONTROL_TABLE")
+ACCOUNT_ID_INDEX = os.environ.get("ACCOUNT_ID_INDEX", "AccountIdIndex")
+ARCHIVE_TABLE = os.environ.get("ARCHIVE_TABLE")
+
+# Chamadas ao Organizations em paralelo; o ORG_LIMITER (thread-safe) mantém o
+# conjunto dentro do orçamento de TPS compartilhado com os demais handlers.
+BULK_WORKERS = int(os.environ.get("BULK_WORKERS", "8"))
+EXECUTOR = ThreadPoolExecutor(max_workers=BULK_WORKERS, thread_name_prefix="bulk")
+BATCH_SIZE = 25  # contas por lote: 1 BatchGetItem + 1 TransactWriteItems
+# Abaixo disso o worker para entre lotes e continua numa nova invocação.
+SAFETY_MARGIN_MS = 90_000
+
+
+def _iso_now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ---------------- Resolução dos alvos ----------------
+def _emails_for_ids(account_ids):
+    def lookup(account_id):
+        items = DYNO.query(
+            TableName=DYNAMO_TABLE,
+            IndexName=ACCOUNT_ID_INDEX,
+            KeyConditionExpression="AccountId = :id",
+            ExpressionAttributeValues={":id": {"S": account_id}},
+            ProjectionExpression="AccountEmail",
+            Limit=1,
+        ).get("Items", [])
+        return items[0]["AccountEmail"]["S"] if items else None
+
+    emails, missing = [], []
+    for account_id, email in zip(account_ids, EXECUTOR.map(lookup, account_ids)):
+        if email:
+            emails.append(email)
+        else:
+            missing.append((account_id, "AccountId não encontrado na tabela"))
+    return emails, missing
+
+
+def _emails_for_org_unit(ou_path):
+    # Registros da API guardam o caminho relativo ("Engineering/Platform"); os
+    # do bootstrap, o caminho a partir do root ("Root/Engineering/Platform").
+    tree = org_cache.ou_tree(ORG, ORG_LIMITER)
+    rooted = f"{tree.root_name}/{ou_path}" if tree else ou_path
+    kwargs = {
+        "TableName": DYNAMO_TABLE,
+        "FilterExpression": "OrgUnit IN (:ou, :rooted)",
+        "ExpressionAttributeValues": {":ou": {"S": ou_path}, ":rooted": {"S": rooted}},
+        "ProjectionExpression": "AccountEmail",
+    }
+    emails = []
+    while True:
+        response = DYNO.scan(**kwargs)
+        emails.extend(item["AccountEmail"]["S"] for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return sorted(emails)
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def resolve_targets(selector):
+    """``(e-mails, erros)`` das contas selecionadas."""
+    if "AccountEmails" in selector:
+        return selector["AccountEmails"], []
+    if "AccountIds" in selector:
+        return _emails_for_ids(selector["AccountIds"])
+    return _emails_for_org_unit(selector["OrgUnit"]), []
+
+
+# ---------------- Lote ----------------
+def _batch_get(table_name, emails, projection):
+    keys = [{"AccountEmail": {"S": email}} for email in emails]
+    request = {table_name: {"Keys": keys, "ProjectionExpression": projection}}
+    accounts = {}
+    while request:
+        response = DYNO.batch_get_item(RequestItems=request)
+        for item in response.get("Responses", {}).get(table_name, []):
+            account = {name: plain(value) for name, value in item.items()}
+            accounts[account["AccountEmail"]] = account
+        request = response.get("UnprocessedKeys") or None
+    return accounts
+
+
+def _read_accounts(emails):
+    accounts = _batch_get(
+        DYNAMO_TABLE, emails, f"AccountEmail, AccountId, Tags, {archive.MARKER}"
+    )
+    # Stubs de registros arquivados: as tags atuais estão na cópia do arquivo
+    archived = [email for email, item in accounts.items() if archive.is_stub(item)]
+    if archived and ARCHIVE_TABLE:
+        copies = _batch_get(ARCHIVE_TABLE, archived, "AccountEmail, Tags")
+        for email in archived:
+            accounts[email]["Tags"] = copies.get(email, {}).get("Tags")
+    return accounts
+
+
+def apply_org_changes(account_id, changes, destination_id):
+    """Aplica tags e troca de OU no Organizations (idempotente)."""
+    if "Tags" in changes:
+        ORG_LIMITER.call(ORG.tag_resource, ResourceId=account_id, Tags=changes["Tags"])
+    if destination_id:
+        parents = ORG_LIMITER.call(ORG.list_parents, ChildId=account_id)["Parents"]
+        source_id = parents[0]["Id"]
+        if source_id != destination_id:
+            ORG_LIMITER.call(
+                ORG.move_account,
+                AccountId=account_id,
+                SourceParentId=source_id,
+                DestinationParentId=destination_id,
+            )
+
+
+def _merged_tags(current, new):
+    tags = {tag["Key"]: tag["Value"] for tag in current or []}
+    tags.update((tag["Key"], tag["Value"]) for tag in new)
+    return {
+        "L": [
+            {"M": {"Key": {"S": key}, "Value": {"S": value}}}
+            for key, value in tags.items()
+        ]
+    }
+
+
+def _update_requests(account, changes):
+    """Atualização do registro; a de um arquivado vai para a cópia do arquivo."""
+    now = _iso_now()
+    expression = "SET UpdatedAt = :now, LastUpdateDate = :now"
+    values = {":now": {"S": now}}
+    if "Tags" in changes:
+        expression += ", Tags = :tags"
+        values[":tags"] = _merged_tags(account.get("Tags"), changes["Tags"])
+    if "OrgUnit" in changes:
+        expression += ", OrgUnit = :ou"
+        values[":ou"] = {"S": changes["OrgUnit"]}
+    key = {"AccountEmail": {"S": account["AccountEmail"]}}
+    if not (archive.is_stub(account) and ARCHIVE_TABLE):
+        return [
+            {
+                "TableName": DYNAMO_TABLE,
+                "Key": key,
+                "UpdateExpression": expression,
+                "ConditionExpression": (
+                    f"attribute_exists(AccountEmail) AND "
+                    f"attribute_not_exists({archive.MARKER})"
+                ),
+                "ExpressionAttributeValues": values,
+            }
+        ]
+    updates = [
+        {
+            "TableName": ARCHIVE_TABLE,
+            "Key": key,
+            "UpdateExpression": expression,
+            "ConditionExpression": "attribute_exists(AccountEmail)",
+            "ExpressionAttributeValues": values,
+        }
+    ]
+    if "OrgUnit" in changes:
+        # O stub mantém a OU para os contadores e a seleção por OU
+        updates.append(
+            {
+                "TableName": DYNAMO_TABLE,
+                "Key": key,
+                "UpdateExpression": "SET OrgUnit = :ou",
+                "ConditionExpression": f"attribute_exists({archive.MARKER})",
+                "ExpressionAttributeValues": {":ou": values[":ou"]},
+            }
+        )
+    return updates
+
+
+def _write_updates(updates):
+    """Grava o lote numa transação; se ela falhar, item a item. Retorna os erros."""
+    if not updates:
+        return []
+    try:
+        DYNO.transact_write_items(
+            TransactItems=[{"Update": update} for _, update in updates]
+        )
+        return []
+    except ClientError as error:
+        LOGGER.warning("Transação do lote falhou, gravando item a item: %s", error)
+    errors = {}
+    for email, update in updates:
+        if email in errors:
+            continue
+        try:
+            DYNO.update_item(**update)
+        except ClientError as error:
+            errors[email] = f"Organizations atualizado; DynamoDB: {error}"
+    return list(errors.items())
+
+
+def process_batch(emails, changes, destination_id):
+    """Retorna ``(sucessos, erros)`` de um lote de até ``BATCH_SIZE`` contas."""
+    accounts = _read_accounts(emails)
+    errors, futures = [], []
+    for email in emails:
+        account = accounts.get(email)
+        if not account:
+            errors.append((email, "Conta não encontrada na tabela"))
+        elif not account.get("AccountId"):
+            errors.append((email, "Conta ainda sem AccountId"))
+        else:
+            future = EXECUTOR.submit(
+                apply_org_changes, account["AccountId"], changes, destination_id
+            )
+            futures.append((account, future))
+
+    updates = []
+    for account, future in futures:
+        try:
+            future.result()
+            updates += [
+                (account["AccountEmail"], update)
+                for update in _update_requests(account, changes)
+            ]
+        except Exception as error:
+            errors.append((account["AccountEmail"], str(error)))
+
+    errors += _write_updates(updates)
+    return len(emails) - len(errors), errors
+
+
+# ---------------- Lambda Handler ----------------
+def _continue(job_id, context):
+    LAMBDA.invoke(
+        FunctionName=context.function_name,
+        InvocationType="Event",
+        Payload=json.dumps({"jobId": job_id}).encode("utf-8"),
+    )
+
+
+@logs.handler
+def lambda_handler(event, context):
+    """Executa (ou continua) o job ``event["jobId"]`` criado pela API."""
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+
+    job_id = event["jobId"]
+    logs.bind(correlationId=job_id)
+    job = bulk.get_job(DYNO, CONTROL_TABLE, job_id, consistent=True)
+    if not job or job["Status"] not in (bulk.PENDING, bulk.RUNNING):
+        LOGGER.warning("Job %s inexistente ou já finalizado", job_id)
+        return {"jobId": job_id, "status": job["Status"] if job else None}
+
+    selector, changes = job["Request"]["selector"], job["Request"]["changes"]
+    destination_id = None
+    if "OrgUnit" in changes:
+        destination_id = org_cache.resolve_ou(ORG, ORG_LIMITER, changes["OrgUnit"])
+        if destination_id is None:
+            bulk.finish(
+                DYNO,
+                CONTROL_TABLE,
+                job_id,
+                bulk.FAILED,
+                "OrgUnit de destino não existe",
+            )
+            return {"jobId": job_id, "status": bulk.FAILED}
+
+    if job["Status"] == bulk.PENDING:
+        targets, missing = resolve_targets(selector)
+        if len(targets) > bulk.MAX_TARGETS:
+            message = f"Seleção com {len(targets)} contas (máximo {bulk.MAX_TARGETS})"
+            bulk.finish(DYNO, CONTROL_TABLE, job_id, bulk.FAILED, message)
+            return {"jobId": job_id, "status": bulk.FAILED}
+        bulk.start(DYNO, CONTROL_TABLE, job_id, targets)
+        job.update(Targets=targets, Offset=0, Succeeded=0, Failed=len(missing))
+        job["Errors"] = []
+        if missing:
+            bulk.record_progress(
+                DYNO, CONTROL_TABLE, job_id, 0, len(missing), missing, 0, 0
+            )
+            job["Errors"] = missing[: bulk.MAX_ERRORS]
+
+    targets = job.get("Targets", [])
+    offset = int(job.get("Offset", 0))
+    succeeded, failed = int(job["Succeeded"]), int(job["Failed"])
+    known_errors = len(job.get("Errors", []))
+    LOGGER.info("Job %s: %s contas a partir de %s", job_id, len(targets), offset)
+
+    while offset < len(targets):
+        batch = targets[offset : offset + BATCH_SIZE]
+        ok, errors = process_batch(batch, changes, destination_id)
+        offset += len(batch)
+        succeeded += ok
+        failed += len(errors)
+        known_errors += bulk.record_progress(
+            DYNO, CONTROL_TABLE, job_id, ok, len(errors), errors, offset, known_errors
+        )
+        if (
+            offset < len(targets)
+            and context is not None
+            and context.get_remaining_time_in_millis() < SAFETY_MARGIN_MS
+        ):
+            LOGGER.info("Job %s continua em nova invocação (offset %s)", job_id, offset)
+            _continue(job_id, context)
+            return {"jobId": job_id, "status": bulk.RUNNING, "offset": offset}
+
+    status = bulk.final_status(succeeded, failed)
+    bulk.finish(DYNO, CONTROL_TABLE, job_id, status)
+    LOGGER.info(
+        "Job %s finalizado: %s (ok=%s, falhas=%s)", job_id, status, succeeded, failed
+    )
+    return {
+        "jobId": job_id,
+        "status": status,
+        "succeeded": succeeded,
+        "failed": failed,
+    }
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {"ou_tree": lambda: org_cache.ou_tree(ORG, ORG_LIMITER)}
+warmup.on_init(WARMERS)
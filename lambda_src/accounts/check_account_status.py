@@ -1,27 +1,43 @@
-import logging
+import os
 import boto3
-import json
 
-LOGGER = logging.getLogger()
-LOGGER.setLevel(logging.INFO)
+from accfactory import batch, circuit, errors, logs, orgs, timeline, warmup
+
+LOGGER = logs.get_logger()
 
 SC = boto3.client("servicecatalog")
+dynamo_client = boto3.client("dynamodb")
+SC_CIRCUIT = circuit.for_service("servicecatalog")
+DYNAMO_TABLE = os.environ.get("DYNAMO_TABLE")
+# Produto e circuito ficam na organização do pedido (accfactory.orgs)
+ORGS = orgs.load()
+SC_CLIENTS = orgs.ClientPool()
+
 
+def for_org(item):
+    """(client do Service Catalog, circuito) da organização do pedido."""
+    org = orgs.of(ORGS, item)
+    if org.name == orgs.DEFAULT:
+        return SC, SC_CIRCUIT
+    return SC_CLIENTS.client(org, "servicecatalog"), orgs.breaker(org, "servicecatalog")
 
-def get_pp_status(pp_id):
+
+def get_pp_status(sc, pp_id):
     """Retorna o status atual do Provisioned Product e mensagem de erro (se houver)."""
     try:
-        result = SC.describe_provisioned_product(Id=pp_id)["ProvisionedProductDetail"]
+        result = sc.describe_provisioned_product(Id=pp_id)["ProvisionedProductDetail"]
         status = result["Status"]
         message = result.get("StatusMessage", "")
         return status, message
     except Exception as e:
-        LOGGER.error(f"Erro ao consultar Service Catalog: {e}")
+        # Throttling/indisponibilidade não significam falha do provisionamento
+        if errors.is_transient(e):
+            raise
+        LOGGER.error("Erro ao consultar Service Catalog: %s", e)
         return "ERROR", str(e)
 
 
-def lambda_handler(event, context):
-
+def check_status(event):
     class CheckStatusErrorWithData(Exception):
         def __init__(self, message, account_email):
             super().__init__(message)
@@ -37,12 +53,33 @@ def lambda_handler(event, context):
                 item.get("AccountEmail", "desconhecido"),
             )
 
-        sc_status, sc_message = get_pp_status(pp_id)
-        LOGGER.info(f"ProvisionedProductId: {pp_id} Status SC={sc_status}")
+        sc, breaker = for_org(item)
+        sc_status, sc_message = get_pp_status(sc, pp_id)
+        LOGGER.info("ProvisionedProductId: %s Status SC=%s", pp_id, sc_status)
+        # Resultado final do provisionamento alimenta o circuit breaker
+        if sc_status == "ERROR":
+            breaker.record_failure()
+        elif sc_status in ("AVAILABLE", "TAINTED"):
+            breaker.record_success()
+
+        # Control Tower ocupado com outra conta: o Step Function espera e volta
+        # ao ProvisionAccount com uma nova tentativa, mantendo o registro.
+        if sc_status == "ERROR" and errors.is_transient_message(sc_message):
+            raise errors.conflict_error(
+                f"Control Tower ocupado: {sc_message}",
+                item.get("AccountEmail", "desconhecido"),
+            )
 
         # Atualiza o status apenas se diferente de UNDER_CHANGE
         if sc_status != "UNDER_CHANGE":
             item["Status"] = sc_status
+            if DYNAMO_TABLE and item.get("AccountEmail"):
+                timeline.mark(
+                    dynamo_client,
+                    DYNAMO_TABLE,
+                    item["AccountEmail"],
+                    timeline.PROVISION_COMPLETED,
+                )
 
         if sc_status == "ERROR":
             raise CheckStatusErrorWithData(
@@ -53,13 +90,31 @@ def lambda_handler(event, context):
         return item
 
     except Exception as e:
-        LOGGER.error(f"Erro no CheckAccountStatus: {e}")
-        raise Exception(
-            json.dumps(
-                {
-                    "errorType": "CheckStatusError",
-                    "errorMessage": str(e),
-                    "account_email": item.get("AccountEmail", "desconhecido"),
-                }
-            )
+        LOGGER.error("Erro no CheckAccountStatus: %s", e)
+        raise errors.task_error(
+            e, "CheckStatusError", item.get("AccountEmail", "desconhecido")
+        )
+
+
+@logs.handler
+def lambda_handler(event, context):
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+    if batch.is_batch(event):
+        # Um poll para o lote inteiro; throttling deixa o item para o próximo
+        return batch.run(
+            check_status,
+            event,
+            select=lambda item: item.get("Status") in batch.PENDING,
+            keep_transient=True,
         )
+    return check_status(event)
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {}
+if DYNAMO_TABLE:
+    WARMERS["dynamodb"] = lambda: dynamo_client.get_item(
+        TableName=DYNAMO_TABLE, Key={"AccountEmail": {"S": "warmup"}}
+    )
+warmup.on_init(WARMERS)
@@ -0,0 +1,64 @@
+import os
+from datetime import datetime, timezone
+
+import boto3
+
+from accfactory import export, logs, warmup
+
+LOGGER = logs.get_logger()
+
+DYNO = boto3.client("dynamodb")
+S3 = boto3.client("s3")
+DYNAMO_TABLE = os.environ.get("DYNAMO_TABLE")
+if not DYNAMO_TABLE:
+    raise RuntimeError("Missing required environment variable DYNAMO_TABLE")
+ARCHIVE_TABLE = os.environ.get("ARCHIVE_TABLE")
+EXPORT_BUCKET = os.environ.get("EXPORT_BUCKET")
+EXPORT_PREFIX = os.environ.get("EXPORT_PREFIX", "exports/")
+EXPORT_SEGMENTS = int(os.environ.get("EXPORT_SEGMENTS", "4"))
+
+
+@logs.handler
+def lambda_handler(event, context):
+    """Exporta o inventário para o S3.
+
+    Evento (todos opcionais): ``format`` (ndjson|csv), ``segments``,
+    ``projection`` (lista de atributos), ``bucket``, ``key`` e ``archive``
+    (exporta a tabela de arquivo; na tabela quente os arquivados são stubs).
+    """
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+
+    fmt = event.get("format", "ndjson")
+    bucket = event.get("bucket") or EXPORT_BUCKET
+    if not bucket:
+        raise RuntimeError("Missing export bucket (EXPORT_BUCKET or event.bucket)")
+    if event.get("archive") and not ARCHIVE_TABLE:
+        raise RuntimeError("Missing required environment variable ARCHIVE_TABLE")
+    table, name = (
+        (ARCHIVE_TABLE, "accounts-archive")
+        if event.get("archive")
+        else (DYNAMO_TABLE, "accounts")
+    )
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    key = event.get("key") or f"{EXPORT_PREFIX}{name}-{stamp}.{fmt}"
+
+    LOGGER.info("Exportando %s para s3://%s/%s", table, bucket, key)
+    manifest = export.export_table(
+        DYNO,
+        table,
+        export.S3Sink(S3, bucket, key),
+        fmt=fmt,
+        segments=int(event.get("segments", EXPORT_SEGMENTS)),
+        projection=event.get("projection"),
+    )
+    return {
+        "itemCount": manifest["itemCount"],
+        "destination": manifest["destination"],
+        "manifest": f"s3://{bucket}/{key}.manifest.json",
+    }
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {}
+warmup.on_init(WARMERS)
@@ -0,0 +1,77 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+from accfactory import logs, metrics, warmup, webhooks
+
+LOGGER = logs.get_logger()
+
+DYNO = boto3.client("dynamodb")
+CONTROL_TABLE = os.environ.get("CONTROL_TABLE")
+if not CONTROL_TABLE:
+    raise RuntimeError("Missing required environment variable CONTROL_TABLE")
+# Entregas em paralelo: um callback lento não atrasa os demais do lote
+WORKERS = int(os.environ.get("WEBHOOK_WORKERS", "8"))
+
+
+def notify(email, payload):
+    """Entrega um evento; sem callback registrado não há o que fazer."""
+    callback = webhooks.lookup(DYNO, CONTROL_TABLE, email)
+    if not callback:
+        return "skipped"
+    ok, attempts, error = webhooks.deliver(callback, payload)
+    if not ok:
+        LOGGER.warning(
+            "Webhook %s para %s falhou após %s tentativas: %s",
+            payload["type"],
+            email,
+            attempts,
+            error,
+        )
+        webhooks.dead_letter(
+            DYNO, CONTROL_TABLE, email, callback, payload, error, attempts
+        )
+        return "dead_lettered"
+    if payload["type"] == webhooks.REMOVED:
+        webhooks.forget(DYNO, CONTROL_TABLE, email)
+    return "delivered"
+
+
+def redeliver():
+    """Reenvia as entregas da DLQ (mais antigas primeiro)."""
+    results = {"delivered": 0, "dead_lettered": 0, "skipped": 0}
+    for item in webhooks.dead_letters(DYNO, CONTROL_TABLE):
+        email = item["AccountEmail"]["S"]
+        payload = json.loads(item["Payload"]["S"])
+        # notify() grava um novo item se falhar de novo; o atual sai da fila
+        DYNO.delete_item(
+            TableName=CONTROL_TABLE, Key={"PK": item["PK"], "SK": item["SK"]}
+        )
+        results[notify(email, payload)] += 1
+    metrics.put_metric("WebhookRedeliveries", results["delivered"])
+    return results
+
+
+@logs.handler
+def lambda_handler(event, context):
+    """``{"events": [[email, payload], ...]}`` (stream) ou ``{"redeliver": true}``."""
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+    if event.get("redeliver"):
+        return redeliver()
+
+    events = event.get("events", [])
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        outcomes = list(pool.map(lambda e: notify(*e), events))
+    results = {outcome: outcomes.count(outcome) for outcome in set(outcomes)}
+    LOGGER.info("Webhooks processados: %s", results)
+    return results
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {
+    "dynamodb": lambda: webhooks.lookup(DYNO, CONTROL_TABLE, "warmup"),
+}
+warmup.on_init(WARMERS)
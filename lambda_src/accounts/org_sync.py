@@ -0,0 +1,196 @@
+import os
+import re
+import time
+
+import boto3
+from botocore.exceptions import ClientError
+
+from accfactory import inventory, logs, metrics, org_cache, pool, throttling, warmup
+
+LOGGER = logs.get_logger()
+
+ORG = boto3.client("organizations")
+ORG_LIMITER = throttling.for_service("organizations")
+DYNO = boto3.client("dynamodb")
+DDB = boto3.resource("dynamodb")
+TABLE_NAME = os.environ.get("DYNAMO_TABLE")
+if not TABLE_NAME:
+    raise RuntimeError("Missing required environment variable DYNAMO_TABLE")
+CONTROL_TABLE = os.environ.get("CONTROL_TABLE")
+if not CONTROL_TABLE:
+    raise RuntimeError("Missing required environment variable CONTROL_TABLE")
+TABLE = DDB.Table(TABLE_NAME)
+# Registros arquivados recebem a escrita na cópia do arquivo (accfactory.archive)
+ARCHIVE_TABLE = os.environ.get("ARCHIVE_TABLE")
+ARCHIVE = DDB.Table(ARCHIVE_TABLE) if ARCHIVE_TABLE else None
+
+EVENT_PREFIX = "ORGEVENT#"
+# O EventBridge repete a entrega por até 24h
+EVENT_TTL_SECONDS = int(os.environ.get("ORG_EVENT_TTL_SECONDS", "86400"))
+ACCOUNT_ID = re.compile(r"\d{12}")
+
+
+# ---------------- Deduplicação ----------------
+def _event_key(event_id):
+    return {"PK": {"S": f"{EVENT_PREFIX}{event_id}"}, "SK": {"S": "-"}}
+
+
+def claim_event(event_id):
+    """False se o evento já foi processado (entrega repetida)."""
+    try:
+        DYNO.put_item(
+            TableName=CONTROL_TABLE,
+            Item={
+                **_event_key(event_id),
+                "ExpiresAt": {"N": str(int(time.time()) + EVENT_TTL_SECONDS)},
+            },
+            ConditionExpression="attribute_not_exists(PK)",
+        )
+    except ClientError as error:
+        if error.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return False
+        raise
+    return True
+
+
+def release_event(event_id):
+    DYNO.delete_item(TableName=CONTROL_TABLE, Key=_event_key(event_id))
+
+
+# ---------------- Sincronização ----------------
+def sync_account(account_id, event_time):
+    """Relê a conta no Organizations e atualiza o registro do inventário.
+
+    Como o estado é relido, eventos fora de ordem não gravam dado antigo; a
+    condição em ``OrgEventTime`` ainda impede que a releitura de um evento mais
+    antigo sobrescreva a de um mais novo. Registros em andamento no workflow
+    (status fora de ``ORG_STATUSES``) ficam com o Step Function.
+    """
+    try:
+        account = ORG_LIMITER.call(ORG.describe_account, AccountId=account_id)[
+            "Account"
+        ]
+    except ClientError as error:
+        if error.response["Error"]["Code"] != "AccountNotFoundException":
+            raise
+        LOGGER.warning("Conta %s não está mais na organização", account_id)
+        return "missing"
+    if pool.is_pool_email(account["Email"]):
+        return "skipped"
+
+    item = inventory.normalize(account, inventory.ou_path(ORG, ORG_LIMITER, account_id))
+    tags = inventory.fetch_tags(ORG, ORG_LIMITER, account_id)
+    statuses = {f":org{i}": status for i, status in enumerate(inventory.ORG_STATUSES)}
+    condition = (
+        f"(attribute_not_exists(AccountEmail) OR #status IN ({', '.join(statuses)}))"
+        " AND (attribute_not_exists(OrgEventTime) OR OrgEventTime <= :eventTime)",
+        {**statuses, ":eventTime": event_time},
+        None,
+    )
+    try:
+        inventory.upsert(
+            TABLE,
+            item,
+            tags,
+            condition=condition,
+            extra={"OrgEventTime": event_time},
+            archive_table=ARCHIVE,
+        )
+    except ClientError as error:
+        if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        return "skipped"
+    return "updated"
+
+
+def accounts_under(ou_id):
+    """Contas da OU e de todas as OUs abaixo dela."""
+    accounts, queue = [], [ou_id]
+    while queue:
+        parent = queue.pop(0)
+        for child_type, target in (
+            ("ACCOUNT", accounts),
+            ("ORGANIZATIONAL_UNIT", queue),
+        ):
+            for page in ORG_LIMITER.paginate(
+                ORG.list_children, ParentId=parent, ChildType=child_type
+            ):
+                target.extend(child["Id"] for child in page.get("Children", []))
+    return accounts
+
+
+def _created(detail):
+    status = detail.get("serviceEventDetails", {}).get("createAccountStatus", {})
+    return [status["accountId"]] if status.get("state") == "SUCCEEDED" else []
+
+
+def _account(detail):
+    return [detail["requestParameters"]["accountId"]]
+
+
+def _tagged(detail):
+    # Tags de OU, root e políticas não entram no inventário
+    resource = detail["requestParameters"]["resourceId"]
+    return [resource] if ACCOUNT_ID.fullmatch(resource) else []
+
+
+def _ou_changed(detail):
+    org_cache.invalidate()
+    return []
+
+
+def _ou_renamed(detail):
+    # O caminho de todas as contas abaixo da OU muda junto com o nome
+    org_cache.invalidate()
+    return accounts_under(detail["requestParameters"]["organizationalUnitId"])
+
+
+# eventName -> ids das contas afetadas
+HANDLERS = {
+    "CreateAccountResult": _created,
+    "MoveAccount": _account,
+    "CloseAccount": _account,
+    "TagResource": _tagged,
+    "UntagResource": _tagged,
+    "UpdateOrganizationalUnit": _ou_renamed,
+    "CreateOrganizationalUnit": _ou_changed,
+    "DeleteOrganizationalUnit": _ou_changed,
+}
+
+
+# ---------------- Lambda Handler ----------------
+@logs.handler
+def lambda_handler(event, context):
+    """Evento do Organizations (CloudTrail) entregue pelo EventBridge."""
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+
+    detail = event.get("detail", {})
+    name = detail.get("eventName")
+    if name not in HANDLERS or detail.get("errorCode"):
+        return {"event": name, "ignored": True}
+    event_id = detail.get("eventID") or event["id"]
+    event_time = detail.get("eventTime") or event["time"]
+    logs.bind(correlationId=event_id)
+    if not claim_event(event_id):
+        LOGGER.info("Evento %s (%s) já processado", event_id, name)
+        metrics.put_metric("OrgSyncEvents", Event=name, Result="duplicate")
+        return {"event": name, "duplicate": True}
+
+    try:
+        accounts = {
+            account_id: sync_account(account_id, event_time)
+            for account_id in HANDLERS[name](detail)
+        }
+    except Exception:
+        # Libera o evento para o retry do EventBridge
+        release_event(event_id)
+        raise
+    metrics.put_metric("OrgSyncEvents", Event=name, Result="applied")
+    LOGGER.info("Evento %s aplicado: %s", name, accounts)
+    return {"event": name, "accounts": accounts}
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {"ou_tree": lambda: org_cache.ou_tree(ORG, ORG_LIMITER)}
+warmup.on_init(WARMERS)
@@ -1,17 +1,27 @@
-import logging
 import os
 import boto3
 from datetime import datetime, timezone
+import time
 from time import sleep
-import json
 
+from accfactory import (
+    circuit,
+    errors,
+    logs,
+    orgs,
+    snapshot,
+    throttling,
+    timeline,
+    warmup,
+)
 
-LOGGER = logging.getLogger()
-LOGGER.setLevel(logging.INFO)
+LOGGER = logs.get_logger()
 
 
 dynamo_client = boto3.client("dynamodb")
 SC = boto3.client("servicecatalog")
+SC_LIMITER = throttling.for_service("servicecatalog")
+SC_CIRCUIT = circuit.for_service("servicecatalog")
 # padroniza variável de ambiente
 DYNAMO_TABLE = os.environ.get("DYNAMO_TABLE")
 if not DYNAMO_TABLE:
@@ -20,43 +30,72 @@ PRINCIPAL_ARN = os.environ.get("PRINCIPAL_ARN")
 if not PRINCIPAL_ARN:
     raise RuntimeError("Missing required environment variable PRINCIPAL_ARN")
 SLEEP = 10
+# Ids do produto Account Factory mudam só quando o Control Tower é atualizado
+CATALOG_TTL_SECONDS = int(os.environ.get("CATALOG_TTL_SECONDS", "3600"))
+CATALOG_CACHE = {}  # organização -> {"ids", "loaded_at"}
+# Cada organização (accfactory.orgs) tem o seu Account Factory e o seu circuito
+ORGS = orgs.load()
+SC_CLIENTS = orgs.ClientPool()
 
 
-def get_product_id():
+def service_catalog(org):
+    """``orgs.Access`` ao Service Catalog da organização."""
+    return SC_CLIENTS.access(org, "servicecatalog", (SC, SC_LIMITER))
+
+
+def sc_circuit(org):
+    return (
+        SC_CIRCUIT if org.name == orgs.DEFAULT else orgs.breaker(org, "servicecatalog")
+    )
+
+
+def principal_arn(org):
+    return PRINCIPAL_ARN if org.name == orgs.DEFAULT else org.principal_arn
+
+
+def get_product_id(catalog):
     filters = {"Owner": ["AWS Control Tower"]}
     af_product_name = "AWS Control Tower Account Factory"
     key = "ProductViewSummary"
     try:
-        products = SC.search_products_as_admin(Filters=filters)["ProductViewDetails"]
+        products = catalog.limiter.call(
+            catalog.client.search_products_as_admin, Filters=filters
+        )["ProductViewDetails"]
         for item in products:
             if key in item and item[key]["Name"] == af_product_name:
                 return item[key]["ProductId"]
     except Exception as e:
-        LOGGER.error(f"Erro ao buscar ProductId: {e}")
+        if errors.is_transient(e):
+            raise
+        LOGGER.error("Erro ao buscar ProductId: %s", e)
     return None
 
 
-def get_portfolio_id(prod_id):
+def get_portfolio_id(catalog, prod_id):
     try:
-        portfolios = SC.list_portfolios_for_product(ProductId=prod_id)[
-            "PortfolioDetails"
-        ]
+        portfolios = catalog.limiter.call(
+            catalog.client.list_portfolios_for_product, ProductId=prod_id
+        )["PortfolioDetails"]
         for item in portfolios:
             if item.get("ProviderName") == "AWS Control Tower":
                 return item["Id"]
     except Exception as e:
-        LOGGER.error(f"Erro ao buscar PortfolioId: {e}")
+        if errors.is_transient(e):
+            raise
+        LOGGER.error("Erro ao buscar PortfolioId: %s", e)
     return None
 
 
-def get_provisioning_artifact_id(prod_id):
+def get_provisioning_artifact_id(catalog, prod_id):
     try:
-        artifacts = SC.describe_product_as_admin(Id=prod_id)[
-            "ProvisioningArtifactSummaries"
-        ]
+        artifacts = catalog.limiter.call(
+            catalog.client.describe_product_as_admin, Id=prod_id
+        )["ProvisioningArtifactSummaries"]
         return artifacts[-1]["Id"] if artifacts else None
     except Exception as e:
-        LOGGER.error(f"Erro ao buscar ProvisioningArtifactId: {e}")
+        if errors.is_transient(e):
+            raise
+        LOGGER.error("Erro ao buscar ProvisioningArtifactId: %s", e)
     return None
 
 
@@ -78,15 +117,19 @@ def generate_provisioned_product_name(params):
     return "AccountLaunch-Unknown"
 
 
-def list_principals_in_portfolio(port_id):
+def list_principals_in_portfolio(catalog, port_id):
     """List all prinicpals associated with a portfolio"""
 
     pri_info = list()
     pri_list = list()
 
     try:
-        sc_paginator = SC.get_paginator("list_principals_for_portfolio")
-        sc_page_iterator = sc_paginator.paginate(PortfolioId=port_id)
+        sc_page_iterator = catalog.limiter.paginate(
+            catalog.client.list_principals_for_portfolio,
+            token_key="PageToken",
+            next_token_key="NextPageToken",
+            PortfolioId=port_id,
+        )
     except Exception as exe:
         LOGGER.error("Unable to get prinicpals list: %s", str(exe))
 
@@ -99,16 +142,19 @@ def list_principals_in_portfolio(port_id):
     return pri_info
 
 
-def associate_principal_portfolio(principal, port_id):
+def associate_principal_portfolio(catalog, principal, port_id):
     """Associate a pricipal to portfolio if doesn't exist"""
 
     result = True
-    pri_list = list_principals_in_portfolio(port_id)
+    pri_list = list_principals_in_portfolio(catalog, port_id)
 
     if principal not in pri_list:
         try:
-            result = SC.associate_principal_with_portfolio(
-                PortfolioId=port_id, PrincipalARN=principal, PrincipalType="IAM"
+            result = catalog.limiter.call(
+                catalog.client.associate_principal_with_portfolio,
+                PortfolioId=port_id,
+                PrincipalARN=principal,
+                PrincipalType="IAM",
             )
             LOGGER.info(
                 "Associated %s to %s. Sleeping %s sec", principal, port_id, SLEEP
@@ -121,15 +167,48 @@ def associate_principal_portfolio(principal, port_id):
     return result
 
 
-def get_pp_status(pp_id):
+def get_pp_status(catalog, pp_id):
     try:
-        result = SC.describe_provisioned_product(Id=pp_id)["ProvisionedProductDetail"]
+        result = catalog.limiter.call(
+            catalog.client.describe_provisioned_product, Id=pp_id
+        )["ProvisionedProductDetail"]
         return result["Status"], result.get("StatusMessage", "")
     except Exception as e:
-        LOGGER.error(f"Erro ao verificar status do produto provisionado: {e}")
+        if errors.is_transient(e):
+            raise
+        LOGGER.error("Erro ao verificar status do produto provisionado: %s", e)
         return "ERROR", str(e)
 
 
+def catalog_ids(org=None):
+    """(ProductId, PortfolioId, ProvisioningArtifactId) em cache no container.
+
+    Só cacheia quando todos os ids foram encontrados; a associação do principal
+    ao portfolio é feita na mesma carga. Um cache por organização.
+    """
+    org = org or ORGS[orgs.DEFAULT]
+    cached = CATALOG_CACHE.get(org.name)
+    if cached and time.time() - cached["loaded_at"] < CATALOG_TTL_SECONDS:
+        return cached["ids"]
+    # Container reiniciado no mesmo ambiente: a associação já foi feita na carga
+    name = orgs.scoped("catalog_ids", org)
+    stored = snapshot.load(name, CATALOG_TTL_SECONDS, time.time(), tuple)
+    if stored:
+        CATALOG_CACHE[org.name] = {"ids": stored[0], "loaded_at": stored[1]}
+        return stored[0]
+
+    catalog = service_catalog(org)
+    product_id = get_product_id(catalog)
+    port_id = get_portfolio_id(catalog, product_id)
+    associate_principal_portfolio(catalog, principal_arn(org), port_id)
+    artifact_id = get_provisioning_artifact_id(catalog, product_id)
+    ids = (product_id, port_id, artifact_id)
+    if all(ids):
+        CATALOG_CACHE[org.name] = {"ids": ids, "loaded_at": time.time()}
+        snapshot.save(name, list(ids), CATALOG_CACHE[org.name]["loaded_at"])
+    return ids
+
+
 def format_dynamo_value(value):
     if isinstance(value, bool):
         return {"BOOL": value}
@@ -149,7 +228,9 @@ def update_dynamodb_fields_with_timestamp(
     for i, (field, value) in enumerate(update_fields.items()):
         placeholder_name = f"#f{i}"
         placeholder_value = f":v{i}"
-        update_expression_parts.append(f"{placeholder_name} = {placeholder_value}")
+        update_expression_parts.append(
+            timeline.assignment(field, placeholder_name, placeholder_value)
+        )
         expression_attribute_names[placeholder_name] = field
         expression_attribute_values[placeholder_value] = format_dynamo_value(value)
 
@@ -168,7 +249,10 @@ def update_dynamodb_fields_with_timestamp(
     )
 
 
+@logs.handler
 def lambda_handler(event, context):
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
 
     class ProvisionErrorWithData(Exception):
         def __init__(self, message, account_email):
@@ -177,17 +261,20 @@ def lambda_handler(event, context):
 
     try:
 
-        LOGGER.info(f"Event: {event}")
+        logs.debug_payload(LOGGER, "Event", event)
         item = event
-
-        product_id = get_product_id()
-        LOGGER.info(f"ProductId: {product_id}")
-        port_id = get_portfolio_id(product_id)
-        LOGGER.info(f"PortfolioId: {port_id}")
-        associate_principal_portfolio(PRINCIPAL_ARN, port_id)
-        LOGGER.info(f"Associado principal {PRINCIPAL_ARN} ao portfolio {port_id}")
-        artifact_id = get_provisioning_artifact_id(product_id)
-        LOGGER.info(f"ProvisioningArtifactId: {artifact_id}")
+        org = orgs.of(ORGS, item)
+        catalog = service_catalog(org)
+        breaker = sc_circuit(org)
+        principal = principal_arn(org)
+
+        product_id, port_id, artifact_id = catalog_ids(org)
+        LOGGER.info(
+            "ProductId: %s, PortfolioId: %s, ProvisioningArtifactId: %s",
+            product_id,
+            port_id,
+            artifact_id,
+        )
 
         if not product_id or not artifact_id:
             raise ProvisionErrorWithData(
@@ -196,26 +283,53 @@ def lambda_handler(event, context):
             )
 
         input_params = generate_input_params(item)
-        LOGGER.info(f"InputParams: {input_params}")
+        logs.debug_payload(LOGGER, "InputParams", input_params)
         prov_prod_name = generate_provisioned_product_name(input_params)
-        LOGGER.info(f"ProvisionedProductName: {prov_prod_name}")
-        request_id = item["RequestID"]
-
-        response = SC.provision_product(
-            ProductId=product_id,
-            ProvisioningArtifactId=artifact_id,
-            ProvisionedProductName=prov_prod_name,
-            ProvisioningParameters=input_params,
-            ProvisionToken=str(request_id),
-        )
-        LOGGER.info(f"ProvisionProductResponse: {response}")
+        request_id = str(item["RequestID"])
+        # Retry no lugar reaproveita o token (provision_product idempotente); uma
+        # nova tentativa após conflito do Control Tower gera outro produto.
+        attempt = int(item.get("ProvisionAttempt", 0)) + 1
+        item["ProvisionAttempt"] = attempt
+        item.pop("Error", None)
+        if attempt > 1:
+            request_id = f"{request_id}-{attempt}"
+            prov_prod_name = f"{prov_prod_name}-{attempt}"
+
+        try:
+            response = catalog.limiter.call(
+                catalog.client.provision_product,
+                ProductId=product_id,
+                ProvisioningArtifactId=artifact_id,
+                ProvisionedProductName=prov_prod_name,
+                ProvisioningParameters=input_params,
+                ProvisionToken=request_id,
+            )
+        except Exception as e:
+            if errors.is_transient(e):
+                breaker.record_failure()
+            raise
+        logs.debug_payload(LOGGER, "ProvisionProductResponse", response)
         pp_id = response["RecordDetail"]["ProvisionedProductId"]
-        LOGGER.info(f"ProvisionedProductId: {pp_id}")
-        status, message = get_pp_status(pp_id)
-        LOGGER.info(f"Status: {status}, Message: {message}")
+        status, message = get_pp_status(catalog, pp_id)
+        LOGGER.info(
+            "ProvisionedProduct %s (%s): Status: %s, Message: %s",
+            prov_prod_name,
+            pp_id,
+            status,
+            message,
+        )
 
         if status == "UNDER_CHANGE":
             status = "IN_PROCESSING"
+        elif status == "ERROR" and errors.is_transient_message(message):
+            # Conflito do Control Tower: o CheckAccountStatus devolve o pedido
+            # para uma nova tentativa (o registro não é marcado como falha).
+            status = "RETRYING"
+        if status == "ERROR":
+            # Só aqui: esse ERROR encerra a execução sem passar pelo
+            # CheckAccountStatus, que registra os demais resultados (RETRYING
+            # inclusive) no circuito.
+            breaker.record_failure()
 
         item["Provisioning"] = True
         item["ProvisionedProductId"] = pp_id
@@ -224,7 +338,7 @@ def lambda_handler(event, context):
         item["Status"] = status
         item["ProductID"] = product_id
         item["ProvisioningArtifactID"] = artifact_id
-        item["PRINCIPAL_ARN"] = PRINCIPAL_ARN
+        item["PRINCIPAL_ARN"] = principal
         item["PortfolioID"] = port_id
 
         if status == "ERROR":
@@ -239,8 +353,10 @@ def lambda_handler(event, context):
             "ProvisionedProductName": prov_prod_name,
             "ProductID": product_id,
             "ProvisioningArtifactID": artifact_id,
-            "PRINCIPAL_ARN": PRINCIPAL_ARN,
+            "PRINCIPAL_ARN": principal,
             "PortfolioID": port_id,
+            "ProvisionAttempt": attempt,
+            timeline.PROVISION_SUBMITTED: timeline.now_iso(),
         }
 
         response_dynomodb = update_dynamodb_fields_with_timestamp(
@@ -251,18 +367,17 @@ def lambda_handler(event, context):
             update_fields,
         )
 
-        LOGGER.info(f"Response DynamoDB: {response_dynomodb}")
-        LOGGER.info("Status atualizado para IN_PROCESSING")
+        logs.debug_payload(LOGGER, "Response DynamoDB", response_dynomodb)
+        LOGGER.info("Status atualizado para %s", status)
 
         return item
 
     except Exception as e:
-        raise Exception(
-            json.dumps(
-                {
-                    "errorType": "ProvisionError",
-                    "errorMessage": str(e),
-                    "account_email": item.get("AccountEmail", "desconhecido"),
-                }
-            )
+        raise errors.task_error(
+            e, "ProvisionError", item.get("AccountEmail", "desconhecido")
         )
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {"catalog_ids": catalog_ids}
+warmup.on_init(WARMERS)
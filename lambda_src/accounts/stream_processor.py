@@ -0,0 +1,69 @@
+import os
+
+import boto3
+
+from accfactory import aggregates, logs, metrics, search_index, warmup, webhooks
+
+LOGGER = logs.get_logger()
+
+DYNO = boto3.client("dynamodb")
+DYNAMO_TABLE = os.environ.get("DYNAMO_TABLE")
+if not DYNAMO_TABLE:
+    raise RuntimeError("Missing required environment variable DYNAMO_TABLE")
+CONTROL_TABLE = os.environ.get("CONTROL_TABLE")
+if not CONTROL_TABLE:
+    raise RuntimeError("Missing required environment variable CONTROL_TABLE")
+
+# Um único consumer do stream da tabela de contas (além do trigger_sfn) que
+# repassa cada lote para as visões materializadas. Novas visões entram aqui em
+# vez de ganhar um event source mapping próprio (o stream admite ~2 leitores).
+CONSUMERS = [
+    ("aggregates", aggregates.apply_records),
+    ("search_index", search_index.apply_records),
+    # Só repassa os eventos: a entrega HTTP roda na Lambda notify_webhooks
+    ("webhooks", webhooks.apply_records),
+]
+REBUILDERS = {
+    "aggregates": aggregates.rebuild,
+    "search_index": search_index.rebuild,
+}
+
+
+@logs.handler
+def lambda_handler(event, context):
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+
+    if event.get("rebuild"):
+        # {"rebuild": true} reconstrói todas as visões; ou uma lista de nomes.
+        targets = event["rebuild"]
+        if not isinstance(targets, list):
+            targets = list(REBUILDERS)
+        LOGGER.info("Reconstruindo %s a partir de %s", targets, DYNAMO_TABLE)
+        return {
+            name: REBUILDERS[name](DYNO, DYNAMO_TABLE, CONTROL_TABLE)
+            for name in targets
+        }
+
+    records = event.get("Records", [])
+    results = {}
+    for name, consumer in CONSUMERS:
+        try:
+            results[name] = consumer(DYNO, CONTROL_TABLE, records)
+        except Exception as e:
+            # Não relança: um retry do lote reaplicaria os demais consumers.
+            LOGGER.error("Falha no consumer %s: %s", name, e)
+            metrics.put_metric("StreamConsumerErrors", Consumer=name)
+            results[name] = {"error": str(e)}
+
+    LOGGER.info("Lote processado: %s registros, %s", len(records), results)
+    return results
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {
+    "dynamodb": lambda: DYNO.get_item(
+        TableName=DYNAMO_TABLE, Key={"AccountEmail": {"S": "warmup"}}
+    )
+}
+warmup.on_init(WARMERS)
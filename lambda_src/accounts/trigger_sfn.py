@@ -1,20 +1,190 @@
 import json
 import boto3
 import os
-import logging
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+from accfactory import batch, circuit, logs, metrics, orgs, timeline, warmup
+from accfactory.export import plain
+
+logger = logs.get_logger()
 
 SFN_ARN = os.environ["SFN_ARN"]
 sfn_client = boto3.client("stepfunctions")
+dynamo_client = boto3.client("dynamodb")
+DYNAMO_TABLE = os.environ.get("DYNAMO_TABLE")
+CONTROL_TABLE = os.environ.get("CONTROL_TABLE")
+SC_CIRCUIT = circuit.for_service("servicecatalog")
+# State machine de lote (accfactory.batch): usada quando o lote do stream tem
+# pelo menos BATCH_MIN_SIZE pedidos novos.
+BATCH_SFN_ARN = os.environ.get("BATCH_SFN_ARN")
+BATCH_MIN_SIZE = int(os.environ.get("BATCH_MIN_SIZE", "2"))
+# Pedidos segurados com o circuito aberto (tabela de controle, SK = AccountEmail);
+# cada organização tem o seu circuito e a sua fila (HELD#servicecatalog@<org>)
+HELD_PK = "HELD#servicecatalog"
+# Organizações atendidas (accfactory.orgs): state machine e circuito próprios
+ORGS = orgs.load()
+
+
+def sc_circuit(org):
+    if org.name == orgs.DEFAULT:
+        return SC_CIRCUIT
+    return orgs.breaker(org, "servicecatalog")
+
+
+def held_pk(org):
+    return orgs.scoped(HELD_PK, org)
+
+
+def start_execution(payload):
+    org = orgs.of(ORGS, payload)
+    response = sfn_client.start_execution(
+        stateMachineArn=SFN_ARN if org.name == orgs.DEFAULT else org.sfn_arn,
+        input=json.dumps(payload),
+    )
+    logger.info(
+        "Step Function started para %s: %s",
+        payload.get("AccountEmail"),
+        response["executionArn"],
+    )
+
+    if DYNAMO_TABLE:
+        timeline.mark(
+            dynamo_client,
+            DYNAMO_TABLE,
+            payload["AccountEmail"],
+            timeline.TRIGGERED,
+        )
+
 
+def start_batch(payloads):
+    response = sfn_client.start_execution(
+        stateMachineArn=BATCH_SFN_ARN, input=json.dumps({batch.ITEMS: payloads})
+    )
+    metrics.put_metric("BatchSize", len(payloads))
+    logger.info(
+        "Step Function de lote iniciado com %s contas: %s",
+        len(payloads),
+        response["executionArn"],
+    )
+
+    if DYNAMO_TABLE:
+        for payload in payloads:
+            timeline.mark(
+                dynamo_client,
+                DYNAMO_TABLE,
+                payload["AccountEmail"],
+                timeline.TRIGGERED,
+            )
+
+
+def dispatch(payloads):
+    """Uma execução de lote para o lote do stream ou uma por conta.
+
+    O lote só reúne pedidos da organização local; os das demais organizações
+    vão para a state machine de cada uma.
+    """
+    local = [payload for payload in payloads if not payload.get(orgs.FIELD)]
+    # Na meia-abertura do circuito cada pedido passa pelo allow(): só a sonda sai
+    if (
+        BATCH_SFN_ARN
+        and len(local) >= BATCH_MIN_SIZE
+        and SC_CIRCUIT.state().state == circuit.CLOSED
+    ):
+        start_batch(local)
+        payloads = [payload for payload in payloads if payload.get(orgs.FIELD)]
+    for payload in payloads:
+        try:
+            org = orgs.of(ORGS, payload)
+            # Control Tower saturado: segura o pedido em vez de gastar uma execução
+            if not sc_circuit(org).allow():
+                hold(payload, org)
+                continue
+            start_execution(payload)
+        except Exception as e:
+            logger.error("Error starting Step Function: %s", e)
 
+
+def hold(payload, org):
+    """Guarda o pedido até o circuito do Service Catalog liberar novos envios."""
+    breaker = sc_circuit(org)
+    dynamo_client.put_item(
+        TableName=CONTROL_TABLE,
+        Item={
+            "PK": {"S": held_pk(org)},
+            "SK": {"S": payload["AccountEmail"]},
+            "Payload": {"S": json.dumps(payload)},
+            "HeldAt": {"S": timeline.now_iso()},
+        },
+    )
+    metrics.put_metric("DispatchesHeld", Circuit=breaker.name)
+    logger.warning(
+        "Circuito %s aberto: pedido %s segurado",
+        breaker.name,
+        payload["AccountEmail"],
+    )
+
+
+def release_held():
+    """Despacha os pedidos segurados de cada organização."""
+    released = remaining = 0
+    for org in ORGS.values():
+        result = release_org(org)
+        released += result["released"]
+        remaining += result["held"]
+    return {"released": released, "held": remaining}
+
+
+def release_org(org):
+    """Despacha os pedidos segurados, por ordem de chegada, enquanto o circuito permitir."""
+    breaker = sc_circuit(org)
+    kwargs = {
+        "TableName": CONTROL_TABLE,
+        "KeyConditionExpression": "PK = :pk",
+        "ExpressionAttributeValues": {":pk": {"S": held_pk(org)}},
+    }
+    held = []
+    while True:
+        response = dynamo_client.query(**kwargs)
+        held.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    held.sort(key=lambda item: item["HeldAt"]["S"])
+
+    released = 0
+    for item in held:
+        # Na meia-abertura só a primeira chamada ganha a sonda
+        if not breaker.allow():
+            break
+        start_execution(json.loads(item["Payload"]["S"]))
+        dynamo_client.delete_item(
+            TableName=CONTROL_TABLE, Key={"PK": item["PK"], "SK": item["SK"]}
+        )
+        released += 1
+
+    remaining = len(held) - released
+    metrics.put_metric("HeldDispatches", remaining, Circuit=breaker.name)
+    logger.info("Pedidos liberados: %s, ainda segurados: %s", released, remaining)
+    return {"released": released, "held": remaining}
+
+
+@logs.handler
 def lambda_handler(event, context):
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+    if event.get("release"):
+        return release_held()
+
+    payloads = []
     for record in event.get("Records", []):
         try:
-            # Confirma que é insert e status é Requested
-            if record["eventName"] != "INSERT":
+            # Pedido novo (INSERT) ou novo POST sobre um registro FAILED (MODIFY)
+            event_name = record["eventName"]
+            old_status = (
+                record["dynamodb"].get("OldImage", {}).get("Status", {}).get("S")
+            )
+            if event_name == "REMOVE" or (
+                event_name == "MODIFY" and old_status != "FAILED"
+            ):
                 continue
 
             new_image = record["dynamodb"]["NewImage"]
@@ -22,16 +192,29 @@ def lambda_handler(event, context):
             if status != "Requested":
                 continue
 
-            # Monta payload para Step Function
-            payload = {k: list(v.values())[0] for k, v in new_image.items()}
-            logger.info(f"Starting Step Function with payload: {payload}")
-
-            response = sfn_client.start_execution(
-                stateMachineArn=SFN_ARN, input=json.dumps(payload)
-            )
-            logger.info(f"Step Function started: {response['executionArn']}")
+            # Monta payload para Step Function (Tags é lista de mapas: o
+            # AttributeValue é convertido inteiro, não só o primeiro nível)
+            payload = {k: plain(v) for k, v in new_image.items()}
+            logs.debug_payload(logger, "Starting Step Function with payload", payload)
+            payloads.append(payload)
 
         except Exception as e:
-            logger.error(f"Error processing record: {e}")
+            logger.error("Error processing record: %s", e)
+
+    try:
+        dispatch(payloads)
+    except Exception as e:
+        logger.error("Error starting batch Step Function: %s", e)
 
     return {"Status": "processed"}
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {}
+if DYNAMO_TABLE:
+    WARMERS["dynamodb"] = lambda: dynamo_client.get_item(
+        TableName=DYNAMO_TABLE, Key={"AccountEmail": {"S": "warmup"}}
+    )
+if CONTROL_TABLE:
+    WARMERS["circuit"] = lambda: SC_CIRCUIT.state()
+warmup.on_init(WARMERS)
@@ -1,45 +1,124 @@
 import json
-import logging
 import os
 
 import boto3
+from botocore.exceptions import ClientError
 
-LOGGER = logging.getLogger()
-LOGGER.setLevel(logging.INFO)
+from accfactory import batch, logs, pool, timeline, warmup
+
+LOGGER = logs.get_logger()
 
 DYNO = boto3.client("dynamodb")
 DYNAMO_TABLE = os.environ.get("DYNAMO_TABLE")
 if not DYNAMO_TABLE:
     raise RuntimeError("Missing required environment variable DYNAMO_TABLE")
+CONTROL_TABLE = os.environ.get("CONTROL_TABLE")
 
 
-def lambda_handler(event, context):
+def mark_failed(event):
     try:
-        account_email = None
+        account_email = event.get("AccountEmail")
         error_message_str = "{}"
+        error_data = {}
 
         if "Error" in event:
             validate_error = event.get("Error", {})
             cause_str = validate_error.get("Cause", "{}")
             cause_obj = json.loads(cause_str)
             error_message_str = cause_obj.get("errorMessage", "{}")
-            error_data = json.loads(error_message_str)
-            account_email = error_data.get("account_email", "desconhecido")
-            LOGGER.info(f"Email: {account_email} extraído do erro.")
+            try:
+                error_data = json.loads(error_message_str)
+            except ValueError:
+                # Erros do próprio Step Function/Lambda (timeout, etc.) não têm JSON
+                error_data = {"errorMessage": error_message_str}
+            account_email = error_data.get("account_email") or account_email
+            LOGGER.info("Email: %s extraído do erro.", account_email)
 
-        DYNO.delete_item(
-            TableName=DYNAMO_TABLE,
-            Key={"AccountEmail": {"S": account_email}},
-        )
+        if not account_email or account_email == "desconhecido":
+            LOGGER.error("Falha sem AccountEmail identificável: %s", error_message_str)
+            return {"Success": "False", "errorMessage": error_message_str}
+
+        # O registro é mantido com o erro: o cliente consulta o motivo e pode
+        # reenviar o POST (permitido sobre registros FAILED).
+        error_type = error_data.get("errorType") or event.get("Error", {}).get("Error")
+        now = timeline.now_iso()
+        try:
+            DYNO.update_item(
+                TableName=DYNAMO_TABLE,
+                Key={"AccountEmail": {"S": account_email}},
+                UpdateExpression=(
+                    "SET #status = :failed, ErrorMessage = :message, "
+                    "ErrorType = :type, FailedAt = :now, UpdatedAt = :now, "
+                    "LastUpdateDate = :now"
+                ),
+                # Nunca rebaixa uma conta já ativa (ex.: execução repetida)
+                ConditionExpression="attribute_exists(AccountEmail) AND #status <> :active",
+                ExpressionAttributeNames={"#status": "Status"},
+                ExpressionAttributeValues={
+                    ":failed": {"S": "FAILED"},
+                    ":active": {"S": "ACTIVE"},
+                    ":message": {
+                        "S": str(error_data.get("errorMessage", error_message_str))
+                    },
+                    ":type": {"S": str(error_type or "Unknown")},
+                    ":now": {"S": now},
+                },
+            )
+        except ClientError as error:
+            if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            LOGGER.warning("Registro %s ausente ou já ativo; mantido.", account_email)
+        if event.get("Pooled") and CONTROL_TABLE:
+            # Reposição do pool que falhou: sai do pool (a próxima reposição cria outra)
+            pool.drop(DYNO, CONTROL_TABLE, account_email)
         LOGGER.warning(
-            f"Falha na criação da conta {account_email}. Item removido do DynamoDB."
+            "Falha na criação da conta %s. Registro marcado como FAILED.",
+            account_email,
         )
         return {
             "Success": "False",
             "account_email": account_email,
             "errorMessage": error_message_str,
-            "Status": "Resquest_removed",
+            "Status": "FAILED",
         }
     except Exception as e:
-        LOGGER.error(f"Erro no UpdateFailedStatusLambda: {e}")
+        LOGGER.error("Erro no UpdateFailedStatusLambda: %s", e)
         return {"Success": "False", "error": str(e)}
+
+
+def _batch_failures(event):
+    """Itens do lote que não terminaram com sucesso, com o erro a registrar."""
+    for item in event[batch.ITEMS]:
+        if item.get("Success") == "True":
+            continue
+        if not batch.failed(item):
+            # Falha da task do lote inteiro (BatchError) ou status final inesperado
+            item["Error"] = event.get("BatchError") or batch.catch_error(
+                RuntimeError(
+                    item.get("message") or f"Status inesperado: {item.get('Status')}"
+                )
+            )
+        yield item
+
+
+@logs.handler
+def lambda_handler(event, context):
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+    if batch.is_batch(event):
+        failures = [mark_failed(item) for item in _batch_failures(event)]
+        return {
+            "Succeeded": len(event[batch.ITEMS]) - len(failures),
+            "Failed": len(failures),
+            "FailedAccounts": [item.get("account_email") for item in failures],
+        }
+    return mark_failed(event)
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {
+    "dynamodb": lambda: DYNO.get_item(
+        TableName=DYNAMO_TABLE, Key={"AccountEmail": {"S": "warmup"}}
+    )
+}
+warmup.on_init(WARMERS)
@@ -1,10 +1,10 @@
-import logging
 import os
 import boto3
 from datetime import datetime, timezone
 
-LOGGER = logging.getLogger()
-LOGGER.setLevel(logging.INFO)
+from accfactory import batch, logs, orgs, pool, timeline, warmup
+
+LOGGER = logs.get_logger()
 
 sevicecatalog_client = boto3.client("servicecatalog")
 dynamo_client = boto3.client("dynamodb")
@@ -12,6 +12,17 @@ dynamo_client = boto3.client("dynamodb")
 DYNAMO_TABLE = os.environ.get("DYNAMO_TABLE")
 if not DYNAMO_TABLE:
     raise RuntimeError("Missing required environment variable DYNAMO_TABLE")
+CONTROL_TABLE = os.environ.get("CONTROL_TABLE")
+# O produto provisionado fica no Service Catalog da organização do pedido
+ORGS = orgs.load()
+SC_CLIENTS = orgs.ClientPool()
+
+
+def servicecatalog_for(item):
+    org = orgs.of(ORGS, item)
+    if org.name == orgs.DEFAULT:
+        return sevicecatalog_client
+    return SC_CLIENTS.client(org, "servicecatalog")
 
 
 def get_account_id(servicecatalog_client, pp_id):
@@ -26,10 +37,12 @@ def get_account_id(servicecatalog_client, pp_id):
         for output in outputs:
             if output.get("OutputKey") == "AccountId":
                 return output.get("OutputValue")
-        LOGGER.warning(f"Output 'AccountId' não encontrado para {pp_id}.")
+        LOGGER.warning("Output 'AccountId' não encontrado para %s.", pp_id)
     except Exception as e:
         LOGGER.error(
-            f"Erro ao buscar AccountId via get_provisioned_product_outputs para {pp_id}: {e}"
+            "Erro ao buscar AccountId via get_provisioned_product_outputs para %s: %s",
+            pp_id,
+            e,
         )
     return None
 
@@ -53,7 +66,9 @@ def update_dynamodb_fields_with_timestamp(
     for i, (field, value) in enumerate(update_fields.items()):
         placeholder_name = f"#f{i}"
         placeholder_value = f":v{i}"
-        update_expression_parts.append(f"{placeholder_name} = {placeholder_value}")
+        update_expression_parts.append(
+            timeline.assignment(field, placeholder_name, placeholder_value)
+        )
         expression_attribute_names[placeholder_name] = field
         expression_attribute_values[placeholder_value] = format_dynamo_value(value)
 
@@ -72,14 +87,13 @@ def update_dynamodb_fields_with_timestamp(
     )
 
 
-def lambda_handler(event, context):
-
+def mark_succeeded(event):
     try:
         # Pega o item com AccountEmail e AccountId
         item = event
         account_email = item.get("AccountEmail")
         pp_id = item.get("ProvisionedProductId")
-        account_id = get_account_id(sevicecatalog_client, pp_id)
+        account_id = get_account_id(servicecatalog_for(item), pp_id)
 
         if not account_id:
             update_fields = {
@@ -98,21 +112,46 @@ def lambda_handler(event, context):
             )
 
         LOGGER.info(
-            f"AccountId {account_id} encontrado para ProvisionedProductId {pp_id}"
+            "AccountId %s encontrado para ProvisionedProductId %s", account_id, pp_id
         )
-        # Atualiza DynamoDB como Provisioned
-        update_fields = {
-            "Status": "ACTIVE",
-            "AccountId": account_id,
-        }
+        # Reposição do pool: a conta fica disponível (Pooled) em vez de ativa
+        pooled = bool(item.get("Pooled")) and bool(CONTROL_TABLE)
+        status = pool.POOLED if pooled else "ACTIVE"
+        update_fields = {"Status": status, "AccountId": account_id}
+        if not pooled:
+            update_fields[timeline.ACTIVATED] = timeline.now_iso()
         update_dynamodb_fields_with_timestamp(
             dynamo_client, DYNAMO_TABLE, "AccountEmail", account_email, update_fields
         )
-        LOGGER.info(f"Conta {account_email} atualizada para ACTIVE no DynamoDB.")
+        if pooled:
+            pool.mark_ready(dynamo_client, CONTROL_TABLE, account_email, account_id)
+        LOGGER.info("Conta %s atualizada para %s no DynamoDB.", account_email, status)
         item["AccountId"] = account_id
-        item["Status"] = "ACTIVE"
+        item["Status"] = status
         item["Success"] = "True"
         return item
     except Exception as e:
-        LOGGER.error(f"Erro no UpdateStatusLambda: {e}")
+        LOGGER.error("Erro no UpdateStatusLambda: %s", e)
         return {"Success": "False", "message": str(e)}
+
+
+@logs.handler
+def lambda_handler(event, context):
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+    if batch.is_batch(event):
+        return batch.run(
+            mark_succeeded,
+            event,
+            select=lambda item: item.get("Status") in batch.SUCCEEDED,
+        )
+    return mark_succeeded(event)
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {
+    "dynamodb": lambda: dynamo_client.get_item(
+        TableName=DYNAMO_TABLE, Key={"AccountEmail": {"S": "warmup"}}
+    )
+}
+warmup.on_init(WARMERS)
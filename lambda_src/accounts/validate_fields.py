@@ -1,67 +1,67 @@
-import logging
-import re
 import boto3
 import os
 import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from accfactory import (
+    batch,
+    errors,
+    logs,
+    metrics,
+    org_cache,
+    orgs,
+    throttling,
+    timeline,
+    validation,
+    warmup,
+)
 
 
 # ---------------- Logging ----------------
-LOGGER = logging.getLogger()
-LOGGER.setLevel(logging.INFO)
+LOGGER = logs.get_logger()
 
 # ---------------- Clients AWS ----------------
 ORG = boto3.client("organizations")
 DYNO = boto3.client("dynamodb")
+ORG_LIMITER = throttling.for_service("organizations")
+# Demais organizações (accfactory.orgs): o pedido é checado na de destino
+ORGS = orgs.load()
+ORG_CLIENTS = orgs.ClientPool()
 # padroniza variável de ambiente para o nome da tabela
 DYNAMO_TABLE = os.environ.get("DYNAMO_TABLE")
 if not DYNAMO_TABLE:
     raise RuntimeError("Missing required environment variable DYNAMO_TABLE")
 
 # ---------------- Configuração ----------------
-REQUIRED_FIELDS = [
-    "AccountName",
-    "AccountEmail",
-    "OrgUnit",
-    "SSOUserEmail",
-    "SSOUserFirstName",
-    "SSOUserLastName",
-    "RequestID",
-]
-
-EMAIL_REGEX = r"^[\w\.-]+@[\w\.-]+\.\w+$"
+# Campos e normalização vêm de accfactory.validation (as mesmas regras da API)
+WORKFLOW_FIELDS = ("RequestID",)
 
 
 # ---------------- Funções auxiliares ----------------
-def is_valid_email(email):
-    return re.match(EMAIL_REGEX, email) is not None
-
-
-def normalize_item(item):
-    """Coloca AccountEmail, SSOUserEmail e AccountName em lowercase e first letter maiúscula para nomes"""
-    item["AccountEmail"] = item["AccountEmail"].lower()
-    item["SSOUserEmail"] = item["SSOUserEmail"].lower()
-    item["AccountName"] = item["AccountName"].lower()
-    item["SSOUserFirstName"] = item["SSOUserFirstName"].capitalize()
-    item["SSOUserLastName"] = item["SSOUserLastName"].capitalize()
-    return item
-
-
-def check_existing_account(account_name, account_email):
-    """Verifica se já existe na AWS Organizations"""
+def check_existing_account(account_name, account_email, org=None):
+    """Verifica se já existe na AWS Organizations (índice de contas em cache)"""
     try:
-        paginator = ORG.get_paginator("list_accounts")
-        for page in paginator.paginate():
-            for acct in page["Accounts"]:
-                if (
-                    acct["Name"].lower() == account_name
-                    or acct["Email"].lower() == account_email
-                ):
-                    LOGGER.info(
-                        f"Conta já existe na Organizations: {account_name} / {account_email}"
-                    )
-                    return True
+        item = {"AccountName": account_name, "AccountEmail": account_email}
+        access = ORG_CLIENTS.access(
+            org or ORGS[orgs.DEFAULT], "organizations", (ORG, ORG_LIMITER)
+        )
+        if validation.exists_in_organizations(
+            access.client, access.limiter, item, scope=access.scope
+        ):
+            LOGGER.info(
+                "Conta já existe na Organizations: %s / %s",
+                account_name,
+                account_email,
+            )
+            return True
+    except throttling.ThrottledError:
+        # Sem resposta do Organizations não é possível afirmar que a conta não existe
+        raise
     except Exception as e:
-        LOGGER.error(f"Erro ao consultar AWS Organizations: {e}")
+        if errors.is_transient(e):
+            raise
+        LOGGER.error("Erro ao consultar AWS Organizations: %s", e)
     return False
 
 
@@ -75,14 +75,76 @@ def already_processed(account_email):
         status = item.get("Status", {}).get("S")
         if status and status != "Requested":
             LOGGER.info(
-                f"Item já processado ou em andamento: {account_email} com status {status}"
+                "Item já processado ou em andamento: %s com status %s",
+                account_email,
+                status,
             )
             return True
     except Exception as e:
-        LOGGER.error(f"Erro ao verificar duplicidade no DynamoDB: {e}")
+        if errors.is_transient(e):
+            raise
+        LOGGER.error("Erro ao verificar duplicidade no DynamoDB: %s", e)
     return False
 
 
+# ---------------- Checagens concorrentes ----------------
+# Checagens independentes entre si: (nome, função(item) -> True se falhou, erro)
+CHECKS = [
+    (
+        "organizations",
+        lambda item: check_existing_account(
+            item["AccountName"], item["AccountEmail"], orgs.of(ORGS, item)
+        ),
+        "AccountName ou AccountEmail já existem na Organizations",
+    ),
+    (
+        "dynamodb",
+        lambda item: already_processed(item["AccountEmail"]),
+        "Item já foi processado ou está em andamento",
+    ),
+]
+
+# Reaproveitado entre invocações do mesmo container (clients boto3 são thread-safe)
+EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="check")
+
+
+def _timed_check(name, check, item):
+    start = time.perf_counter()
+    try:
+        return check(item)
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        LOGGER.info("Checagem %s concluída em %.0f ms", name, elapsed_ms)
+        metrics.put_metric(
+            "ValidationCheckLatency", round(elapsed_ms, 1), "Milliseconds", Check=name
+        )
+
+
+def run_checks(item, checks=None):
+    """Executa as checagens em paralelo e retorna o erro da primeira que falhar.
+
+    Não espera as demais quando uma falha (short-circuit): as que ainda estão
+    na fila do ``EXECUTOR`` são canceladas, mas uma checagem já em execução não
+    pode ser interrompida e termina em segundo plano (é uma única chamada ou a
+    recarga do índice de contas, que fica no cache para as próximas). Exceções
+    de uma checagem (ex.: ThrottledError) são propagadas para o handler.
+    """
+    pending = {
+        EXECUTOR.submit(_timed_check, name, check, item): message
+        for name, check, message in (checks or CHECKS)
+    }
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            message = pending.pop(future)
+            if future.result():
+                # Só as que ainda não começaram; as demais terminam sozinhas
+                for other in pending:
+                    other.cancel()
+                return message
+    return None
+
+
 # ---------------- Lambda Handler ----------------
 
 
@@ -92,46 +154,29 @@ class ValidationErrorWithData(Exception):
         self.item = {"account_email": account_email or "desconhecido"}
 
 
-def lambda_handler(event, context):
+def validate_item(event):
     item = event
 
     try:
-        # Campos obrigatórios
-        missing_fields = [f for f in REQUIRED_FIELDS if f not in item]
-        if missing_fields:
-            raise ValidationErrorWithData(
-                f"Campos obrigatórios ausentes: {', '.join(missing_fields)}",
-                item.get("AccountEmail", "desconhecido"),
-            )
-
-        # Normaliza
-        item = normalize_item(item)
-
-        # Valida emails
-        if not is_valid_email(item["AccountEmail"]) or not is_valid_email(
-            item["SSOUserEmail"]
-        ):
-            raise ValidationErrorWithData(
-                "Formato de e-mail inválido", item.get("AccountEmail", "desconhecido")
-            )
-
-        # Checa duplicidade na Organizations
-        if check_existing_account(item["AccountName"], item["AccountEmail"]):
+        # Campos, formato e normalização: todos os erros de uma vez
+        item, failures = validation.validate(item, required=WORKFLOW_FIELDS)
+        if failures:
             raise ValidationErrorWithData(
-                "AccountName ou AccountEmail já existem na Organizations",
-                item.get("AccountEmail", "desconhecido"),
+                validation.summary(failures), item.get("AccountEmail", "desconhecido")
             )
 
-        # Checa duplicidade no DynamoDB
-        if already_processed(item["AccountEmail"]):
+        # Duplicidade na Organizations e no DynamoDB, em paralelo
+        failure = run_checks(item)
+        if failure:
             raise ValidationErrorWithData(
-                "Item já foi processado ou está em andamento",
-                item.get("AccountEmail", "desconhecido"),
+                failure, item.get("AccountEmail", "desconhecido")
             )
 
         # Sucesso
-        LOGGER.info(f"Item validado com sucesso: {item}")
+        LOGGER.info("Item validado com sucesso: %s", item["AccountEmail"])
+        logs.debug_payload(LOGGER, "Item validado", item)
         item["Validation"] = True
+        timeline.mark(DYNO, DYNAMO_TABLE, item["AccountEmail"], timeline.VALIDATED)
         return item
 
     except ValidationErrorWithData as e:
@@ -147,13 +192,26 @@ def lambda_handler(event, context):
         )
 
     except Exception as e:
-        # Erros inesperados
-        raise Exception(
-            json.dumps(
-                {
-                    "errorType": "UnexpectedError",
-                    "errorMessage": str(e),
-                    "account_email": item.get("AccountEmail", "desconhecido"),
-                }
-            )
+        # Erros inesperados (transitórios são repetidos pelo Step Function)
+        raise errors.task_error(
+            e, "UnexpectedError", item.get("AccountEmail", "desconhecido")
         )
+
+
+@logs.handler
+def lambda_handler(event, context):
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+    if batch.is_batch(event):
+        return batch.run(validate_item, event)
+    return validate_item(event)
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {
+    "org_account_index": lambda: org_cache.account_index(ORG, ORG_LIMITER),
+    "dynamodb": lambda: DYNO.get_item(
+        TableName=DYNAMO_TABLE, Key={"AccountEmail": {"S": "warmup"}}
+    ),
+}
+warmup.on_init(WARMERS)
@@ -2,42 +2,76 @@ import json
 import boto3
 import os
 import uuid
-import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from botocore.exceptions import ClientError
-from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.conditions import Attr, Key
+
+from accfactory import (
+    admission,
+    aggregates,
+    archive,
+    bulk,
+    circuit,
+    idempotency,
+    logs,
+    org_cache,
+    orgs,
+    pool,
+    responses,
+    search_index,
+    throttling,
+    timeline,
+    validation,
+    warmup,
+    webhooks,
+)
 
 # Logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = logs.get_logger()
 
 # AWS Clients
 sfn_client = boto3.client("stepfunctions")
 dynamodb = boto3.resource("dynamodb")
+dynamo_client = boto3.client("dynamodb")
 org_client = boto3.client("organizations")
+lambda_client = boto3.client("lambda")
+ORG_LIMITER = throttling.for_service("organizations")
+SC_CIRCUIT = circuit.for_service("servicecatalog")
+CALLER_LIMITERS = admission.limiters()
+# Organizações atendidas (accfactory.orgs); a local usa os clients acima
+ORGS = orgs.load()
+ORG_CLIENTS = orgs.ClientPool()
 
 TABLE_NAME = os.environ.get("DYNAMO_TABLE", "accfactory-ddb-accounts")
 if not TABLE_NAME:
     raise RuntimeError("Missing required environment variable DYNAMO_TABLE")
 table = dynamodb.Table(TABLE_NAME)
+# GSIs da tabela de contas: evitam Scan nas buscas por id e por nome
+ACCOUNT_ID_INDEX = os.environ.get("ACCOUNT_ID_INDEX", "AccountIdIndex")
+ACCOUNT_NAME_INDEX = os.environ.get("ACCOUNT_NAME_INDEX", "AccountNameIndex")
+CONTROL_TABLE = os.environ.get("CONTROL_TABLE")
+# Registros terminais antigos ficam na tabela de arquivo (stub na tabela quente)
+ARCHIVE_TABLE = os.environ.get("ARCHIVE_TABLE")
+archive_table = dynamodb.Table(ARCHIVE_TABLE) if ARCHIVE_TABLE else None
 SFN_ARN = os.environ.get("SFN_ARN")
 SFN_MAX_CONCURRENT = int(os.environ.get("SFN_MAX_CONCURRENT", "5"))
-
-
-def format_name(name):
-    """Formata nomes com capitalização"""
-    return " ".join([part.capitalize() for part in name.strip().split()])
+BULK_FUNCTION = os.environ.get("BULK_FUNCTION")
+POOL_FUNCTION = os.environ.get("POOL_FUNCTION")
 
 
-def has_available_capacity():
-    if not SFN_ARN:
+def has_available_capacity(org=None):
+    """Execuções em andamento abaixo de ``SFN_MAX_CONCURRENT`` na state machine
+    da organização (uma por organização: o limite vale para cada landing zone).
+    """
+    sfn_arn = org.sfn_arn if org else SFN_ARN
+    if not sfn_arn:
         return True
     try:
         running = 0
         next_token = None
         while True:
             params = {
-                "stateMachineArn": SFN_ARN,
+                "stateMachineArn": sfn_arn,
                 "statusFilter": "RUNNING",
             }
             if next_token:
@@ -49,67 +83,93 @@ def has_available_capacity():
             next_token = response["nextToken"]
         return running < SFN_MAX_CONCURRENT
     except Exception as exc:
-        logger.error(f"Erro ao verificar execuções do Step Function: {exc}")
+        logger.error("Erro ao verificar execuções do Step Function: %s", exc)
         return True
 
 
+@logs.handler
 def lambda_handler(event, context):
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+
     method = event.get("httpMethod")
-    logger.info(f"HTTP Method: {method}")
-    logger.info(f"Event received: {json.dumps(event)}")
+    resource = event.get("resource") or "/accounts"
+    logger.info("%s %s", method, resource)
+    # Sem o body (string JSON não passa pela redação); ele é logado já parseado.
+    logs.debug_payload(
+        logger,
+        "Event received",
+        lambda: {key: value for key, value in event.items() if key != "body"},
+    )
+
+    # Antes de qualquer chamada: um chamador barulhento não consome o resto
+    rejected = admission.check(event, CALLER_LIMITERS)
+    if rejected:
+        return rejected
+
+    if method == "GET" and resource == "/stats/latency":
+        return get_latency_stats(event.get("queryStringParameters") or {})
+
+    if method == "GET" and resource == "/accounts/search":
+        return search_accounts(
+            event.get("queryStringParameters") or {}, responses.accepts_gzip(event)
+        )
+
+    if method == "GET" and resource == "/stats":
+        return get_stats(event.get("queryStringParameters") or {})
+
+    if method == "GET" and resource == "/accounts/bulk/{jobId}":
+        return get_bulk_job((event.get("pathParameters") or {}).get("jobId"))
+
+    if method == "PATCH" and resource == "/accounts/bulk":
+        try:
+            body = json.loads(responses.request_body(event))
+        except json.JSONDecodeError:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "Invalid JSON format"}),
+            }
+        logs.debug_payload(logger, "Request body", body)
+        return start_bulk_update(body)
 
     if method == "GET":
         params = event.get("queryStringParameters") or {}
         account_email = params.get("accountEmail")
         account_id = params.get("accountId")
-        return get_account(account_email, account_id)
+        try:
+            fields = responses.parse_fields(params.get("fields"))
+        except ValueError as exc:
+            return {"statusCode": 400, "body": json.dumps({"error": str(exc)})}
+        return get_account(
+            account_email, account_id, fields, responses.accepts_gzip(event)
+        )
 
     elif method == "POST":
         try:
-            body = json.loads(event.get("body", "{}"))
+            body = json.loads(responses.request_body(event))
         except json.JSONDecodeError:
             return {
                 "statusCode": 400,
                 "body": json.dumps({"error": "Invalid JSON format"}),
             }
-        if not has_available_capacity():
-            return {
-                "statusCode": 429,
-                "body": json.dumps({"error": "Too many requests in progress"}),
-            }
-
-        # Valida campos obrigatórios
-        required_fields = [
-            "AccountEmail",
-            "AccountName",
-            "OrgUnit",
-            "SSOUserEmail",
-            "SSOUserFirstName",
-            "SSOUserLastName",
-        ]
-        missing = [f for f in required_fields if f not in body or not body[f]]
-        if missing:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": f"Missing fields: {', '.join(missing)}"}),
-            }
-
-        # Formata nomes
-        body["SSOUserFirstName"] = format_name(body["SSOUserFirstName"])
-        body["SSOUserLastName"] = format_name(body["SSOUserLastName"])
-
-        return create_account(body)
+        logs.debug_payload(logger, "Request body", body)
+        idempotency_key = responses.get_header(event, "Idempotency-Key")
+        if idempotency_key and CONTROL_TABLE:
+            return handle_idempotent_post(idempotency_key, body)
+        return handle_post(body)
 
     else:
         return {"statusCode": 405, "body": json.dumps({"error": "Method not allowed"})}
 
 
 # ---------------- GET ----------------
-def get_account(account_email=None, account_id=None):
+def get_account(account_email=None, account_id=None, fields=None, gzip=False):
+    """Busca a conta; ``fields`` vira ``ProjectionExpression`` no DynamoDB."""
     try:
         if account_email:
             response = table.get_item(
-                Key={"AccountEmail": account_email.strip().lower()}
+                Key={"AccountEmail": account_email.strip().lower()},
+                **responses.projection(stub_fields(fields)),
             )
             item = response.get("Item")
             if not item:
@@ -117,17 +177,22 @@ def get_account(account_email=None, account_id=None):
                     "statusCode": 404,
                     "body": json.dumps({"error": "Account not found"}),
                 }
-            return {"statusCode": 200, "body": json.dumps(item)}
+            return responses.json_response(200, read_through(item, fields), gzip)
 
         elif account_id:
-            response = table.scan(FilterExpression=Attr("AccountId").eq(account_id))
+            response = table.query(
+                IndexName=ACCOUNT_ID_INDEX,
+                KeyConditionExpression=Key("AccountId").eq(account_id),
+                Limit=1,
+                **responses.projection(stub_fields(fields)),
+            )
             items = response.get("Items", [])
             if not items:
                 return {
                     "statusCode": 404,
                     "body": json.dumps({"error": "Account not found"}),
                 }
-            return {"statusCode": 200, "body": json.dumps(items[0])}
+            return responses.json_response(200, read_through(items[0], fields), gzip)
 
         else:
             return {
@@ -139,26 +204,292 @@ def get_account(account_email=None, account_id=None):
         return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
 
 
+def stub_fields(fields):
+    """Projeção na tabela quente: chave e marcador identificam um stub."""
+    if not fields or archive_table is None:
+        return fields
+    return list(dict.fromkeys([*fields, "AccountEmail", archive.MARKER]))
+
+
+def read_through(item, fields):
+    """Item pedido no GET; de um stub arquivado, o registro completo do arquivo."""
+    if archive_table is not None and archive.is_stub(item):
+        return archive.read(archive_table, item, **responses.projection(fields))
+    if fields:
+        return {name: value for name, value in item.items() if name in fields}
+    return item
+
+
+# ---------------- Search ----------------
+SEARCH_PROJECTION = ["AccountEmail", "AccountName", "AccountId", "Status", "OrgUnit"]
+
+
+def search_accounts(params, gzip=False):
+    """Busca por prefixo/aproximada em AccountName, AccountEmail e SSOUserEmail."""
+    query = (params.get("q") or "").strip()
+    if len(query) < search_index.PREFIX_MIN:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "Provide q with at least 2 characters"}),
+        }
+    if not CONTROL_TABLE:
+        return {
+            "statusCode": 501,
+            "body": json.dumps({"error": "Search not configured"}),
+        }
+    try:
+        limit = min(int(params.get("limit", 20)), 100)
+    except (TypeError, ValueError):
+        limit = 0
+    if limit < 1:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "limit must be a positive integer"}),
+        }
+    try:
+        ranked = search_index.search(dynamo_client, CONTROL_TABLE, query, limit)
+        items = {}
+        request = None
+        if ranked:
+            request = {
+                TABLE_NAME: {
+                    "Keys": [{"AccountEmail": email} for email, _ in ranked],
+                    # Status é palavra reservada: a projeção usa aliases
+                    **responses.projection(SEARCH_PROJECTION),
+                }
+            }
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response.get("Responses", {}).get(TABLE_NAME, []):
+                items[item["AccountEmail"]] = item
+            request = response.get("UnprocessedKeys") or None
+    except Exception as e:
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+    results = [
+        dict(items[email], Score=round(score, 3))
+        for email, score in ranked
+        if email in items
+    ]
+    return responses.json_response(200, {"query": query, "results": results}, gzip)
+
+
+# ---------------- Stats ----------------
+def get_stats(params):
+    """Contagem de contas por Status/OrgUnit a partir dos contadores materializados."""
+    if not CONTROL_TABLE:
+        return {
+            "statusCode": 501,
+            "body": json.dumps({"error": "Stats not configured"}),
+        }
+    try:
+        counters = aggregates.read_counters(dynamo_client, CONTROL_TABLE)
+    except Exception as e:
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+    return {
+        "statusCode": 200,
+        "body": json.dumps(aggregates.summarize(counters, params.get("orgUnit"))),
+    }
+
+
+def get_latency_stats(params):
+    """Percentis por etapa para os registros criados na janela [from, to]."""
+    end = params.get("to") or datetime.now(timezone.utc).isoformat()
+    start = params.get("from")
+    if not start:
+        start = (datetime.now(timezone.utc) - timedelta(hours=24)).isoformat()
+
+    scan_kwargs = {
+        "FilterExpression": "CreatedAt BETWEEN :start AND :end",
+        "ExpressionAttributeValues": {":start": start, ":end": end},
+        "ProjectionExpression": ", ".join(timeline.STAGES),
+    }
+    items = []
+    try:
+        while True:
+            response = table.scan(**scan_kwargs)
+            items.extend(response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                break
+            scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    except Exception as e:
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps(
+            {"from": start, "to": end, "stages": timeline.summarize(items)}
+        ),
+    }
+
+
 # ---------------- POST ----------------
-def create_account(data):
+def handle_idempotent_post(idempotency_key, body):
+    """Executa o POST no máximo uma vez por ``Idempotency-Key``."""
+    try:
+        state, stored = idempotency.begin(
+            dynamo_client, CONTROL_TABLE, idempotency_key, idempotency.body_hash(body)
+        )
+    except Exception as error:
+        # Sem o marcador não há como garantir execução única: o cliente repete
+        logger.warning("Chave idempotente %s indisponível: %s", idempotency_key, error)
+        return {
+            "statusCode": 503,
+            "headers": {"Retry-After": "1"},
+            "body": json.dumps({"error": "Idempotency store unavailable, retry later"}),
+        }
+    if state == idempotency.REPLAY:
+        stored.setdefault("headers", {})["Idempotent-Replayed"] = "true"
+        return stored
+    if state == idempotency.MISMATCH:
+        return {
+            "statusCode": 422,
+            "body": json.dumps(
+                {"error": "Idempotency-Key already used with a different payload"}
+            ),
+        }
+    if state == idempotency.IN_PROGRESS:
+        return {
+            "statusCode": 409,
+            "headers": {"Retry-After": "1"},
+            "body": json.dumps(
+                {"error": "A request with this Idempotency-Key is in progress"}
+            ),
+        }
+
+    response = {}
+    try:
+        response = handle_post(body)
+        return response
+    finally:
+        # Exceção no POST conta como 5xx: a chave é liberada para o retry
+        idempotency.complete(dynamo_client, CONTROL_TABLE, idempotency_key, response)
+
+
+def provisioning_blocked(org=None):
+    """Resposta 429/503 se o workflow da organização não aceita pedidos agora."""
+    if not has_available_capacity(org):
+        return {
+            "statusCode": 429,
+            "body": json.dumps({"error": "Too many requests in progress"}),
+        }
+    # Control Tower saturado: o cliente volta quando o circuito aceitar uma sonda
+    breaker = sc_circuit(org)
+    if breaker.is_open():
+        return {
+            "statusCode": 503,
+            "headers": {"Retry-After": str(breaker.retry_after())},
+            "body": json.dumps(
+                {"error": "Account provisioning is paused, retry later"}
+            ),
+        }
+    return None
+
+
+def uses_pool(data):
+    # O pool só tem contas da organização local
+    return (
+        bool(POOL_FUNCTION and CONTROL_TABLE)
+        and not data.get(orgs.FIELD)
+        and pool.eligible(data)
+    )
+
+
+def route(body):
+    """Organização do pedido; o nome vai para o registro se não for a local."""
+    org = orgs.route(ORGS, body)
+    if org.name == orgs.DEFAULT:
+        body.pop(orgs.FIELD, None)
+    else:
+        body[orgs.FIELD] = org.name
+    return org
+
+
+def sc_circuit(org):
+    if org is None or org.name == orgs.DEFAULT:
+        return SC_CIRCUIT
+    return orgs.breaker(org, "servicecatalog")
+
+
+def organizations(org):
+    """``orgs.Access`` ao Organizations da organização (None: a local)."""
+    return ORG_CLIENTS.access(
+        org or ORGS[orgs.DEFAULT], "organizations", (org_client, ORG_LIMITER)
+    )
+
+
+def handle_post(body):
+    # Regras do validate_fields antes de qualquer chamada: pedido inválido
+    # não grava registro nem inicia execução
+    if not isinstance(body, dict):
+        body = {}
+    body, errors = validation.validate(body)
+    if errors:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": validation.summary(errors), "errors": errors}),
+        }
+    try:
+        callback = webhooks.parse_callback(body)
+        org = route(body)
+    except ValueError as exc:
+        return {"statusCode": 400, "body": json.dumps({"error": str(exc)})}
+
+    # Pedidos atendidos pelo pool não passam pelo Step Function nem pelo
+    # Service Catalog; os limites são checados só se o pool estiver vazio.
+    if not uses_pool(body):
+        blocked = provisioning_blocked(org)
+        if blocked:
+            return blocked
+
+    try:
+        response = create_account(body, org)
+    except throttling.ThrottledError as exc:
+        return {
+            "statusCode": 503,
+            "headers": {"Retry-After": str(exc.retry_after)},
+            "body": json.dumps({"error": "Organizations throttled, retry later"}),
+        }
+    if callback and response["statusCode"] == 201 and CONTROL_TABLE:
+        # Só depois do 201: um 409 não pode redirecionar os avisos da conta existente
+        created = json.loads(response["body"])
+        try:
+            webhooks.register(
+                dynamo_client, CONTROL_TABLE, created["AccountEmail"], callback
+            )
+        except Exception as exc:
+            # A conta já foi registrada: um 5xx faria o retry do cliente virar 409
+            logger.error(
+                "Callback de %s não registrado: %s", created["AccountEmail"], exc
+            )
+            response["body"] = json.dumps({**created, "CallbackRegistered": False})
+    return response
+
+
+def create_account(data, org=None):
     if not validate_account_name(data["AccountName"]):
         return {
             "statusCode": 409,
             "body": json.dumps({"error": "AccountName already exists"}),
         }
-    if not validate_org_unit(data["OrgUnit"]):
+    if not validate_org_unit(data["OrgUnit"], org):
         return {
             "statusCode": 400,
             "body": json.dumps({"error": f"Invalid OrgUnit: {data['OrgUnit']}"}),
         }
+    if exists_in_organizations(data, org):
+        return {
+            "statusCode": 409,
+            "body": json.dumps({"error": "Account already exists in Organizations"}),
+        }
 
     request_id = str(uuid.uuid4())
     timestamp = datetime.now(timezone.utc).isoformat()
 
     item = {
-        "AccountEmail": data["AccountEmail"].strip().lower(),
-        "AccountName": data["AccountName"].strip(),
-        "SSOUserEmail": data["SSOUserEmail"].strip().lower(),
+        "AccountEmail": data["AccountEmail"],
+        "AccountName": data["AccountName"],
+        "SSOUserEmail": data["SSOUserEmail"],
         "SSOUserFirstName": data["SSOUserFirstName"],
         "SSOUserLastName": data["SSOUserLastName"],
         "OrgUnit": data["OrgUnit"],
@@ -171,10 +502,24 @@ def create_account(data):
 
     if "Tags" in data:
         item["Tags"] = data["Tags"]
+    if orgs.FIELD in data:
+        item[orgs.FIELD] = data[orgs.FIELD]
+
+    if uses_pool(data):
+        claimed = claim_pooled_account(item)
+        if claimed:
+            return claimed
+        blocked = provisioning_blocked(org)
+        if blocked:
+            return blocked
 
     try:
+        # Registros FAILED são mantidos com o erro e podem receber um novo POST
         table.put_item(
-            Item=item, ConditionExpression="attribute_not_exists(AccountEmail)"
+            Item=item,
+            ConditionExpression="attribute_not_exists(AccountEmail) OR #status = :failed",
+            ExpressionAttributeNames={"#status": "Status"},
+            ExpressionAttributeValues={":failed": "FAILED"},
         )
         return {"statusCode": 201, "body": json.dumps(item)}
     except ClientError as e:
@@ -186,57 +531,156 @@ def create_account(data):
         return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
 
 
+def claim_pooled_account(item):
+    """Entrega uma conta do pool; None se o pool estiver vazio."""
+    try:
+        claimed = pool.claim(dynamo_client, CONTROL_TABLE, TABLE_NAME, item)
+    except pool.AccountExists:
+        return {
+            "statusCode": 409,
+            "body": json.dumps({"error": "Account already exists"}),
+        }
+    if not claimed:
+        logger.info("Pool vazio; seguindo com o provisionamento normal")
+        return None
+    try:
+        # Troca de OU, nome, tags e SSO (segundos) + reposição do pool
+        lambda_client.invoke(
+            FunctionName=POOL_FUNCTION,
+            InvocationType="Event",
+            Payload=json.dumps({"claim": item["AccountEmail"]}).encode("utf-8"),
+        )
+    except Exception as e:
+        logger.error(
+            "Falha ao acionar %s para %s: %s", POOL_FUNCTION, item["AccountEmail"], e
+        )
+    return {"statusCode": 201, "body": json.dumps(claimed)}
+
+
+# ---------------- Bulk PATCH ----------------
+def start_bulk_update(body):
+    """Cria o job de atualização em massa e dispara o worker assíncrono."""
+    if not (CONTROL_TABLE and BULK_FUNCTION):
+        return {
+            "statusCode": 501,
+            "body": json.dumps({"error": "Bulk updates are not configured"}),
+        }
+    try:
+        selector, changes = bulk.parse_request(body)
+    except ValueError as exc:
+        return {"statusCode": 400, "body": json.dumps({"error": str(exc)})}
+
+    try:
+        if "OrgUnit" in changes and not validate_org_unit(changes["OrgUnit"]):
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": f"Invalid OrgUnit: {changes['OrgUnit']}"}),
+            }
+    except throttling.ThrottledError as exc:
+        return {
+            "statusCode": 503,
+            "headers": {"Retry-After": str(exc.retry_after)},
+            "body": json.dumps({"error": "Organizations throttled, retry later"}),
+        }
+
+    try:
+        job_id = bulk.create_job(dynamo_client, CONTROL_TABLE, selector, changes)
+        lambda_client.invoke(
+            FunctionName=BULK_FUNCTION,
+            InvocationType="Event",
+            Payload=json.dumps({"jobId": job_id}).encode("utf-8"),
+        )
+    except Exception as e:
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+    logger.info("Job de atualização em massa %s criado", job_id)
+    return {
+        "statusCode": 202,
+        "headers": {"Location": f"/accounts/bulk/{job_id}"},
+        "body": json.dumps({"jobId": job_id, "status": bulk.PENDING}),
+    }
+
+
+def get_bulk_job(job_id):
+    if not (CONTROL_TABLE and job_id):
+        return {"statusCode": 404, "body": json.dumps({"error": "Job not found"})}
+    try:
+        job = bulk.get_job(dynamo_client, CONTROL_TABLE, job_id)
+    except Exception as e:
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+    if not job:
+        return {"statusCode": 404, "body": json.dumps({"error": "Job not found"})}
+    # A lista de alvos pode ter até MAX_TARGETS e-mails: fica só no item.
+    job.pop("Targets", None)
+    return responses.json_response(200, job)
+
+
 # ---------------- Validation ----------------
-def validate_org_unit(ou_path):
+def validate_org_unit(ou_path, org=None):
     """
     Valida se uma OU existe seguindo o caminho especificado (ex: "Engineering/Platform").
     Retorna True se encontrar a OU exata no caminho especificado.
     """
     try:
-        # Pega o root como ponto de partida
-        roots = org_client.list_roots()
-        if not roots.get("Roots"):
-            logger.error("Nenhum root encontrado na organização")
+        # Árvore de OUs em cache no container (recarregada se o caminho não existir)
+        client, limiter, scope = organizations(org)
+        if org_cache.resolve_ou(client, limiter, ou_path, scope=scope) is None:
+            logger.warning("OU não encontrada no caminho: %s", ou_path)
             return False
-
-        current_parent_id = roots["Roots"][0]["Id"]
-        ou_parts = [part.strip() for part in ou_path.split("/") if part.strip()]
-
-        # Para cada parte do caminho (Engineering, depois Platform, etc)
-        for ou_name in ou_parts:
-            found = False
-            paginator = org_client.get_paginator("list_organizational_units_for_parent")
-
-            # Lista OUs do nível atual
-            for page in paginator.paginate(ParentId=current_parent_id):
-                for ou in page["OrganizationalUnits"]:
-                    if ou["Name"].lower() == ou_name.lower():
-                        current_parent_id = ou["Id"]  # Move para próximo nível
-                        found = True
-                        break
-                if found:
-                    break
-
-            # Se não achou alguma parte do caminho, OU não existe
-            if not found:
-                logger.warning(
-                    f"OU não encontrada no caminho: {ou_path} (parou em: {ou_name})"
-                )
-                return False
-
-        # Se chegou aqui, encontrou todo o caminho
         return True
 
+    except throttling.ThrottledError:
+        # Throttling não significa OU inválida: a API responde 503
+        raise
     except Exception as e:
-        logger.error(f"Erro ao validar OU path '{ou_path}': {str(e)}")
+        logger.error("Erro ao validar OU path '%s': %s", ou_path, e)
+        return False
+
+
+def exists_in_organizations(data, org=None):
+    """Mesma checagem do validate_fields, no índice de contas em cache."""
+    try:
+        client, limiter, scope = organizations(org)
+        return validation.exists_in_organizations(client, limiter, data, scope=scope)
+    except throttling.ThrottledError:
+        raise
+    except Exception as e:
+        # O validate_fields repete a checagem dentro do workflow
+        logger.error("Erro ao consultar contas da Organizations: %s", e)
         return False
 
 
 def validate_account_name(account_name):
     try:
-        response = table.scan(
-            FilterExpression=Attr("AccountName").eq(account_name.strip().lower())
+        response = table.query(
+            IndexName=ACCOUNT_NAME_INDEX,
+            KeyConditionExpression=Key("AccountName").eq(account_name.strip()),
+            FilterExpression=Attr("Status").ne("FAILED"),
+            Select="COUNT",
         )
-        return len(response.get("Items", [])) == 0
+        return response.get("Count", 0) == 0
     except Exception:
         return False
+
+
+# ---------------- Warm-up ----------------
+WARMERS = {
+    "ou_tree": lambda: org_cache.ou_tree(org_client, ORG_LIMITER),
+    "org_account_index": lambda: org_cache.account_index(org_client, ORG_LIMITER),
+    "dynamodb": lambda: table.get_item(Key={"AccountEmail": "warmup"}),
+    "stepfunctions": has_available_capacity,
+    "circuit": lambda: SC_CIRCUIT.state(),
+}
+
+
+def warm_organizations():
+    """Árvores de OUs (e credenciais) das demais organizações."""
+    for org in ORGS.values():
+        if org.name != orgs.DEFAULT:
+            client, limiter, scope = organizations(org)
+            org_cache.ou_tree(client, limiter, scope=scope)
+
+
+if len(ORGS) > 1:
+    WARMERS["organizations"] = warm_organizations
+warmup.on_init(WARMERS)
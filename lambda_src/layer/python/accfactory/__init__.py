@@ -0,0 +1 @@
+"""Código compartilhado entre as Lambdas da Account Factory (publicado como layer)."""
@@ -0,0 +1,71 @@
+"""Limite de requisições por chamador na entrada da API.
+
+Cada principal IAM (``requestContext.identity`` do API Gateway com sigv4) tem
+um orçamento de leituras (``GET``) e outro de escritas (``POST``/``PATCH``/
+``DELETE``), nos serviços ``caller-read`` e ``caller-write`` do
+``accfactory.throttling``: o mesmo token bucket local com leases de um
+contador por janela de 1s na tabela de controle
+(``PK=RATE#caller-<tipo>:<principal>``), de modo que o limite vale para todos
+os containers da API. Dentro da janela o container consome o lease (e lembra
+de uma janela esgotada) sem voltar ao DynamoDB. Sem a tabela, ou com o
+DynamoDB falhando, o limite degrada para o bucket local do container.
+
+A checagem roda antes de qualquer chamada do handler: um chamador acima do
+orçamento recebe ``429`` com ``Retry-After`` sem custar leitura de conta,
+Organizations ou Step Functions aos demais.
+"""
+
+import json
+import logging
+import math
+
+from accfactory import metrics, throttling
+
+LOGGER = logging.getLogger(__name__)
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+KINDS = ("read", "write")
+
+
+def limiters():
+    """Limiters do container por tipo de requisição."""
+    return {kind: throttling.for_service(f"caller-{kind}") for kind in KINDS}
+
+
+def principal(event):
+    """Chave do chamador: ARN IAM, com a sessão de roles assumidas removida.
+
+    Jobs que assumem a mesma role com nomes de sessão diferentes dividem o
+    orçamento da role. Sem identidade IAM, cai para o IP de origem.
+    """
+    identity = (event.get("requestContext") or {}).get("identity") or {}
+    arn = identity.get("userArn") or ""
+    if ":assumed-role/" in arn:
+        return arn.rsplit("/", 1)[0]
+    return arn or identity.get("caller") or identity.get("sourceIp") or "anonymous"
+
+
+def kind(method):
+    return "read" if (method or "GET").upper() in READ_METHODS else "write"
+
+
+def check(event, caller_limiters):
+    """``None`` se a requisição é admitida, senão a resposta ``429``."""
+    request_kind = kind(event.get("httpMethod"))
+    caller = principal(event)
+    wait = caller_limiters[request_kind].try_acquire(caller)
+    if not wait:
+        return None
+    retry_after = max(1, math.ceil(wait))
+    LOGGER.warning(
+        "Chamador %s acima do limite de %s (Retry-After %ss)",
+        caller,
+        request_kind,
+        retry_after,
+    )
+    metrics.put_metric("CallerThrottled", Kind=request_kind)
+    return {
+        "statusCode": 429,
+        "headers": {"Retry-After": str(retry_after)},
+        "body": json.dumps({"error": "Rate limit exceeded for caller"}),
+    }
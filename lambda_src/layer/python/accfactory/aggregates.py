@@ -0,0 +1,140 @@
+"""Contadores materializados de contas por Status x OrgUnit.
+
+Mantidos pelo ``stream_processor`` a partir das imagens antiga/nova do stream da
+tabela de contas e gravados na tabela de controle (``PK = "STATS"``), de modo que
+o ``GET /stats`` lê poucos itens independentemente do tamanho do inventário.
+"""
+
+import logging
+from collections import Counter
+
+LOGGER = logging.getLogger(__name__)
+
+STATS_PK = "STATS"
+UNKNOWN = "unknown"
+
+
+def _key(image):
+    if not image:
+        return None
+    status = image.get("Status", {}).get("S") or UNKNOWN
+    org_unit = image.get("OrgUnit", {}).get("S") or UNKNOWN
+    return status, org_unit
+
+
+def deltas_from_records(records):
+    """Soma os incrementos/decrementos de um lote de registros do stream."""
+    deltas = Counter()
+    for record in records:
+        images = record.get("dynamodb", {})
+        old_key = _key(images.get("OldImage"))
+        new_key = _key(images.get("NewImage"))
+        if old_key == new_key:
+            continue
+        if old_key:
+            deltas[old_key] -= 1
+        if new_key:
+            deltas[new_key] += 1
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def apply_deltas(dynamo_client, table_name, deltas):
+    for (status, org_unit), delta in deltas.items():
+        dynamo_client.update_item(
+            TableName=table_name,
+            Key={"PK": {"S": STATS_PK}, "SK": {"S": f"{status}#{org_unit}"}},
+            UpdateExpression="ADD #count :delta SET #status = :status, #ou = :ou",
+            ExpressionAttributeNames={
+                "#count": "Count",
+                "#status": "Status",
+                "#ou": "OrgUnit",
+            },
+            ExpressionAttributeValues={
+                ":delta": {"N": str(delta)},
+                ":status": {"S": status},
+                ":ou": {"S": org_unit},
+            },
+        )
+    return len(deltas)
+
+
+def apply_records(dynamo_client, table_name, records):
+    """Consumer do ``stream_processor``: aplica as diferenças de um lote."""
+    deltas = deltas_from_records(records)
+    return {"updated_counters": apply_deltas(dynamo_client, table_name, deltas)}
+
+
+def read_counters(dynamo_client, table_name):
+    """Lê todos os contadores (uma ``Query`` paginada na partição ``STATS``)."""
+    counters = []
+    kwargs = {
+        "TableName": table_name,
+        "KeyConditionExpression": "PK = :pk",
+        "ExpressionAttributeValues": {":pk": {"S": STATS_PK}},
+    }
+    while True:
+        response = dynamo_client.query(**kwargs)
+        for item in response.get("Items", []):
+            counters.append(
+                {
+                    "Status": item["Status"]["S"],
+                    "OrgUnit": item["OrgUnit"]["S"],
+                    "Count": int(item["Count"]["N"]),
+                }
+            )
+        if "LastEvaluatedKey" not in response:
+            return counters
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def summarize(counters, org_unit=None):
+    """Agrupa os contadores em totais por status e por OU."""
+    by_status = Counter()
+    by_org_unit = {}
+    for counter in counters:
+        if org_unit and counter["OrgUnit"] != org_unit:
+            continue
+        if counter["Count"] <= 0:
+            continue
+        by_status[counter["Status"]] += counter["Count"]
+        by_org_unit.setdefault(counter["OrgUnit"], {})[counter["Status"]] = counter[
+            "Count"
+        ]
+    return {
+        "total": sum(by_status.values()),
+        "byStatus": dict(by_status),
+        "byOrgUnit": by_org_unit,
+    }
+
+
+def rebuild(dynamo_client, accounts_table, table_name):
+    """Recalcula os contadores com um ``Scan`` completo (reconciliação).
+
+    Deve ser executado com o stream parado ou em baixa atividade: alterações
+    concorrentes podem ser contadas duas vezes até a próxima reconciliação.
+    """
+    totals = Counter()
+    kwargs = {
+        "TableName": accounts_table,
+        "ProjectionExpression": "#status, OrgUnit",
+        "ExpressionAttributeNames": {"#status": "Status"},
+    }
+    while True:
+        response = dynamo_client.scan(**kwargs)
+        for item in response.get("Items", []):
+            totals[_key(item)] += 1
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    current = {
+        (c["Status"], c["OrgUnit"]): c["Count"]
+        for c in read_counters(dynamo_client, table_name)
+    }
+    deltas = {
+        key: totals.get(key, 0) - current.get(key, 0)
+        for key in set(totals) | set(current)
+    }
+    apply_deltas(dynamo_client, table_name, {k: v for k, v in deltas.items() if v})
+    LOGGER.info("Contadores reconstruídos: %s chaves", len(totals))
+    return {"counters": len(totals), "items": sum(totals.values())}
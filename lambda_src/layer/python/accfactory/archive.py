@@ -0,0 +1,150 @@
+"""Arquivamento de registros terminais da tabela de contas.
+
+Registros em estado terminal (``STATUSES``) há mais de ``ARCHIVE_AFTER_DAYS``
+são copiados inteiros para a tabela de arquivo (``ARCHIVE_TABLE``, mesma chave
+``AccountEmail``, classe Standard-IA) e substituídos na tabela quente por um
+stub com ``STUB_FIELDS`` e ``ArchivedAt``. O stub mantém o que os GSIs, a
+checagem de duplicidade, a busca e os contadores usam, então a troca não gera
+diferença para os consumers do stream; o resto do registro sai da tabela
+quente.
+
+Leituras: ``read`` busca o registro completo no arquivo quando o item quente é
+um stub (GET por e-mail e por id). Escritas do inventário (``bootstrap`` e
+``org_sync``, via ``inventory.upsert``) e do PATCH em massa vão para a cópia do
+arquivo e atualizam os campos do stub, sem trazer o registro de volta. Um novo
+POST sobre um stub ``FAILED`` substitui o stub por um registro novo.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from botocore.exceptions import ClientError
+
+from accfactory import metrics
+
+LOGGER = logging.getLogger(__name__)
+
+MARKER = "ArchivedAt"
+STATUSES = ("ACTIVE", "SUSPENDED", "FAILED")
+# Chave, GSIs (AccountId/AccountName + Status), contadores (Status/OrgUnit) e
+# termos da busca (AccountName/AccountEmail/SSOUserEmail)
+STUB_FIELDS = (
+    "AccountEmail",
+    "AccountName",
+    "AccountId",
+    "Status",
+    "OrgUnit",
+    "SSOUserEmail",
+)
+# Instante em que o registro chegou ao estado terminal, em ordem de preferência
+TERMINAL_FIELDS = ("ActivatedAt", "FailedAt", "CreatedAt")
+
+
+def is_stub(item):
+    return bool(item) and MARKER in item
+
+
+def terminal_at(item):
+    return next((item[name] for name in TERMINAL_FIELDS if item.get(name)), None)
+
+
+def cutoff(days, now=None):
+    """Instante ISO antes do qual um registro terminal pode ser arquivado."""
+    now = now or datetime.now(timezone.utc)
+    return (now - timedelta(days=days)).isoformat()
+
+
+def stub_for(item, archived_at):
+    stub = {name: item[name] for name in STUB_FIELDS if name in item}
+    stub[MARKER] = archived_at
+    return stub
+
+
+def candidates(table, before):
+    """Registros terminais ainda na tabela quente com ``terminal_at < before``.
+
+    ``Scan`` paginado com filtro; roda só no job de arquivamento.
+    """
+    statuses = {f":s{i}": status for i, status in enumerate(STATUSES)}
+    kwargs = {
+        "FilterExpression": (
+            f"#status IN ({', '.join(statuses)}) AND attribute_not_exists({MARKER})"
+        ),
+        "ExpressionAttributeNames": {"#status": "Status"},
+        "ExpressionAttributeValues": statuses,
+    }
+    while True:
+        response = table.scan(**kwargs)
+        for item in response.get("Items", []):
+            reached = terminal_at(item)
+            if reached and reached < before:
+                yield item
+        if "LastEvaluatedKey" not in response:
+            return
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def archive_record(table, archive_table, item, archived_at):
+    """Copia ``item`` para o arquivo e troca o registro quente pelo stub.
+
+    A troca só acontece se o registro não mudou desde a leitura (mesmo
+    ``Status`` e ``UpdatedAt``); caso contrário retorna False e a cópia no
+    arquivo é sobrescrita numa próxima execução.
+    """
+    archive_table.put_item(Item={**item, MARKER: archived_at})
+    values = {":status": item["Status"]}
+    if item.get("UpdatedAt"):
+        unchanged = "UpdatedAt = :updated"
+        values[":updated"] = item["UpdatedAt"]
+    else:
+        unchanged = "attribute_not_exists(UpdatedAt)"
+    try:
+        table.put_item(
+            Item=stub_for(item, archived_at),
+            ConditionExpression=(
+                f"#status = :status AND {unchanged} AND attribute_not_exists({MARKER})"
+            ),
+            ExpressionAttributeNames={"#status": "Status"},
+            ExpressionAttributeValues=values,
+        )
+    except ClientError as error:
+        if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        LOGGER.info("Registro %s mudou durante o arquivamento", item["AccountEmail"])
+        return False
+    metrics.put_metric("AccountsArchived", Status=item["Status"])
+    return True
+
+
+def read(archive_table, stub, **kwargs):
+    """Registro completo de um stub; o próprio stub se a cópia não existir."""
+    response = archive_table.get_item(
+        Key={"AccountEmail": stub["AccountEmail"]}, **kwargs
+    )
+    item = response.get("Item")
+    if not item:
+        LOGGER.warning("Stub %s sem cópia no arquivo", stub["AccountEmail"])
+        return stub
+    return item
+
+
+def refresh_stub(table, email, values):
+    """Replica no stub os campos de ``STUB_FIELDS`` alterados na cópia do arquivo."""
+    fields = [name for name in STUB_FIELDS if name in values]
+    if not fields:
+        return
+    try:
+        table.update_item(
+            Key={"AccountEmail": email},
+            UpdateExpression="SET "
+            + ", ".join(f"#f{i} = :f{i}" for i in range(len(fields))),
+            ConditionExpression=f"attribute_exists({MARKER})",
+            ExpressionAttributeNames={f"#f{i}": name for i, name in enumerate(fields)},
+            ExpressionAttributeValues={
+                f":f{i}": values[name] for i, name in enumerate(fields)
+            },
+        )
+    except ClientError as error:
+        # Stub substituído por um novo POST nesse meio tempo
+        if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
@@ -0,0 +1,87 @@
+"""Workflow em lote: uma execução do Step Function para várias contas.
+
+O ``trigger_sfn`` junta os pedidos de um lote do stream em ``{"Items": [...]}``
+e inicia a state machine de lote. Os handlers do fluxo aceitam tanto um item
+quanto o lote; no lote, cada item é processado pela mesma função e o erro de um
+item não derruba os demais: ele fica em ``item["Error"]`` no mesmo formato do
+``Catch`` do Step Function (``Error`` / ``Cause``), que o
+``update_failed_status`` já sabe ler.
+
+Estados de um item no lote:
+
+- ``IN_PROCESSING`` / ``RETRYING``: pendente, consultado no próximo poll (um
+  único ``CheckBatchStatus`` para o lote inteiro);
+- ``REQUEUE``: conflito do Control Tower; volta ao ``ProvisionBatch`` após a
+  espera, até ``MAX_PROVISION_ATTEMPTS`` tentativas;
+- com ``Error``: segue para o ``update_failed_status``.
+"""
+
+import json
+
+from accfactory import logs
+from accfactory.errors import ProvisionConflictError, TransientError
+
+ITEMS = "Items"
+PENDING = ("IN_PROCESSING", "RETRYING")
+REQUEUE = "REQUEUE"
+SUCCEEDED = ("AVAILABLE", "TAINTED")
+# Mesmo limite do CanRequeueProvision na state machine por conta
+MAX_PROVISION_ATTEMPTS = 3
+
+
+def is_batch(event):
+    return isinstance(event, dict) and isinstance(event.get(ITEMS), list)
+
+
+def failed(item):
+    return "Error" in item
+
+
+def catch_error(error):
+    """Erro no formato que o ``Catch`` do Step Function grava em ``$.Error``."""
+    name = type(error).__name__
+    return {
+        "Error": name,
+        "Cause": json.dumps({"errorType": name, "errorMessage": str(error)}),
+    }
+
+
+def run(process, event, select=None, keep_transient=False):
+    """Aplica ``process`` a cada item do lote (na ordem) e devolve o lote.
+
+    Itens com ``Error`` ou recusados por ``select`` passam direto. Um
+    ``TransientError`` é relançado (o ``Retry`` repete a task do lote) ou, com
+    ``keep_transient``, deixa o item como estava para a próxima rodada.
+    """
+    results = []
+    for item in event[ITEMS]:
+        if failed(item) or (select and not select(item)):
+            results.append(item)
+            continue
+        logs.bind(correlationId=item.get("RequestID"))
+        try:
+            results.append({**item, **process(dict(item))})
+        except TransientError:
+            if not keep_transient:
+                raise
+            results.append(item)
+        except ProvisionConflictError as error:
+            if int(item.get("ProvisionAttempt", 0)) < MAX_PROVISION_ATTEMPTS:
+                results.append({**item, "Status": REQUEUE})
+            else:
+                results.append({**item, "Error": catch_error(error)})
+        except Exception as error:
+            results.append({**item, "Error": catch_error(error)})
+    return summarize({**event, ITEMS: results})
+
+
+def summarize(event):
+    """Contadores usados pelas escolhas da state machine de lote."""
+    items = event[ITEMS]
+    active = [item for item in items if not failed(item)]
+    return {
+        **event,
+        "Pending": sum(item.get("Status") in PENDING for item in active),
+        "Requeue": sum(item.get("Status") == REQUEUE for item in active),
+        "Failed": len(items) - len(active),
+    }
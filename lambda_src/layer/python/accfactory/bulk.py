@@ -0,0 +1,198 @@
+"""Jobs de atualização em massa (tags e troca de OU) gravados na tabela de controle.
+
+A API valida a requisição, grava o job (``PK = JOB#<id>``) e dispara o worker
+``bulk_update`` de forma assíncrona; o worker grava o progresso no mesmo item,
+que o cliente consulta em ``GET /accounts/bulk/{jobId}``.
+
+Formato da requisição::
+
+    {"selector": {"AccountEmails": [...]} | {"AccountIds": [...]} | {"OrgUnit": "..."},
+     "changes": {"Tags": [{"Key": "...", "Value": "..."}], "OrgUnit": "..."}}
+"""
+
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+from accfactory.export import plain
+
+JOB_TTL_SECONDS = int(os.environ.get("BULK_JOB_TTL_SECONDS", str(7 * 86400)))
+MAX_TARGETS = 1000
+MAX_ERRORS = 50  # erros por conta guardados no job (os demais só contam)
+
+SELECTORS = ("AccountEmails", "AccountIds", "OrgUnit")
+PENDING, RUNNING = "PENDING", "RUNNING"
+SUCCEEDED, PARTIAL, FAILED = "SUCCEEDED", "PARTIAL", "FAILED"
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _key(job_id):
+    return {"PK": {"S": f"JOB#{job_id}"}, "SK": {"S": "-"}}
+
+
+def parse_request(body):
+    """Valida o corpo do PATCH; retorna ``(selector, changes)`` ou lança ValueError."""
+    if not isinstance(body, dict):
+        raise ValueError("Body must be an object with selector and changes")
+    selector = body.get("selector") or {}
+    changes = body.get("changes") or {}
+
+    chosen = [name for name in SELECTORS if selector.get(name)]
+    if len(chosen) != 1:
+        raise ValueError(f"selector requires exactly one of: {', '.join(SELECTORS)}")
+    name = chosen[0]
+    if name == "OrgUnit":
+        if not isinstance(selector[name], str):
+            raise ValueError("selector.OrgUnit must be a string")
+        selector = {name: selector[name].strip()}
+    else:
+        values = selector[name]
+        if not isinstance(values, list) or not all(
+            isinstance(v, str) and v.strip() for v in values
+        ):
+            raise ValueError(f"selector.{name} must be a list of strings")
+        values = [
+            v.strip().lower() if name == "AccountEmails" else v.strip() for v in values
+        ]
+        values = list(dict.fromkeys(values))
+        if len(values) > MAX_TARGETS:
+            raise ValueError(f"selector.{name} accepts at most {MAX_TARGETS} entries")
+        selector = {name: values}
+
+    unknown = set(changes) - {"Tags", "OrgUnit"}
+    if unknown or not changes:
+        raise ValueError("changes accepts Tags and/or OrgUnit")
+    if "Tags" in changes:
+        tags = changes["Tags"]
+        if (
+            not isinstance(tags, list)
+            or not tags
+            or not all(
+                isinstance(t, dict) and isinstance(t.get("Key"), str) and "Value" in t
+                for t in tags
+            )
+        ):
+            raise ValueError("changes.Tags must be a list of {Key, Value}")
+        changes = {
+            **changes,
+            "Tags": [{"Key": t["Key"], "Value": str(t["Value"])} for t in tags],
+        }
+    if "OrgUnit" in changes and not isinstance(changes["OrgUnit"], str):
+        raise ValueError("changes.OrgUnit must be a string")
+    return selector, changes
+
+
+def create_job(dynamo_client, table_name, selector, changes, now=None):
+    now = int(now if now is not None else time.time())
+    job_id = str(uuid.uuid4())
+    dynamo_client.put_item(
+        TableName=table_name,
+        Item={
+            **_key(job_id),
+            "Status": {"S": PENDING},
+            "Request": {"S": json.dumps({"selector": selector, "changes": changes})},
+            "Total": {"N": "0"},
+            "Succeeded": {"N": "0"},
+            "Failed": {"N": "0"},
+            "CreatedAt": {"S": _now_iso()},
+            "UpdatedAt": {"S": _now_iso()},
+            "ExpiresAt": {"N": str(now + JOB_TTL_SECONDS)},
+        },
+        ConditionExpression="attribute_not_exists(PK)",
+    )
+    return job_id
+
+
+def get_job(dynamo_client, table_name, job_id, consistent=False):
+    """Job como dicionário Python (``Request`` já decodificado) ou None."""
+    item = dynamo_client.get_item(
+        TableName=table_name, Key=_key(job_id), ConsistentRead=consistent
+    ).get("Item")
+    if not item:
+        return None
+    job = {name: plain(value) for name, value in item.items()}
+    job["Request"] = json.loads(job["Request"])
+    job["JobId"] = job_id
+    for name in ("PK", "SK", "ExpiresAt"):
+        job.pop(name, None)
+    return job
+
+
+def start(dynamo_client, table_name, job_id, targets):
+    """Marca o job como RUNNING e grava a lista de alvos (e-mails) resolvida."""
+    dynamo_client.update_item(
+        TableName=table_name,
+        Key=_key(job_id),
+        UpdateExpression=(
+            "SET #status = :running, Targets = :targets, #total = :total, "
+            "UpdatedAt = :now"
+        ),
+        ExpressionAttributeNames={"#status": "Status", "#total": "Total"},
+        ExpressionAttributeValues={
+            ":running": {"S": RUNNING},
+            ":targets": {"L": [{"S": email} for email in targets]},
+            ":total": {"N": str(len(targets))},
+            ":now": {"S": _now_iso()},
+        },
+    )
+
+
+def record_progress(
+    dynamo_client, table_name, job_id, succeeded, failed, errors, offset, known_errors
+):
+    """Soma o resultado de um lote; guarda até ``MAX_ERRORS`` erros por conta."""
+    names = {"#offset": "Offset"}
+    values = {
+        ":ok": {"N": str(succeeded)},
+        ":failed": {"N": str(failed)},
+        ":offset": {"N": str(offset)},
+        ":now": {"S": _now_iso()},
+    }
+    expression = "SET #offset = :offset, UpdatedAt = :now"
+    errors = errors[: max(0, MAX_ERRORS - known_errors)]
+    if errors:
+        expression += ", #errors = list_append(if_not_exists(#errors, :empty), :errors)"
+        names["#errors"] = "Errors"
+        values[":empty"] = {"L": []}
+        values[":errors"] = {
+            "L": [
+                {"M": {"AccountEmail": {"S": email}, "Error": {"S": message}}}
+                for email, message in errors
+            ]
+        }
+    dynamo_client.update_item(
+        TableName=table_name,
+        Key=_key(job_id),
+        UpdateExpression=expression + " ADD Succeeded :ok, Failed :failed",
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+    )
+    return len(errors)
+
+
+def finish(dynamo_client, table_name, job_id, status, message=None):
+    names = {"#status": "Status"}
+    values = {":status": {"S": status}, ":now": {"S": _now_iso()}}
+    expression = "SET #status = :status, UpdatedAt = :now, FinishedAt = :now"
+    if message:
+        expression += ", #message = :message"
+        names["#message"] = "Message"
+        values[":message"] = {"S": message}
+    dynamo_client.update_item(
+        TableName=table_name,
+        Key=_key(job_id),
+        UpdateExpression=expression,
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+    )
+
+
+def final_status(succeeded, failed):
+    if not failed:
+        return SUCCEEDED
+    return PARTIAL if succeeded else FAILED
@@ -0,0 +1,298 @@
+"""Circuit breaker compartilhado para o provisionamento no Service Catalog.
+
+O estado fica num único item da tabela de controle (``PK = CIRCUIT#<nome>``),
+de forma que todos os containers enxergam o mesmo circuito:
+
+- ``CLOSED``: chamadas liberadas; falhas consecutivas são contadas e qualquer
+  sucesso zera o contador.
+- ``OPEN``: após ``CIRCUIT_FAILURE_THRESHOLD`` falhas seguidas, novas
+  requisições são seguradas por ``CIRCUIT_OPEN_SECONDS``.
+- ``HALF_OPEN``: vencida a janela, um único chamador ganha a sonda (update
+  condicional). Sucesso fecha o circuito; falha volta a abri-lo. Se o resultado
+  da sonda não chegar em ``CIRCUIT_PROBE_SECONDS``, outra sonda é liberada.
+
+O estado é publicado na métrica EMF ``CircuitState`` (0 fechado, 1 meia-abertura,
+2 aberto). Sem a tabela (ou se o DynamoDB falhar) o circuito fica fechado: ele
+protege o backend, mas não pode virar um ponto único de falha.
+
+Uso::
+
+    SC_CIRCUIT = circuit.for_service("servicecatalog")
+    if not SC_CIRCUIT.allow():
+        ...  # segura o pedido
+    SC_CIRCUIT.record_failure()  # ou record_success()
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from accfactory import metrics
+
+LOGGER = logging.getLogger(__name__)
+
+CONTROL_TABLE = os.environ.get("CONTROL_TABLE")
+FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "5"))
+OPEN_SECONDS = int(os.environ.get("CIRCUIT_OPEN_SECONDS", "900"))
+# Um provisionamento leva ~30 min até o CheckAccountStatus ver o resultado.
+PROBE_SECONDS = int(os.environ.get("CIRCUIT_PROBE_SECONDS", "2700"))
+# Estado lido do DynamoDB é reaproveitado pelo container por alguns segundos.
+CACHE_SECONDS = 10
+
+CLOSED, HALF_OPEN, OPEN = "CLOSED", "HALF_OPEN", "OPEN"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+State = namedtuple("State", ["state", "failures", "open_until", "probe_until"])
+_CLOSED = State(CLOSED, 0, 0, 0)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name,
+        table_name=CONTROL_TABLE,
+        dynamo_client=None,
+        threshold=FAILURE_THRESHOLD,
+        open_seconds=OPEN_SECONDS,
+        probe_seconds=PROBE_SECONDS,
+        clock=time.time,
+    ):
+        self.name = name
+        self.table_name = table_name
+        self.threshold = threshold
+        self.open_seconds = open_seconds
+        self.probe_seconds = probe_seconds
+        self._dynamo = dynamo_client
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._cached = None
+        self._cached_at = 0.0
+
+    # ---------------- API pública ----------------
+    def state(self):
+        """Estado atual (``State``), com cache curto por container."""
+        if not self.table_name:
+            return _CLOSED
+        with self._lock:
+            now = self._clock()
+            if self._cached and now - self._cached_at < CACHE_SECONDS:
+                return self._cached
+        try:
+            item = (
+                self._client()
+                .get_item(
+                    TableName=self.table_name, Key=self._key(), ConsistentRead=True
+                )
+                .get("Item")
+            )
+        except Exception as error:
+            LOGGER.warning(
+                "Circuito %s ilegível, seguindo fechado: %s", self.name, error
+            )
+            return _CLOSED
+        current = self._parse(item)
+        self._publish(current)
+        with self._lock:
+            self._cached = current
+            self._cached_at = now
+        return current
+
+    def is_open(self):
+        """True enquanto novas requisições devem ser recusadas (sem pegar a sonda)."""
+        current = self.state()
+        now = self._clock()
+        if current.state == OPEN:
+            return now < current.open_until
+        if current.state == HALF_OPEN:
+            return now < current.probe_until
+        return False
+
+    def retry_after(self):
+        """Segundos até a próxima sonda possível (mínimo 1)."""
+        current = self.state()
+        until = current.open_until if current.state == OPEN else current.probe_until
+        return max(1, int(until - self._clock()))
+
+    def allow(self):
+        """True se o chamador pode seguir; na meia-abertura, só quem pegou a sonda."""
+        current = self.state()
+        if current.state == CLOSED:
+            return True
+        now = self._clock()
+        until = current.open_until if current.state == OPEN else current.probe_until
+        if now < until or not self._take_probe(current, now):
+            metrics.put_metric("CircuitRejections", Circuit=self.name)
+            return False
+        return True
+
+    def record_success(self):
+        """Fecha o circuito e zera as falhas consecutivas."""
+        if not self.table_name:
+            return
+        try:
+            old = (
+                self._client()
+                .update_item(
+                    TableName=self.table_name,
+                    Key=self._key(),
+                    UpdateExpression=(
+                        "SET #state = :closed, Failures = :zero, UpdatedAt = :now "
+                        "REMOVE OpenUntil, ProbeUntil"
+                    ),
+                    ExpressionAttributeNames={"#state": "State"},
+                    ExpressionAttributeValues={
+                        ":closed": {"S": CLOSED},
+                        ":zero": {"N": "0"},
+                        ":now": {"N": str(int(self._clock()))},
+                    },
+                    ReturnValues="UPDATED_OLD",
+                )
+                .get("Attributes", {})
+            )
+        except Exception as error:
+            LOGGER.warning("Falha ao fechar circuito %s: %s", self.name, error)
+            return
+        if old.get("State", {}).get("S", CLOSED) != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        """Conta uma falha; abre o circuito no limite ou se a sonda falhou."""
+        if not self.table_name:
+            return
+        try:
+            item = (
+                self._client()
+                .update_item(
+                    TableName=self.table_name,
+                    Key=self._key(),
+                    UpdateExpression="ADD Failures :one SET UpdatedAt = :now",
+                    ExpressionAttributeValues={
+                        ":one": {"N": "1"},
+                        ":now": {"N": str(int(self._clock()))},
+                    },
+                    ReturnValues="ALL_NEW",
+                )
+                .get("Attributes")
+            )
+            current = self._parse(item)
+            if current.state == HALF_OPEN or (
+                current.state == CLOSED and current.failures >= self.threshold
+            ):
+                self._open(current)
+        except Exception as error:
+            LOGGER.warning(
+                "Falha ao registrar erro no circuito %s: %s", self.name, error
+            )
+
+    # ---------------- Transições ----------------
+    def _take_probe(self, current, now):
+        until = "OpenUntil" if current.state == OPEN else "ProbeUntil"
+        try:
+            self._client().update_item(
+                TableName=self.table_name,
+                Key=self._key(),
+                UpdateExpression="SET #state = :half, ProbeUntil = :probe",
+                ConditionExpression="#state = :seen AND #until <= :now",
+                ExpressionAttributeNames={"#state": "State", "#until": until},
+                ExpressionAttributeValues={
+                    ":half": {"S": HALF_OPEN},
+                    ":seen": {"S": current.state},
+                    ":probe": {"N": str(int(now + self.probe_seconds))},
+                    ":now": {"N": str(int(now))},
+                },
+            )
+        except ClientError as error:
+            if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                LOGGER.warning(
+                    "Falha ao pegar sonda do circuito %s: %s", self.name, error
+                )
+                return True
+            # Outro container ganhou a sonda: relê o estado na próxima chamada
+            with self._lock:
+                self._cached = None
+            return False
+        LOGGER.info("Circuito %s em meia-abertura: liberando uma sonda", self.name)
+        self._transition(HALF_OPEN)
+        return True
+
+    def _open(self, current):
+        now = self._clock()
+        try:
+            self._client().update_item(
+                TableName=self.table_name,
+                Key=self._key(),
+                UpdateExpression=(
+                    "SET #state = :open, OpenUntil = :until REMOVE ProbeUntil"
+                ),
+                ConditionExpression="attribute_not_exists(#state) OR #state = :seen",
+                ExpressionAttributeNames={"#state": "State"},
+                ExpressionAttributeValues={
+                    ":open": {"S": OPEN},
+                    ":seen": {"S": current.state},
+                    ":until": {"N": str(int(now + self.open_seconds))},
+                },
+            )
+        except ClientError as error:
+            if error.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            return  # outro container já abriu
+        LOGGER.warning(
+            "Circuito %s aberto após %s falhas seguidas; reavaliando em %ss",
+            self.name,
+            current.failures,
+            self.open_seconds,
+        )
+        self._transition(OPEN)
+
+    def _transition(self, state):
+        with self._lock:
+            self._cached = None
+        metrics.put_metric("CircuitTransitions", Circuit=self.name, To=state)
+        self._publish(State(state, 0, 0, 0))
+
+    def _publish(self, current):
+        metrics.put_metric(
+            "CircuitState",
+            STATE_VALUES[current.state],
+            unit="None",
+            Circuit=self.name,
+        )
+
+    # ---------------- DynamoDB ----------------
+    def _key(self):
+        return {"PK": {"S": f"CIRCUIT#{self.name}"}, "SK": {"S": "-"}}
+
+    @staticmethod
+    def _parse(item):
+        if not item:
+            return _CLOSED
+
+        def number(name):
+            return int(item.get(name, {}).get("N", "0"))
+
+        return State(
+            item.get("State", {}).get("S", CLOSED),
+            number("Failures"),
+            number("OpenUntil"),
+            number("ProbeUntil"),
+        )
+
+    def _client(self):
+        if self._dynamo is None:
+            self._dynamo = boto3.client("dynamodb")
+        return self._dynamo
+
+
+_BREAKERS = {}
+
+
+def for_service(service):
+    """Circuito compartilhado pelo container para o serviço informado."""
+    if service not in _BREAKERS:
+        _BREAKERS[service] = CircuitBreaker(service)
+    return _BREAKERS[service]
@@ -0,0 +1,113 @@
+"""Classificação de erros transitórios x permanentes nas tasks do Step Function.
+
+O nome do erro visto pelo Step Function é o nome da classe da exceção:
+
+- ``TransientError``: throttling, indisponibilidade do serviço, timeouts. A
+  task é repetida no lugar (``Retry`` com backoff exponencial e jitter).
+- ``ProvisionConflictError``: o Control Tower recusou o produto por outra
+  operação em andamento (só provisiona uma conta por vez). O fluxo espera e
+  volta ao ``ProvisionAccount`` com uma nova tentativa (``ProvisionAttempt``).
+- Qualquer outro: permanente, segue para ``UpdateStatusFailed``, que mantém o
+  registro com ``Status=FAILED`` e a mensagem de erro.
+
+Todas carregam o mesmo JSON (``errorType``, ``errorMessage``, ``account_email``)
+usado pelo ``update_failed_status``.
+"""
+
+import json
+
+from accfactory.throttling import ThrottledError
+
+TRANSIENT_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "ProvisionedThroughputExceededException",
+    "RequestThrottled",
+    "ServiceUnavailable",
+    "ServiceUnavailableException",
+    "InternalFailure",
+    "InternalServerError",
+    "InternalServiceError",
+    "RequestTimeout",
+    "RequestTimeoutException",
+    "ConcurrentModificationException",
+    "ResourceInUseException",
+    "TransactionInProgressException",
+}
+
+# Trechos (minúsculos) de mensagens do Service Catalog / Control Tower que
+# indicam conflito ou sobrecarga momentânea, não um pedido inválido.
+TRANSIENT_MESSAGES = (
+    "another account is being provisioned",
+    "currently being provisioned",
+    "is being provisioned",
+    "another operation is in progress",
+    "operation in progress",
+    "rate exceeded",
+    "throttl",
+    "try again later",
+    "service unavailable",
+)
+
+# Falhas de rede do botocore (não são ClientError)
+TRANSIENT_EXCEPTIONS = {
+    "EndpointConnectionError",
+    "ConnectionClosedError",
+    "ConnectTimeoutError",
+    "ReadTimeoutError",
+}
+
+
+class TransientError(Exception):
+    """Erro repetido no lugar pelo ``Retry`` do Step Function."""
+
+
+class ProvisionConflictError(Exception):
+    """Control Tower ocupado: o fluxo volta a provisionar após uma espera."""
+
+
+def is_transient_message(message):
+    text = (message or "").lower()
+    return any(fragment in text for fragment in TRANSIENT_MESSAGES)
+
+
+def is_transient(error):
+    if isinstance(error, (ThrottledError, TransientError)):
+        return True
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        code = response.get("Error", {}).get("Code")
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return code in TRANSIENT_CODES or status >= 500
+    if type(error).__name__ in TRANSIENT_EXCEPTIONS:
+        return True
+    return is_transient_message(str(error))
+
+
+def task_error(error, error_type, account_email):
+    """Exceção final da task, já com o JSON esperado pelo ``update_failed_status``."""
+    if isinstance(error, (TransientError, ProvisionConflictError)):
+        return error
+    transient = is_transient(error)
+    body = json.dumps(
+        {
+            "errorType": "TransientError" if transient else error_type,
+            "errorMessage": str(error),
+            "account_email": account_email or "desconhecido",
+        }
+    )
+    return TransientError(body) if transient else Exception(body)
+
+
+def conflict_error(message, account_email):
+    return ProvisionConflictError(
+        json.dumps(
+            {
+                "errorType": "ProvisionConflictError",
+                "errorMessage": message,
+                "account_email": account_email or "desconhecido",
+            }
+        )
+    )
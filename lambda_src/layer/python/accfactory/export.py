@@ -0,0 +1,294 @@
+"""Exportação do inventário completo da tabela de contas em NDJSON ou CSV.
+
+O ``Scan`` é dividido em segmentos paralelos (um por worker). Cada worker
+serializa suas páginas e as entrega por uma fila limitada à thread de escrita,
+que grava em blocos no destino (arquivo local ou upload multipart no S3). A
+memória usada fica limitada pelo tamanho da fila e do bloco, independente do
+tamanho da tabela. Ao final é gravado um manifest com as contagens.
+"""
+
+import csv
+import io
+import json
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+LOGGER = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "csv")
+DEFAULT_SEGMENTS = 4
+CHUNK_SIZE = 1024 * 1024
+S3_PART_SIZE = 8 * 1024 * 1024  # mínimo do S3 para partes intermediárias: 5 MiB
+DEFAULT_CSV_COLUMNS = [
+    "AccountEmail",
+    "AccountName",
+    "AccountId",
+    "Status",
+    "OrgUnit",
+    "SSOUserEmail",
+    "CreatedAt",
+    "UpdatedAt",
+]
+
+_DONE = object()
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def plain(value):
+    """Converte um AttributeValue do DynamoDB (formato low-level) em Python."""
+    ((kind, data),) = value.items()
+    if kind == "S":
+        return data
+    if kind == "N":
+        return int(data) if data.lstrip("-").isdigit() else float(data)
+    if kind == "BOOL":
+        return data
+    if kind == "NULL":
+        return None
+    if kind == "M":
+        return {k: plain(v) for k, v in data.items()}
+    if kind == "L":
+        return [plain(v) for v in data]
+    if kind in ("SS", "NS"):
+        return sorted(plain({kind[0]: v}) for v in data)
+    return data
+
+
+# ---------------- Destinos ----------------
+class FileSink:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "wb")
+        self.bytes = 0
+
+    def write(self, chunk):
+        self._file.write(chunk)
+        self.bytes += len(chunk)
+
+    def close(self):
+        self._file.close()
+        return {"path": self.path, "bytes": self.bytes}
+
+    def abort(self):
+        self._file.close()
+
+    def write_manifest(self, manifest):
+        with open(f"{self.path}.manifest.json", "w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, indent=2)
+
+
+class S3Sink:
+    """Upload multipart em partes de ``S3_PART_SIZE`` (memória limitada a uma parte)."""
+
+    def __init__(self, s3_client, bucket, key, part_size=S3_PART_SIZE):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.bytes = 0
+        self._buffer = bytearray()
+        self._parts = []
+        self._upload_id = None
+
+    def write(self, chunk):
+        self._buffer += chunk
+        self.bytes += len(chunk)
+        if len(self._buffer) >= self.part_size:
+            self._upload_part()
+
+    def _upload_part(self):
+        if self._upload_id is None:
+            self._upload_id = self.s3.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )["UploadId"]
+        number = len(self._parts) + 1
+        response = self.s3.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=number,
+            Body=bytes(self._buffer),
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": number})
+        self._buffer = bytearray()
+
+    def close(self):
+        if self._upload_id is None:
+            self.s3.put_object(
+                Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer)
+            )
+        else:
+            if self._buffer:
+                self._upload_part()
+            self.s3.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+        return {
+            "bucket": self.bucket,
+            "key": self.key,
+            "bytes": self.bytes,
+            "parts": max(1, len(self._parts)),
+        }
+
+    def abort(self):
+        if self._upload_id is not None:
+            self.s3.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+
+    def write_manifest(self, manifest):
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=f"{self.key}.manifest.json",
+            Body=json.dumps(manifest, indent=2).encode("utf-8"),
+            ContentType="application/json",
+        )
+
+
+# ---------------- Serialização ----------------
+def _serializer(fmt, columns):
+    if fmt == "ndjson":
+
+        def serialize(items):
+            return "".join(
+                json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n"
+                for item in items
+            ).encode("utf-8")
+
+        return serialize
+
+    def serialize(items):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for item in items:
+            writer.writerow(
+                [
+                    (
+                        json.dumps(item.get(c), ensure_ascii=False)
+                        if isinstance(item.get(c), (dict, list))
+                        else item.get(c, "")
+                    )
+                    for c in columns
+                ]
+            )
+        return buffer.getvalue().encode("utf-8")
+
+    return serialize
+
+
+def _csv_header(columns):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue().encode("utf-8")
+
+
+# ---------------- Exportação ----------------
+def export_table(
+    dynamo_client,
+    table_name,
+    sink,
+    fmt="ndjson",
+    segments=DEFAULT_SEGMENTS,
+    projection=None,
+    page_size=500,
+    chunk_size=CHUNK_SIZE,
+):
+    """Exporta ``table_name`` para ``sink`` e retorna o manifest da exportação."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato não suportado: {fmt}")
+    columns = list(projection or ([] if fmt == "ndjson" else DEFAULT_CSV_COLUMNS))
+    serialize = _serializer(fmt, columns)
+    scan_kwargs = {"TableName": table_name, "Limit": page_size}
+    if columns:
+        names = {f"#p{i}": column for i, column in enumerate(columns)}
+        scan_kwargs["ProjectionExpression"] = ", ".join(names)
+        scan_kwargs["ExpressionAttributeNames"] = names
+
+    # Fila limitada: os workers param de ler quando a escrita fica para trás.
+    pages = queue.Queue(maxsize=segments * 2)
+    segment_counts = [0] * segments
+    # Falha em um segmento ou na escrita: os demais param na próxima página
+    stop = threading.Event()
+
+    def scan_segment(segment):
+        try:
+            kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=segments)
+            while not stop.is_set():
+                response = dynamo_client.scan(**kwargs)
+                items = [
+                    {k: plain(v) for k, v in item.items()}
+                    for item in response.get("Items", [])
+                ]
+                if items:
+                    segment_counts[segment] += len(items)
+                    pages.put(serialize(items))
+                if "LastEvaluatedKey" not in response:
+                    break
+                kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+            pages.put(_DONE)
+        except Exception as error:
+            pages.put(error)
+
+    started_at = _now_iso()
+    buffer = bytearray(_csv_header(columns) if fmt == "csv" else b"")
+    finished = 0
+    error = None
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        for segment in range(segments):
+            pool.submit(scan_segment, segment)
+        while finished < segments:
+            page = pages.get()
+            if page is _DONE:
+                finished += 1
+            elif isinstance(page, Exception):
+                finished += 1
+                error = error or page
+                stop.set()
+            elif error is None:
+                buffer += page
+                if len(buffer) >= chunk_size:
+                    try:
+                        sink.write(bytes(buffer))
+                    except Exception as write_error:
+                        error = write_error
+                        stop.set()
+                    buffer = bytearray()
+            # Com erro a fila continua sendo drenada: um worker bloqueado no
+            # put() impediria o shutdown do executor.
+
+    if error is None:
+        try:
+            if buffer:
+                sink.write(bytes(buffer))
+            destination = sink.close()
+        except Exception as close_error:
+            error = close_error
+    if error is not None:
+        sink.abort()
+        raise error
+
+    manifest = {
+        "table": table_name,
+        "format": fmt,
+        "projection": columns or None,
+        "segments": segments,
+        "segmentCounts": segment_counts,
+        "itemCount": sum(segment_counts),
+        "startedAt": started_at,
+        "finishedAt": _now_iso(),
+        "destination": destination,
+    }
+    sink.write_manifest(manifest)
+    LOGGER.info(
+        "Exportação concluída: %s itens em %s", manifest["itemCount"], destination
+    )
+    return manifest
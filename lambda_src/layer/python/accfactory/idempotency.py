@@ -0,0 +1,92 @@
+"""Suporte ao header ``Idempotency-Key`` com respostas armazenadas na tabela de controle.
+
+Cada chave vira um item ``PK = IDEMPOTENCY#<chave>`` com o hash do corpo da
+requisição, o estado (``IN_PROGRESS`` / ``COMPLETED``) e a resposta final. Um
+replay dentro da janela custa uma única leitura; requisições concorrentes com a
+mesma chave são barradas pelo ``put_item`` condicional do marcador.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+from botocore.exceptions import ClientError
+
+LOGGER = logging.getLogger(__name__)
+
+TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IN_PROGRESS_SECONDS = 60  # timeout da Lambda: marcador abandonado pode ser retomado
+
+NEW, REPLAY, IN_PROGRESS, MISMATCH = "new", "replay", "in_progress", "mismatch"
+
+
+def body_hash(body):
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _key(idempotency_key):
+    return {"PK": {"S": f"IDEMPOTENCY#{idempotency_key}"}, "SK": {"S": "-"}}
+
+
+def begin(dynamo_client, table_name, idempotency_key, request_hash, now=None):
+    """Retorna ``(estado, resposta_armazenada)`` para a chave informada."""
+    now = int(now if now is not None else time.time())
+    item = dynamo_client.get_item(
+        TableName=table_name, Key=_key(idempotency_key), ConsistentRead=True
+    ).get("Item")
+
+    if item and int(item["ExpiresAt"]["N"]) > now:
+        if item["BodyHash"]["S"] != request_hash:
+            return MISMATCH, None
+        if item["Status"]["S"] == "COMPLETED":
+            return REPLAY, json.loads(item["Response"]["S"])
+        return IN_PROGRESS, None
+
+    try:
+        dynamo_client.put_item(
+            TableName=table_name,
+            Item={
+                **_key(idempotency_key),
+                "Status": {"S": "IN_PROGRESS"},
+                "BodyHash": {"S": request_hash},
+                "ExpiresAt": {"N": str(now + IN_PROGRESS_SECONDS)},
+            },
+            ConditionExpression="attribute_not_exists(PK) OR ExpiresAt <= :now",
+            ExpressionAttributeValues={":now": {"N": str(now)}},
+        )
+    except ClientError as error:
+        if error.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return IN_PROGRESS, None
+        raise
+    return NEW, None
+
+
+def complete(dynamo_client, table_name, idempotency_key, response, now=None):
+    """Armazena a resposta final; erros transitórios liberam a chave para retry."""
+    now = int(now if now is not None else time.time())
+    status_code = response.get("statusCode", 500)
+    try:
+        if status_code >= 500 or status_code == 429:
+            dynamo_client.delete_item(TableName=table_name, Key=_key(idempotency_key))
+            return
+        dynamo_client.update_item(
+            TableName=table_name,
+            Key=_key(idempotency_key),
+            UpdateExpression="SET #status = :done, #response = :response, ExpiresAt = :exp",
+            ExpressionAttributeNames={"#status": "Status", "#response": "Response"},
+            ExpressionAttributeValues={
+                ":done": {"S": "COMPLETED"},
+                ":response": {"S": json.dumps(response)},
+                ":exp": {"N": str(now + TTL_SECONDS)},
+            },
+        )
+    except Exception as error:
+        # A requisição já foi processada; perder o cache só custa um 409 no replay.
+        LOGGER.warning(
+            "Não foi possível gravar resposta idempotente %s: %s",
+            idempotency_key,
+            error,
+        )
@@ -0,0 +1,162 @@
+"""Registro de inventário de uma conta a partir do Organizations.
+
+Compartilhado pelo ``bootstrap_accounts`` (reconciliação completa) e pelo
+``org_sync`` (eventos do Organizations): mesmo mapeamento conta → item
+(``normalize``), mesmo caminho de OU e mesma escrita no DynamoDB (``upsert``),
+que preserva os campos de SSO, ``RequestID`` e ``CreatedAt`` já gravados.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+
+from accfactory import archive, org_cache, throttling
+
+LOGGER = logging.getLogger(__name__)
+
+# Status que vêm do Organizations; os demais são do workflow da fábrica
+ORG_STATUSES = ("ACTIVE", "SUSPENDED", "PENDING_CLOSURE")
+
+
+def iso_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def ou_path(org_client, limiter, account_id: str) -> str:
+    tree = org_cache.ou_tree(org_client, limiter)
+    root_name, paths = (tree.root_name, tree.paths) if tree else ("", {})
+    try:
+        parents = limiter.call(org_client.list_parents, ChildId=account_id).get(
+            "Parents", []
+        )
+        if not parents:
+            return root_name or "unknown"
+        parent = parents[0]
+        if parent["Type"] == "ROOT":
+            return paths.get(parent["Id"], root_name or "unknown")
+        return paths.get(parent["Id"], "unknown")
+    except (ClientError, throttling.ThrottledError) as error:
+        LOGGER.warning("Não foi possível obter OU da conta %s: %s", account_id, error)
+        return root_name or "unknown"
+
+
+def normalize(account, ou_path):
+    email = account["Email"].lower()
+    timestamp = account.get("JoinedTimestamp")
+    joined_at = timestamp.isoformat() if timestamp else iso_now()
+    return {
+        "AccountEmail": email,
+        "AccountName": account["Name"],
+        "AccountId": account["Id"],
+        "Status": account["Status"],
+        "OrgUnit": ou_path,
+        "SSOUserEmail": "",
+        "SSOUserFirstName": "",
+        "SSOUserLastName": "",
+        "RequestID": f"bootstrap-{account['Id']}",
+        "CreatedAt": joined_at,
+        "UpdatedAt": iso_now(),
+        "LastUpdateDate": iso_now(),
+    }
+
+
+def fetch_tags(org_client, limiter, account_id):
+    try:
+        response = limiter.call(
+            org_client.list_tags_for_resource, ResourceId=account_id
+        )
+        return [
+            {"Key": tag["Key"], "Value": tag["Value"]}
+            for tag in response.get("Tags", [])
+        ]
+    except (ClientError, throttling.ThrottledError) as error:
+        LOGGER.warning("Não foi possível obter tags para %s: %s", account_id, error)
+        return []
+
+
+def upsert(table, item, tags, condition=None, extra=None, archive_table=None):
+    """Grava ``item`` (de ``normalize``) na tabela de contas (resource).
+
+    ``condition``: ``(expressão, valores, nomes)`` anexada ao ``update_item``;
+    ``extra``: atributos adicionais gravados com ``SET``. Com ``archive_table``,
+    um registro arquivado (stub) recebe a escrita na cópia do arquivo, com a
+    mesma condição, e o stub é atualizado; o caminho comum continua com uma
+    única escrita.
+    """
+    updated = iso_now()
+    values = {
+        ":name": item["AccountName"],
+        ":accId": item["AccountId"],
+        ":status": item["Status"],
+        ":org": item["OrgUnit"],
+        ":req": item["RequestID"],
+        ":updated": updated,
+        ":created": item["CreatedAt"],
+        ":tags": tags,
+        ":ssoEmail": item["SSOUserEmail"],
+        ":ssoFirst": item["SSOUserFirstName"],
+        ":ssoLast": item["SSOUserLastName"],
+    }
+    expression = (
+        "SET AccountName = :name, "
+        "AccountId = :accId, "
+        "#status = :status, "
+        "OrgUnit = :org, "
+        "SSOUserEmail = if_not_exists(SSOUserEmail, :ssoEmail), "
+        "SSOUserFirstName = if_not_exists(SSOUserFirstName, :ssoFirst), "
+        "SSOUserLastName = if_not_exists(SSOUserLastName, :ssoLast), "
+        "RequestID = if_not_exists(RequestID, :req), "
+        "UpdatedAt = :updated, "
+        "LastUpdateDate = :updated, "
+        "Tags = :tags, "
+        "CreatedAt = if_not_exists(CreatedAt, :created)"
+    )
+    for i, (name, value) in enumerate((extra or {}).items()):
+        expression += f", {name} = :x{i}"
+        values[f":x{i}"] = value
+    # Status é palavra reservada do DynamoDB
+    names = {"#status": "Status"}
+    kwargs = {}
+    if condition:
+        condition_expression, condition_values, condition_names = condition
+        kwargs["ConditionExpression"] = condition_expression
+        values.update(condition_values)
+        names.update(condition_names or {})
+    write = {
+        "Key": {"AccountEmail": item["AccountEmail"]},
+        "UpdateExpression": expression,
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+    if archive_table is None:
+        table.update_item(**write, **kwargs)
+        return
+
+    not_archived = f"attribute_not_exists({archive.MARKER})"
+    guarded = kwargs.get("ConditionExpression")
+    try:
+        table.update_item(
+            **write,
+            ConditionExpression=(
+                f"({guarded}) AND {not_archived}" if guarded else not_archived
+            ),
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
+        )
+        return
+    except ClientError as error:
+        code = error.response["Error"]["Code"]
+        if code != "ConditionalCheckFailedException":
+            raise
+        # Condição do chamador falhou num registro que não está arquivado
+        if not archive.is_stub(error.response.get("Item")):
+            raise
+    archive_table.update_item(**write, **kwargs)
+    archive.refresh_stub(
+        table,
+        item["AccountEmail"],
+        {
+            name: item[name]
+            for name in ("AccountName", "AccountId", "Status", "OrgUnit")
+        },
+    )
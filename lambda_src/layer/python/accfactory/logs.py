@@ -0,0 +1,149 @@
+"""Logging estruturado (uma linha JSON por registro) para todos os handlers.
+
+- Mensagens usam formatação lazy (``LOGGER.info("x=%s", x)``): nada é
+  serializado se o nível estiver desabilitado.
+- Payloads grandes (eventos, itens, respostas do boto) vão para
+  ``debug_payload`` e só são serializados nas invocações amostradas
+  (``LOG_SAMPLE_RATE``, fração 0..1 configurável por Lambda) ou com
+  ``LOG_LEVEL=DEBUG``. O payload pode ser um callable, avaliado só se emitido.
+  A amostragem não muda o nível dos loggers: o DEBUG do botocore/urllib3
+  (corpos das requisições, sem redação) continua desligado.
+- Campos de SSO (e-mail/nome do usuário) e credenciais de headers são
+  mascarados em qualquer payload, sem diferenciar maiúsculas.
+- Cada linha carrega ``requestId`` (id da invocação) e ``correlationId``
+  (``RequestID`` da conta ou id da requisição no API Gateway).
+"""
+
+import functools
+import json
+import logging
+import os
+import random
+from datetime import datetime, timezone
+
+LEVEL = logging.getLevelName(os.environ.get("LOG_LEVEL", "INFO").upper())
+SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0"))
+
+REDACTED_FIELDS = frozenset(
+    {
+        "SSOUserEmail",
+        "SSOUserFirstName",
+        "SSOUserLastName",
+        "Authorization",
+        "X-Amz-Security-Token",
+        "Secret",
+    }
+)
+MASK = "***"
+_REDACTED = frozenset(field.lower() for field in REDACTED_FIELDS)
+
+_CONTEXT = {}
+_SAMPLING = {"sampled": False}
+
+
+def _sensitive(name):
+    return isinstance(name, str) and name.lower() in _REDACTED
+
+
+def redact(value):
+    """Cópia de ``value`` com os campos sensíveis mascarados (recursivo)."""
+    if isinstance(value, dict):
+        if _sensitive(value.get("Key")) and "Value" in value:
+            # Formato de ProvisioningParameters / tags: {"Key": ..., "Value": ...}
+            return {**value, "Value": MASK}
+        return {
+            key: MASK if _sensitive(key) else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(_CONTEXT)
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            entry["payload"] = redact(payload() if callable(payload) else payload)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def get_logger(name=None):
+    """Logger configurado com o ``JsonFormatter`` (substitui o formato da Lambda)."""
+    root = logging.getLogger()
+    if not root.handlers:
+        root.addHandler(logging.StreamHandler())
+    for handler in root.handlers:
+        if not isinstance(handler.formatter, JsonFormatter):
+            handler.setFormatter(JsonFormatter())
+    root.setLevel(LEVEL)
+    return logging.getLogger(name)
+
+
+def debug_payload(logger, message, payload, *args):
+    """Registra ``payload`` em DEBUG; sem custo de serialização se desabilitado.
+
+    Nas invocações amostradas o registro vai direto aos handlers, sem baixar o
+    nível do logger.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, *args, extra={"payload": payload})
+    elif _SAMPLING["sampled"] and not logger.disabled:
+        record = logger.makeRecord(
+            logger.name,
+            logging.DEBUG,
+            "",
+            0,
+            message,
+            args,
+            None,
+            extra={"payload": payload},
+        )
+        logger.handle(record)
+
+
+def bind(**fields):
+    """Adiciona campos de correlação às próximas linhas da invocação."""
+    _CONTEXT.update({key: value for key, value in fields.items() if value})
+
+
+def _correlation_id(event):
+    if not isinstance(event, dict):
+        return None
+    request_context = event.get("requestContext") or {}
+    return event.get("RequestID") or request_context.get("requestId")
+
+
+def handler(func=None, *, sample_rate=None):
+    """Decorator do ``lambda_handler``: correlação e amostragem de DEBUG."""
+    if func is None:
+        return functools.partial(handler, sample_rate=sample_rate)
+
+    rate = SAMPLE_RATE if sample_rate is None else sample_rate
+
+    @functools.wraps(func)
+    def wrapper(event, context):
+        _CONTEXT.clear()
+        bind(
+            requestId=getattr(context, "aws_request_id", None),
+            correlationId=_correlation_id(event),
+        )
+        _SAMPLING["sampled"] = rate > 0 and random.random() < rate
+        try:
+            return func(event, context)
+        finally:
+            _SAMPLING["sampled"] = False
+            _CONTEXT.clear()
+
+    return wrapper
@@ -0,0 +1,45 @@
+"""Métricas customizadas no formato CloudWatch Embedded Metric Format (EMF).
+
+As linhas EMF são escritas com ``print`` para que o CloudWatch Logs consiga
+extrair as métricas (o prefixo do logger da Lambda quebraria o JSON).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "AccountFactory")
+
+COUNTERS = defaultdict(float)
+_LOCK = threading.Lock()
+
+
+def put_metric(name, value=1, unit="Count", **dimensions):
+    """Registra uma métrica localmente e emite a linha EMF correspondente."""
+    key = (name,) + tuple(sorted(dimensions.items()))
+    with _LOCK:
+        COUNTERS[key] += value
+
+    payload = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": NAMESPACE,
+                    "Dimensions": [sorted(dimensions)],
+                    "Metrics": [{"Name": name, "Unit": unit}],
+                }
+            ],
+        },
+        name: value,
+    }
+    payload.update(dimensions)
+    print(json.dumps(payload))
+
+
+def get_count(name, **dimensions):
+    """Valor acumulado no container para a métrica/dimensões informadas."""
+    key = (name,) + tuple(sorted(dimensions.items()))
+    return COUNTERS.get(key, 0)
@@ -0,0 +1,175 @@
+"""Caches de container para dados do Organizations que mudam pouco.
+
+- Árvore de OUs (``ou_tree``/``resolve_ou``): percorrida uma vez por container
+  e reaproveitada por ``ORG_TREE_TTL_SECONDS``. Um caminho não encontrado força
+  um recarregamento (no máximo a cada ``MIN_REFRESH_SECONDS``), para que OUs
+  recém-criadas sejam vistas sem esperar o TTL.
+- Índice de contas (``account_index``): nomes e e-mails de todas as contas da
+  organização, usado na checagem de duplicidade. Contas criadas pelo próprio
+  factory também são barradas pela checagem no DynamoDB, então o TTL curto
+  (``ORG_ACCOUNTS_TTL_SECONDS``) só afeta contas criadas fora dele.
+
+Os dois caches são pré-carregados pelo evento de warm-up (``accfactory.warmup``)
+e gravados em snapshot (``accfactory.snapshot``): um container que perdeu a
+memória volta a usá-los do ``/tmp`` enquanto valerem pelo mesmo TTL.
+
+``scope`` separa os caches de cada organização (``accfactory.orgs.scope``);
+None é a organização local.
+"""
+
+import os
+import threading
+import time
+
+from accfactory import snapshot
+
+ORG_TREE_TTL_SECONDS = int(os.environ.get("ORG_TREE_TTL_SECONDS", "300"))
+ORG_ACCOUNTS_TTL_SECONDS = int(os.environ.get("ORG_ACCOUNTS_TTL_SECONDS", "60"))
+MIN_REFRESH_SECONDS = 30
+CLOCK = time.time  # substituível em testes/simulação
+
+_LOCK = threading.Lock()
+_TREE = {"loaded_at": None}
+_ACCOUNTS = {"loaded_at": None}
+# Caches das demais organizações: escopo -> (árvore, índice de contas)
+_SCOPED = {}
+
+
+class OUTree:
+    def __init__(self, root_id, root_name):
+        self.root_id = root_id
+        self.root_name = root_name
+        self.paths = {root_id: root_name}  # id -> "Root/Engineering/Platform"
+        self.ids = {}  # "engineering/platform" (sem o root) -> id
+
+    def add(self, ou_id, parent_path, name):
+        path = f"{parent_path}/{name}"
+        self.paths[ou_id] = path
+        self.ids[path.split("/", 1)[1].lower()] = ou_id
+        return path
+
+    def dump(self):
+        return {"root_id": self.root_id, "root_name": self.root_name, **self.paths}
+
+    @classmethod
+    def restore(cls, data):
+        data = dict(data)
+        tree = cls(data.pop("root_id"), data.pop("root_name"))
+        tree.paths.update(data)
+        for ou_id, path in data.items():
+            if ou_id != tree.root_id:
+                tree.ids[path.split("/", 1)[1].lower()] = ou_id
+        return tree
+
+
+def _load_tree(org_client, limiter):
+    roots = limiter.call(org_client.list_roots).get("Roots", [])
+    if not roots:
+        return None
+    root = roots[0]
+    tree = OUTree(root["Id"], root["Name"])
+    queue = [(root["Id"], root["Name"])]
+    while queue:
+        parent_id, parent_path = queue.pop(0)
+        for page in limiter.paginate(
+            org_client.list_organizational_units_for_parent, ParentId=parent_id
+        ):
+            for ou in page.get("OrganizationalUnits", []):
+                queue.append((ou["Id"], tree.add(ou["Id"], parent_path, ou["Name"])))
+    return tree
+
+
+def _caches(scope):
+    if scope is None:
+        return _TREE, _ACCOUNTS
+    return _SCOPED.setdefault(scope, ({"loaded_at": None}, {"loaded_at": None}))
+
+
+def _snapshot_name(name, scope):
+    return name if scope is None else f"{name}@{scope}"
+
+
+def _fresh(cache, ttl, now):
+    return cache["loaded_at"] is not None and now - cache["loaded_at"] < ttl
+
+
+def _refresh(cache, name, max_age, now, load, dump, restore):
+    """Recarrega ``cache`` do snapshot ainda válido ou, sem ele, do serviço."""
+    stored = snapshot.load(name, max_age, now, decode=restore)
+    if stored:
+        value, saved_at = stored
+        # Mantém a idade original: o TTL conta desde a carga no serviço
+        cache.update(value=value, loaded_at=saved_at)
+        return
+    value = load()
+    cache.update(value=value, loaded_at=now)
+    if value is not None:
+        snapshot.save(name, dump(value), now)
+
+
+def ou_tree(org_client, limiter, max_age=None, scope=None):
+    """Árvore de OUs do cache (ou recarregada se mais velha que ``max_age``)."""
+    max_age = ORG_TREE_TTL_SECONDS if max_age is None else max_age
+    tree_cache = _caches(scope)[0]
+    with _LOCK:
+        now = CLOCK()
+        if not _fresh(tree_cache, max_age, now):
+            _refresh(
+                tree_cache,
+                _snapshot_name("ou_tree", scope),
+                max_age,
+                now,
+                lambda: _load_tree(org_client, limiter),
+                OUTree.dump,
+                OUTree.restore,
+            )
+        return tree_cache["value"]
+
+
+def resolve_ou(org_client, limiter, ou_path, scope=None):
+    """Id da OU para um caminho relativo ao root (ex.: "Engineering/Platform")."""
+    key = "/".join(p.strip() for p in ou_path.split("/") if p.strip()).lower()
+    tree = ou_tree(org_client, limiter, scope=scope)
+    if tree and not key:
+        return tree.root_id
+    if tree and key in tree.ids:
+        return tree.ids[key]
+    # Cache possivelmente desatualizado: recarrega antes de negar o caminho.
+    tree = ou_tree(org_client, limiter, max_age=MIN_REFRESH_SECONDS, scope=scope)
+    return tree.ids.get(key) if tree else None
+
+
+def account_index(org_client, limiter, max_age=None, scope=None):
+    """``(nomes, e-mails)`` em minúsculas de todas as contas da organização."""
+    max_age = ORG_ACCOUNTS_TTL_SECONDS if max_age is None else max_age
+    accounts_cache = _caches(scope)[1]
+    with _LOCK:
+        now = CLOCK()
+        if not _fresh(accounts_cache, max_age, now):
+            _refresh(
+                accounts_cache,
+                _snapshot_name("org_accounts", scope),
+                max_age,
+                now,
+                lambda: _load_accounts(org_client, limiter),
+                lambda index: [sorted(index[0]), sorted(index[1])],
+                lambda data: (set(data[0]), set(data[1])),
+            )
+        return accounts_cache["value"]
+
+
+def _load_accounts(org_client, limiter):
+    names, emails = set(), set()
+    for page in limiter.paginate(org_client.list_accounts):
+        for account in page["Accounts"]:
+            names.add(account["Name"].lower())
+            emails.add(account["Email"].lower())
+    return names, emails
+
+
+def invalidate(scope=None):
+    with _LOCK:
+        for cache in _caches(scope):
+            cache.update(loaded_at=None)
+        snapshot.discard(_snapshot_name("ou_tree", scope))
+        snapshot.discard(_snapshot_name("org_accounts", scope))
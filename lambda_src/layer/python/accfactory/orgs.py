@@ -0,0 +1,198 @@
+"""Roteamento de pedidos entre organizações (landing zones do Control Tower).
+
+Cada landing zone cria uma conta por vez; com várias organizações a vazão de
+provisionamento cresce com o número delas. ``ORGANIZATIONS`` (JSON, Terraform
+``organizations``) declara as organizações além da local::
+
+    {"clients": {"role_arn": "arn:aws:iam::222222222222:role/accfactory-org",
+                 "principal_arn": "arn:aws:iam::222222222222:role/accfactory-sc",
+                 "sfn_arn": "arn:aws:states:...:stateMachine:CreateAccount-clients",
+                 "ou_prefixes": ["Clients"]}}
+
+A organização local (``DEFAULT``) usa as credenciais da própria Lambda,
+``SFN_ARN`` e ``PRINCIPAL_ARN``; as demais são acessadas assumindo
+``role_arn`` na conta de gerenciamento delas (``ClientPool``).
+
+A API escolhe a organização com ``route`` (campo ``Organization`` explícito ou
+o prefixo de OU mais longo; sem correspondência, a local) e grava o nome no
+registro; os handlers do workflow a recuperam com ``of``. Limiters, circuito do
+Service Catalog e caches do Organizations são separados por organização
+(``limiter``, ``breaker`` e ``scope``): uma landing zone saturada não segura
+as outras.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+import boto3
+
+from accfactory import circuit, throttling
+
+DEFAULT = "default"
+FIELD = "Organization"
+# Credenciais e clients são renovados antes de expirarem
+SESSION_SECONDS = 3600
+REFRESH_MARGIN_SECONDS = 300
+
+Org = namedtuple(
+    "Org",
+    ["name", "role_arn", "principal_arn", "sfn_arn", "ou_prefixes"],
+    defaults=(None, None, None, ()),
+)
+# O que um handler usa de um serviço numa organização
+Access = namedtuple("Access", ["client", "limiter", "scope"])
+
+
+class UnknownOrganization(ValueError):
+    """``Organization`` do pedido não está entre as configuradas."""
+
+    def __init__(self, name):
+        super().__init__(f"Unknown Organization: {name}")
+        self.name = name
+
+
+def _ou_key(path):
+    return "/".join(p.strip() for p in path.split("/") if p.strip()).lower()
+
+
+def load(raw=None):
+    """Organizações por nome: a local mais as de ``ORGANIZATIONS``.
+
+    JSON inválido impede o carregamento da Lambda: roteá-lo em silêncio para a
+    organização local criaria contas no lugar errado.
+    """
+    raw = os.environ.get("ORGANIZATIONS") if raw is None else raw
+    registry = {
+        DEFAULT: Org(
+            DEFAULT,
+            principal_arn=os.environ.get("PRINCIPAL_ARN"),
+            sfn_arn=os.environ.get("SFN_ARN"),
+        )
+    }
+    try:
+        configured = json.loads(raw) if raw else {}
+    except json.JSONDecodeError as exc:
+        raise RuntimeError(f"Invalid ORGANIZATIONS: {exc}") from exc
+    for name, values in configured.items():
+        if name == DEFAULT or not values.get("role_arn"):
+            raise RuntimeError(f"Invalid ORGANIZATIONS entry: {name}")
+        registry[name] = Org(
+            name,
+            role_arn=values["role_arn"],
+            # Quem chama o Service Catalog lá é a própria role assumida
+            principal_arn=values.get("principal_arn") or values["role_arn"],
+            sfn_arn=values.get("sfn_arn") or registry[DEFAULT].sfn_arn,
+            ou_prefixes=tuple(_ou_key(p) for p in values.get("ou_prefixes", [])),
+        )
+    return registry
+
+
+def route(registry, item):
+    """Organização de um pedido novo: ``Organization`` ou prefixo de ``OrgUnit``."""
+    name = item.get(FIELD)
+    if name:
+        if name not in registry:
+            raise UnknownOrganization(name)
+        return registry[name]
+    path = _ou_key(item.get("OrgUnit") or "")
+    chosen, longest = registry[DEFAULT], -1
+    for org in registry.values():
+        for prefix in org.ou_prefixes:
+            matches = path == prefix or path.startswith(f"{prefix}/")
+            if matches and len(prefix) > longest:
+                chosen, longest = org, len(prefix)
+    return chosen
+
+
+def of(registry, item):
+    """Organização de um registro já roteado pela API."""
+    name = item.get(FIELD) or DEFAULT
+    if name not in registry:
+        raise UnknownOrganization(name)
+    return registry[name]
+
+
+def scope(org):
+    """Escopo de caches e snapshots (``accfactory.org_cache``); None na local."""
+    return None if org.name == DEFAULT else org.name
+
+
+def scoped(name, org):
+    """Nome de limiter/circuito da organização; o da local não muda."""
+    return name if org.name == DEFAULT else f"{name}@{org.name}"
+
+
+def limiter(org, service):
+    """Limiter do container para o serviço na organização (orçamento próprio)."""
+    return throttling.for_service(scoped(service, org))
+
+
+def breaker(org, service):
+    """Circuito do container para o serviço na organização."""
+    return circuit.for_service(scoped(service, org))
+
+
+class ClientPool:
+    """Clients boto3 por organização e serviço, reaproveitados pelo container.
+
+    Organizações com ``role_arn`` usam as credenciais de um ``AssumeRole``
+    compartilhado por todos os serviços, renovado ``REFRESH_MARGIN_SECONDS``
+    antes de expirar (os clients são recriados junto).
+    """
+
+    def __init__(self, factory=None, sts_client=None, clock=time.time):
+        self._factory = factory or boto3.client
+        self._sts = sts_client
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sessions = {}  # organização -> (credenciais, expira em)
+        self._clients = {}  # (organização, serviço) -> (client, expira em)
+
+    def access(self, org, service, local):
+        """``Access`` ao serviço na organização.
+
+        ``local``: ``(client, limiter)`` do módulo, usados na organização local
+        (lidos a cada chamada, então continuam substituíveis em testes).
+        """
+        if org.name == DEFAULT:
+            return Access(*local, None)
+        return Access(self.client(org, service), limiter(org, service), scope(org))
+
+    def client(self, org, service):
+        with self._lock:
+            now = self._clock()
+            cached = self._clients.get((org.name, service))
+            if cached and (cached[1] is None or now < cached[1]):
+                return cached[0]
+            if not org.role_arn:
+                client, expires = self._factory(service), None
+            else:
+                credentials, expires = self._session(org, now)
+                client = self._factory(service, **credentials)
+            self._clients[(org.name, service)] = (client, expires)
+            return client
+
+    def _session(self, org, now):
+        session = self._sessions.get(org.name)
+        if session and now < session[1]:
+            return session
+        if self._sts is None:
+            self._sts = boto3.client("sts")
+        credentials = self._sts.assume_role(
+            RoleArn=org.role_arn,
+            RoleSessionName=f"accfactory-{org.name}",
+            DurationSeconds=SESSION_SECONDS,
+        )["Credentials"]
+        session = (
+            {
+                "aws_access_key_id": credentials["AccessKeyId"],
+                "aws_secret_access_key": credentials["SecretAccessKey"],
+                "aws_session_token": credentials["SessionToken"],
+            },
+            credentials["Expiration"].timestamp() - REFRESH_MARGIN_SECONDS,
+        )
+        self._sessions[org.name] = session
+        return session
@@ -0,0 +1,225 @@
+"""Pool de contas pré-provisionadas (entrega de conta em segundos).
+
+Com ``ACCOUNT_POOL_SIZE > 0`` a fábrica mantém contas já criadas pelo Control
+Tower numa OU de espera (``ACCOUNT_POOL_OU``). Cada membro do pool é um item
+``PK = POOL#default`` / ``SK = <e-mail do pool>`` na tabela de controle:
+
+- ``PROVISIONING``: pedido de reposição criado, passando pelo workflow normal
+  (o registro na tabela de contas tem ``Pooled = true``);
+- ``READY``: conta pronta (``Status=Pooled`` na tabela de contas), disponível
+  para um POST.
+
+O ``claim`` é uma transação única: remove o membro ``READY`` e o registro
+``Pooled`` e grava o registro do solicitante já com o ``AccountId``. O restante
+(troca de OU, nome, tags e usuário SSO) é feito pela Lambda ``account_pool``,
+que também repõe o pool.
+"""
+
+import os
+import re
+import uuid
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+
+from accfactory import metrics
+from accfactory.export import plain
+
+POOL_PK = "POOL#default"
+POOL_SIZE = int(os.environ.get("ACCOUNT_POOL_SIZE", "0"))
+POOL_OU = os.environ.get("ACCOUNT_POOL_OU", "Pool")
+# Ex.: "aws-pool+{id}@corp.com" (o Control Tower exige um e-mail único por conta)
+EMAIL_TEMPLATE = os.environ.get("ACCOUNT_POOL_EMAIL_TEMPLATE", "")
+# OUs atendidas pelo pool (vazio = qualquer OU)
+ELIGIBLE_OUS = {
+    ou.strip().lower()
+    for ou in os.environ.get("ACCOUNT_POOL_OUS", "").split(",")
+    if ou.strip()
+}
+
+PROVISIONING, READY = "PROVISIONING", "READY"
+POOLED = "Pooled"  # Status do registro na tabela de contas
+CLAIMING = "Claiming"
+
+
+class AccountExists(Exception):
+    """O e-mail do POST já tem registro (fora de ``FAILED``)."""
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _key(email):
+    return {"PK": {"S": POOL_PK}, "SK": {"S": email}}
+
+
+def enabled():
+    return POOL_SIZE > 0 and bool(EMAIL_TEMPLATE)
+
+
+def eligible(body):
+    """True se o POST pode ser atendido pelo pool (``"UsePool": false`` desliga)."""
+    if not enabled() or body.get("UsePool") is False:
+        return False
+    return not ELIGIBLE_OUS or body.get("OrgUnit", "").strip().lower() in ELIGIBLE_OUS
+
+
+def is_pool_email(email):
+    """E-mails gerados pelo template (usado pelo bootstrap para ignorar o pool)."""
+    if not EMAIL_TEMPLATE:
+        return False
+    pattern = re.escape(EMAIL_TEMPLATE).replace(re.escape("{id}"), r"[0-9a-f]+")
+    return re.fullmatch(pattern, email.lower()) is not None
+
+
+def new_request(owner):
+    """Registro de reposição (tabela de contas) para o workflow normal."""
+    pool_id = uuid.uuid4().hex[:10]
+    now = _now_iso()
+    return {
+        "AccountEmail": EMAIL_TEMPLATE.format(id=pool_id).lower(),
+        "AccountName": f"pool-{pool_id}",
+        "OrgUnit": POOL_OU,
+        "SSOUserEmail": owner["email"],
+        "SSOUserFirstName": owner["first_name"],
+        "SSOUserLastName": owner["last_name"],
+        "Status": "Requested",
+        "Pooled": True,
+        "RequestID": str(uuid.uuid4()),
+        "CreatedAt": now,
+        "UpdatedAt": now,
+        "LastUpdateDate": now,
+    }
+
+
+# ---------------- Membros ----------------
+def members(dynamo_client, table_name):
+    """Membros do pool (mais antigos primeiro)."""
+    kwargs = {
+        "TableName": table_name,
+        "KeyConditionExpression": "PK = :pk",
+        "ExpressionAttributeValues": {":pk": {"S": POOL_PK}},
+        "ConsistentRead": True,
+    }
+    found = []
+    while True:
+        response = dynamo_client.query(**kwargs)
+        for item in response.get("Items", []):
+            member = {name: plain(value) for name, value in item.items()}
+            member["AccountEmail"] = member.pop("SK")
+            member.pop("PK", None)
+            found.append(member)
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    found.sort(key=lambda member: member.get("ReadyAt") or member["CreatedAt"])
+    ready = sum(member["State"] == READY for member in found)
+    metrics.put_metric("PoolReady", ready, unit="None")
+    return found
+
+
+def register(dynamo_client, table_name, email, account_name):
+    dynamo_client.put_item(
+        TableName=table_name,
+        Item={
+            **_key(email),
+            "State": {"S": PROVISIONING},
+            "AccountName": {"S": account_name},
+            "CreatedAt": {"S": _now_iso()},
+        },
+    )
+
+
+def mark_ready(dynamo_client, table_name, email, account_id):
+    dynamo_client.update_item(
+        TableName=table_name,
+        Key=_key(email),
+        UpdateExpression="SET #state = :ready, AccountId = :id, ReadyAt = :now",
+        ExpressionAttributeNames={"#state": "State"},
+        ExpressionAttributeValues={
+            ":ready": {"S": READY},
+            ":id": {"S": account_id},
+            ":now": {"S": _now_iso()},
+        },
+    )
+
+
+def drop(dynamo_client, table_name, email):
+    """Remove o membro cujo provisionamento falhou (o registro fica FAILED)."""
+    dynamo_client.delete_item(TableName=table_name, Key=_key(email))
+
+
+# ---------------- Claim ----------------
+def _typed(value):
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, list):
+        return {"L": [_typed(v) for v in value]}
+    if isinstance(value, dict):
+        return {"M": {k: _typed(v) for k, v in value.items()}}
+    return {"S": str(value)}
+
+
+def claim(dynamo_client, control_table, accounts_table, record):
+    """Entrega uma conta ``READY`` para ``record``; retorna o membro ou None.
+
+    Remove o membro e o registro ``Pooled`` e grava ``record`` (com
+    ``AccountId``, ``PoolEmail`` e ``Status=Claiming``) numa única transação.
+    Lança ``AccountExists`` se o e-mail do POST já tiver registro ativo.
+    """
+    for member in members(dynamo_client, control_table):
+        if member["State"] != READY:
+            continue
+        item = {
+            **record,
+            "AccountId": member["AccountId"],
+            "PoolEmail": member["AccountEmail"],
+            "Status": CLAIMING,
+        }
+        try:
+            dynamo_client.transact_write_items(
+                TransactItems=[
+                    {
+                        "Delete": {
+                            "TableName": control_table,
+                            "Key": _key(member["AccountEmail"]),
+                            "ConditionExpression": "#state = :ready",
+                            "ExpressionAttributeNames": {"#state": "State"},
+                            "ExpressionAttributeValues": {":ready": {"S": READY}},
+                        }
+                    },
+                    {
+                        "Delete": {
+                            "TableName": accounts_table,
+                            "Key": {"AccountEmail": {"S": member["AccountEmail"]}},
+                            "ConditionExpression": "#status = :pooled",
+                            "ExpressionAttributeNames": {"#status": "Status"},
+                            "ExpressionAttributeValues": {":pooled": {"S": POOLED}},
+                        }
+                    },
+                    {
+                        "Put": {
+                            "TableName": accounts_table,
+                            "Item": {k: _typed(v) for k, v in item.items()},
+                            "ConditionExpression": (
+                                "attribute_not_exists(AccountEmail) "
+                                "OR #status = :failed"
+                            ),
+                            "ExpressionAttributeNames": {"#status": "Status"},
+                            "ExpressionAttributeValues": {":failed": {"S": "FAILED"}},
+                        }
+                    },
+                ]
+            )
+        except ClientError as error:
+            if error.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            reasons = error.response.get("CancellationReasons") or []
+            if len(reasons) == 3 and reasons[2].get("Code") == "ConditionalCheckFailed":
+                raise AccountExists(record["AccountEmail"]) from error
+            continue  # outro POST levou este membro: tenta o próximo
+        metrics.put_metric("PoolClaims", Result="claimed")
+        return item
+    metrics.put_metric("PoolClaims", Result="empty")
+    return None
@@ -0,0 +1,119 @@
+"""Respostas JSON do API Gateway com projeção de campos e compressão gzip.
+
+O corpo é serializado uma única vez com ``JSONEncoder.iterencode``: os pedaços
+vão direto para o compressor (``zlib`` com cabeçalho gzip) assim que passam do
+limite ``GZIP_MIN_BYTES``, sem montar a string completa antes de comprimir.
+Respostas menores que o limite, ou para clientes sem ``Accept-Encoding: gzip``,
+saem como texto puro.
+"""
+
+import base64
+import json
+import os
+import re
+import zlib
+from decimal import Decimal
+
+GZIP_MIN_BYTES = int(os.environ.get("GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+
+_FIELD_RE = re.compile(r"^[A-Za-z][A-Za-z0-9_]{0,63}$")
+MAX_FIELDS = 32
+
+
+def _default(value):
+    # Números vindos do resource do DynamoDB chegam como Decimal.
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_ENCODER = json.JSONEncoder(default=_default)
+
+
+def get_header(event, name):
+    headers = event.get("headers") or {}
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def accepts_gzip(event):
+    """``True`` se o ``Accept-Encoding`` da requisição aceita gzip (q > 0)."""
+    header = get_header(event, "Accept-Encoding") or ""
+    for coding in header.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def parse_fields(raw):
+    """Converte ``fields=a,b`` em lista validada; ``ValueError`` se inválido."""
+    if not raw:
+        return None
+    fields = list(dict.fromkeys(f.strip() for f in raw.split(",") if f.strip()))
+    if not fields or len(fields) > MAX_FIELDS:
+        raise ValueError(f"fields must list between 1 and {MAX_FIELDS} attributes")
+    invalid = [f for f in fields if not _FIELD_RE.match(f)]
+    if invalid:
+        raise ValueError(f"Invalid fields: {', '.join(invalid)}")
+    return fields
+
+
+def projection(fields):
+    """Argumentos de ``ProjectionExpression`` (com aliases) para o DynamoDB."""
+    if not fields:
+        return {}
+    names = {f"#p{i}": field for i, field in enumerate(fields)}
+    return {
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+
+
+def json_response(status_code, payload, gzip=False, headers=None):
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    chunks = _ENCODER.iterencode(payload)
+    if not gzip:
+        return {"statusCode": status_code, "headers": headers, "body": "".join(chunks)}
+
+    headers["Vary"] = "Accept-Encoding"
+    pending, size = [], 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= GZIP_MIN_BYTES:
+            break
+    else:
+        # Abaixo do limite: gzip custaria mais CPU do que economiza em bytes.
+        return {"statusCode": status_code, "headers": headers, "body": "".join(pending)}
+
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    compressed = [compressor.compress("".join(pending).encode("utf-8"))]
+    for chunk in chunks:
+        compressed.append(compressor.compress(chunk.encode("utf-8")))
+    compressed.append(compressor.flush())
+    headers["Content-Encoding"] = "gzip"
+    return {
+        "statusCode": status_code,
+        "headers": headers,
+        "body": base64.b64encode(b"".join(compressed)).decode("ascii"),
+        "isBase64Encoded": True,
+    }
+
+
+def request_body(event):
+    """Corpo da requisição como texto (com binary media types ele chega em base64)."""
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body).decode("utf-8")
+    return body
@@ -0,0 +1,172 @@
+"""Índice invertido para busca por prefixo/aproximada em nomes e e-mails.
+
+Os valores de ``AccountName``, ``AccountEmail`` e ``SSOUserEmail`` são
+normalizados (minúsculas, sem acentos) e quebrados em tokens. Cada token gera
+três tipos de termos, gravados como postings na tabela de controle
+(``PK = SEARCH#<termo>``, ``SK = AccountEmail``):
+
+- ``W:<token>``   token completo (match exato)
+- ``P:<prefixo>`` prefixos do token (busca por prefixo, ex.: "paym")
+- ``T:<trigrama>`` trigramas do token (busca aproximada, tolera erros de digitação)
+
+O índice é mantido incrementalmente pelo ``stream_processor``: apenas a
+diferença entre os termos da imagem antiga e da nova é escrita.
+"""
+
+import logging
+import re
+import time
+import unicodedata
+from collections import defaultdict
+
+LOGGER = logging.getLogger(__name__)
+
+FIELDS = ("AccountName", "AccountEmail", "SSOUserEmail")
+PREFIX_MIN, PREFIX_MAX = 2, 16
+POSTINGS_PER_TERM = 200
+BATCH_SIZE = 25
+
+EXACT_SCORE, PREFIX_SCORE, TRIGRAM_SCORE = 3.0, 2.0, 1.0
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def trigrams(token):
+    return {token[i : i + 3] for i in range(len(token) - 2)}
+
+
+def terms_for_token(token):
+    terms = {f"W:{token}"}
+    for size in range(PREFIX_MIN, min(len(token), PREFIX_MAX) + 1):
+        terms.add(f"P:{token[:size]}")
+    terms.update(f"T:{gram}" for gram in trigrams(token))
+    return terms
+
+
+def terms_for_image(image):
+    """Termos de um item no formato low-level do DynamoDB (stream ou client)."""
+    terms = set()
+    if not image:
+        return terms
+    for field in FIELDS:
+        value = image.get(field, {}).get("S")
+        for token in tokenize(value):
+            terms |= terms_for_token(token)
+    return terms
+
+
+# ---------------- Manutenção ----------------
+def _posting_key(term, account_email):
+    return {"PK": {"S": f"SEARCH#{term}"}, "SK": {"S": account_email}}
+
+
+def _batch_write(dynamo_client, table_name, requests):
+    for start in range(0, len(requests), BATCH_SIZE):
+        pending = {table_name: requests[start : start + BATCH_SIZE]}
+        attempt = 0
+        while pending:
+            response = dynamo_client.batch_write_item(RequestItems=pending)
+            pending = response.get("UnprocessedItems") or {}
+            if pending:
+                attempt += 1
+                time.sleep(min(2.0, 0.05 * 2**attempt))
+
+
+def apply_records(dynamo_client, table_name, records):
+    """Consumer do ``stream_processor``: aplica a diferença de termos do lote."""
+    changes = {}
+    for record in records:
+        images = record.get("dynamodb", {})
+        old_image, new_image = images.get("OldImage"), images.get("NewImage")
+        email = (new_image or old_image or {}).get("AccountEmail", {}).get("S")
+        if not email:
+            continue
+        # Vários eventos do mesmo item no lote: vale a primeira imagem antiga
+        # e a última imagem nova.
+        first_old = changes.get(email, (old_image, None))[0]
+        changes[email] = (first_old, new_image)
+
+    requests = []
+    for email, (old_image, new_image) in changes.items():
+        old_terms, new_terms = terms_for_image(old_image), terms_for_image(new_image)
+        for term in old_terms - new_terms:
+            requests.append({"DeleteRequest": {"Key": _posting_key(term, email)}})
+        for term in new_terms - old_terms:
+            requests.append({"PutRequest": {"Item": _posting_key(term, email)}})
+
+    _batch_write(dynamo_client, table_name, requests)
+    return {"accounts": len(changes), "postings": len(requests)}
+
+
+def rebuild(dynamo_client, accounts_table, table_name):
+    """Indexa todo o inventário (carga inicial). Postings órfãos não são removidos."""
+    kwargs = {
+        "TableName": accounts_table,
+        "ProjectionExpression": ", ".join(FIELDS),
+    }
+    indexed = 0
+    while True:
+        response = dynamo_client.scan(**kwargs)
+        records = [{"dynamodb": {"NewImage": item}} for item in response["Items"]]
+        indexed += apply_records(dynamo_client, table_name, records)["accounts"]
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return {"indexed": indexed}
+
+
+# ---------------- Consulta ----------------
+def _postings(dynamo_client, table_name, term):
+    response = dynamo_client.query(
+        TableName=table_name,
+        KeyConditionExpression="PK = :pk",
+        ExpressionAttributeValues={":pk": {"S": f"SEARCH#{term}"}},
+        ProjectionExpression="SK",
+        Limit=POSTINGS_PER_TERM,
+    )
+    return [item["SK"]["S"] for item in response.get("Items", [])]
+
+
+def search(dynamo_client, table_name, query, limit=20):
+    """Retorna ``[(AccountEmail, score)]`` ordenado por qualidade do match.
+
+    Primeiro consulta apenas termos exatos e de prefixo (2 queries por token);
+    os trigramas só são consultados quando isso não preenche ``limit``.
+    """
+    tokens = [token for token in tokenize(query) if len(token) >= PREFIX_MIN]
+    scores = defaultdict(float)
+    for token in tokens:
+        exact = set(_postings(dynamo_client, table_name, f"W:{token}"))
+        for email in exact:
+            scores[email] += EXACT_SCORE
+        if len(token) <= PREFIX_MAX:
+            for email in _postings(dynamo_client, table_name, f"P:{token}"):
+                if email not in exact:
+                    scores[email] += PREFIX_SCORE
+
+    if len(scores) < limit:
+        for token in tokens:
+            grams = trigrams(token)
+            if not grams:
+                continue
+            hits = defaultdict(int)
+            for gram in grams:
+                for email in _postings(dynamo_client, table_name, f"T:{gram}"):
+                    hits[email] += 1
+            for email, count in hits.items():
+                similarity = count / len(grams)
+                # Exige metade dos trigramas para evitar ruído.
+                if similarity >= 0.5:
+                    scores[email] += TRIGRAM_SCORE * similarity
+
+    ranked = sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))
+    return ranked[:limit]
@@ -0,0 +1,107 @@
+"""Snapshots em ``/tmp`` dos caches de container (árvore de OUs, índice de
+contas do Organizations, ids do Account Factory).
+
+O ``/tmp`` sobrevive ao reinício do runtime dentro do mesmo ambiente de
+execução (timeout, erro no init, falta de memória), quando o estado em memória
+se perde; nesses casos o cache volta do disco em vez de refazer as chamadas ao
+Organizations/Service Catalog. Handlers empacotados na mesma função leem os
+mesmos arquivos.
+
+Formato de ``<SNAPSHOT_DIR>/<nome>.snap``: cabeçalho binário fixo (``HEADER``:
+magic, versão do formato, instante da gravação, tamanho e SHA-256 do payload)
+seguido do JSON compactado com zlib. ``load`` lê só o cabeçalho para decidir o
+TTL; o payload é lido e descompactado apenas quando o snapshot está válido.
+Versão diferente, checksum errado ou payload ilegível descartam o arquivo e o
+chamador recarrega do serviço. Nenhuma falha de disco chega ao chamador.
+
+Fora da Lambda (testes, scripts, simulador) os snapshots ficam desligados, a
+menos que ``SNAPSHOT_DIR`` seja definido.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import struct
+import tempfile
+import zlib
+
+from accfactory import metrics
+
+LOGGER = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR") or (
+    "/tmp/accfactory" if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") else ""
+)
+MAGIC = b"AFS"
+FORMAT_VERSION = 1
+# magic, versão, savedAt (epoch), tamanho do payload, sha256 do payload
+HEADER = struct.Struct(">3sBdI32s")
+
+
+def _path(name):
+    return os.path.join(SNAPSHOT_DIR, f"{name}.snap")
+
+
+def _record(name, result):
+    metrics.put_metric("SnapshotReads", Snapshot=name, Result=result)
+
+
+def save(name, value, now):
+    """Grava ``value`` (serializável em JSON) de forma atômica."""
+    if not SNAPSHOT_DIR:
+        return False
+    payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), 6)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, now, len(payload), hashlib.sha256(payload).digest()
+    )
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=SNAPSHOT_DIR, prefix=f".{name}.")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(header + payload)
+        os.replace(tmp, _path(name))
+    except OSError as e:
+        LOGGER.warning("Falha ao gravar snapshot %s: %s", name, e)
+        return False
+    return True
+
+
+def load(name, max_age, now, decode=None):
+    """``(valor, savedAt)`` se o snapshot existe e tem menos de ``max_age``s."""
+    if not SNAPSHOT_DIR:
+        return None
+    try:
+        with open(_path(name), "rb") as handle:
+            magic, version, saved_at, size, digest = HEADER.unpack(
+                handle.read(HEADER.size)
+            )
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"formato {magic!r} v{version}")
+            if not 0 <= now - saved_at < max_age:
+                _record(name, "stale")
+                return None
+            payload = handle.read(size)
+        if len(payload) != size or hashlib.sha256(payload).digest() != digest:
+            raise ValueError("checksum inválido")
+        value = json.loads(zlib.decompress(payload))
+        value = decode(value) if decode else value
+    except FileNotFoundError:
+        _record(name, "miss")
+        return None
+    except Exception as e:
+        LOGGER.warning("Snapshot %s descartado: %s", name, e)
+        _record(name, "corrupt")
+        discard(name)
+        return None
+    _record(name, "hit")
+    return value, saved_at
+
+
+def discard(name):
+    if not SNAPSHOT_DIR:
+        return
+    try:
+        os.remove(_path(name))
+    except OSError:
+        pass
@@ -0,0 +1,292 @@
+"""Rate limiter compartilhado para as APIs do Organizations e do Service Catalog.
+
+Cada container mantém um token bucket local por operação. Quando ``CONTROL_TABLE``
+está definido, os tokens são obtidos em pequenos lotes (leases) de um contador
+por janela de 1 segundo no DynamoDB, de forma que todas as Lambdas respeitam o
+mesmo orçamento de TPS da conta. Sem a tabela (ou se o DynamoDB falhar) o
+limiter degrada para o bucket local.
+
+Uso::
+
+    ORG_LIMITER = throttling.for_service("organizations")
+    roots = ORG_LIMITER.call(ORG.list_roots)
+    for page in ORG_LIMITER.paginate(ORG.list_accounts):
+        ...
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from accfactory import metrics
+
+LOGGER = logging.getLogger(__name__)
+
+CONTROL_TABLE = os.environ.get("CONTROL_TABLE")
+LEASE_SIZE = int(os.environ.get("RATE_LIMIT_LEASE_SIZE", "2"))
+
+THROTTLE_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+}
+
+Budget = namedtuple(
+    "Budget", ["rate", "burst", "max_attempts", "base_delay", "max_delay"]
+)
+
+# Orçamentos em chamadas por segundo, compartilhados por todos os containers.
+# A chave "<serviço>:<operação>" tem precedência sobre a chave do serviço. Um
+# serviço de outra organização ("organizations@<org>", ``accfactory.orgs``) tem
+# contador próprio e, sem chave específica, herda o orçamento do serviço.
+DEFAULT_BUDGETS = {
+    "organizations": Budget(
+        rate=4, burst=4, max_attempts=6, base_delay=0.25, max_delay=8.0
+    ),
+    "servicecatalog": Budget(
+        rate=4, burst=4, max_attempts=5, base_delay=0.5, max_delay=10.0
+    ),
+    "servicecatalog:provision_product": Budget(
+        rate=1, burst=1, max_attempts=4, base_delay=1.0, max_delay=20.0
+    ),
+    # Admissão da API (``accfactory.admission``): orçamento de cada chamador,
+    # a operação é o principal IAM. Sem retry: excedeu, a API responde 429.
+    "caller-read": Budget(
+        rate=10, burst=20, max_attempts=1, base_delay=0.0, max_delay=1.0
+    ),
+    "caller-write": Budget(
+        rate=2, burst=4, max_attempts=1, base_delay=0.0, max_delay=1.0
+    ),
+}
+
+
+def _load_budgets():
+    """Aplica sobre os defaults os overrides de ``RATE_LIMIT_BUDGETS`` (JSON)."""
+    budgets = dict(DEFAULT_BUDGETS)
+    raw = os.environ.get("RATE_LIMIT_BUDGETS")
+    if not raw:
+        return budgets
+    try:
+        overrides = json.loads(raw)
+    except json.JSONDecodeError:
+        LOGGER.warning("RATE_LIMIT_BUDGETS inválido, usando defaults")
+        return budgets
+    for key, values in overrides.items():
+        service = key.split(":", 1)[0]
+        base = (
+            budgets.get(key)
+            or budgets.get(service)
+            or budgets.get(_base(service))
+            or DEFAULT_BUDGETS["organizations"]
+        )
+        budgets[key] = base._replace(**values)
+    return budgets
+
+
+def _base(service):
+    """Serviço sem o sufixo da organização (``organizations@prod``)."""
+    return service.split("@", 1)[0]
+
+
+class ThrottledError(Exception):
+    """Orçamento de tentativas esgotado para uma operação limitada."""
+
+    def __init__(self, service, operation, retry_after=1):
+        super().__init__(f"Limite de requisições excedido para {service}:{operation}")
+        self.service = service
+        self.operation = operation
+        self.retry_after = retry_after
+
+
+def is_throttle_error(error):
+    if not isinstance(error, ClientError):
+        return False
+    return error.response.get("Error", {}).get("Code") in THROTTLE_CODES
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        service,
+        table_name=CONTROL_TABLE,
+        budgets=None,
+        dynamo_client=None,
+        clock=time.time,
+        sleep=time.sleep,
+    ):
+        self.service = service
+        self.table_name = table_name
+        self.budgets = budgets if budgets is not None else _load_budgets()
+        self._dynamo = dynamo_client
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def budget(self, operation):
+        base = _base(self.service)
+        for key in (f"{self.service}:{operation}", self.service, f"{base}:{operation}"):
+            if key in self.budgets:
+                return self.budgets[key]
+        return self.budgets[base]
+
+    # ---------------- API pública ----------------
+    def acquire(self, operation):
+        """Bloqueia até obter um token para a operação (com backoff e jitter)."""
+        budget = self.budget(operation)
+        for attempt in range(budget.max_attempts):
+            wait = self._take(operation, budget)
+            if not wait:
+                return
+            metrics.put_metric(
+                "ClientThrottleEvents", Service=self.service, Operation=operation
+            )
+            self._sleep(wait + self._jitter(budget, attempt))
+        raise ThrottledError(self.service, operation, retry_after=1)
+
+    def try_acquire(self, operation):
+        """Versão sem espera do ``acquire``: 0 ou os segundos até o próximo token."""
+        return self._take(operation, self.budget(operation))
+
+    def call(self, func, **kwargs):
+        """Executa ``func(**kwargs)`` respeitando o orçamento da operação.
+
+        Erros de throttling do serviço são repetidos com backoff exponencial e
+        jitter; ao esgotar as tentativas é lançado ``ThrottledError``.
+        """
+        operation = func.__name__
+        budget = self.budget(operation)
+        last_error = None
+        for attempt in range(budget.max_attempts):
+            self.acquire(operation)
+            try:
+                return func(**kwargs)
+            except ClientError as error:
+                if not is_throttle_error(error):
+                    raise
+                last_error = error
+                metrics.put_metric(
+                    "ThrottleEvents", Service=self.service, Operation=operation
+                )
+                self._sleep(self._jitter(budget, attempt))
+        raise ThrottledError(
+            self.service, operation, retry_after=int(budget.max_delay)
+        ) from last_error
+
+    def paginate(self, func, token_key="NextToken", next_token_key=None, **kwargs):
+        """Equivalente aos paginators do boto3, com cada página limitada."""
+        next_token_key = next_token_key or token_key
+        while True:
+            page = self.call(func, **kwargs)
+            yield page
+            token = page.get(next_token_key)
+            if not token:
+                return
+            kwargs[token_key] = token
+
+    # ---------------- Tokens ----------------
+    def _take(self, operation, budget):
+        """Consome um token. Retorna 0 em caso de sucesso ou o tempo de espera."""
+        with self._lock:
+            now = self._clock()
+            bucket = self._buckets.setdefault(
+                operation,
+                {
+                    "tokens": budget.burst,
+                    "updated": now,
+                    "window": None,
+                    "exhausted": False,
+                },
+            )
+
+            if self.table_name:
+                window = int(now)
+                if bucket["window"] == window:
+                    if bucket["tokens"] >= 1:
+                        bucket["tokens"] -= 1
+                        return 0
+                    # Janela já esgotada no contador: não repete o lease
+                    if bucket["exhausted"]:
+                        return window + 1 - now
+                granted = self._lease(operation, budget, window)
+                if granted is not None:
+                    bucket.update(
+                        tokens=granted,
+                        window=window,
+                        updated=now,
+                        exhausted=not granted,
+                    )
+                    if granted >= 1:
+                        bucket["tokens"] -= 1
+                        return 0
+                    return window + 1 - now
+                # DynamoDB indisponível: segue com o bucket local.
+                bucket["window"] = None
+
+            elapsed = now - bucket["updated"]
+            bucket["tokens"] = min(
+                budget.burst, bucket["tokens"] + elapsed * budget.rate
+            )
+            bucket["updated"] = now
+            if bucket["tokens"] >= 1:
+                bucket["tokens"] -= 1
+                return 0
+            return (1 - bucket["tokens"]) / budget.rate
+
+    def _lease(self, operation, budget, window):
+        """Reserva tokens da janela atual no contador compartilhado do DynamoDB."""
+        size = max(1, min(LEASE_SIZE, budget.rate))
+        while size >= 1:
+            try:
+                self._client().update_item(
+                    TableName=self.table_name,
+                    Key={
+                        "PK": {"S": f"RATE#{self.service}:{operation}"},
+                        "SK": {"S": str(window)},
+                    },
+                    UpdateExpression="ADD #used :n SET #exp = :exp",
+                    ConditionExpression="attribute_not_exists(#used) OR #used <= :max",
+                    ExpressionAttributeNames={"#used": "Used", "#exp": "ExpiresAt"},
+                    ExpressionAttributeValues={
+                        ":n": {"N": str(size)},
+                        ":max": {"N": str(budget.rate - size)},
+                        ":exp": {"N": str(window + 60)},
+                    },
+                )
+                return size
+            except ClientError as error:
+                code = error.response.get("Error", {}).get("Code")
+                if code != "ConditionalCheckFailedException":
+                    LOGGER.warning("Falha no lease de rate limit: %s", error)
+                    return None
+                size = size // 2
+            except Exception as error:
+                LOGGER.warning("Falha no lease de rate limit: %s", error)
+                return None
+        return 0
+
+    def _jitter(self, budget, attempt):
+        return random.uniform(0, min(budget.max_delay, budget.base_delay * 2**attempt))
+
+    def _client(self):
+        if self._dynamo is None:
+            self._dynamo = boto3.client("dynamodb")
+        return self._dynamo
+
+
+_LIMITERS = {}
+
+
+def for_service(service):
+    """Limiter compartilhado pelo container para o serviço informado."""
+    if service not in _LIMITERS:
+        _LIMITERS[service] = RateLimiter(service)
+    return _LIMITERS[service]
@@ -0,0 +1,125 @@
+"""Linha do tempo de provisionamento gravada em cada registro da tabela de contas.
+
+Cada etapa grava (uma única vez, via ``if_not_exists``) o seu timestamp ISO8601
+em um atributo próprio do item. A partir desses atributos são calculadas as
+durações de cada etapa e seus percentis em uma janela de tempo.
+"""
+
+import logging
+import math
+from datetime import datetime, timezone
+
+LOGGER = logging.getLogger(__name__)
+
+# Atributos gravados por cada etapa, na ordem do fluxo.
+REQUESTED = "CreatedAt"  # API
+TRIGGERED = "TriggeredAt"  # trigger_sfn
+VALIDATED = "ValidatedAt"  # validate_fields
+PROVISION_SUBMITTED = "ProvisionSubmittedAt"  # provision_account
+# check_account_status, ao sair de UNDER_CHANGE
+PROVISION_COMPLETED = "ProvisionCompletedAt"
+ACTIVATED = "ActivatedAt"  # update_succeed_status
+
+STAGES = [
+    REQUESTED,
+    TRIGGERED,
+    VALIDATED,
+    PROVISION_SUBMITTED,
+    PROVISION_COMPLETED,
+    ACTIVATED,
+]
+
+# Nome da etapa -> (atributo inicial, atributo final)
+DURATIONS = {
+    "Admission": (REQUESTED, TRIGGERED),
+    "Validation": (TRIGGERED, VALIDATED),
+    "ProvisionSubmit": (VALIDATED, PROVISION_SUBMITTED),
+    "UnderChange": (PROVISION_SUBMITTED, PROVISION_COMPLETED),
+    "Finalization": (PROVISION_COMPLETED, ACTIVATED),
+    "EndToEnd": (REQUESTED, ACTIVATED),
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def mark(dynamo_client, table_name, account_email, stage, timestamp=None):
+    """Grava o timestamp da etapa no item, sem sobrescrever um valor anterior.
+
+    Falhas são apenas registradas no log: a linha do tempo nunca interrompe o fluxo.
+    """
+    try:
+        dynamo_client.update_item(
+            TableName=table_name,
+            Key={"AccountEmail": {"S": account_email}},
+            UpdateExpression="SET #stage = if_not_exists(#stage, :ts)",
+            ConditionExpression="attribute_exists(AccountEmail)",
+            ExpressionAttributeNames={"#stage": stage},
+            ExpressionAttributeValues={":ts": {"S": timestamp or now_iso()}},
+        )
+        return True
+    except Exception as error:
+        LOGGER.warning(
+            "Não foi possível registrar %s para %s: %s", stage, account_email, error
+        )
+    return False
+
+
+def assignment(attribute, name, value):
+    """Cláusula de ``SET``; atributos da linha do tempo não são sobrescritos.
+
+    Usada pelas etapas que gravam o timestamp junto com a própria atualização
+    (retries repetem o ``SET`` e não podem mover o instante da etapa).
+    """
+    if attribute in STAGES:
+        return f"{name} = if_not_exists({name}, {value})"
+    return f"{name} = {value}"
+
+
+def _parse(value):
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def stage_durations(item):
+    """Durações (segundos) das etapas já concluídas de um item."""
+    durations = {}
+    for name, (start_attr, end_attr) in DURATIONS.items():
+        start, end = _parse(item.get(start_attr)), _parse(item.get(end_attr))
+        if start and end and end >= start:
+            durations[name] = (end - start).total_seconds()
+    return durations
+
+
+def percentile(sorted_values, pct):
+    """Percentil pelo método nearest-rank sobre uma lista já ordenada."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(items):
+    """Percentis p50/p95/p99 por etapa para uma coleção de itens."""
+    samples = {name: [] for name in DURATIONS}
+    for item in items:
+        for name, seconds in stage_durations(item).items():
+            samples[name].append(seconds)
+
+    summary = {}
+    for name, values in samples.items():
+        values.sort()
+        summary[name] = {"count": len(values)}
+        for pct in PERCENTILES:
+            summary[name][f"p{pct}"] = percentile(values, pct)
+    return summary
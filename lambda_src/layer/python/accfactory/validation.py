@@ -0,0 +1,147 @@
+"""Regras de um pedido de conta, compartilhadas pela API e pelo ``validate_fields``.
+
+``FIELDS`` declara cada campo uma única vez (obrigatório, normalização,
+formato e tamanho); ``RULES`` é a versão compilada no import, com as
+expressões regulares prontas. A API roda ``validate`` antes de qualquer
+escrita e rejeita na hora (``400`` com todos os erros de uma vez), então um
+pedido inválido não grava registro nem inicia execução; o ``validate_fields``
+roda as mesmas regras dentro do workflow (registros gravados por outros
+caminhos e versões antigas da API). As normalizações são idempotentes: o item
+já normalizado pela API passa inalterado pelo workflow.
+
+Os limites de tamanho são os do ``CreateAccount`` do Organizations, que
+falharia só no provisionamento.
+"""
+
+import re
+from collections import namedtuple
+
+from accfactory import org_cache
+
+Field = namedtuple(
+    "Field",
+    ["name", "required", "normalize", "pattern", "length", "check"],
+    defaults=(True, None, None, None, None),
+)
+
+EMAIL_PATTERN = r"[\w.+-]+@[\w.-]+\.\w+"
+MISSING = "is required"
+MAX_TAGS = 50
+
+
+def format_name(value):
+    """Espaços colapsados e cada parte com a inicial maiúscula."""
+    return " ".join(part.capitalize() for part in value.split())
+
+
+def _lower(value):
+    return value.strip().lower()
+
+
+def _ou_path(value):
+    return value.strip().strip("/")
+
+
+def _strip(value):
+    return value.strip()
+
+
+def _tags(tags):
+    """``Tags`` opcional: lista de ``{Key, Value}`` (mesmo formato do PATCH em massa)."""
+    if not isinstance(tags, list) or not all(
+        isinstance(t, dict) and isinstance(t.get("Key"), str) and "Value" in t
+        for t in tags
+    ):
+        return "must be a list of {Key, Value}"
+    if len(tags) > MAX_TAGS:
+        return f"accepts at most {MAX_TAGS} tags"
+    if not all(0 < len(t["Key"].strip()) <= 128 for t in tags):
+        return "Key must have 1 to 128 characters"
+    return None
+
+
+def _tags_normalize(tags):
+    return [{"Key": t["Key"].strip(), "Value": str(t["Value"])} for t in tags]
+
+
+FIELDS = (
+    Field("AccountEmail", normalize=_lower, pattern=EMAIL_PATTERN, length=(6, 64)),
+    Field("AccountName", normalize=_lower, pattern=r"[\x20-\x7e]+", length=(1, 50)),
+    Field("OrgUnit", normalize=_ou_path, pattern=r"[^/]+(/[^/]+)*"),
+    Field("SSOUserEmail", normalize=_lower, pattern=EMAIL_PATTERN, length=(6, 128)),
+    Field("SSOUserFirstName", normalize=format_name, length=(1, 64)),
+    Field("SSOUserLastName", normalize=format_name, length=(1, 64)),
+    Field("Tags", required=False, normalize=_tags_normalize, check=_tags),
+    # Organização de destino explícita (``accfactory.orgs``); sem ela vale a OU
+    Field("Organization", required=False, normalize=_strip, length=(1, 64)),
+)
+
+
+def _compile(field):
+    """Regra pronta: ``(nome, obrigatório, fn(valor) -> (valor, erro))``."""
+    pattern = re.compile(field.pattern) if field.pattern else None
+    is_text = field.check is None
+
+    def apply(value):
+        if is_text and not isinstance(value, str):
+            return value, "must be a string"
+        if field.check:
+            error = field.check(value)
+            if error:
+                return value, error
+        if field.normalize:
+            value = field.normalize(value)
+        if field.length:
+            low, high = field.length
+            if not low <= len(value) <= high:
+                return value, f"must have {low} to {high} characters"
+        if pattern and not pattern.fullmatch(value):
+            return value, "invalid format"
+        return value, None
+
+    return field.name, field.required, apply
+
+
+RULES = tuple(_compile(field) for field in FIELDS)
+
+
+def validate(item, required=()):
+    """Normaliza ``item`` e retorna ``(item_normalizado, erros)``.
+
+    ``erros`` é a lista completa de ``{"field", "message"}`` (vazia se o item
+    é válido); campos fora das regras são copiados sem alteração.
+    ``required``: campos obrigatórios extras do chamador (ex.: ``RequestID``).
+    """
+    normalized = dict(item)
+    missing = [name for name in required if normalized.get(name) in (None, "", [])]
+    errors = []
+    for name, is_required, apply in RULES:
+        value = normalized.get(name)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            if is_required:
+                missing.append(name)
+            continue
+        normalized[name], error = apply(value)
+        if error:
+            errors.append({"field": name, "message": error})
+    errors[:0] = [{"field": name, "message": MISSING} for name in missing]
+    return normalized, errors
+
+
+def summary(errors):
+    """Mensagem única com todos os erros (``errorMessage`` e ``error`` da API)."""
+    missing = [e["field"] for e in errors if e["message"] == MISSING]
+    parts = [f"Missing fields: {', '.join(missing)}"] if missing else []
+    parts += [f"{e['field']} {e['message']}" for e in errors if e["message"] != MISSING]
+    return "; ".join(parts)
+
+
+def exists_in_organizations(org_client, limiter, item, scope=None):
+    """True se ``AccountName`` ou ``AccountEmail`` já existem na organização.
+
+    Usa o índice de contas em cache no container (``org_cache.account_index``);
+    ``ThrottledError`` é propagado, já que sem resposta do Organizations não dá
+    para afirmar que a conta não existe.
+    """
+    names, emails = org_cache.account_index(org_client, limiter, scope=scope)
+    return item["AccountName"] in names or item["AccountEmail"] in emails
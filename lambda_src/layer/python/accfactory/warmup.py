@@ -0,0 +1,58 @@
+"""Evento de warm-up para pré-carregar caches e conexões dos handlers.
+
+Cada handler declara um dicionário ``WARMERS`` (nome -> callable) e responde
+ao evento ``{"warmup": true}`` executando-os e retornando imediatamente::
+
+    if warmup.is_warmup(event):
+        return warmup.run(WARMERS)
+
+Em containers de provisioned concurrency o init já roda os warmers
+(``warmup.on_init``), de forma que a primeira requisição real depois de um
+scale-out encontra a árvore de OUs, os ids do catálogo e o índice de contas
+carregados e as conexões TLS abertas.
+"""
+
+import logging
+import os
+import time
+
+from accfactory import metrics
+
+LOGGER = logging.getLogger(__name__)
+
+WARMUP_KEY = "warmup"
+
+
+def is_warmup(event):
+    return isinstance(event, dict) and event.get(WARMUP_KEY) is True
+
+
+def run(warmers):
+    """Executa cada warmer (erros não interrompem os demais) e reporta tempos."""
+    started = time.perf_counter()
+    report = {}
+    for name, warmer in warmers.items():
+        step = time.perf_counter()
+        try:
+            warmer()
+            report[name] = {"ok": True}
+        except Exception as error:
+            LOGGER.warning("Warm-up de %s falhou: %s", name, error)
+            report[name] = {"ok": False, "error": str(error)}
+        report[name]["ms"] = round((time.perf_counter() - step) * 1000, 1)
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    metrics.put_metric(
+        "WarmupDuration",
+        duration_ms,
+        "Milliseconds",
+        Function=os.environ.get("AWS_LAMBDA_FUNCTION_NAME", "local"),
+    )
+    LOGGER.info("Warm-up concluído em %.1f ms: %s", duration_ms, report)
+    return {"warmed": report, "durationMs": duration_ms}
+
+
+def on_init(warmers):
+    """Roda os warmers no init de containers de provisioned concurrency."""
+    if os.environ.get("AWS_LAMBDA_INITIALIZATION_TYPE") == "provisioned-concurrency":
+        return run(warmers)
+    return None
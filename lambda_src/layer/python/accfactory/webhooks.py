@@ -0,0 +1,233 @@
+"""Webhooks de conclusão: o cliente é avisado em vez de fazer polling no GET.
+
+O POST aceita ``"Callback": {"Url": "https://...", "Secret": "..."}``. A
+configuração fica na tabela de controle (``PK = CALLBACK#<AccountEmail>``,
+``SK = -``), fora do registro da conta, para o segredo não aparecer em GET,
+busca ou export.
+
+O ``stream_processor`` (consumer ``webhooks``) separa os eventos que
+notificam — registro chegando a ``ACTIVE``, ``ERROR`` ou ``FAILED``, ou
+removido — e os repassa numa invocação assíncrona da Lambda
+``notify_webhooks``, que entrega um ``POST`` JSON para cada callback
+registrado; o stream continua com dois leitores e o processamento das visões
+não espera por HTTP. Com segredo, o corpo é assinado com HMAC-SHA256::
+
+    X-AccountFactory-Timestamp: <epoch>
+    X-AccountFactory-Signature: sha256=<hex(hmac(secret, "<epoch>.<corpo>"))>
+
+``X-AccountFactory-Delivery`` (id do evento do stream) permite ao cliente
+descartar entregas repetidas. Falhas de rede, ``429`` e ``5xx`` são repetidas
+com backoff exponencial e jitter; esgotadas as tentativas, a entrega vira um
+item ``PK = WEBHOOK#DLQ`` na tabela de controle, reenviado pelo evento
+``{"redeliver": true}``.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import random
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlparse
+
+import boto3
+
+from accfactory import metrics
+from accfactory.export import plain
+
+CALLBACK_PREFIX = "CALLBACK#"
+DLQ_PK = "WEBHOOK#DLQ"
+MAX_ATTEMPTS = int(os.environ.get("WEBHOOK_MAX_ATTEMPTS", "4"))
+TIMEOUT_SECONDS = float(os.environ.get("WEBHOOK_TIMEOUT_SECONDS", "5"))
+BASE_DELAY = 0.5
+MAX_DELAY = 8.0
+MAX_SECRET_LENGTH = 256
+# Lambda notify_webhooks (sem ela o consumer do stream não repassa nada)
+WEBHOOK_FUNCTION = os.environ.get("WEBHOOK_FUNCTION")
+_LAMBDA = None
+
+SIGNATURE_HEADER = "X-AccountFactory-Signature"
+TIMESTAMP_HEADER = "X-AccountFactory-Timestamp"
+DELIVERY_HEADER = "X-AccountFactory-Delivery"
+
+# Status do registro que disparam notificação (e o tipo do evento enviado)
+EVENTS = {
+    "ACTIVE": "account.active",
+    "ERROR": "account.error",
+    "FAILED": "account.failed",
+}
+REMOVED = "account.removed"
+
+
+# ---------------- Registro ----------------
+def parse_callback(body):
+    """``{"Url", "Secret"}`` validado a partir do corpo do POST (ou None)."""
+    callback = body.get("Callback")
+    if callback is None:
+        return None
+    if not isinstance(callback, dict) or not isinstance(callback.get("Url"), str):
+        raise ValueError("Callback deve ter Url")
+    url = callback["Url"].strip()
+    parsed = urlparse(url)
+    if parsed.scheme != "https" or not parsed.netloc:
+        raise ValueError("Callback.Url deve ser https")
+    secret = callback.get("Secret")
+    if secret is not None and (
+        not isinstance(secret, str) or not 0 < len(secret) <= MAX_SECRET_LENGTH
+    ):
+        raise ValueError(
+            f"Callback.Secret deve ter de 1 a {MAX_SECRET_LENGTH} caracteres"
+        )
+    return {"Url": url, "Secret": secret}
+
+
+def _key(email):
+    return {"PK": {"S": f"{CALLBACK_PREFIX}{email}"}, "SK": {"S": "-"}}
+
+
+def register(dynamo_client, table_name, email, callback):
+    item = {**_key(email), "Url": {"S": callback["Url"]}}
+    if callback.get("Secret"):
+        item["Secret"] = {"S": callback["Secret"]}
+    dynamo_client.put_item(TableName=table_name, Item=item)
+
+
+def lookup(dynamo_client, table_name, email):
+    item = dynamo_client.get_item(TableName=table_name, Key=_key(email)).get("Item")
+    if not item:
+        return None
+    return {"Url": item["Url"]["S"], "Secret": item.get("Secret", {}).get("S")}
+
+
+def forget(dynamo_client, table_name, email):
+    dynamo_client.delete_item(TableName=table_name, Key=_key(email))
+
+
+# ---------------- Eventos ----------------
+def event_for(record):
+    """``(email, evento)`` para um registro do stream, ou None se não notifica."""
+    data = record.get("dynamodb", {})
+    old = data.get("OldImage") or {}
+    if record.get("eventName") == "REMOVE":
+        email = old.get("AccountEmail", {}).get("S")
+        return (email, _payload(REMOVED, old, record)) if email else None
+    new = data.get("NewImage") or {}
+    status = new.get("Status", {}).get("S")
+    if status not in EVENTS or old.get("Status", {}).get("S") == status:
+        return None
+    return new["AccountEmail"]["S"], _payload(EVENTS[status], new, record)
+
+
+def _payload(event_type, image, record):
+    account = {name: plain(value) for name, value in image.items()}
+    # Campos internos do workflow não interessam ao cliente
+    for name in ("PRINCIPAL_ARN", "PP_Message"):
+        account.pop(name, None)
+    return {
+        "id": record.get("eventID"),
+        "type": event_type,
+        "occurredAt": int(
+            record.get("dynamodb", {}).get("ApproximateCreationDateTime", time.time())
+        ),
+        "account": account,
+    }
+
+
+def apply_records(dynamo_client, table_name, records):
+    """Consumer do ``stream_processor``: repassa os eventos ao notificador."""
+    global _LAMBDA
+    events = [event for event in map(event_for, records) if event]
+    if not events or not WEBHOOK_FUNCTION:
+        return {"forwarded": 0}
+    if _LAMBDA is None:
+        _LAMBDA = boto3.client("lambda")
+    _LAMBDA.invoke(
+        FunctionName=WEBHOOK_FUNCTION,
+        InvocationType="Event",
+        Payload=json.dumps({"events": events}, default=str).encode("utf-8"),
+    )
+    return {"forwarded": len(events)}
+
+
+# ---------------- Entrega ----------------
+def sign(secret, timestamp, body):
+    digest = hmac.new(
+        secret.encode("utf-8"), f"{timestamp}.".encode("utf-8") + body, hashlib.sha256
+    ).hexdigest()
+    return f"sha256={digest}"
+
+
+def verify(secret, timestamp, body, signature):
+    """Checagem do lado do cliente (usada também nos testes)."""
+    return hmac.compare_digest(sign(secret, timestamp, body), signature)
+
+
+def _retryable(error):
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code == 429 or error.code >= 500
+    return isinstance(error, (urllib.error.URLError, TimeoutError, OSError))
+
+
+def deliver(callback, payload, sleep=time.sleep, clock=time.time):
+    """Entrega ``payload``; retorna ``(ok, tentativas, erro)``."""
+    body = json.dumps(payload, default=str).encode("utf-8")
+    error = None
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        timestamp = str(int(clock()))
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "AccountFactory-Webhooks",
+            TIMESTAMP_HEADER: timestamp,
+        }
+        if payload.get("id"):
+            headers[DELIVERY_HEADER] = payload["id"]
+        if callback.get("Secret"):
+            headers[SIGNATURE_HEADER] = sign(callback["Secret"], timestamp, body)
+        request = urllib.request.Request(
+            callback["Url"], data=body, headers=headers, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=TIMEOUT_SECONDS):
+                pass
+            metrics.put_metric("WebhookDeliveries", Result="delivered")
+            return True, attempt, None
+        except Exception as exc:
+            error = exc
+            if not _retryable(exc) or attempt == MAX_ATTEMPTS:
+                break
+            sleep(random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2**attempt)))
+    metrics.put_metric("WebhookDeliveries", Result="failed")
+    return False, attempt, str(error)
+
+
+def dead_letter(dynamo_client, table_name, email, callback, payload, error, attempts):
+    """Guarda a entrega que falhou para reenvio (``{"redeliver": true}``)."""
+    dynamo_client.put_item(
+        TableName=table_name,
+        Item={
+            "PK": {"S": DLQ_PK},
+            "SK": {"S": f"{payload.get('occurredAt', 0):012d}#{payload.get('id')}"},
+            "AccountEmail": {"S": email},
+            "Url": {"S": callback["Url"]},
+            "Payload": {"S": json.dumps(payload, default=str)},
+            "Attempts": {"N": str(attempts)},
+            "LastError": {"S": error or ""},
+        },
+    )
+    metrics.put_metric("WebhookDeadLetters")
+
+
+def dead_letters(dynamo_client, table_name):
+    kwargs = {
+        "TableName": table_name,
+        "KeyConditionExpression": "PK = :pk",
+        "ExpressionAttributeValues": {":pk": {"S": DLQ_PK}},
+    }
+    while True:
+        response = dynamo_client.query(**kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
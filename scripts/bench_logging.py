@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Mede o overhead de logging por invocação: formato antigo vs ``accfactory.logs``.
+
+O cenário reproduz o handler da API (evento do API Gateway com headers) e o
+``provision_account`` (item + resposta do boto). Os logs vão para um stream
+descartável, então o número medido é o custo de CPU de formatar/serializar.
+
+Exemplo:
+    python3 scripts/bench_logging.py --iterations 20000 --sample-rate 0.01
+"""
+
+import argparse
+import io
+import json
+import logging
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda_src/layer/python"))
+
+from accfactory import logs  # noqa: E402
+
+EVENT = {
+    "resource": "/accounts",
+    "httpMethod": "POST",
+    "headers": {f"X-Header-{i}": "x" * 40 for i in range(25)},
+    "requestContext": {"requestId": "c6af9ac6-7b61-11e6-9a41-93e8deadbeef"},
+    "body": json.dumps(
+        {
+            "AccountEmail": "payments-prod@corp.com",
+            "AccountName": "payments-prod",
+            "OrgUnit": "Engineering/Platform",
+            "SSOUserEmail": "owner@corp.com",
+            "SSOUserFirstName": "Maria",
+            "SSOUserLastName": "Silva",
+        }
+    ),
+}
+RESPONSE = {
+    "RecordDetail": {
+        "ProvisionedProductId": "pp-abc123",
+        "CreatedTime": datetime.now(timezone.utc),
+        "RecordErrors": [],
+        "RecordTags": [{"Key": f"k{i}", "Value": "v" * 30} for i in range(10)],
+    },
+    "ResponseMetadata": {"HTTPHeaders": {f"h{i}": "v" * 30 for i in range(10)}},
+}
+
+
+class Context:
+    aws_request_id = "bench"
+
+
+def _reset_root(formatter):
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(io.StringIO())
+    handler.setFormatter(formatter)
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    return handler
+
+
+def legacy_handler(event, context):
+    logger = logging.getLogger()
+    logger.info(f"HTTP Method: {event['httpMethod']}")
+    logger.info(f"Event received: {json.dumps(event)}")
+    logger.info(f"ProvisionProductResponse: {RESPONSE}")
+    return {"statusCode": 201}
+
+
+@logs.handler
+def structured_handler(event, context):
+    logger = logging.getLogger()
+    logger.info("%s %s", event["httpMethod"], event["resource"])
+    logs.debug_payload(logger, "Event received", event)
+    logs.debug_payload(logger, "ProvisionProductResponse", RESPONSE)
+    return {"statusCode": 201}
+
+
+def _measure(func, iterations):
+    seconds = timeit.timeit(lambda: func(EVENT, Context()), number=iterations)
+    return seconds / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    handler = _reset_root(logging.Formatter("[%(levelname)s] %(message)s"))
+    legacy = _measure(legacy_handler, args.iterations)
+    legacy_bytes = handler.stream.tell() / args.iterations
+
+    results = {"legacy": (legacy, legacy_bytes)}
+    for rate in (0.0, args.sample_rate, 1.0):
+        handler = _reset_root(logs.JsonFormatter())
+        sampled = logs.handler(structured_handler.__wrapped__, sample_rate=rate)
+        elapsed = _measure(sampled, args.iterations)
+        results[f"structured (sample={rate:g})"] = (
+            elapsed,
+            handler.stream.tell() / args.iterations,
+        )
+
+    print(f"{'cenário':<28}{'µs/invocação':>14}{'bytes/invocação':>18}")
+    for name, (elapsed, size) in results.items():
+        print(f"{name:<28}{elapsed:>14.1f}{size:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Exporta o inventário da tabela de contas para um arquivo local (NDJSON ou CSV).
+
+Exemplo:
+    python3 scripts/export_inventory.py --table accfactory-ddb-accounts \\
+        --format csv --segments 8 --out inventario.csv
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda_src/layer/python"))
+
+import boto3  # noqa: E402
+
+from accfactory import export  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table", default="accfactory-ddb-accounts")
+    parser.add_argument("--format", choices=export.FORMATS, default="ndjson")
+    parser.add_argument("--segments", type=int, default=export.DEFAULT_SEGMENTS)
+    parser.add_argument(
+        "--projection",
+        help="Atributos separados por vírgula (ex.: AccountEmail,Status)",
+    )
+    parser.add_argument("--out", required=True, help="Arquivo de destino")
+    args = parser.parse_args()
+
+    projection = args.projection.split(",") if args.projection else None
+    manifest = export.export_table(
+        boto3.client("dynamodb"),
+        args.table,
+        export.FileSink(args.out),
+        fmt=args.format,
+        segments=args.segments,
+        projection=projection,
+    )
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
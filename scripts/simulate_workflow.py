@@ -0,0 +1,807 @@
+#!/usr/bin/env python3
+"""Simulador local da Step Function de criação de contas (tempo virtual).
+
+Interpreta ``terraform/sfn_definition.json.tpl`` (Task, Choice, Wait, Pass,
+Succeed, Fail, Retry, Catch e ResultPath) e executa os handlers reais de
+``lambda_src/accounts`` contra fakes em memória de DynamoDB, Organizations e
+Service Catalog. O provisionamento do Control Tower é modelado como uma fila
+FIFO com ``--ct-concurrency`` slots e duração sorteada de uma distribuição
+triangular (``--provision-minutes min,moda,max``).
+
+O relógio é virtual: centenas de execuções concorrentes levando horas de
+"tempo de parede" são simuladas em segundos. Esperas dentro dos handlers
+(rate limiter, ``sleep`` do provision) avançam o relógio da própria task.
+
+Com ``--batch-size N`` os pedidos são agrupados (como o trigger faz com o lote
+do stream) e executados pela state machine de lote
+(``terraform/sfn_batch_definition.json.tpl``, com estados Map inline).
+
+Exemplo:
+    python3 scripts/simulate_workflow.py --requests 300 --arrival-per-hour 120 \\
+        --ct-concurrency 5 --provision-minutes 18,25,40 --seed 7
+"""
+
+import argparse
+import contextlib
+import heapq
+import io
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+import uuid
+from collections import Counter
+from copy import deepcopy
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFINITION_PATH = ROOT / "terraform" / "sfn_definition.json.tpl"
+BATCH_DEFINITION_PATH = ROOT / "terraform" / "sfn_batch_definition.json.tpl"
+
+# ---------------- Relógio virtual ----------------
+
+
+class VirtualClock:
+    """Tempo da simulação. ``offset`` acumula esperas feitas dentro de uma task."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.offset = 0.0
+
+    def time(self):
+        return self.now + self.offset
+
+    def sleep(self, seconds):
+        self.offset += max(0.0, seconds)
+
+
+# ---------------- Fakes ----------------
+
+
+def _client_error(code, operation):
+    from botocore.exceptions import ClientError
+
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+def _split_top_level(expression):
+    parts, depth, current = [], 0, ""
+    for char in expression:
+        depth += char == "("
+        depth -= char == ")"
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+class FakeDynamoDB:
+    """Tabela de contas (chave ``AccountEmail``) com o subconjunto usado pelos handlers."""
+
+    def __init__(self):
+        self.items = {}
+
+    def _key(self, key):
+        return key["AccountEmail"]["S"]
+
+    def get_item(self, TableName, Key, **kwargs):
+        item = self.items.get(self._key(Key))
+        return {"Item": deepcopy(item)} if item else {}
+
+    def put_item(self, TableName, Item, ConditionExpression=None, **kwargs):
+        key = self._key(Item)
+        if ConditionExpression and "attribute_not_exists" in ConditionExpression:
+            if key in self.items:
+                raise _client_error("ConditionalCheckFailedException", "PutItem")
+        self.items[key] = deepcopy(Item)
+        return {}
+
+    def _matches(self, key, condition, names, values):
+        """Avalia ``attribute_exists(...)`` e ``a <> :v`` unidos por AND."""
+        item = self.items.get(key)
+        for part in condition.split(" AND "):
+            part = part.strip()
+            if part == "attribute_exists(AccountEmail)":
+                if item is None:
+                    return False
+                continue
+            match = re.fullmatch(r"(\S+) <> (\S+)", part)
+            if not match:
+                raise ValueError(f"ConditionExpression não suportada: {part}")
+            attribute = names.get(match.group(1), match.group(1))
+            if item is not None and item.get(attribute) == values[match.group(2)]:
+                return False
+        return True
+
+    def delete_item(self, TableName, Key, **kwargs):
+        self.items.pop(self._key(Key), None)
+        return {}
+
+    def update_item(
+        self,
+        TableName,
+        Key,
+        UpdateExpression,
+        ConditionExpression=None,
+        ExpressionAttributeNames=None,
+        ExpressionAttributeValues=None,
+        **kwargs,
+    ):
+        key = self._key(Key)
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        if ConditionExpression and not self._matches(
+            key, ConditionExpression, names, values
+        ):
+            raise _client_error("ConditionalCheckFailedException", "UpdateItem")
+        item = self.items.setdefault(key, deepcopy(Key))
+        assert UpdateExpression.startswith("SET "), UpdateExpression
+        for clause in _split_top_level(UpdateExpression[4:]):
+            target, expression = (side.strip() for side in clause.split("=", 1))
+            attribute = names.get(target, target)
+            match = re.match(r"if_not_exists\((\S+),\s*(\S+)\)", expression)
+            if match:
+                if attribute not in item:
+                    item[attribute] = values[match.group(2)]
+            else:
+                item[attribute] = values[expression]
+        return {"Attributes": deepcopy(item)}
+
+
+class FakeOrganizations:
+    PAGE_SIZE = 20
+
+    def __init__(self):
+        self.accounts = []
+
+    def list_accounts(self, NextToken=None):
+        start = int(NextToken or 0)
+        page = {"Accounts": self.accounts[start : start + self.PAGE_SIZE]}
+        if start + self.PAGE_SIZE < len(self.accounts):
+            page["NextToken"] = str(start + self.PAGE_SIZE)
+        return page
+
+
+class FakeServiceCatalog:
+    """Account Factory do Control Tower: fila FIFO com ``concurrency`` slots."""
+
+    BUSY_MESSAGE = "Another account is being provisioned. Try again later."
+
+    def __init__(
+        self,
+        clock,
+        organizations,
+        rng,
+        concurrency,
+        minutes,
+        failure_rate,
+        conflict_rate=0.0,
+    ):
+        self.clock = clock
+        self.organizations = organizations
+        self.rng = rng
+        self.minutes = minutes
+        self.failure_rate = failure_rate
+        self.conflict_rate = conflict_rate
+        self.slots = [0.0] * concurrency
+        self.principals = []
+        self.products = {}
+        self.tokens = {}
+        self._ids = itertools.count(1)
+
+    # --- catálogo ---
+    def search_products_as_admin(self, **kwargs):
+        summary = {"Name": "AWS Control Tower Account Factory", "ProductId": "prod-ct"}
+        return {"ProductViewDetails": [{"ProductViewSummary": summary}]}
+
+    def list_portfolios_for_product(self, **kwargs):
+        return {
+            "PortfolioDetails": [{"ProviderName": "AWS Control Tower", "Id": "port-ct"}]
+        }
+
+    def describe_product_as_admin(self, **kwargs):
+        return {"ProvisioningArtifactSummaries": [{"Id": "pa-1"}]}
+
+    def list_principals_for_portfolio(self, **kwargs):
+        return {"Principals": [{"PrincipalARN": arn} for arn in self.principals]}
+
+    def associate_principal_with_portfolio(self, PrincipalARN, **kwargs):
+        self.principals.append(PrincipalARN)
+        return {}
+
+    # --- provisionamento ---
+    def provision_product(self, ProvisionToken, ProvisioningParameters, **kwargs):
+        if ProvisionToken in self.tokens:
+            pp_id = self.tokens[ProvisionToken]
+        else:
+            pp_id = f"pp-{next(self._ids):05d}"
+            self.tokens[ProvisionToken] = pp_id
+            submitted = self.clock.time()
+            params = {p["Key"]: p["Value"] for p in ProvisioningParameters}
+            if self.conflict_rate and self.rng.random() < self.conflict_rate:
+                # Recusado pelo Control Tower sem ocupar slot: ERROR em 1 minuto.
+                self.products[pp_id] = {
+                    "submitted": submitted,
+                    "started": submitted,
+                    "finished": submitted + 60,
+                    "failed": True,
+                    "conflict": True,
+                    "params": params,
+                    "account_id": None,
+                }
+                return {
+                    "RecordDetail": {
+                        "ProvisionedProductId": pp_id,
+                        "RecordId": f"rec-{pp_id}",
+                    }
+                }
+            low, mode, high = self.minutes
+            duration = self.rng.triangular(low, high, mode) * 60
+            free_at = heapq.heappop(self.slots)
+            started = max(submitted, free_at)
+            heapq.heappush(self.slots, started + duration)
+            self.products[pp_id] = {
+                "submitted": submitted,
+                "started": started,
+                "finished": started + duration,
+                "failed": self.rng.random() < self.failure_rate,
+                "params": params,
+                "account_id": f"{next(self._ids):012d}",
+            }
+        return {
+            "RecordDetail": {"ProvisionedProductId": pp_id, "RecordId": f"rec-{pp_id}"}
+        }
+
+    def _status(self, pp_id):
+        product = self.products[pp_id]
+        if self.clock.time() < product["finished"]:
+            return "UNDER_CHANGE"
+        return "ERROR" if product["failed"] else "AVAILABLE"
+
+    def describe_provisioned_product(self, Id):
+        status = self._status(Id)
+        message = ""
+        if status == "ERROR":
+            conflict = self.products[Id].get("conflict")
+            message = self.BUSY_MESSAGE if conflict else "AccountFactory failed"
+        return {
+            "ProvisionedProductDetail": {"Status": status, "StatusMessage": message}
+        }
+
+    def get_provisioned_product_outputs(self, ProvisionedProductId):
+        product = self.products[ProvisionedProductId]
+        if self._status(ProvisionedProductId) != "AVAILABLE":
+            return {"Outputs": []}
+        account = {
+            "Name": product["params"]["AccountName"],
+            "Email": product["params"]["AccountEmail"],
+        }
+        if account not in self.organizations.accounts:
+            self.organizations.accounts.append(account)
+        return {
+            "Outputs": [
+                {"OutputKey": "AccountId", "OutputValue": product["account_id"]}
+            ]
+        }
+
+
+# ---------------- Interpretador ASL ----------------
+
+
+def load_definition(path=DEFINITION_PATH, **values):
+    """Lê o template e troca ``${placeholder}`` pelo valor em ``values``.
+
+    Placeholders sem valor viram o próprio nome (ARNs das Lambdas).
+    """
+    text = Path(path).read_text(encoding="utf-8")
+
+    def resolve(match):
+        name = match.group(1)
+        return json.dumps(values[name]) if name in values else name
+
+    return json.loads(re.sub(r"\$\{(\w+)\}", resolve, text))
+
+
+def _path_get(data, path):
+    if path in (None, "$"):
+        return data
+    value = data
+    for part in path[2:].split("."):
+        value = value[part]
+    return value
+
+
+def _path_set(data, path, value):
+    if path is None:
+        return data
+    if path == "$":
+        return value
+    result = deepcopy(data)
+    target = result
+    parts = path[2:].split(".")
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    target[parts[-1]] = value
+    return result
+
+
+def _matches(rule, data):
+    if "And" in rule:
+        return all(_matches(sub, data) for sub in rule["And"])
+    if "Or" in rule:
+        return any(_matches(sub, data) for sub in rule["Or"])
+    if "Not" in rule:
+        return not _matches(rule["Not"], data)
+    try:
+        value = _path_get(data, rule["Variable"])
+    except (KeyError, TypeError):
+        return rule.get("IsPresent") is False
+    if "IsPresent" in rule:
+        return rule["IsPresent"]
+    for op, check in (
+        ("StringEquals", lambda a, b: a == b),
+        ("NumericEquals", lambda a, b: a == b),
+        ("BooleanEquals", lambda a, b: a is b),
+        ("NumericGreaterThan", lambda a, b: a > b),
+        ("NumericLessThan", lambda a, b: a < b),
+    ):
+        if op in rule:
+            return check(value, rule[op])
+    raise ValueError(f"Regra de Choice não suportada: {rule}")
+
+
+def _error_matches(error_equals, error_name):
+    return "States.ALL" in error_equals or error_name in error_equals
+
+
+class Execution:
+    def __init__(self, name, data, started):
+        self.name = name
+        self.data = data
+        self.started = started
+        self.finished = None
+        self.status = "RUNNING"
+        self.attempts = Counter()
+
+
+class Simulator:
+    def __init__(self, definition, handlers, clock, lambda_latency=0.3):
+        self.definition = definition
+        self.handlers = handlers
+        self.clock = clock
+        self.lambda_latency = lambda_latency
+        self.transitions = Counter()
+        self.invocations = Counter()
+        self.executions = []
+        self._events = []
+        self._seq = itertools.count()
+
+    def start(self, data, at):
+        execution = Execution(f"exec-{len(self.executions)}", data, at)
+        self.executions.append(execution)
+        self._schedule(at, execution, self.definition["StartAt"])
+        return execution
+
+    def _schedule(self, at, execution, state):
+        heapq.heappush(self._events, (at, next(self._seq), execution, state))
+
+    def run(self):
+        while self._events:
+            at, _, execution, state_name = heapq.heappop(self._events)
+            self.clock.now, self.clock.offset = at, 0.0
+            self._enter(execution, state_name, at)
+        return self
+
+    def _enter(self, execution, name, at):
+        state = self.definition["States"][name]
+        self.transitions[name] += 1
+        kind = state["Type"]
+
+        if kind == "Task":
+            self._run_task(execution, name, state, at)
+        elif kind == "Choice":
+            target = next(
+                (c["Next"] for c in state["Choices"] if _matches(c, execution.data)),
+                state.get("Default"),
+            )
+            if target is None:
+                self._finish(execution, "FAILED", at)
+            else:
+                self._schedule(at, execution, target)
+        elif kind == "Wait":
+            seconds = state.get("Seconds")
+            if seconds is None:
+                seconds = _path_get(execution.data, state["SecondsPath"])
+            self._schedule(at + seconds, execution, state["Next"])
+        elif kind == "Map":
+            self._run_map(execution, name, state, at)
+        elif kind == "Pass":
+            if "Result" in state:
+                execution.data = _path_set(
+                    execution.data, state.get("ResultPath", "$"), state["Result"]
+                )
+            self._advance(execution, state, at)
+        elif kind == "Succeed":
+            self._finish(execution, "SUCCEEDED", at)
+        elif kind == "Fail":
+            self._finish(execution, "FAILED", at)
+        else:
+            raise ValueError(f"Tipo de estado não suportado: {kind}")
+
+    def _advance(self, execution, state, at):
+        if state.get("End"):
+            self._finish(execution, "SUCCEEDED", at)
+        else:
+            self._schedule(at, execution, state["Next"])
+
+    def _run_task(self, execution, name, state, at):
+        handler = self.handlers[state["Resource"]]
+        self.invocations[state["Resource"]] += 1
+        payload = deepcopy(_path_get(execution.data, state.get("InputPath", "$")))
+        try:
+            result = handler(payload, None)
+            error = None
+        except Exception as exc:
+            error = {
+                "Error": type(exc).__name__,
+                "Cause": json.dumps(
+                    {"errorMessage": str(exc), "errorType": type(exc).__name__}
+                ),
+            }
+        done = at + self.lambda_latency + self.clock.offset
+        self._complete(
+            execution, name, state, result if error is None else None, error, done
+        )
+
+    def _run_map(self, execution, name, state, at):
+        """Map inline: iterações em ondas de ``MaxConcurrency`` (sub-simulação)."""
+        items = _path_get(execution.data, state.get("ItemsPath", "$"))
+        processor = state.get("ItemProcessor") or state["Iterator"]
+        size = state.get("MaxConcurrency") or len(items) or 1
+        results, done, error = [], at, None
+        for start in range(0, len(items), size):
+            inner = Simulator(processor, self.handlers, self.clock, self.lambda_latency)
+            inner.transitions = self.transitions
+            inner.invocations = self.invocations
+            runs = [
+                inner.start(deepcopy(item), done)
+                for item in items[start : start + size]
+            ]
+            inner.run()
+            done = max([done] + [run.finished for run in runs])
+            results.extend(run.data for run in runs)
+            if any(run.status != "SUCCEEDED" for run in runs):
+                error = {"Error": "States.Runtime", "Cause": "Iteração do Map falhou"}
+        self._complete(execution, name, state, results, error, done)
+
+    def _complete(self, execution, name, state, result, error, done):
+        if error is None:
+            execution.attempts[name] = 0
+            execution.data = _path_set(
+                execution.data, state.get("ResultPath", "$"), result
+            )
+            self._advance(execution, state, done)
+            return
+
+        for retrier in state.get("Retry", []):
+            if not _error_matches(retrier["ErrorEquals"], error["Error"]):
+                continue
+            attempt = execution.attempts[name]
+            if attempt < retrier.get("MaxAttempts", 3):
+                execution.attempts[name] += 1
+                delay = (
+                    retrier.get("IntervalSeconds", 1)
+                    * retrier.get("BackoffRate", 2.0) ** attempt
+                )
+                delay = min(delay, retrier.get("MaxDelaySeconds", delay))
+                if retrier.get("JitterStrategy") == "FULL":
+                    delay = random.uniform(0, delay)
+                self._schedule(done + delay, execution, name)
+                return
+            break
+
+        execution.attempts[name] = 0
+        for catcher in state.get("Catch", []):
+            if _error_matches(catcher["ErrorEquals"], error["Error"]):
+                execution.data = _path_set(
+                    execution.data, catcher.get("ResultPath", "$"), error
+                )
+                self._schedule(done, execution, catcher["Next"])
+                return
+        self._finish(execution, "FAILED", done)
+
+    def _finish(self, execution, status, at):
+        execution.status = status
+        execution.finished = at
+
+
+# ---------------- Montagem com os handlers reais ----------------
+
+
+def _import_handlers():
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("DYNAMO_TABLE", "accfactory-ddb-accounts")
+    os.environ.setdefault("PRINCIPAL_ARN", "arn:aws:iam::000000000000:role/simulator")
+    for path in (ROOT / "lambda_src/layer/python", ROOT / "lambda_src/accounts"):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+
+    import check_account_status
+    import provision_account
+    import update_failed_status
+    import update_succeed_status
+    import validate_fields
+
+    return {
+        "validate_fields": validate_fields,
+        "provision_account": provision_account,
+        "check_account_status": check_account_status,
+        "update_succeed_status": update_succeed_status,
+        "update_failed_status": update_failed_status,
+    }
+
+
+@contextlib.contextmanager
+def patched_handlers(clock, dynamo, organizations, service_catalog):
+    """Troca os clients de módulo dos handlers pelos fakes (e restaura ao sair)."""
+    modules = _import_handlers()  # também coloca a layer no sys.path
+    from accfactory import circuit, org_cache, throttling
+
+    limiter = {
+        service: throttling.RateLimiter(
+            service, table_name=None, clock=clock.time, sleep=clock.sleep
+        )
+        for service in ("organizations", "servicecatalog")
+    }
+    # Sem tabela de controle o circuito fica sempre fechado (o trigger não é simulado).
+    breaker = circuit.CircuitBreaker("servicecatalog", table_name=None)
+    patches = [
+        (modules["validate_fields"], "ORG", organizations),
+        (modules["validate_fields"], "DYNO", dynamo),
+        (modules["validate_fields"], "ORG_LIMITER", limiter["organizations"]),
+        (modules["provision_account"], "SC", service_catalog),
+        (modules["provision_account"], "dynamo_client", dynamo),
+        (modules["provision_account"], "SC_LIMITER", limiter["servicecatalog"]),
+        (modules["provision_account"], "sleep", clock.sleep),
+        (modules["provision_account"], "CATALOG_CACHE", {}),
+        (modules["provision_account"], "SC_CIRCUIT", breaker),
+        (modules["check_account_status"], "SC_CIRCUIT", breaker),
+        (org_cache, "CLOCK", clock.time),
+        (modules["check_account_status"], "SC", service_catalog),
+        (modules["check_account_status"], "dynamo_client", dynamo),
+        (modules["update_succeed_status"], "sevicecatalog_client", service_catalog),
+        (modules["update_succeed_status"], "dynamo_client", dynamo),
+        (modules["update_failed_status"], "DYNO", dynamo),
+    ]
+    originals = [(module, attr, getattr(module, attr)) for module, attr, _ in patches]
+    for module, attr, fake in patches:
+        setattr(module, attr, fake)
+    org_cache.invalidate()
+    try:
+        yield {
+            "validate_lambda": modules["validate_fields"].lambda_handler,
+            "provision_lambda": modules["provision_account"].lambda_handler,
+            "check_status_lambda": modules["check_account_status"].lambda_handler,
+            "update_status_lambda": modules["update_succeed_status"].lambda_handler,
+            "update_failed_status_lambda": modules[
+                "update_failed_status"
+            ].lambda_handler,
+        }
+    finally:
+        for module, attr, original in originals:
+            setattr(module, attr, original)
+        org_cache.invalidate()
+
+
+def _request(index):
+    email = f"sim-{index:05d}@example.com"
+    return {
+        "AccountEmail": email,
+        "AccountName": f"sim-{index:05d}",
+        "OrgUnit": "Sandbox",
+        "SSOUserEmail": f"owner-{index:05d}@example.com",
+        "SSOUserFirstName": "Sim",
+        "SSOUserLastName": "User",
+        "Status": "Requested",
+        "RequestID": str(uuid.UUID(int=index)),
+    }
+
+
+def _percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def simulate(
+    requests=100,
+    arrival_per_hour=None,
+    ct_concurrency=5,
+    provision_minutes=(18, 25, 40),
+    failure_rate=0.0,
+    conflict_rate=0.0,
+    duplicate_rate=0.0,
+    lambda_latency=0.3,
+    seed=0,
+    definition=None,
+    batch_size=1,
+):
+    """Executa a simulação e devolve o relatório (dict serializável em JSON)."""
+    rng = random.Random(seed)
+    random.seed(seed)
+    clock = VirtualClock()
+    dynamo, organizations = FakeDynamoDB(), FakeOrganizations()
+    service_catalog = FakeServiceCatalog(
+        clock,
+        organizations,
+        rng,
+        ct_concurrency,
+        provision_minutes,
+        failure_rate,
+        conflict_rate,
+    )
+
+    # Os handlers logam e emitem linhas EMF a cada chamada; o relatório é o que importa.
+    logging.disable(logging.CRITICAL)
+    try:
+        with patched_handlers(
+            clock, dynamo, organizations, service_catalog
+        ) as handlers, contextlib.redirect_stdout(io.StringIO()):
+            if definition is None:
+                definition = (
+                    load_definition(
+                        BATCH_DEFINITION_PATH, provision_concurrency=ct_concurrency
+                    )
+                    if batch_size > 1
+                    else load_definition()
+                )
+            simulator = Simulator(definition, handlers, clock, lambda_latency)
+            at, pending = 0.0, []
+            for index in range(requests):
+                if arrival_per_hour:
+                    at += rng.expovariate(arrival_per_hour / 3600)
+                # Duplicatas reaproveitam o nome de uma conta anterior.
+                source = (
+                    rng.randrange(index)
+                    if index and rng.random() < duplicate_rate
+                    else index
+                )
+                request = _request(source)
+                request["AccountEmail"] = f"sim-{index:05d}@example.com"
+                dynamo.put_item(
+                    TableName="accounts",
+                    Item={key: {"S": value} for key, value in request.items()},
+                )
+                if batch_size <= 1:
+                    simulator.start(request, at)
+                    continue
+                # Lote do stream: sai quando enche (ou com o último pedido)
+                pending.append(request)
+                if len(pending) == batch_size or index == requests - 1:
+                    simulator.start({"Items": pending}, at)
+                    pending = []
+            simulator.run()
+    finally:
+        logging.disable(logging.NOTSET)
+
+    return _report(simulator, service_catalog, dynamo, requests)
+
+
+def _report(simulator, service_catalog, dynamo, requests):
+    executions = simulator.executions
+    succeeded = [e for e in executions if e.status == "SUCCEEDED"]
+    first = min(e.started for e in executions)
+    last = max(e.finished for e in executions)
+    hours = max(last - first, 1e-9) / 3600
+    durations = [(e.finished - e.started) / 60 for e in succeeded]
+    queueing = [
+        (p["started"] - p["submitted"]) / 60 for p in service_catalog.products.values()
+    ]
+    total_transitions = sum(simulator.transitions.values())
+    total_invocations = sum(simulator.invocations.values())
+    statuses = Counter(item["Status"]["S"] for item in dynamo.items.values())
+
+    def summary(values):
+        if not values:
+            return {"p50": None, "p95": None, "max": None}
+        return {
+            "p50": round(_percentile(values, 50), 1),
+            "p95": round(_percentile(values, 95), 1),
+            "max": round(max(values), 1),
+        }
+
+    return {
+        "executions": len(executions),
+        "succeeded": len(succeeded),
+        "failed": len(executions) - len(succeeded),
+        "accounts": {
+            "active": statuses["ACTIVE"],
+            "failed": statuses["FAILED"],
+        },
+        "makespanHours": round(hours, 3),
+        "accountsPerHour": round(len(succeeded) / hours, 2),
+        "endToEndMinutes": summary(durations),
+        "queueingDelayMinutes": summary(queueing),
+        "stateTransitions": {
+            "total": total_transitions,
+            "perExecution": round(total_transitions / len(executions), 2),
+            "perAccount": round(total_transitions / requests, 2),
+            "byState": dict(simulator.transitions.most_common()),
+        },
+        "lambdaInvocations": {
+            "total": total_invocations,
+            "perAccount": round(total_invocations / requests, 2),
+            "byFunction": dict(simulator.invocations.most_common()),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument(
+        "--arrival-per-hour",
+        type=float,
+        help="Taxa de chegada (Poisson). Sem ela, todas as requisições chegam em t=0",
+    )
+    parser.add_argument("--ct-concurrency", type=int, default=5)
+    parser.add_argument(
+        "--provision-minutes",
+        default="18,25,40",
+        help="Duração do provisionamento: min,moda,max (distribuição triangular)",
+    )
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--conflict-rate",
+        type=float,
+        default=0.0,
+        help="Fração de provisionamentos recusados com o Control Tower ocupado",
+    )
+    parser.add_argument(
+        "--duplicate-rate",
+        type=float,
+        default=0.0,
+        help="Fração de requisições que repetem o AccountName de uma anterior",
+    )
+    parser.add_argument("--lambda-latency", type=float, default=0.3)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Pedidos por execução (2+ usa a state machine de lote)",
+    )
+    parser.add_argument("--definition", help="Template ASL (default conforme o modo)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = simulate(
+        requests=args.requests,
+        arrival_per_hour=args.arrival_per_hour,
+        ct_concurrency=args.ct_concurrency,
+        provision_minutes=tuple(float(v) for v in args.provision_minutes.split(",")),
+        failure_rate=args.failure_rate,
+        conflict_rate=args.conflict_rate,
+        duplicate_rate=args.duplicate_rate,
+        lambda_latency=args.lambda_latency,
+        seed=args.seed,
+        definition=(
+            load_definition(args.definition, provision_concurrency=args.ct_concurrency)
+            if args.definition
+            else None
+        ),
+        batch_size=args.batch_size,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
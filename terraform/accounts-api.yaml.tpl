@@ -4,6 +4,10 @@ info:
   description: API para criação e busca de contas internas
   version: 1.0.0
 
+# Necessário para devolver corpos gzip (isBase64Encoded) pela integração proxy.
+x-amazon-apigateway-binary-media-types:
+  - '*/*'
+
 paths:
   /accounts:
     get:
@@ -22,6 +26,18 @@ paths:
           description: ID da conta
           schema:
             type: string
+        - name: fields
+          in: query
+          required: false
+          description: Atributos a retornar, separados por vírgula (ex. "Status,AccountId")
+          schema:
+            type: string
+        - name: Accept-Encoding
+          in: header
+          required: false
+          description: Com "gzip", respostas acima de GZIP_MIN_BYTES voltam comprimidas (Content-Encoding)
+          schema:
+            type: string
       responses:
         '200':
           description: Conta encontrada
@@ -33,6 +49,8 @@ paths:
           description: Parâmetro ausente
         '404':
           description: Conta não encontrada
+        '429':
+          description: Limite de leituras do chamador excedido (Retry-After)
         '500':
           description: Erro interno
       security:
@@ -45,6 +63,13 @@ paths:
 
     post:
       summary: Cria uma nova conta
+      parameters:
+        - name: Idempotency-Key
+          in: header
+          required: false
+          description: Chave para repetir o POST com segurança; replays na janela retornam a resposta original
+          schema:
+            type: string
       requestBody:
         required: true
         content:
@@ -73,6 +98,23 @@ paths:
                     properties:
                       Key: { type: string }
                       Value: { type: string }
+                Organization:
+                  type: string
+                  description: Organização de destino (var.organizations); sem ela vale o prefixo da OrgUnit
+                Callback:
+                  type: object
+                  description: Webhook chamado quando a conta fica ACTIVE, ERROR, FAILED ou é removida
+                  properties:
+                    Url:
+                      type: string
+                      format: uri
+                      description: Endpoint https que recebe o POST do evento
+                    Secret:
+                      type: string
+                      maxLength: 256
+                      description: Assina o corpo com HMAC-SHA256 (X-AccountFactory-Signature)
+                  required:
+                    - Url
               required:
                 - AccountEmail
                 - AccountName
@@ -88,9 +130,198 @@ paths:
               schema:
                 type: object
         '400':
-          description: Falha na validação
+          description: Falha na validação (todos os erros em errors) ou Organization desconhecida
         '409':
-          description: Conta já existe
+          description: Conta já existe (tabela ou Organizations) ou requisição com a mesma Idempotency-Key em andamento
+        '422':
+          description: Idempotency-Key reutilizada com payload diferente
+        '429':
+          description: Limite de execuções simultâneas ou de escritas do chamador atingido (Retry-After no limite do chamador)
+        '503':
+          description: Organizations com throttling, tente novamente (Retry-After)
+        '500':
+          description: Erro interno
+      security:
+        - sigv4: []
+      x-amazon-apigateway-integration:
+        uri: arn:aws:apigateway:${region}:lambda:path/2015-03-31/functions/arn:aws:lambda:${region}:${account_id}:function:${name}/invocations
+        passthroughBehavior: when_no_match
+        httpMethod: POST
+        type: aws_proxy
+
+  /accounts/search:
+    get:
+      summary: Busca contas por prefixo/aproximação em AccountName, AccountEmail e SSOUserEmail
+      parameters:
+        - name: q
+          in: query
+          required: true
+          description: Texto parcial (mínimo 2 caracteres), ex. "payments-" ou "sandbox"
+          schema:
+            type: string
+        - name: limit
+          in: query
+          required: false
+          description: Máximo de resultados (default 20, máximo 100)
+          schema:
+            type: integer
+      responses:
+        '200':
+          description: Contas ordenadas pela qualidade do match (campo Score)
+          content:
+            application/json:
+              schema:
+                type: object
+        '400':
+          description: Parâmetro ausente
+        '500':
+          description: Erro interno
+      security:
+        - sigv4: []
+      x-amazon-apigateway-integration:
+        uri: arn:aws:apigateway:${region}:lambda:path/2015-03-31/functions/arn:aws:lambda:${region}:${account_id}:function:${name}/invocations
+        passthroughBehavior: when_no_match
+        httpMethod: POST
+        type: aws_proxy
+
+  /accounts/bulk:
+    patch:
+      summary: Atualiza tags e/ou OU de várias contas (job assíncrono)
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                selector:
+                  type: object
+                  description: Exatamente um de AccountEmails, AccountIds (até 1000) ou OrgUnit
+                  properties:
+                    AccountEmails:
+                      type: array
+                      items: { type: string }
+                    AccountIds:
+                      type: array
+                      items: { type: string }
+                    OrgUnit:
+                      type: string
+                changes:
+                  type: object
+                  properties:
+                    Tags:
+                      type: array
+                      items:
+                        type: object
+                        properties:
+                          Key: { type: string }
+                          Value: { type: string }
+                    OrgUnit:
+                      type: string
+              required:
+                - selector
+                - changes
+      responses:
+        '202':
+          description: Job criado; acompanhe em /accounts/bulk/{jobId} (header Location)
+          content:
+            application/json:
+              schema:
+                type: object
+        '400':
+          description: Seleção ou alterações inválidas
+        '429':
+          description: Limite de escritas do chamador excedido (Retry-After)
+        '503':
+          description: Organizations com throttling, tente novamente (Retry-After)
+        '500':
+          description: Erro interno
+      security:
+        - sigv4: []
+      x-amazon-apigateway-integration:
+        uri: arn:aws:apigateway:${region}:lambda:path/2015-03-31/functions/arn:aws:lambda:${region}:${account_id}:function:${name}/invocations
+        passthroughBehavior: when_no_match
+        httpMethod: POST
+        type: aws_proxy
+
+  /accounts/bulk/{jobId}:
+    get:
+      summary: Progresso de um job de atualização em massa
+      parameters:
+        - name: jobId
+          in: path
+          required: true
+          schema:
+            type: string
+      responses:
+        '200':
+          description: Status (PENDING, RUNNING, SUCCEEDED, PARTIAL, FAILED), contadores e erros por conta
+          content:
+            application/json:
+              schema:
+                type: object
+        '404':
+          description: Job não encontrado
+        '500':
+          description: Erro interno
+      security:
+        - sigv4: []
+      x-amazon-apigateway-integration:
+        uri: arn:aws:apigateway:${region}:lambda:path/2015-03-31/functions/arn:aws:lambda:${region}:${account_id}:function:${name}/invocations
+        passthroughBehavior: when_no_match
+        httpMethod: POST
+        type: aws_proxy
+
+  /stats:
+    get:
+      summary: Total de contas por Status e OrgUnit (contadores materializados)
+      parameters:
+        - name: orgUnit
+          in: query
+          required: false
+          description: Restringe a contagem a uma OU (caminho completo)
+          schema:
+            type: string
+      responses:
+        '200':
+          description: Totais por status e por OU
+          content:
+            application/json:
+              schema:
+                type: object
+        '500':
+          description: Erro interno
+      security:
+        - sigv4: []
+      x-amazon-apigateway-integration:
+        uri: arn:aws:apigateway:${region}:lambda:path/2015-03-31/functions/arn:aws:lambda:${region}:${account_id}:function:${name}/invocations
+        passthroughBehavior: when_no_match
+        httpMethod: POST
+        type: aws_proxy
+
+  /stats/latency:
+    get:
+      summary: Percentis (p50/p95/p99) de duração por etapa do provisionamento
+      parameters:
+        - name: from
+          in: query
+          required: false
+          description: Início da janela (ISO8601, filtra por CreatedAt; default últimas 24h)
+          schema:
+            type: string
+        - name: to
+          in: query
+          required: false
+          description: Fim da janela (ISO8601; default agora)
+          schema:
+            type: string
+      responses:
+        '200':
+          description: Percentis por etapa (Admission, Validation, ProvisionSubmit, UnderChange, Finalization, EndToEnd)
+          content:
+            application/json:
+              schema:
+                type: object
         '500':
           description: Erro interno
       security:
@@ -10,9 +10,58 @@ resource "aws_dynamodb_table" "accounts" {
     type = "S"
   }
 
+  attribute {
+    name = "AccountId"
+    type = "S"
+  }
+
+  attribute {
+    name = "AccountName"
+    type = "S"
+  }
+
+  # GET por accountId e checagem de AccountName duplicado sem Scan
+  global_secondary_index {
+    name            = "AccountIdIndex"
+    hash_key        = "AccountId"
+    projection_type = "ALL"
+  }
+
+  global_secondary_index {
+    name               = "AccountNameIndex"
+    hash_key           = "AccountName"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["Status"]
+  }
+
   # Habilita o Stream
   stream_enabled   = true
-  stream_view_type = "NEW_IMAGE"
+  stream_view_type = "NEW_AND_OLD_IMAGES"
+}
+
+# Tabela auxiliar (PK/SK genéricos) para estado compartilhado entre containers:
+# contadores de rate limit e demais itens de controle com expiração via TTL.
+resource "aws_dynamodb_table" "control" {
+  name         = "${local.prefix}-ddb-control"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "PK"
+  range_key    = "SK"
+  tags         = local.default_tags
+
+  attribute {
+    name = "PK"
+    type = "S"
+  }
+
+  attribute {
+    name = "SK"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "ExpiresAt"
+    enabled        = true
+  }
 }
 
 # ---------------- Lambda Event Source Mapping (Trigger SFN) ----------------
@@ -20,7 +69,9 @@ resource "aws_lambda_event_source_mapping" "ddb_to_sfn" {
   event_source_arn  = aws_dynamodb_table.accounts.stream_arn
   function_name     = module.trigger_lambda.function_name
   starting_position = "LATEST"
-  batch_size        = 1
+  # Pedidos do mesmo lote viram uma única execução da state machine de lote
+  batch_size                         = var.trigger_batch_size
+  maximum_batching_window_in_seconds = var.trigger_batching_window_seconds
 
   filter_criteria {
     filter {
@@ -33,11 +84,34 @@ resource "aws_lambda_event_source_mapping" "ddb_to_sfn" {
         }
       })
     }
+    # Novo POST sobre um registro FAILED (filtros são combinados com OR)
+    filter {
+      pattern = jsonencode({
+        eventName = ["MODIFY"]
+        dynamodb = {
+          OldImage = {
+            Status = { S = ["FAILED"] }
+          }
+          NewImage = {
+            Status = { S = ["Requested"] }
+          }
+        }
+      })
+    }
   }
 }
 
 
 
+# ---------------- Lambda Event Source Mapping (visões materializadas) ----------------
+resource "aws_lambda_event_source_mapping" "ddb_to_stream_processor" {
+  event_source_arn                   = aws_dynamodb_table.accounts.stream_arn
+  function_name                      = module.stream_processor_lambda.function_name
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 5
+}
+
 # ---------------- Lambda ----------------
 
 module "accounts_api_lambda" {
@@ -48,12 +122,23 @@ module "accounts_api_lambda" {
   runtime       = "python3.11"
   source_dir    = "${local.lambda_src_path}/api"
   output_path   = "${local.lambda_src_path}/artfacts/api-lambda.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
   tags          = local.default_tags
-  environment = {
+  environment = merge(local.pool_environment, {
     DYNAMO_TABLE       = aws_dynamodb_table.accounts.name
+    CONTROL_TABLE      = aws_dynamodb_table.control.name
     SFN_ARN            = aws_sfn_state_machine.create_account_sfn.arn
     SFN_MAX_CONCURRENT = "5"
-  }
+    ARCHIVE_TABLE      = aws_dynamodb_table.archive.name
+    ORGANIZATIONS      = local.organizations_config
+    RATE_LIMIT_BUDGETS = jsonencode({
+      for kind, rate in var.api_caller_rate_limits :
+      "caller-${kind}" => { rate = rate, burst = 2 * rate }
+    })
+    BULK_FUNCTION      = module.bulk_update_lambda.function_name
+    POOL_FUNCTION      = module.account_pool_lambda.function_name
+    LOG_SAMPLE_RATE    = lookup(var.log_sample_rates, "api", "0")
+  })
 }
 
 
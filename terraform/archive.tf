@@ -0,0 +1,87 @@
+# ---------------- Arquivamento de registros terminais ----------------
+# Registros ACTIVE/SUSPENDED/FAILED há mais de archive_after_days saem da
+# tabela quente (fica um stub com ArchivedAt) para esta tabela, lida pelo GET.
+resource "aws_dynamodb_table" "archive" {
+  name         = "${local.prefix}-ddb-accounts-archive"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "AccountEmail"
+  table_class  = "STANDARD_INFREQUENT_ACCESS"
+  tags         = local.default_tags
+
+  attribute {
+    name = "AccountEmail"
+    type = "S"
+  }
+
+  point_in_time_recovery {
+    enabled = true
+  }
+}
+
+resource "aws_iam_role" "lambda_archive_role" {
+  name               = "${local.prefix}-archive-lambda-role"
+  assume_role_policy = local.lambda_assume_role
+  tags               = local.default_tags
+}
+
+resource "aws_iam_role_policy" "lambda_archive_policy" {
+  name = "${local.prefix}-archive-lambda-policy"
+  role = aws_iam_role.lambda_archive_role.id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = [
+          "dynamodb:Scan",
+          "dynamodb:PutItem"
+        ]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.accounts.arn
+      },
+      {
+        Action   = ["dynamodb:PutItem"]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.archive.arn
+      },
+      {
+        Action = [
+          "logs:CreateLogGroup",
+          "logs:CreateLogStream",
+          "logs:PutLogEvents"
+        ]
+        Effect   = "Allow"
+        Resource = "*"
+      }
+    ]
+  })
+}
+
+module "archive_accounts_lambda" {
+  source        = "./modules/lambda"
+  function_name = "${local.prefix}-archive-accounts"
+  role_arn      = aws_iam_role.lambda_archive_role.arn
+  handler       = "archive_accounts.lambda_handler"
+  runtime       = "python3.11"
+  timeout       = 900
+  source_file   = "${local.lambda_src_path}/accounts/archive_accounts.py"
+  output_path   = "${local.lambda_src_path}/artfacts/archive_accounts.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
+  tags          = local.default_tags
+  environment = {
+    DYNAMO_TABLE       = aws_dynamodb_table.accounts.name
+    ARCHIVE_TABLE      = aws_dynamodb_table.archive.name
+    ARCHIVE_AFTER_DAYS = tostring(var.archive_after_days)
+    LOG_SAMPLE_RATE    = lookup(var.log_sample_rates, "archive_accounts", "0")
+  }
+}
+
+resource "aws_ssm_association" "archive_daily" {
+  name                = "AWS-InvokeLambdaFunction"
+  association_name    = "${local.prefix}-archive-daily"
+  schedule_expression = "cron(0 4 * * ? *)"
+
+  parameters = {
+    FunctionName = [module.archive_accounts_lambda.function_name]
+    Payload      = ["{}"]
+  }
+}
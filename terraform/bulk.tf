@@ -0,0 +1,93 @@
+# ---------------- Atualização em massa (PATCH /accounts/bulk) ----------------
+resource "aws_iam_role" "lambda_bulk_role" {
+  name               = "${local.prefix}-bulk-update-lambda-role"
+  assume_role_policy = local.lambda_assume_role
+  tags               = local.default_tags
+}
+
+resource "aws_iam_role_policy" "lambda_bulk_policy" {
+  name = "${local.prefix}-bulk-update-lambda-policy"
+  role = aws_iam_role.lambda_bulk_role.id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = [
+          "dynamodb:BatchGetItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:Query",
+          "dynamodb:Scan"
+        ]
+        Effect = "Allow"
+        Resource = [
+          aws_dynamodb_table.accounts.arn,
+          "${aws_dynamodb_table.accounts.arn}/index/*"
+        ]
+      },
+      {
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:UpdateItem"
+        ]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.control.arn
+      },
+      {
+        # Tags e OU de registros arquivados ficam na cópia do arquivo
+        Action = [
+          "dynamodb:BatchGetItem",
+          "dynamodb:UpdateItem"
+        ]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.archive.arn
+      },
+      {
+        Action = [
+          "organizations:ListRoots",
+          "organizations:ListOrganizationalUnitsForParent",
+          "organizations:ListParents",
+          "organizations:TagResource",
+          "organizations:MoveAccount"
+        ]
+        Effect   = "Allow"
+        Resource = "*"
+      },
+      {
+        # Jobs longos continuam numa nova invocação assíncrona da própria função
+        Action   = ["lambda:InvokeFunction"]
+        Effect   = "Allow"
+        Resource = "arn:aws:lambda:${local.region}:${local.account_id}:function:${local.prefix}-bulk-update"
+      },
+      {
+        Action = [
+          "logs:CreateLogGroup",
+          "logs:CreateLogStream",
+          "logs:PutLogEvents"
+        ]
+        Effect   = "Allow"
+        Resource = "*"
+      }
+    ]
+  })
+}
+
+module "bulk_update_lambda" {
+  source        = "./modules/lambda"
+  function_name = "${local.prefix}-bulk-update"
+  role_arn      = aws_iam_role.lambda_bulk_role.arn
+  handler       = "bulk_update.lambda_handler"
+  runtime       = "python3.11"
+  timeout       = 900
+  memory_size   = 256
+  source_file   = "${local.lambda_src_path}/accounts/bulk_update.py"
+  output_path   = "${local.lambda_src_path}/artfacts/bulk_update.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
+  tags          = local.default_tags
+  environment = {
+    DYNAMO_TABLE    = aws_dynamodb_table.accounts.name
+    CONTROL_TABLE   = aws_dynamodb_table.control.name
+    ARCHIVE_TABLE   = aws_dynamodb_table.archive.name
+    BULK_WORKERS    = "8"
+    LOG_SAMPLE_RATE = lookup(var.log_sample_rates, "bulk_update", "0")
+  }
+}
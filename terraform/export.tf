@@ -0,0 +1,119 @@
+# ---------------- Exportação semanal do inventário ----------------
+resource "aws_s3_bucket" "exports" {
+  bucket_prefix = "${local.prefix}-exports-"
+  tags          = local.default_tags
+}
+
+resource "aws_s3_bucket_public_access_block" "exports" {
+  bucket                  = aws_s3_bucket.exports.id
+  block_public_acls       = true
+  block_public_policy     = true
+  ignore_public_acls      = true
+  restrict_public_buckets = true
+}
+
+resource "aws_s3_bucket_server_side_encryption_configuration" "exports" {
+  bucket = aws_s3_bucket.exports.id
+  rule {
+    apply_server_side_encryption_by_default {
+      sse_algorithm = "AES256"
+    }
+  }
+}
+
+resource "aws_s3_bucket_versioning" "exports" {
+  bucket = aws_s3_bucket.exports.id
+  versioning_configuration {
+    status = "Enabled"
+  }
+}
+
+resource "aws_iam_role" "lambda_export_role" {
+  name               = "${local.prefix}-export-lambda-role"
+  assume_role_policy = local.lambda_assume_role
+  tags               = local.default_tags
+}
+
+resource "aws_iam_role_policy" "lambda_export_policy" {
+  name = "${local.prefix}-export-lambda-policy"
+  role = aws_iam_role.lambda_export_role.id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = ["dynamodb:Scan"]
+        Effect = "Allow"
+        Resource = [
+          aws_dynamodb_table.accounts.arn,
+          aws_dynamodb_table.archive.arn
+        ]
+      },
+      {
+        Action = [
+          "s3:PutObject",
+          "s3:AbortMultipartUpload",
+          "s3:ListMultipartUploadParts"
+        ]
+        Effect   = "Allow"
+        Resource = "${aws_s3_bucket.exports.arn}/*"
+      },
+      {
+        Action = [
+          "logs:CreateLogGroup",
+          "logs:CreateLogStream",
+          "logs:PutLogEvents"
+        ]
+        Effect   = "Allow"
+        Resource = "*"
+      }
+    ]
+  })
+}
+
+module "export_inventory_lambda" {
+  source        = "./modules/lambda"
+  function_name = "${local.prefix}-export-inventory"
+  role_arn      = aws_iam_role.lambda_export_role.arn
+  handler       = "export_inventory.lambda_handler"
+  runtime       = "python3.11"
+  timeout       = 900
+  memory_size   = 512
+  source_file   = "${local.lambda_src_path}/accounts/export_inventory.py"
+  output_path   = "${local.lambda_src_path}/artfacts/export_inventory.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
+  tags          = local.default_tags
+  environment = {
+    DYNAMO_TABLE    = aws_dynamodb_table.accounts.name
+    ARCHIVE_TABLE   = aws_dynamodb_table.archive.name
+    EXPORT_BUCKET   = aws_s3_bucket.exports.id
+    EXPORT_SEGMENTS = "4"
+    LOG_SAMPLE_RATE = lookup(var.log_sample_rates, "export_inventory", "0")
+  }
+}
+
+resource "aws_ssm_association" "export_weekly" {
+  name                = "AWS-InvokeLambdaFunction"
+  association_name    = "${local.prefix}-export-weekly"
+  schedule_expression = "cron(0 6 ? * MON *)"
+
+  parameters = {
+    FunctionName = [module.export_inventory_lambda.function_name]
+    Payload      = ["{\"format\": \"ndjson\"}"]
+  }
+}
+
+resource "aws_ssm_association" "export_archive_weekly" {
+  name                = "AWS-InvokeLambdaFunction"
+  association_name    = "${local.prefix}-export-archive-weekly"
+  schedule_expression = "cron(30 6 ? * MON *)"
+
+  parameters = {
+    FunctionName = [module.export_inventory_lambda.function_name]
+    Payload      = ["{\"format\": \"ndjson\", \"archive\": true}"]
+  }
+}
+
+output "exports_bucket_name" {
+  description = "Bucket com as exportações semanais do inventário (NDJSON/CSV + manifest)"
+  value       = aws_s3_bucket.exports.id
+}
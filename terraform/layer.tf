@@ -0,0 +1,15 @@
+# ---------------- Lambda Layer (código compartilhado) ----------------
+data "archive_file" "shared_layer" {
+  type        = "zip"
+  source_dir  = "${local.lambda_src_path}/layer"
+  output_path = "${local.lambda_src_path}/artfacts/shared-layer.zip"
+  excludes    = ["**/__pycache__/**"]
+}
+
+resource "aws_lambda_layer_version" "shared" {
+  layer_name          = "${local.prefix}-shared"
+  filename            = data.archive_file.shared_layer.output_path
+  source_code_hash    = data.archive_file.shared_layer.output_base64sha256
+  compatible_runtimes = ["python3.11"]
+  description         = "Código compartilhado (rate limiter, métricas) das Lambdas da Account Factory"
+}
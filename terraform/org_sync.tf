@@ -0,0 +1,171 @@
+# ---------------- Sincronização por eventos do Organizations ----------------
+# O bootstrap semanal continua como reconciliação; entre uma execução e outra
+# o inventário acompanha os eventos do Organizations em segundos.
+locals {
+  org_sync_event_pattern = jsonencode({
+    source        = ["aws.organizations"]
+    "detail-type" = ["AWS API Call via CloudTrail", "AWS Service Event via CloudTrail"]
+    detail = {
+      eventName = [
+        "CreateAccountResult",
+        "MoveAccount",
+        "CloseAccount",
+        "TagResource",
+        "UntagResource",
+        "UpdateOrganizationalUnit",
+        "CreateOrganizationalUnit",
+        "DeleteOrganizationalUnit"
+      ]
+    }
+  })
+  # Fora de us-east-1 os eventos são repassados para o barramento da região
+  org_sync_forward = var.aws_region != "us-east-1"
+}
+
+resource "aws_iam_role" "lambda_org_sync_role" {
+  name               = "${local.prefix}-org-sync-lambda-role"
+  assume_role_policy = local.lambda_assume_role
+  tags               = local.default_tags
+}
+
+resource "aws_iam_role_policy" "lambda_org_sync_policy" {
+  name = "${local.prefix}-org-sync-lambda-policy"
+  role = aws_iam_role.lambda_org_sync_role.id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = ["dynamodb:UpdateItem"]
+        Effect = "Allow"
+        Resource = [
+          aws_dynamodb_table.accounts.arn,
+          aws_dynamodb_table.archive.arn
+        ]
+      },
+      {
+        Action = [
+          "dynamodb:PutItem",
+          "dynamodb:DeleteItem"
+        ]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.control.arn
+      },
+      {
+        Action = [
+          "organizations:DescribeAccount",
+          "organizations:ListParents",
+          "organizations:ListChildren",
+          "organizations:ListTagsForResource",
+          "organizations:ListRoots",
+          "organizations:ListOrganizationalUnitsForParent"
+        ]
+        Effect   = "Allow"
+        Resource = "*"
+      },
+      {
+        Action = [
+          "logs:CreateLogGroup",
+          "logs:CreateLogStream",
+          "logs:PutLogEvents"
+        ]
+        Effect   = "Allow"
+        Resource = "*"
+      }
+    ]
+  })
+}
+
+module "org_sync_lambda" {
+  source        = "./modules/lambda"
+  function_name = "${local.prefix}-org-sync"
+  role_arn      = aws_iam_role.lambda_org_sync_role.arn
+  handler       = "org_sync.lambda_handler"
+  runtime       = "python3.11"
+  timeout       = 120
+  source_file   = "${local.lambda_src_path}/accounts/org_sync.py"
+  output_path   = "${local.lambda_src_path}/artfacts/org_sync.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
+  tags          = local.default_tags
+  environment = {
+    DYNAMO_TABLE                = aws_dynamodb_table.accounts.name
+    CONTROL_TABLE               = aws_dynamodb_table.control.name
+    ARCHIVE_TABLE               = aws_dynamodb_table.archive.name
+    ACCOUNT_POOL_EMAIL_TEMPLATE = var.account_pool_email_template
+    LOG_SAMPLE_RATE             = lookup(var.log_sample_rates, "org_sync", "0")
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "org_changes" {
+  name          = "${local.prefix}-org-changes"
+  description   = "Mudanças de contas e OUs no Organizations para o inventário"
+  event_pattern = local.org_sync_event_pattern
+  tags          = local.default_tags
+}
+
+resource "aws_cloudwatch_event_target" "org_changes" {
+  rule = aws_cloudwatch_event_rule.org_changes.name
+  arn  = module.org_sync_lambda.arn
+
+  retry_policy {
+    maximum_event_age_in_seconds = 86400
+    maximum_retry_attempts       = 20
+  }
+}
+
+resource "aws_lambda_permission" "org_changes" {
+  statement_id  = "AllowOrgChangesRule"
+  action        = "lambda:InvokeFunction"
+  function_name = module.org_sync_lambda.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.org_changes.arn
+}
+
+# ---------------- Repasse us-east-1 -> região da fábrica ----------------
+resource "aws_iam_role" "org_events_forward_role" {
+  count = local.org_sync_forward ? 1 : 0
+  name  = "${local.prefix}-org-events-forward-role"
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action    = "sts:AssumeRole"
+        Effect    = "Allow"
+        Principal = { Service = "events.amazonaws.com" }
+      }
+    ]
+  })
+  tags = local.default_tags
+}
+
+resource "aws_iam_role_policy" "org_events_forward_policy" {
+  count = local.org_sync_forward ? 1 : 0
+  name  = "${local.prefix}-org-events-forward-policy"
+  role  = aws_iam_role.org_events_forward_role[0].id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action   = ["events:PutEvents"]
+        Effect   = "Allow"
+        Resource = "arn:aws:events:${local.region}:${local.account_id}:event-bus/default"
+      }
+    ]
+  })
+}
+
+resource "aws_cloudwatch_event_rule" "org_changes_forward" {
+  count         = local.org_sync_forward ? 1 : 0
+  provider      = aws.us_east_1
+  name          = "${local.prefix}-org-changes-forward"
+  description   = "Repassa os eventos do Organizations para ${local.region}"
+  event_pattern = local.org_sync_event_pattern
+  tags          = local.default_tags
+}
+
+resource "aws_cloudwatch_event_target" "org_changes_forward" {
+  count    = local.org_sync_forward ? 1 : 0
+  provider = aws.us_east_1
+  rule     = aws_cloudwatch_event_rule.org_changes_forward[0].name
+  arn      = "arn:aws:events:${local.region}:${local.account_id}:event-bus/default"
+  role_arn = aws_iam_role.org_events_forward_role[0].arn
+}
@@ -0,0 +1,87 @@
+# ---------------- Demais organizações (landing zones) ----------------
+# Cada organização de var.organizations tem a sua state machine, então o limite
+# de execuções simultâneas (SFN_MAX_CONCURRENT) vale por landing zone.
+locals {
+  organizations = {
+    for name, org in var.organizations : name => {
+      role_arn      = org.role_arn
+      principal_arn = org.principal_arn
+      ou_prefixes   = org.ou_prefixes
+    }
+  }
+  # Lido por accfactory.orgs. As Lambdas do workflow não usam sfn_arn e as
+  # state machines dependem delas: com o ARN haveria um ciclo no grafo.
+  organizations_workflow_config = jsonencode(local.organizations)
+  # API e trigger: iniciam e contam execuções na state machine de cada uma
+  organizations_config = jsonencode({
+    for name, org in local.organizations : name => merge(org, {
+      sfn_arn = aws_sfn_state_machine.org_create_account_sfn[name].arn
+    })
+  })
+  organization_role_arns = [for org in values(var.organizations) : org.role_arn]
+}
+
+resource "aws_sfn_state_machine" "org_create_account_sfn" {
+  for_each = var.organizations
+
+  name     = "CreateAccountStateMachine-${each.key}"
+  role_arn = aws_iam_role.sfn_role.arn
+  tags     = merge(local.default_tags, { Organization = each.key })
+
+  definition = templatefile("${path.module}/sfn_definition.json.tpl", {
+    validate_lambda             = module.validate_lambda.arn
+    provision_lambda            = module.provision_account_lambda.arn
+    check_status_lambda         = module.check_status_lambda.arn
+    update_status_lambda        = module.update_status_lambda.arn
+    update_failed_status_lambda = module.update_failed_status_lambda.arn
+  })
+}
+
+# As Lambdas assumem a role de cada organização (Organizations/Service Catalog)
+resource "aws_iam_role_policy" "assume_organization_roles" {
+  for_each = length(var.organizations) > 0 ? {
+    validation   = aws_iam_role.lambda_validation_role.id
+    provisioning = aws_iam_role.lambda_provisioning_role.id
+    ddb_sfn      = aws_iam_role.lambda_ddb_sfn_role.id
+  } : {}
+
+  name = "${local.prefix}-assume-organization-roles-${each.key}"
+  role = each.value
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action   = ["sts:AssumeRole"]
+        Effect   = "Allow"
+        Resource = local.organization_role_arns
+      }
+    ]
+  })
+}
+
+# API: capacidade de cada state machine; trigger: início das execuções
+resource "aws_iam_role_policy" "organization_state_machines" {
+  for_each = length(var.organizations) > 0 ? {
+    validation = {
+      role   = aws_iam_role.lambda_validation_role.id
+      action = "states:ListExecutions"
+    }
+    ddb_sfn = {
+      role   = aws_iam_role.lambda_ddb_sfn_role.id
+      action = "states:StartExecution"
+    }
+  } : {}
+
+  name = "${local.prefix}-organization-state-machines-${each.key}"
+  role = each.value.role
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action   = [each.value.action]
+        Effect   = "Allow"
+        Resource = [for sfn in aws_sfn_state_machine.org_create_account_sfn : sfn.arn]
+      }
+    ]
+  })
+}
@@ -0,0 +1,114 @@
+# ---------------- Pool de contas pré-provisionadas ----------------
+locals {
+  # Configuração lida por accfactory.pool (API, bootstrap e Lambda do pool)
+  pool_environment = {
+    ACCOUNT_POOL_SIZE           = tostring(var.account_pool_size)
+    ACCOUNT_POOL_OU             = var.account_pool_ou
+    ACCOUNT_POOL_EMAIL_TEMPLATE = var.account_pool_email_template
+    ACCOUNT_POOL_OUS            = join(",", var.account_pool_eligible_ous)
+  }
+}
+
+resource "aws_iam_role" "lambda_pool_role" {
+  name               = "${local.prefix}-account-pool-lambda-role"
+  assume_role_policy = local.lambda_assume_role
+  tags               = local.default_tags
+}
+
+resource "aws_iam_role_policy" "lambda_pool_policy" {
+  name = "${local.prefix}-account-pool-lambda-policy"
+  role = aws_iam_role.lambda_pool_role.id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem"
+        ]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.accounts.arn
+      },
+      {
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:Query"
+        ]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.control.arn
+      },
+      {
+        Action = [
+          "organizations:ListRoots",
+          "organizations:ListOrganizationalUnitsForParent",
+          "organizations:ListParents",
+          "organizations:TagResource",
+          "organizations:MoveAccount",
+          "account:PutAccountName"
+        ]
+        Effect   = "Allow"
+        Resource = "*"
+      },
+      {
+        Action = [
+          "sso:CreateAccountAssignment",
+          "sso:DescribeAccountAssignmentCreationStatus",
+          "sso:DescribePermissionSet",
+          "identitystore:ListUsers",
+          "identitystore:CreateUser"
+        ]
+        Effect   = "Allow"
+        Resource = "*"
+      },
+      {
+        Action = [
+          "logs:CreateLogGroup",
+          "logs:CreateLogStream",
+          "logs:PutLogEvents"
+        ]
+        Effect   = "Allow"
+        Resource = "*"
+      }
+    ]
+  })
+}
+
+module "account_pool_lambda" {
+  source        = "./modules/lambda"
+  function_name = "${local.prefix}-account-pool"
+  role_arn      = aws_iam_role.lambda_pool_role.arn
+  handler       = "account_pool.lambda_handler"
+  runtime       = "python3.11"
+  timeout       = 120
+  source_file   = "${local.lambda_src_path}/accounts/account_pool.py"
+  output_path   = "${local.lambda_src_path}/artfacts/account_pool.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
+  tags          = local.default_tags
+  environment = merge(local.pool_environment, {
+    DYNAMO_TABLE                    = aws_dynamodb_table.accounts.name
+    CONTROL_TABLE                   = aws_dynamodb_table.control.name
+    ACCOUNT_POOL_OWNER_EMAIL        = var.account_pool_owner.email
+    ACCOUNT_POOL_OWNER_FIRST_NAME   = var.account_pool_owner.first_name
+    ACCOUNT_POOL_OWNER_LAST_NAME    = var.account_pool_owner.last_name
+    SSO_INSTANCE_ARN                = var.account_pool_sso.instance_arn
+    IDENTITY_STORE_ID               = var.account_pool_sso.identity_store_id
+    ACCOUNT_POOL_PERMISSION_SET_ARN = var.account_pool_sso.permission_set_arn
+    LOG_SAMPLE_RATE                 = lookup(var.log_sample_rates, "account_pool", "0")
+  })
+}
+
+# Reposição periódica (a API também dispara uma reposição a cada conta entregue)
+resource "aws_ssm_association" "account_pool_refill" {
+  count               = var.account_pool_size > 0 ? 1 : 0
+  name                = "AWS-InvokeLambdaFunction"
+  association_name    = "${local.prefix}-account-pool-refill"
+  schedule_expression = "rate(1 hour)"
+
+  parameters = {
+    FunctionName = [module.account_pool_lambda.function_name]
+    Payload      = ["{\"refill\": true}"]
+  }
+}
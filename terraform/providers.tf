@@ -8,4 +8,9 @@ terraform {
 
 provider "aws" {
   region = var.aws_region
-}
\ No newline at end of file
+}
+# Eventos do Organizations (CloudTrail) só são publicados em us-east-1
+provider "aws" {
+  alias  = "us_east_1"
+  region = "us-east-1"
+}
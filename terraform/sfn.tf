@@ -23,6 +23,15 @@ resource "aws_iam_role_policy" "lambda_provisioning_policy" {
         Effect   = "Allow"
         Resource = aws_dynamodb_table.accounts.arn
       },
+      {
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem"
+        ]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.control.arn
+      },
       {
         Action = [
           "dynamodb:DescribeStream",
@@ -121,10 +130,35 @@ resource "aws_iam_role_policy" "lambda_validation_policy" {
           "dynamodb:GetItem",
           "dynamodb:PutItem",
           "dynamodb:Scan",
+          "dynamodb:Query",
+          "dynamodb:BatchGetItem",
+          "dynamodb:DeleteItem"
+        ]
+        Effect = "Allow"
+        Resource = [
+          aws_dynamodb_table.accounts.arn,
+          "${aws_dynamodb_table.accounts.arn}/index/*"
+        ]
+      },
+      {
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem",
           "dynamodb:Query"
         ]
         Effect   = "Allow"
-        Resource = aws_dynamodb_table.accounts.arn
+        Resource = aws_dynamodb_table.control.arn
+      },
+      {
+        # GET de registros arquivados (API) e inventário sobre stubs (bootstrap)
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:UpdateItem"
+        ]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.archive.arn
       },
       {
         Action = [
@@ -142,6 +176,14 @@ resource "aws_iam_role_policy" "lambda_validation_policy" {
         Effect   = "Allow"
         Resource = aws_sfn_state_machine.create_account_sfn.arn
       },
+      {
+        Action = ["lambda:InvokeFunction"]
+        Effect = "Allow"
+        Resource = [
+          module.bulk_update_lambda.arn,
+          module.account_pool_lambda.arn
+        ]
+      },
       {
         Action = [
           "logs:CreateLogGroup",
@@ -173,11 +215,24 @@ resource "aws_iam_role_policy" "lambda_ddb_sfn_policy" {
           "dynamodb:GetItem",
           "dynamodb:PutItem",
           "dynamodb:UpdateItem",
-          "dynamodb:DeleteItem"
+          "dynamodb:DeleteItem",
+          "dynamodb:Scan"
         ]
         Effect   = "Allow"
         Resource = aws_dynamodb_table.accounts.arn
       },
+      {
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem",
+          "dynamodb:Query",
+          "dynamodb:BatchWriteItem"
+        ]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.control.arn
+      },
       {
         Action = [
           "dynamodb:DescribeStream",
@@ -192,8 +247,17 @@ resource "aws_iam_role_policy" "lambda_ddb_sfn_policy" {
         Action = [
           "states:StartExecution"
         ]
+        Effect = "Allow"
+        Resource = [
+          aws_sfn_state_machine.create_account_sfn.arn,
+          aws_sfn_state_machine.create_account_batch_sfn.arn
+        ]
+      },
+      {
+        # Consumer webhooks do stream_processor repassa os eventos ao notificador
+        Action   = ["lambda:InvokeFunction"]
         Effect   = "Allow"
-        Resource = aws_sfn_state_machine.create_account_sfn.arn
+        Resource = module.notify_webhooks_lambda.arn
       },
       {
         Action = [
@@ -227,9 +291,13 @@ module "validate_lambda" {
   runtime       = "python3.11"
   source_file   = "${local.lambda_src_path}/accounts/validate_fields.py"
   output_path   = "${local.lambda_src_path}/artfacts/validate_fields.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
   tags          = local.default_tags
   environment = {
-    DYNAMO_TABLE = aws_dynamodb_table.accounts.name
+    DYNAMO_TABLE    = aws_dynamodb_table.accounts.name
+    CONTROL_TABLE   = aws_dynamodb_table.control.name
+    ORGANIZATIONS   = local.organizations_workflow_config
+    LOG_SAMPLE_RATE = lookup(var.log_sample_rates, "validate_fields", "0")
   }
 }
 
@@ -242,10 +310,14 @@ module "provision_account_lambda" {
   timeout       = 600
   source_file   = "${local.lambda_src_path}/accounts/provision_account.py"
   output_path   = "${local.lambda_src_path}/artfacts/provision_account.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
   tags          = local.default_tags
   environment = {
-    DYNAMO_TABLE  = aws_dynamodb_table.accounts.name
-    PRINCIPAL_ARN = aws_iam_role.lambda_provisioning_role.arn
+    DYNAMO_TABLE    = aws_dynamodb_table.accounts.name
+    CONTROL_TABLE   = aws_dynamodb_table.control.name
+    PRINCIPAL_ARN   = aws_iam_role.lambda_provisioning_role.arn
+    ORGANIZATIONS   = local.organizations_workflow_config
+    LOG_SAMPLE_RATE = lookup(var.log_sample_rates, "provision_account", "0")
   }
 }
 
@@ -257,7 +329,14 @@ module "check_status_lambda" {
   runtime       = "python3.11"
   source_file   = "${local.lambda_src_path}/accounts/check_account_status.py"
   output_path   = "${local.lambda_src_path}/artfacts/check_account_status.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
   tags          = local.default_tags
+  environment = {
+    DYNAMO_TABLE    = aws_dynamodb_table.accounts.name
+    CONTROL_TABLE   = aws_dynamodb_table.control.name
+    ORGANIZATIONS   = local.organizations_workflow_config
+    LOG_SAMPLE_RATE = lookup(var.log_sample_rates, "check_account_status", "0")
+  }
 }
 
 module "bootstrap_accounts_lambda" {
@@ -268,9 +347,14 @@ module "bootstrap_accounts_lambda" {
   runtime       = "python3.11"
   source_file   = "${local.lambda_src_path}/accounts/bootstrap_accounts.py"
   output_path   = "${local.lambda_src_path}/artfacts/bootstrap_accounts.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
   tags          = local.default_tags
   environment = {
-    DYNAMO_TABLE = aws_dynamodb_table.accounts.name
+    DYNAMO_TABLE                = aws_dynamodb_table.accounts.name
+    CONTROL_TABLE               = aws_dynamodb_table.control.name
+    ARCHIVE_TABLE               = aws_dynamodb_table.archive.name
+    ACCOUNT_POOL_EMAIL_TEMPLATE = var.account_pool_email_template
+    LOG_SAMPLE_RATE             = lookup(var.log_sample_rates, "bootstrap_accounts", "0")
   }
 }
 
@@ -293,9 +377,13 @@ module "update_status_lambda" {
   runtime       = "python3.11"
   source_file   = "${local.lambda_src_path}/accounts/update_succeed_status.py"
   output_path   = "${local.lambda_src_path}/artfacts/update_succeed_status.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
   tags          = local.default_tags
   environment = {
-    DYNAMO_TABLE = aws_dynamodb_table.accounts.name
+    DYNAMO_TABLE    = aws_dynamodb_table.accounts.name
+    CONTROL_TABLE   = aws_dynamodb_table.control.name
+    ORGANIZATIONS   = local.organizations_workflow_config
+    LOG_SAMPLE_RATE = lookup(var.log_sample_rates, "update_succeed_status", "0")
   }
 }
 
@@ -307,9 +395,31 @@ module "update_failed_status_lambda" {
   runtime       = "python3.11"
   source_file   = "${local.lambda_src_path}/accounts/update_failed_status.py"
   output_path   = "${local.lambda_src_path}/artfacts/update_failed_status.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
   tags          = local.default_tags
   environment = {
-    DYNAMO_TABLE = aws_dynamodb_table.accounts.name
+    DYNAMO_TABLE    = aws_dynamodb_table.accounts.name
+    CONTROL_TABLE   = aws_dynamodb_table.control.name
+    LOG_SAMPLE_RATE = lookup(var.log_sample_rates, "update_failed_status", "0")
+  }
+}
+
+module "stream_processor_lambda" {
+  source        = "./modules/lambda"
+  function_name = "${local.prefix}-stream-processor"
+  role_arn      = aws_iam_role.lambda_ddb_sfn_role.arn
+  handler       = "stream_processor.lambda_handler"
+  runtime       = "python3.11"
+  timeout       = 300
+  source_file   = "${local.lambda_src_path}/accounts/stream_processor.py"
+  output_path   = "${local.lambda_src_path}/artfacts/stream_processor.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
+  tags          = local.default_tags
+  environment = {
+    DYNAMO_TABLE     = aws_dynamodb_table.accounts.name
+    CONTROL_TABLE    = aws_dynamodb_table.control.name
+    WEBHOOK_FUNCTION = module.notify_webhooks_lambda.function_name
+    LOG_SAMPLE_RATE  = lookup(var.log_sample_rates, "stream_processor", "0")
   }
 }
 
@@ -321,9 +431,28 @@ module "trigger_lambda" {
   runtime       = "python3.11"
   source_file   = "${local.lambda_src_path}/accounts/trigger_sfn.py"
   output_path   = "${local.lambda_src_path}/artfacts/trigger_sfn.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
   tags          = local.default_tags
   environment = {
-    SFN_ARN = aws_sfn_state_machine.create_account_sfn.arn
+    SFN_ARN         = aws_sfn_state_machine.create_account_sfn.arn
+    BATCH_SFN_ARN   = aws_sfn_state_machine.create_account_batch_sfn.arn
+    BATCH_MIN_SIZE  = "2"
+    DYNAMO_TABLE    = aws_dynamodb_table.accounts.name
+    CONTROL_TABLE   = aws_dynamodb_table.control.name
+    ORGANIZATIONS   = local.organizations_config
+    LOG_SAMPLE_RATE = lookup(var.log_sample_rates, "trigger_sfn", "0")
+  }
+}
+
+# Libera pedidos segurados pelo circuit breaker do Service Catalog
+resource "aws_ssm_association" "trigger_release_held" {
+  name                = "AWS-InvokeLambdaFunction"
+  association_name    = "${local.prefix}-release-held-requests"
+  schedule_expression = "rate(30 minutes)"
+
+  parameters = {
+    FunctionName = [module.trigger_lambda.function_name]
+    Payload      = ["{\"release\": true}"]
   }
 }
 
@@ -382,3 +511,19 @@ resource "aws_sfn_state_machine" "create_account_sfn" {
     update_failed_status_lambda = module.update_failed_status_lambda.arn
   })
 }
+
+# Variante em lote: os mesmos handlers recebem {"Items": [...]} (accfactory.batch)
+resource "aws_sfn_state_machine" "create_account_batch_sfn" {
+  name     = "CreateAccountBatchStateMachine"
+  role_arn = aws_iam_role.sfn_role.arn
+  tags     = local.default_tags
+
+  definition = templatefile("${path.module}/sfn_batch_definition.json.tpl", {
+    validate_lambda             = module.validate_lambda.arn
+    provision_lambda            = module.provision_account_lambda.arn
+    check_status_lambda         = module.check_status_lambda.arn
+    update_status_lambda        = module.update_status_lambda.arn
+    update_failed_status_lambda = module.update_failed_status_lambda.arn
+    provision_concurrency       = var.batch_provision_concurrency
+  })
+}
@@ -0,0 +1,234 @@
+{
+  "Comment": "Account Factory em lote: uma execução para os pedidos de um lote do stream; provisionamento em Map limitado à concorrência do Control Tower e um único poll de status para o lote inteiro",
+  "StartAt": "ValidateBatch",
+  "States": {
+    "ValidateBatch": {
+      "Type": "Task",
+      "Resource": "${validate_lambda}",
+      "ResultPath": "$",
+      "Retry": [
+        {
+          "ErrorEquals": [
+            "TransientError",
+            "Lambda.ServiceException",
+            "Lambda.AWSLambdaException",
+            "Lambda.SdkClientException",
+            "Lambda.TooManyRequestsException"
+          ],
+          "IntervalSeconds": 5,
+          "MaxAttempts": 5,
+          "BackoffRate": 2.0,
+          "MaxDelaySeconds": 120,
+          "JitterStrategy": "FULL"
+        }
+      ],
+      "Catch": [
+        {
+          "ErrorEquals": ["States.ALL"],
+          "ResultPath": "$.BatchError",
+          "Next": "UpdateBatchFailed"
+        }
+      ],
+      "Next": "ProvisionBatch"
+    },
+    "ProvisionBatch": {
+      "Type": "Map",
+      "ItemsPath": "$.Items",
+      "MaxConcurrency": ${provision_concurrency},
+      "ResultPath": "$.Items",
+      "ItemProcessor": {
+        "ProcessorConfig": {
+          "Mode": "INLINE"
+        },
+        "StartAt": "ShouldProvision",
+        "States": {
+          "ShouldProvision": {
+            "Type": "Choice",
+            "Choices": [
+              {
+                "Variable": "$.Error",
+                "IsPresent": true,
+                "Next": "SkipProvision"
+              },
+              {
+                "Variable": "$.Status",
+                "StringEquals": "REQUEUE",
+                "Next": "ProvisionAccount"
+              },
+              {
+                "Variable": "$.ProvisionedProductId",
+                "IsPresent": true,
+                "Next": "SkipProvision"
+              }
+            ],
+            "Default": "ProvisionAccount"
+          },
+          "ProvisionAccount": {
+            "Type": "Task",
+            "Resource": "${provision_lambda}",
+            "ResultPath": "$",
+            "Retry": [
+              {
+                "ErrorEquals": [
+                  "TransientError",
+                  "Lambda.ServiceException",
+                  "Lambda.AWSLambdaException",
+                  "Lambda.SdkClientException",
+                  "Lambda.TooManyRequestsException"
+                ],
+                "IntervalSeconds": 30,
+                "MaxAttempts": 6,
+                "BackoffRate": 2.0,
+                "MaxDelaySeconds": 600,
+                "JitterStrategy": "FULL"
+              }
+            ],
+            "Catch": [
+              {
+                "ErrorEquals": ["States.ALL"],
+                "ResultPath": "$.Error",
+                "Next": "SkipProvision"
+              }
+            ],
+            "End": true
+          },
+          "SkipProvision": {
+            "Type": "Pass",
+            "End": true
+          }
+        }
+      },
+      "Catch": [
+        {
+          "ErrorEquals": ["States.ALL"],
+          "ResultPath": "$.BatchError",
+          "Next": "UpdateBatchFailed"
+        }
+      ],
+      "Next": "CheckBatchStatus"
+    },
+    "CheckBatchStatus": {
+      "Type": "Task",
+      "Resource": "${check_status_lambda}",
+      "ResultPath": "$",
+      "Retry": [
+        {
+          "ErrorEquals": [
+            "TransientError",
+            "Lambda.ServiceException",
+            "Lambda.AWSLambdaException",
+            "Lambda.SdkClientException",
+            "Lambda.TooManyRequestsException"
+          ],
+          "IntervalSeconds": 10,
+          "MaxAttempts": 5,
+          "BackoffRate": 2.0,
+          "MaxDelaySeconds": 300,
+          "JitterStrategy": "FULL"
+        }
+      ],
+      "Catch": [
+        {
+          "ErrorEquals": ["States.ALL"],
+          "ResultPath": "$.BatchError",
+          "Next": "UpdateBatchFailed"
+        }
+      ],
+      "Next": "BatchDecision"
+    },
+    "BatchDecision": {
+      "Type": "Choice",
+      "Choices": [
+        {
+          "Variable": "$.Pending",
+          "NumericGreaterThan": 0,
+          "Next": "WaitBatch5Minutes"
+        },
+        {
+          "Variable": "$.Requeue",
+          "NumericGreaterThan": 0,
+          "Next": "WaitBeforeRequeue"
+        }
+      ],
+      "Default": "UpdateBatchSuccess"
+    },
+    "WaitBatch5Minutes": {
+      "Type": "Wait",
+      "Seconds": 300,
+      "Next": "CheckBatchStatus"
+    },
+    "WaitBeforeRequeue": {
+      "Type": "Wait",
+      "Seconds": 600,
+      "Next": "ProvisionBatch"
+    },
+    "UpdateBatchSuccess": {
+      "Type": "Task",
+      "Resource": "${update_status_lambda}",
+      "ResultPath": "$",
+      "Retry": [
+        {
+          "ErrorEquals": [
+            "TransientError",
+            "Lambda.ServiceException",
+            "Lambda.AWSLambdaException",
+            "Lambda.SdkClientException",
+            "Lambda.TooManyRequestsException"
+          ],
+          "IntervalSeconds": 5,
+          "MaxAttempts": 5,
+          "BackoffRate": 2.0,
+          "MaxDelaySeconds": 120,
+          "JitterStrategy": "FULL"
+        }
+      ],
+      "Catch": [
+        {
+          "ErrorEquals": ["States.ALL"],
+          "ResultPath": "$.BatchError",
+          "Next": "UpdateBatchFailed"
+        }
+      ],
+      "Next": "UpdateBatchFailed"
+    },
+    "UpdateBatchFailed": {
+      "Type": "Task",
+      "Resource": "${update_failed_status_lambda}",
+      "ResultPath": "$",
+      "Retry": [
+        {
+          "ErrorEquals": [
+            "TransientError",
+            "Lambda.ServiceException",
+            "Lambda.AWSLambdaException",
+            "Lambda.SdkClientException",
+            "Lambda.TooManyRequestsException"
+          ],
+          "IntervalSeconds": 5,
+          "MaxAttempts": 5,
+          "BackoffRate": 2.0,
+          "MaxDelaySeconds": 120,
+          "JitterStrategy": "FULL"
+        }
+      ],
+      "Next": "FinalDecision"
+    },
+    "FinalDecision": {
+      "Type": "Choice",
+      "Choices": [
+        {
+          "Variable": "$.Failed",
+          "NumericGreaterThan": 0,
+          "Next": "Failed"
+        }
+      ],
+      "Default": "Success"
+    },
+    "Failed": {
+      "Type": "Fail"
+    },
+    "Success": {
+      "Type": "Succeed"
+    }
+  }
+}
@@ -1,11 +1,27 @@
 {
-  "Comment": "Account Factory Workflow sem retry, com tratamento de erros",
+  "Comment": "Account Factory Workflow: erros transitórios repetidos com backoff e jitter, conflitos do Control Tower reenfileirados, falhas permanentes registradas como FAILED",
   "StartAt": "Validate",
   "States": {
     "Validate": {
       "Type": "Task",
       "Resource": "${validate_lambda}",
       "ResultPath": "$",
+      "Retry": [
+        {
+          "ErrorEquals": [
+            "TransientError",
+            "Lambda.ServiceException",
+            "Lambda.AWSLambdaException",
+            "Lambda.SdkClientException",
+            "Lambda.TooManyRequestsException"
+          ],
+          "IntervalSeconds": 5,
+          "MaxAttempts": 5,
+          "BackoffRate": 2.0,
+          "MaxDelaySeconds": 120,
+          "JitterStrategy": "FULL"
+        }
+      ],
       "Catch": [
         {
           "ErrorEquals": ["States.ALL"],
@@ -19,6 +35,22 @@
       "Type": "Task",
       "Resource": "${provision_lambda}",
       "ResultPath": "$",
+      "Retry": [
+        {
+          "ErrorEquals": [
+            "TransientError",
+            "Lambda.ServiceException",
+            "Lambda.AWSLambdaException",
+            "Lambda.SdkClientException",
+            "Lambda.TooManyRequestsException"
+          ],
+          "IntervalSeconds": 30,
+          "MaxAttempts": 6,
+          "BackoffRate": 2.0,
+          "MaxDelaySeconds": 600,
+          "JitterStrategy": "FULL"
+        }
+      ],
       "Catch": [
         {
           "ErrorEquals": ["States.ALL"],
@@ -32,7 +64,28 @@
       "Type": "Task",
       "Resource": "${check_status_lambda}",
       "ResultPath": "$",
+      "Retry": [
+        {
+          "ErrorEquals": [
+            "TransientError",
+            "Lambda.ServiceException",
+            "Lambda.AWSLambdaException",
+            "Lambda.SdkClientException",
+            "Lambda.TooManyRequestsException"
+          ],
+          "IntervalSeconds": 10,
+          "MaxAttempts": 5,
+          "BackoffRate": 2.0,
+          "MaxDelaySeconds": 300,
+          "JitterStrategy": "FULL"
+        }
+      ],
       "Catch": [
+        {
+          "ErrorEquals": ["ProvisionConflictError"],
+          "ResultPath": "$.Error",
+          "Next": "CanRequeueProvision"
+        },
         {
           "ErrorEquals": ["States.ALL"],
           "ResultPath": "$.Error",
@@ -41,6 +94,30 @@
       ],
       "Next": "StatusDecision"
     },
+    "CanRequeueProvision": {
+      "Type": "Choice",
+      "Choices": [
+        {
+          "And": [
+            {
+              "Variable": "$.ProvisionAttempt",
+              "IsPresent": true
+            },
+            {
+              "Variable": "$.ProvisionAttempt",
+              "NumericLessThan": 3
+            }
+          ],
+          "Next": "WaitBeforeRequeue"
+        }
+      ],
+      "Default": "UpdateStatusFailed"
+    },
+    "WaitBeforeRequeue": {
+      "Type": "Wait",
+      "Seconds": 600,
+      "Next": "ProvisionAccount"
+    },
     "StatusDecision": {
       "Type": "Choice",
       "Choices": [
@@ -49,6 +126,11 @@
           "StringEquals": "IN_PROCESSING",
           "Next": "Wait5Minutes"
         },
+        {
+          "Variable": "$.Status",
+          "StringEquals": "RETRYING",
+          "Next": "CheckAccountStatus"
+        },
         {
           "Variable": "$.Status",
           "StringEquals": "AVAILABLE",
@@ -71,12 +153,44 @@
       "Type": "Task",
       "Resource": "${update_status_lambda}",
       "ResultPath": "$",
+      "Retry": [
+        {
+          "ErrorEquals": [
+            "TransientError",
+            "Lambda.ServiceException",
+            "Lambda.AWSLambdaException",
+            "Lambda.SdkClientException",
+            "Lambda.TooManyRequestsException"
+          ],
+          "IntervalSeconds": 5,
+          "MaxAttempts": 5,
+          "BackoffRate": 2.0,
+          "MaxDelaySeconds": 120,
+          "JitterStrategy": "FULL"
+        }
+      ],
       "Next": "FinalDecision"
     },
     "UpdateStatusFailed": {
       "Type": "Task",
       "Resource": "${update_failed_status_lambda}",
       "ResultPath": "$",
+      "Retry": [
+        {
+          "ErrorEquals": [
+            "TransientError",
+            "Lambda.ServiceException",
+            "Lambda.AWSLambdaException",
+            "Lambda.SdkClientException",
+            "Lambda.TooManyRequestsException"
+          ],
+          "IntervalSeconds": 5,
+          "MaxAttempts": 5,
+          "BackoffRate": 2.0,
+          "MaxDelaySeconds": 120,
+          "JitterStrategy": "FULL"
+        }
+      ],
       "Next": "FinalDecision"
     },
     "FinalDecision": {
@@ -90,9 +204,6 @@
       ],
       "Default": "Failed"
     },
-
-
-
     "Failed": {
       "Type": "Fail"
     },
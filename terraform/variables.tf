@@ -19,3 +19,113 @@ variable "api_gateway_vpc_allowed_cidrs" {
   type        = list(string)
   default     = ["0.0.0.0/0"]
 }
+
+variable "log_sample_rates" {
+  description = "Fração (0..1) das invocações que logam payloads em DEBUG, por Lambda (ex.: { api = \"0.01\" })"
+  type        = map(string)
+  default     = {}
+}
+
+variable "account_pool_size" {
+  description = "Contas pré-provisionadas mantidas no pool (0 desliga o pool)"
+  type        = number
+  default     = 0
+}
+
+variable "account_pool_ou" {
+  description = "OU de espera onde ficam as contas do pool (precisa existir e estar registrada no Control Tower)"
+  type        = string
+  default     = "Pool"
+}
+
+variable "account_pool_email_template" {
+  description = "E-mail das contas do pool; {id} é trocado por um identificador único (ex.: aws-pool+{id}@corp.com)"
+  type        = string
+  default     = ""
+}
+
+variable "account_pool_eligible_ous" {
+  description = "OUs atendidas pelo pool (vazio = qualquer OU)"
+  type        = list(string)
+  default     = []
+}
+
+variable "account_pool_owner" {
+  description = "Usuário SSO dono das contas enquanto estão no pool"
+  type = object({
+    email      = string
+    first_name = string
+    last_name  = string
+  })
+  default = {
+    email      = ""
+    first_name = "Account"
+    last_name  = "Pool"
+  }
+}
+
+variable "account_pool_sso" {
+  description = "IAM Identity Center usado para dar acesso ao solicitante na conta entregue pelo pool"
+  type = object({
+    instance_arn       = string
+    identity_store_id  = string
+    permission_set_arn = string
+  })
+  default = {
+    instance_arn       = ""
+    identity_store_id  = ""
+    permission_set_arn = ""
+  }
+}
+
+variable "trigger_batch_size" {
+  description = "Máximo de pedidos do stream por invocação do trigger (2+ pedidos viram uma execução de lote)"
+  type        = number
+  default     = 25
+}
+
+variable "trigger_batching_window_seconds" {
+  description = "Tempo que o stream espera para juntar pedidos num lote (0 = entrega imediata)"
+  type        = number
+  default     = 30
+}
+
+variable "batch_provision_concurrency" {
+  description = "Provisionamentos simultâneos no Map da state machine de lote (limite do Control Tower)"
+  type        = number
+  default     = 5
+}
+
+variable "webhook_max_attempts" {
+  description = "Tentativas por entrega de webhook (com backoff) antes de ir para a DLQ na tabela de controle"
+  type        = number
+  default     = 4
+}
+
+variable "api_caller_rate_limits" {
+  description = "Requisições por segundo aceitas pela API por principal IAM, separadas em leituras (GET) e escritas (POST/PATCH/DELETE)"
+  type = object({
+    read  = number
+    write = number
+  })
+  default = {
+    read  = 10
+    write = 2
+  }
+}
+
+variable "archive_after_days" {
+  description = "Dias em estado terminal (ACTIVE, SUSPENDED, FAILED) antes de o registro ir para a tabela de arquivo"
+  type        = number
+  default     = 90
+}
+
+variable "organizations" {
+  description = "Organizações atendidas além da local, por nome: role assumida na conta de gerenciamento, principal associado ao portfolio do Account Factory (default: a própria role) e prefixos de OU roteados para ela"
+  type = map(object({
+    role_arn      = string
+    principal_arn = optional(string)
+    ou_prefixes   = optional(list(string), [])
+  }))
+  default = {}
+}
@@ -0,0 +1,67 @@
+# ---------------- Webhooks de conclusão ----------------
+# O stream_processor repassa os eventos (consumer webhooks); esta Lambda faz a
+# entrega HTTP, guarda as falhas na DLQ e as reenvia a cada hora.
+resource "aws_iam_role" "lambda_webhooks_role" {
+  name               = "${local.prefix}-notify-webhooks-lambda-role"
+  assume_role_policy = local.lambda_assume_role
+  tags               = local.default_tags
+}
+
+resource "aws_iam_role_policy" "lambda_webhooks_policy" {
+  name = "${local.prefix}-notify-webhooks-lambda-policy"
+  role = aws_iam_role.lambda_webhooks_role.id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:DeleteItem",
+          "dynamodb:Query"
+        ]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.control.arn
+      },
+      {
+        Action = [
+          "logs:CreateLogGroup",
+          "logs:CreateLogStream",
+          "logs:PutLogEvents"
+        ]
+        Effect   = "Allow"
+        Resource = "*"
+      }
+    ]
+  })
+}
+
+module "notify_webhooks_lambda" {
+  source        = "./modules/lambda"
+  function_name = "${local.prefix}-notify-webhooks"
+  role_arn      = aws_iam_role.lambda_webhooks_role.arn
+  handler       = "notify_webhooks.lambda_handler"
+  runtime       = "python3.11"
+  timeout       = 300
+  source_file   = "${local.lambda_src_path}/accounts/notify_webhooks.py"
+  output_path   = "${local.lambda_src_path}/artfacts/notify_webhooks.zip"
+  layers        = [aws_lambda_layer_version.shared.arn]
+  tags          = local.default_tags
+  environment = {
+    CONTROL_TABLE        = aws_dynamodb_table.control.name
+    WEBHOOK_MAX_ATTEMPTS = tostring(var.webhook_max_attempts)
+    LOG_SAMPLE_RATE      = lookup(var.log_sample_rates, "notify_webhooks", "0")
+  }
+}
+
+# Reenvio periódico das entregas que esgotaram as tentativas
+resource "aws_ssm_association" "webhooks_redeliver" {
+  name                = "AWS-InvokeLambdaFunction"
+  association_name    = "${local.prefix}-webhooks-redeliver"
+  schedule_expression = "rate(1 hour)"
+
+  parameters = {
+    FunctionName = [module.notify_webhooks_lambda.function_name]
+    Payload      = ["{\"redeliver\": true}"]
+  }
+}
@@ -0,0 +1,253 @@
+import functools
+import os
+import sys
+import threading
+import types
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+for path in (
+    ROOT,
+    ROOT / "lambda_src" / "layer" / "python",
+    ROOT / "lambda_src" / "accounts",
+):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("DYNAMO_TABLE", "accfactory-ddb-accounts")
+os.environ.setdefault("CONTROL_TABLE", "accfactory-ddb-control")
+os.environ.setdefault("PRINCIPAL_ARN", "arn:aws:iam::123456789012:role/provisioning")
+os.environ.setdefault(
+    "SFN_ARN", "arn:aws:states:us-east-1:123456789012:stateMachine:CreateAccount"
+)
+
+
+class _DummyDynamoResource:
+    def Table(self, name):
+        return None
+
+
+class _DummyClient:
+    pass
+
+
+class _ClientError(Exception):
+    """Mesma assinatura de ``botocore.exceptions.ClientError``."""
+
+    def __init__(self, error_response, operation_name):
+        super().__init__(error_response.get("Error", {}).get("Message", ""))
+        self.response = error_response
+        self.operation_name = operation_name
+
+
+class _DummyAttr:
+    def __init__(self, name):
+        self.name = name
+
+    def eq(self, value):
+        return (self.name, value)
+
+    def ne(self, value):
+        return (self.name, "<>", value)
+
+
+dummy_boto3 = types.ModuleType("boto3")
+dummy_boto3.resource = lambda *_args, **_kwargs: _DummyDynamoResource()
+dummy_boto3.client = lambda *_args, **_kwargs: _DummyClient()
+sys.modules.setdefault("boto3", dummy_boto3)
+
+conditions_module = types.ModuleType("boto3.dynamodb.conditions")
+conditions_module.Attr = _DummyAttr
+conditions_module.Key = _DummyAttr
+dynamodb_module = types.ModuleType("boto3.dynamodb")
+dynamodb_module.conditions = conditions_module
+sys.modules.setdefault("boto3.dynamodb", dynamodb_module)
+sys.modules.setdefault("boto3.dynamodb.conditions", conditions_module)
+
+botocore_exceptions = types.SimpleNamespace(ClientError=_ClientError)
+sys.modules.setdefault(
+    "botocore", types.SimpleNamespace(exceptions=botocore_exceptions)
+)
+sys.modules.setdefault("botocore.exceptions", botocore_exceptions)
+
+
+def client_error(code, operation="Operation", message=""):
+    from botocore.exceptions import ClientError
+
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+class CallRecorder:
+    """Registra cada operação feita nos clients fake como ``(serviço, operação)``."""
+
+    def __init__(self):
+        self.calls = []
+
+    def wrap(self, service, client):
+        return _RecordingClient(self, service, client)
+
+    def count(self, service=None, operation=None):
+        return sum(
+            1
+            for called_service, called_operation in self.calls
+            if service in (None, called_service)
+            and operation in (None, called_operation)
+        )
+
+    def clear(self):
+        self.calls.clear()
+
+
+class _RecordingClient:
+    def __init__(self, recorder, service, client):
+        self._recorder = recorder
+        self._service = service
+        self._client = client
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        # ``wraps`` preserva ``__name__``, usado pelo RateLimiter como operação.
+        @functools.wraps(attribute)
+        def record(*args, **kwargs):
+            self._recorder.calls.append((self._service, name))
+            return attribute(*args, **kwargs)
+
+        return record
+
+
+class DirectLimiter:
+    """Limiter sem orçamento nem retry: chama o client direto."""
+
+    def call(self, func, **kwargs):
+        return func(**kwargs)
+
+    def paginate(self, func, **kwargs):
+        yield func(**kwargs)
+
+
+class FakeOrganizations:
+    """Organizations configurável: árvore de OUs, contas e tags.
+
+    ``ous``: ``{id: (pai, nome)}`` (default Root/Engineering/Platform);
+    ``accounts``: ``{id: {"Name", "Email", "Status", "OU"}}``, com ``OU``
+    default ``ou-eng``; ``tags``: ``{id: [{"Key", "Value"}]}``. Cada chamada
+    fica em ``calls`` como ``(operação, kwargs)``; passe uma lista própria para
+    intercalar com as de outros fakes.
+    """
+
+    DEFAULT_OU = "ou-eng"
+
+    def __init__(self, ous=None, accounts=None, tags=None, root="r-root", calls=None):
+        self.root = root
+        self.ous = dict(
+            ous
+            if ous is not None
+            else {"ou-eng": (root, "Engineering"), "ou-plat": ("ou-eng", "Platform")}
+        )
+        self.accounts = {id_: dict(data) for id_, data in (accounts or {}).items()}
+        self.tags = dict(tags or {})
+        self.calls = [] if calls is None else calls
+        self._lock = threading.Lock()
+
+    def _record(self, operation, **kwargs):
+        with self._lock:
+            self.calls.append((operation, kwargs))
+
+    def count(self, operation=None):
+        return sum(1 for called, _ in self.calls if operation in (None, called))
+
+    def _ou_of(self, account_id):
+        return self.accounts.get(account_id, {}).get("OU", self.DEFAULT_OU)
+
+    def list_roots(self):
+        self._record("list_roots")
+        return {"Roots": [{"Id": self.root, "Name": "Root"}]}
+
+    def list_organizational_units_for_parent(self, ParentId):
+        self._record("list_organizational_units_for_parent", ParentId=ParentId)
+        return {
+            "OrganizationalUnits": [
+                {"Id": ou, "Name": name}
+                for ou, (parent, name) in self.ous.items()
+                if parent == ParentId
+            ]
+        }
+
+    def list_children(self, ParentId, ChildType):
+        self._record("list_children", ParentId=ParentId, ChildType=ChildType)
+        if ChildType == "ACCOUNT":
+            ids = [i for i in self.accounts if self._ou_of(i) == ParentId]
+        else:
+            ids = [ou for ou, (parent, _) in self.ous.items() if parent == ParentId]
+        return {"Children": [{"Id": i, "Type": ChildType} for i in ids]}
+
+    def list_accounts(self, **kwargs):
+        self._record("list_accounts", **kwargs)
+        return {
+            "Accounts": [
+                {
+                    "Id": id_,
+                    **{k: v for k, v in data.items() if k in ("Name", "Email")},
+                    "Status": data.get("Status", "ACTIVE"),
+                }
+                for id_, data in self.accounts.items()
+            ]
+        }
+
+    def describe_account(self, AccountId):
+        self._record("describe_account", AccountId=AccountId)
+        if AccountId not in self.accounts:
+            raise client_error("AccountNotFoundException", "DescribeAccount")
+        account = self.accounts[AccountId]
+        return {
+            "Account": {
+                "Id": AccountId,
+                "Name": account["Name"],
+                "Email": account["Email"],
+                "Status": account.get("Status", "ACTIVE"),
+            }
+        }
+
+    def list_parents(self, ChildId):
+        self._record("list_parents", ChildId=ChildId)
+        parent = self._ou_of(ChildId)
+        kind = "ROOT" if parent == self.root else "ORGANIZATIONAL_UNIT"
+        return {"Parents": [{"Id": parent, "Type": kind}]}
+
+    def list_tags_for_resource(self, ResourceId):
+        self._record("list_tags_for_resource", ResourceId=ResourceId)
+        return {"Tags": self.tags.get(ResourceId, [])}
+
+    def tag_resource(self, ResourceId, Tags):
+        self._record("tag_resource", ResourceId=ResourceId, Tags=Tags)
+        return {}
+
+    def move_account(self, AccountId, SourceParentId, DestinationParentId):
+        self._record(
+            "move_account",
+            AccountId=AccountId,
+            SourceParentId=SourceParentId,
+            DestinationParentId=DestinationParentId,
+        )
+        self.accounts.setdefault(AccountId, {})["OU"] = DestinationParentId
+        return {}
+
+
+@pytest.fixture
+def aws_calls():
+    return CallRecorder()
+
+
+@pytest.fixture(autouse=True)
+def fresh_caller_limits():
+    """Cada teste começa com o orçamento por chamador da API cheio."""
+    from accfactory import admission
+
+    for limiter in admission.limiters().values():
+        limiter._buckets.clear()
@@ -0,0 +1,217 @@
+import json
+import re
+
+import pytest
+
+import account_pool
+import lambda_src.api.lambda_function as api
+import update_succeed_status
+from accfactory import org_cache, pool
+from conftest import DirectLimiter, FakeOrganizations, client_error
+
+TEMPLATE = "aws-pool+{id}@corp.com"
+REQUEST = {
+    "AccountEmail": "team@corp.com",
+    "AccountName": "team-account",
+    "OrgUnit": "Engineering",
+    "SSOUserEmail": "owner@corp.com",
+    "SSOUserFirstName": "Jane",
+    "SSOUserLastName": "Doe",
+}
+
+
+class FakeDynamo:
+    """Tabela de contas (AccountEmail) + membros do pool na tabela de controle."""
+
+    def __init__(self):
+        self.accounts = {}
+        self.members = {}
+        self.transactions = []
+
+    def query(self, TableName, **kwargs):
+        return {"Items": list(self.members.values())}
+
+    def put_item(self, TableName, Item, **kwargs):
+        if "PK" in Item:
+            self.members[Item["SK"]["S"]] = Item
+        else:
+            self.accounts[Item["AccountEmail"]["S"]] = Item
+        return {}
+
+    def update_item(
+        self, TableName, Key, UpdateExpression, ExpressionAttributeValues, **kwargs
+    ):
+        if "PK" in Key:
+            member = self.members[Key["SK"]["S"]]
+            member["State"] = ExpressionAttributeValues[":ready"]
+            member["AccountId"] = ExpressionAttributeValues[":id"]
+            member["ReadyAt"] = ExpressionAttributeValues[":now"]
+        else:
+            item = self.accounts.setdefault(Key["AccountEmail"]["S"], dict(Key))
+            names = kwargs["ExpressionAttributeNames"]
+            for alias, value in re.findall(r"(#\w+) = (:\w+)", UpdateExpression):
+                item[names[alias]] = ExpressionAttributeValues[value]
+        return {}
+
+    def get_item(self, TableName, Key, **kwargs):
+        item = self.accounts.get(Key["AccountEmail"]["S"])
+        return {"Item": item} if item else {}
+
+    def transact_write_items(self, TransactItems):
+        member, pooled, put = TransactItems
+        email = member["Delete"]["Key"]["SK"]["S"]
+        existing = self.accounts.get(put["Put"]["Item"]["AccountEmail"]["S"])
+        if existing and existing["Status"]["S"] != "FAILED":
+            error = client_error("TransactionCanceledException")
+            error.response["CancellationReasons"] = [
+                {"Code": "None"},
+                {"Code": "None"},
+                {"Code": "ConditionalCheckFailed"},
+            ]
+            raise error
+        self.transactions.append(TransactItems)
+        del self.members[email]
+        self.accounts.pop(email, None)
+        self.accounts[put["Put"]["Item"]["AccountEmail"]["S"]] = put["Put"]["Item"]
+        return {}
+
+
+@pytest.fixture
+def pooled(monkeypatch):
+    monkeypatch.setattr(pool, "POOL_SIZE", 2)
+    monkeypatch.setattr(pool, "EMAIL_TEMPLATE", TEMPLATE)
+    dynamo = FakeDynamo()
+    pool.register(dynamo, "control", "aws-pool+aaa@corp.com", "pool-aaa")
+    pool.mark_ready(dynamo, "control", "aws-pool+aaa@corp.com", "111111111111")
+    dynamo.accounts["aws-pool+aaa@corp.com"] = {
+        "AccountEmail": {"S": "aws-pool+aaa@corp.com"},
+        "Status": {"S": pool.POOLED},
+    }
+    return dynamo
+
+
+def test_pool_email_and_eligibility(monkeypatch):
+    monkeypatch.setattr(pool, "EMAIL_TEMPLATE", TEMPLATE)
+    monkeypatch.setattr(pool, "POOL_SIZE", 1)
+    monkeypatch.setattr(pool, "ELIGIBLE_OUS", {"engineering"})
+
+    assert pool.is_pool_email("AWS-Pool+0a1b2c@corp.com")
+    assert not pool.is_pool_email("aws-pool@corp.com")
+    assert not pool.is_pool_email("team@corp.com")
+    assert pool.eligible({"OrgUnit": "Engineering"})
+    assert not pool.eligible({"OrgUnit": "Sandbox"})
+    assert not pool.eligible({"OrgUnit": "Engineering", "UsePool": False})
+
+
+def test_claim_hands_over_a_ready_account_in_one_transaction(pooled):
+    record = {**REQUEST, "Status": "Requested"}
+
+    claimed = pool.claim(pooled, "control", "accounts", record)
+
+    assert claimed["AccountId"] == "111111111111"
+    assert claimed["PoolEmail"] == "aws-pool+aaa@corp.com"
+    assert claimed["Status"] == pool.CLAIMING
+    assert len(pooled.transactions) == 1
+    assert pooled.members == {}
+    assert set(pooled.accounts) == {"team@corp.com"}
+    # Pool vazio: o POST segue o fluxo normal
+    assert pool.claim(pooled, "control", "accounts", record) is None
+
+
+def test_claim_refuses_an_email_that_already_has_an_account(pooled):
+    pooled.accounts["team@corp.com"] = {"Status": {"S": "ACTIVE"}}
+
+    with pytest.raises(pool.AccountExists):
+        pool.claim(pooled, "control", "accounts", {**REQUEST})
+    assert "aws-pool+aaa@corp.com" in pooled.members
+
+
+def test_api_post_served_by_pool_skips_capacity_checks(monkeypatch, pooled):
+    invoked = []
+
+    class FakeLambda:
+        def invoke(self, **kwargs):
+            invoked.append(json.loads(kwargs["Payload"]))
+
+    monkeypatch.setattr(api, "dynamo_client", pooled)
+    monkeypatch.setattr(api, "lambda_client", FakeLambda())
+    monkeypatch.setattr(api, "POOL_FUNCTION", "account-pool")
+    monkeypatch.setattr(api, "validate_account_name", lambda _: True)
+    monkeypatch.setattr(api, "validate_org_unit", lambda path, org=None: True)
+    monkeypatch.setattr(api, "has_available_capacity", lambda org=None: False)
+
+    event = {"httpMethod": "POST", "body": json.dumps(REQUEST)}
+    response = api.lambda_handler(event, None)
+
+    assert response["statusCode"] == 201
+    body = json.loads(response["body"])
+    assert body["AccountId"] == "111111111111"
+    assert body["Status"] == pool.CLAIMING
+    assert invoked == [{"claim": "team@corp.com"}]
+
+    # Sem conta pronta, o limite do Step Function volta a valer
+    event["body"] = json.dumps({**REQUEST, "AccountEmail": "other@corp.com"})
+    assert api.lambda_handler(event, None)["statusCode"] == 429
+
+
+def test_finish_claim_moves_names_and_activates(monkeypatch, pooled):
+    pool.claim(pooled, "control", "accounts", {**REQUEST, "Tags": [{"Key": "a"}]})
+    calls = []
+    org = FakeOrganizations(accounts={"111111111111": {"OU": "ou-pool"}}, calls=calls)
+
+    class FakeAccount:
+        def put_account_name(self, AccountId, AccountName):
+            calls.append(("put_account_name", {"AccountName": AccountName}))
+
+    monkeypatch.setattr(account_pool, "DYNO", pooled)
+    monkeypatch.setattr(account_pool, "ORG", org)
+    monkeypatch.setattr(account_pool, "ACCOUNT", FakeAccount())
+    monkeypatch.setattr(account_pool, "ORG_LIMITER", DirectLimiter())
+    monkeypatch.setattr(account_pool, "SSO_INSTANCE_ARN", None)
+    org_cache.invalidate()
+
+    result = account_pool.finish_claim("team@corp.com")
+    org_cache.invalidate()
+
+    assert result["Status"] == "ACTIVE"
+    writes = [(op, kwargs) for op, kwargs in calls if not op.startswith("list_")]
+    assert [op for op, _ in writes] == [
+        "move_account",
+        "put_account_name",
+        "tag_resource",
+    ]
+    assert writes[0][1]["DestinationParentId"] == "ou-eng"
+    assert writes[1][1]["AccountName"] == "team-account"
+    assert writes[2][1]["ResourceId"] == "111111111111"
+    record = pooled.accounts["team@corp.com"]
+    assert record["Status"] == {"S": "ACTIVE"}
+    assert "ActivatedAt" in record
+
+
+def test_refill_requests_missing_accounts_and_success_marks_them_ready(
+    monkeypatch, pooled
+):
+    monkeypatch.setattr(account_pool, "DYNO", pooled)
+    monkeypatch.setattr(account_pool, "POOL_OWNER", {**account_pool.POOL_OWNER})
+    account_pool.POOL_OWNER["email"] = "cloud@corp.com"
+
+    assert account_pool.refill() == {"requested": 1}
+    (email,) = [e for e in pooled.accounts if e != "aws-pool+aaa@corp.com"]
+    assert pool.is_pool_email(email)
+    assert pooled.members[email]["State"] == {"S": pool.PROVISIONING}
+    assert pooled.accounts[email]["Pooled"] == {"BOOL": True}
+    # Pool cheio: nada a pedir
+    assert account_pool.refill() == {"requested": 0}
+
+    monkeypatch.setattr(update_succeed_status, "dynamo_client", pooled)
+    monkeypatch.setattr(
+        update_succeed_status, "get_account_id", lambda client, pp: "222222222222"
+    )
+    result = update_succeed_status.lambda_handler(
+        {"AccountEmail": email, "ProvisionedProductId": "pp-1", "Pooled": True}, None
+    )
+
+    assert result["Status"] == pool.POOLED
+    assert pooled.accounts[email]["Status"] == {"S": pool.POOLED}
+    assert "ActivatedAt" not in pooled.accounts[email]
+    assert pooled.members[email]["State"] == {"S": pool.READY}
@@ -0,0 +1,111 @@
+import pytest
+
+from accfactory import admission, throttling
+from conftest import client_error
+
+import lambda_src.api.lambda_function as api
+
+BUDGETS = {
+    "caller-read": throttling.Budget(
+        rate=4, burst=4, max_attempts=1, base_delay=0.0, max_delay=1.0
+    ),
+    "caller-write": throttling.Budget(
+        rate=1, burst=1, max_attempts=1, base_delay=0.0, max_delay=1.0
+    ),
+}
+ROLE = "arn:aws:sts::123456789012:assumed-role/ci-deployer"
+
+
+class CounterTable:
+    """``update_item`` condicional dos leases, contando as chamadas."""
+
+    def __init__(self):
+        self.counters = {}
+        self.updates = 0
+
+    def update_item(self, **kwargs):
+        self.updates += 1
+        key = (kwargs["Key"]["PK"]["S"], kwargs["Key"]["SK"]["S"])
+        values = kwargs["ExpressionAttributeValues"]
+        used = self.counters.get(key)
+        if used is not None and used > int(values[":max"]["N"]):
+            raise client_error("ConditionalCheckFailedException", "UpdateItem")
+        self.counters[key] = (used or 0) + int(values[":n"]["N"])
+        return {}
+
+
+def _container(table, now):
+    return {
+        kind: throttling.RateLimiter(
+            f"caller-{kind}",
+            table_name="accfactory-ddb-control",
+            budgets=BUDGETS,
+            dynamo_client=table,
+            clock=lambda: now[0],
+        )
+        for kind in admission.KINDS
+    }
+
+
+def _event(method="GET", arn=f"{ROLE}/run-1", **identity):
+    identity = {"userArn": arn, "sourceIp": "10.0.0.1", **identity}
+    return {"httpMethod": method, "requestContext": {"identity": identity}}
+
+
+def test_principal_groups_role_sessions_and_falls_back_to_ip():
+    assert admission.principal(_event(arn=f"{ROLE}/run-42")) == ROLE
+    user = "arn:aws:iam::123456789012:user/maria"
+    assert admission.principal(_event(arn=user)) == user
+    assert admission.principal(_event(arn=None)) == "10.0.0.1"
+    assert admission.principal({}) == "anonymous"
+
+
+def test_budget_is_shared_across_containers_per_caller_and_kind():
+    table, now = CounterTable(), [1000.2]
+    first, second = _container(table, now), _container(table, now)
+
+    admitted = [
+        admission.check(_event(), limiters) is None
+        for limiters in (first, second, first, second, first)
+    ]
+    assert admitted == [True, True, True, True, False]
+
+    rejected = admission.check(_event(arn=f"{ROLE}/run-2"), second)
+    assert rejected["statusCode"] == 429
+    assert rejected["headers"]["Retry-After"] == "1"
+    # Janela esgotada fica no cache do container: sem novo lease
+    updates = table.updates
+    assert admission.check(_event(), second)["statusCode"] == 429
+    assert table.updates == updates
+
+    # Outro chamador e as escritas têm orçamentos próprios
+    other = "arn:aws:iam::123456789012:user/maria"
+    assert admission.check(_event(arn=other), first) is None
+    assert admission.check(_event("POST"), first) is None
+    assert admission.check(_event("PATCH"), second)["statusCode"] == 429
+
+    now[0] = 1001.0
+    assert admission.check(_event(), first) is None
+
+
+def test_api_rejects_before_any_downstream_call(monkeypatch):
+    class Untouchable:
+        def __getattr__(self, name):
+            raise AssertionError(f"chamada downstream: {name}")
+
+    for client in ("table", "dynamo_client", "org_client", "sfn_client"):
+        monkeypatch.setattr(api, client, Untouchable())
+    table, now = CounterTable(), [1000.0]
+    monkeypatch.setattr(api, "CALLER_LIMITERS", _container(table, now))
+
+    for _ in range(BUDGETS["caller-write"].rate):
+        admission.check(_event("POST"), api.CALLER_LIMITERS)
+    response = api.lambda_handler({**_event("POST"), "body": "{}"}, None)
+
+    assert response["statusCode"] == 429
+    assert response["headers"]["Retry-After"] == "1"
+
+
+@pytest.mark.parametrize("method, kind", [("GET", "read"), ("DELETE", "write")])
+def test_methods_map_to_budgets(method, kind):
+    assert admission.kind(method) == kind
@@ -0,0 +1,120 @@
+import json
+
+from accfactory import aggregates
+
+
+def _image(status, org_unit="Sandbox"):
+    return {"Status": {"S": status}, "OrgUnit": {"S": org_unit}}
+
+
+def _record(event_name, old=None, new=None):
+    images = {}
+    if old:
+        images["OldImage"] = old
+    if new:
+        images["NewImage"] = new
+    return {"eventName": event_name, "dynamodb": images}
+
+
+class CounterControlTable:
+    """Fake low-level da partição STATS (ADD em update_item + query)."""
+
+    def __init__(self):
+        self.items = {}
+        self.updates = 0
+
+    def update_item(self, **kwargs):
+        self.updates += 1
+        sk = kwargs["Key"]["SK"]["S"]
+        values = kwargs["ExpressionAttributeValues"]
+        item = self.items.setdefault(sk, {"Count": 0})
+        item["Count"] += int(values[":delta"]["N"])
+        item["Status"] = values[":status"]["S"]
+        item["OrgUnit"] = values[":ou"]["S"]
+        return {}
+
+    def query(self, **kwargs):
+        return {
+            "Items": [
+                {
+                    "Status": {"S": item["Status"]},
+                    "OrgUnit": {"S": item["OrgUnit"]},
+                    "Count": {"N": str(item["Count"])},
+                }
+                for item in self.items.values()
+            ]
+        }
+
+
+def test_deltas_follow_insert_modify_and_remove():
+    records = [
+        _record("INSERT", new=_image("Requested")),
+        _record("INSERT", new=_image("Requested")),
+        _record("MODIFY", old=_image("Requested"), new=_image("IN_PROCESSING")),
+        # Alterações que não mudam Status/OrgUnit não geram contadores.
+        _record("MODIFY", old=_image("ACTIVE"), new=_image("ACTIVE")),
+        _record("REMOVE", old=_image("ACTIVE", "Engineering")),
+    ]
+
+    deltas = aggregates.deltas_from_records(records)
+
+    assert deltas == {
+        ("Requested", "Sandbox"): 1,
+        ("IN_PROCESSING", "Sandbox"): 1,
+        ("ACTIVE", "Engineering"): -1,
+    }
+
+
+def test_apply_records_issues_one_update_per_changed_counter():
+    table = CounterControlTable()
+    records = [_record("INSERT", new=_image("Requested")) for _ in range(50)]
+
+    result = aggregates.apply_records(table, "control", records)
+
+    assert result == {"updated_counters": 1}
+    assert table.updates == 1
+    assert table.items["Requested#Sandbox"]["Count"] == 50
+
+
+def test_summarize_groups_by_status_and_org_unit():
+    counters = [
+        {"Status": "ACTIVE", "OrgUnit": "Sandbox", "Count": 3},
+        {"Status": "ACTIVE", "OrgUnit": "Engineering", "Count": 2},
+        {"Status": "Requested", "OrgUnit": "Sandbox", "Count": 1},
+        {"Status": "IN_PROCESSING", "OrgUnit": "Sandbox", "Count": 0},
+    ]
+
+    summary = aggregates.summarize(counters)
+
+    assert summary["total"] == 6
+    assert summary["byStatus"] == {"ACTIVE": 5, "Requested": 1}
+    assert summary["byOrgUnit"]["Sandbox"] == {"ACTIVE": 3, "Requested": 1}
+    assert aggregates.summarize(counters, "Engineering")["total"] == 2
+
+
+def test_stats_endpoint_reads_counters_only(monkeypatch):
+    import lambda_src.api.lambda_function as api
+
+    table = CounterControlTable()
+    aggregates.apply_records(
+        table, "control", [_record("INSERT", new=_image("ACTIVE"))]
+    )
+    monkeypatch.setattr(api, "dynamo_client", table)
+
+    response = api.lambda_handler({"httpMethod": "GET", "resource": "/stats"}, None)
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["byStatus"] == {"ACTIVE": 1}
+
+
+def test_stream_processor_isolates_consumer_failures(monkeypatch):
+    import stream_processor
+
+    def broken(*_args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(stream_processor, "CONSUMERS", [("broken", broken)])
+
+    result = stream_processor.lambda_handler({"Records": [{}]}, None)
+
+    assert result == {"broken": {"error": "boom"}}
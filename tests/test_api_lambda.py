@@ -134,9 +134,9 @@ def test_post_success_persists_item(monkeypatch, stub_table):
     }
 
     monkeypatch.setattr(api, "validate_account_name", lambda _: True)
-    monkeypatch.setattr(api, "validate_org_unit", lambda _: True)
+    monkeypatch.setattr(api, "validate_org_unit", lambda path, org=None: True)
 
-    monkeypatch.setattr(api, "has_available_capacity", lambda: True)
+    monkeypatch.setattr(api, "has_available_capacity", lambda org=None: True)
 
     event = {"httpMethod": "POST", "body": json.dumps(payload)}
     response = api.lambda_handler(event, None)
@@ -159,8 +159,8 @@ def test_post_returns_429_when_sfn_is_full(monkeypatch):
         "SSOUserLastName": "Doe",
     }
     monkeypatch.setattr(api, "validate_account_name", lambda _: True)
-    monkeypatch.setattr(api, "validate_org_unit", lambda _: True)
-    monkeypatch.setattr(api, "has_available_capacity", lambda: False)
+    monkeypatch.setattr(api, "validate_org_unit", lambda path, org=None: True)
+    monkeypatch.setattr(api, "has_available_capacity", lambda org=None: False)
 
     event = {"httpMethod": "POST", "body": json.dumps(payload)}
     response = api.lambda_handler(event, None)
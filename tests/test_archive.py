@@ -0,0 +1,128 @@
+import json
+from copy import deepcopy
+
+from accfactory import archive, inventory
+from conftest import client_error
+
+import lambda_src.api.lambda_function as api
+
+RECORD = {
+    "AccountEmail": "old@corp.com",
+    "AccountName": "old-account",
+    "AccountId": "111111111111",
+    "Status": "ACTIVE",
+    "OrgUnit": "Engineering",
+    "SSOUserEmail": "owner@corp.com",
+    "SSOUserFirstName": "Maria",
+    "Tags": [{"Key": "env", "Value": "prod"}],
+    "CreatedAt": "2026-01-01T00:00:00+00:00",
+    "ActivatedAt": "2026-01-02T00:00:00+00:00",
+    "UpdatedAt": "2026-01-02T00:00:00+00:00",
+}
+
+
+class FakeTable:
+    """Tabela por ``AccountEmail`` com as condições usadas pelo arquivamento."""
+
+    def __init__(self, *items):
+        self.items = {item["AccountEmail"]: deepcopy(item) for item in items}
+        self.updates = []
+
+    def scan(self, **kwargs):
+        items = [
+            item
+            for item in self.items.values()
+            if item.get("Status") in archive.STATUSES and archive.MARKER not in item
+        ]
+        return {"Items": deepcopy(items)}
+
+    def get_item(self, Key, **kwargs):
+        item = self.items.get(Key["AccountEmail"])
+        return {"Item": deepcopy(item)} if item else {}
+
+    def query(self, **kwargs):
+        return {"Items": [deepcopy(item) for item in self.items.values()][:1]}
+
+    def put_item(self, Item, ConditionExpression=None, **kwargs):
+        current = self.items.get(Item["AccountEmail"], {})
+        if ConditionExpression and current.get("UpdatedAt") != kwargs[
+            "ExpressionAttributeValues"
+        ].get(":updated"):
+            raise client_error("ConditionalCheckFailedException", "PutItem")
+        self.items[Item["AccountEmail"]] = deepcopy(Item)
+
+    def update_item(self, Key, **kwargs):
+        current = self.items.get(Key["AccountEmail"])
+        condition = kwargs.get("ConditionExpression", "")
+        if f"attribute_not_exists({archive.MARKER})" in condition and (
+            archive.is_stub(current)
+        ):
+            error = client_error("ConditionalCheckFailedException", "UpdateItem")
+            error.response["Item"] = deepcopy(current)
+            raise error
+        self.updates.append((Key["AccountEmail"], kwargs))
+
+
+def test_archive_swaps_old_terminal_records_for_stubs():
+    recent = {
+        **RECORD,
+        "AccountEmail": "new@corp.com",
+        "ActivatedAt": "2026-10-01T00:00:00+00:00",
+    }
+    pending = {**RECORD, "AccountEmail": "pending@corp.com", "Status": "PENDING"}
+    table, archive_table = FakeTable(RECORD, recent, pending), FakeTable()
+
+    before = "2026-07-21T00:00:00+00:00"
+    found = list(archive.candidates(table, before))
+    assert [item["AccountEmail"] for item in found] == ["old@corp.com"]
+
+    assert archive.archive_record(table, archive_table, found[0], "2026-10-19")
+    assert table.items["old@corp.com"] == {
+        **{name: RECORD[name] for name in archive.STUB_FIELDS},
+        "ArchivedAt": "2026-10-19",
+    }
+    assert archive_table.items["old@corp.com"]["Tags"] == RECORD["Tags"]
+    assert list(archive.candidates(table, before)) == []
+
+
+def test_archive_skips_records_changed_since_the_scan():
+    table, archive_table = FakeTable(RECORD), FakeTable()
+    stale = {**RECORD, "UpdatedAt": "2025-12-31T00:00:00+00:00"}
+
+    assert not archive.archive_record(table, archive_table, stale, "2026-10-19")
+    assert table.items["old@corp.com"] == RECORD
+
+
+def test_get_reads_archived_records_through_the_stub(monkeypatch):
+    table, archive_table = FakeTable(RECORD), FakeTable()
+    archive.archive_record(table, archive_table, RECORD, "2026-10-19")
+    monkeypatch.setattr(api, "table", table)
+    monkeypatch.setattr(api, "archive_table", archive_table)
+
+    for params in ({"accountEmail": "OLD@corp.com"}, {"accountId": "111111111111"}):
+        response = api.lambda_handler(
+            {"httpMethod": "GET", "queryStringParameters": params}, None
+        )
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"])["Tags"] == RECORD["Tags"]
+
+
+def test_inventory_writes_go_to_the_archive_copy():
+    table, archive_table = FakeTable(RECORD), FakeTable()
+    archive.archive_record(table, archive_table, RECORD, "2026-10-19")
+    item = inventory.normalize(
+        {
+            "Email": "old@corp.com",
+            "Name": "old-account",
+            "Id": "111111111111",
+            "Status": "SUSPENDED",
+        },
+        "Engineering",
+    )
+
+    inventory.upsert(table, item, [], archive_table=archive_table)
+
+    assert [email for email, _ in archive_table.updates] == ["old@corp.com"]
+    ((email, stub_update),) = table.updates
+    assert "SUSPENDED" in stub_update["ExpressionAttributeValues"].values()
+    assert stub_update["ConditionExpression"] == "attribute_exists(ArchivedAt)"
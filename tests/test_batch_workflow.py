@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+import trigger_sfn
+import update_failed_status
+from accfactory import batch, errors
+from scripts import simulate_workflow
+
+
+def _items(*emails, **fields):
+    return [{"AccountEmail": email, "RequestID": email, **fields} for email in emails]
+
+
+def test_run_isolates_item_errors_and_requeues_conflicts():
+    def process(item):
+        email = item["AccountEmail"]
+        if email.startswith("bad"):
+            raise Exception(json.dumps({"errorMessage": "OU inválida"}))
+        if email.startswith("busy"):
+            raise errors.conflict_error("Control Tower ocupado", email)
+        return {"Status": "AVAILABLE"}
+
+    event = {
+        batch.ITEMS: _items("ok@corp.com", "bad@corp.com", "busy@corp.com")
+        + _items("busy-last@corp.com", ProvisionAttempt=3)
+        + _items("done@corp.com", Error={"Error": "Exception"})
+    }
+
+    result = batch.run(process, event)
+
+    ok, bad, busy, last, done = result[batch.ITEMS]
+    assert ok["Status"] == "AVAILABLE" and "Error" not in ok
+    assert bad["Error"]["Error"] == "Exception"
+    assert busy["Status"] == batch.REQUEUE
+    assert last["Error"]["Error"] == "ProvisionConflictError"
+    assert done == event[batch.ITEMS][4]
+    assert (result["Pending"], result["Requeue"], result["Failed"]) == (0, 1, 3)
+
+
+def test_run_retries_the_batch_or_keeps_the_item_on_transient_errors():
+    def process(item):
+        raise errors.TransientError("Rate exceeded")
+
+    event = {batch.ITEMS: _items("a@corp.com", Status="IN_PROCESSING")}
+
+    with pytest.raises(errors.TransientError):
+        batch.run(process, event)
+    kept = batch.run(process, event, keep_transient=True)
+    assert kept[batch.ITEMS] == event[batch.ITEMS]
+    assert kept["Pending"] == 1
+
+
+def test_failed_handler_marks_every_unfinished_item_of_the_batch(monkeypatch):
+    dynamo = simulate_workflow.FakeDynamoDB()
+    for email in ("a@corp.com", "b@corp.com", "c@corp.com"):
+        dynamo.items[email] = {"Status": {"S": "IN_PROCESSING"}}
+    monkeypatch.setattr(update_failed_status, "DYNO", dynamo)
+    event = {
+        batch.ITEMS: _items("a@corp.com", Success="True")
+        + _items("b@corp.com", "c@corp.com", Status="IN_PROCESSING"),
+        "BatchError": batch.catch_error(RuntimeError("Lambda.Unknown")),
+    }
+
+    result = update_failed_status.lambda_handler(event, None)
+
+    assert result["Succeeded"] == 1 and result["Failed"] == 2
+    assert dynamo.items["a@corp.com"]["Status"] == {"S": "IN_PROCESSING"}
+    assert dynamo.items["b@corp.com"]["Status"] == {"S": "FAILED"}
+    assert dynamo.items["c@corp.com"]["ErrorMessage"] == {"S": "Lambda.Unknown"}
+
+
+def test_trigger_starts_one_batch_execution_per_stream_batch(monkeypatch):
+    started = []
+
+    class FakeSfn:
+        def start_execution(self, stateMachineArn, input):
+            started.append((stateMachineArn, json.loads(input)))
+            return {"executionArn": "arn:execution"}
+
+    class ClosedCircuit:
+        name = "servicecatalog"
+
+        def state(self):
+            return trigger_sfn.circuit.State(trigger_sfn.circuit.CLOSED, 0, 0, 0)
+
+        def allow(self):
+            return True
+
+    monkeypatch.setattr(trigger_sfn, "sfn_client", FakeSfn())
+    monkeypatch.setattr(trigger_sfn, "SC_CIRCUIT", ClosedCircuit())
+    monkeypatch.setattr(trigger_sfn, "DYNAMO_TABLE", None)
+    monkeypatch.setattr(trigger_sfn, "BATCH_SFN_ARN", "arn:batch")
+
+    def records(*emails):
+        return {
+            "Records": [
+                {
+                    "eventName": "INSERT",
+                    "dynamodb": {
+                        "NewImage": {
+                            "AccountEmail": {"S": email},
+                            "Status": {"S": "Requested"},
+                        }
+                    },
+                }
+                for email in emails
+            ]
+        }
+
+    trigger_sfn.lambda_handler(records("a@corp.com", "b@corp.com", "c@corp.com"), None)
+    trigger_sfn.lambda_handler(records("d@corp.com"), None)
+
+    (arn, payload), (single_arn, single) = started
+    assert arn == "arn:batch"
+    assert [item["AccountEmail"] for item in payload[batch.ITEMS]] == [
+        "a@corp.com",
+        "b@corp.com",
+        "c@corp.com",
+    ]
+    assert single_arn == trigger_sfn.SFN_ARN and single["AccountEmail"] == "d@corp.com"
+
+
+def test_batch_definition_references_existing_states():
+    definition = simulate_workflow.load_definition(
+        simulate_workflow.BATCH_DEFINITION_PATH, provision_concurrency=5
+    )
+
+    def targets(states):
+        for state in states.values():
+            yield state.get("Next")
+            yield state.get("Default")
+            for rule in state.get("Choices", []) + state.get("Catch", []):
+                yield rule["Next"]
+
+    processor = definition["States"]["ProvisionBatch"]["ItemProcessor"]
+    assert definition["States"]["ProvisionBatch"]["MaxConcurrency"] == 5
+    for states in (definition["States"], processor["States"]):
+        assert {t for t in targets(states) if t} <= set(states)
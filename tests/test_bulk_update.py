@@ -0,0 +1,204 @@
+import json
+
+import pytest
+
+import bulk_update
+import lambda_src.api.lambda_function as api
+from accfactory import bulk, org_cache
+from conftest import DirectLimiter, FakeOrganizations
+
+DEST_OU = "Engineering/Platform"
+
+
+class FakeDynamo:
+    """Tabela de contas (batch/transação) + item de job na tabela de controle."""
+
+    def __init__(self, accounts):
+        self.accounts = accounts
+        self.jobs = {}
+        self.transactions = []
+        self.progress = []
+
+    def put_item(self, TableName, Item, **kwargs):
+        self.jobs[Item["PK"]["S"]] = Item
+        return {}
+
+    def get_item(self, TableName, Key, **kwargs):
+        item = self.jobs.get(Key["PK"]["S"])
+        return {"Item": item} if item else {}
+
+    def update_item(self, TableName, Key, UpdateExpression, **kwargs):
+        self.progress.append(kwargs.get("ExpressionAttributeValues", {}))
+        return {}
+
+    def batch_get_item(self, RequestItems):
+        ((table, request),) = RequestItems.items()
+        emails = [key["AccountEmail"]["S"] for key in request["Keys"]]
+        found = [self.accounts[e] for e in emails if e in self.accounts]
+        return {"Responses": {table: found}}
+
+    def transact_write_items(self, TransactItems):
+        self.transactions.append(TransactItems)
+        return {}
+
+
+def _account(n, account_id=True, tags=None):
+    item = {"AccountEmail": {"S": f"acc{n}@corp.com"}}
+    if account_id:
+        item["AccountId"] = {"S": f"{n:012d}"}
+    if tags:
+        item["Tags"] = {
+            "L": [{"M": {"Key": {"S": k}, "Value": {"S": v}}} for k, v in tags.items()]
+        }
+    return item
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    accounts = {f"acc{n}@corp.com": _account(n) for n in range(30)}
+    accounts["acc0@corp.com"] = _account(0, tags={"team": "core", "env": "old"})
+    accounts["acc5@corp.com"] = _account(5, account_id=False)
+    dynamo = FakeDynamo(accounts)
+    # Duas contas já estão na OU de destino: não são movidas.
+    org = FakeOrganizations(
+        accounts={f"{1:012d}": {"OU": "ou-plat"}, f"{2:012d}": {"OU": "ou-plat"}}
+    )
+    monkeypatch.setattr(bulk_update, "DYNO", dynamo)
+    monkeypatch.setattr(bulk_update, "ORG", org)
+    monkeypatch.setattr(bulk_update, "ORG_LIMITER", DirectLimiter())
+    org_cache.invalidate()
+    yield dynamo, org
+    org_cache.invalidate()
+
+
+def _create(dynamo, emails):
+    selector, changes = bulk.parse_request(
+        {
+            "selector": {"AccountEmails": emails},
+            "changes": {"Tags": [{"Key": "env", "Value": "prod"}], "OrgUnit": DEST_OU},
+        }
+    )
+    return bulk.create_job(dynamo, "control", selector, changes)
+
+
+def test_parse_request_requires_one_selector_and_known_changes():
+    selector, changes = bulk.parse_request(
+        {
+            "selector": {"AccountEmails": [" A@corp.com", "a@corp.com"]},
+            "changes": {"Tags": [{"Key": "cost", "Value": 10}]},
+        }
+    )
+    assert selector == {"AccountEmails": ["a@corp.com"]}
+    assert changes == {"Tags": [{"Key": "cost", "Value": "10"}]}
+
+    for body in (
+        {"selector": {}, "changes": {"OrgUnit": DEST_OU}},
+        {
+            "selector": {"AccountIds": ["1"], "OrgUnit": "X"},
+            "changes": {"OrgUnit": DEST_OU},
+        },
+        {"selector": {"AccountIds": ["1"]}, "changes": {"Status": "ACTIVE"}},
+        {"selector": {"AccountIds": ["1"]}, "changes": {"Tags": [{"Key": "k"}]}},
+        {
+            "selector": {"AccountIds": [str(n) for n in range(1001)]},
+            "changes": {"OrgUnit": DEST_OU},
+        },
+    ):
+        with pytest.raises(ValueError):
+            bulk.parse_request(body)
+
+
+def test_worker_applies_changes_in_batches(worker):
+    dynamo, org = worker
+    emails = [f"acc{n}@corp.com" for n in range(30)] + ["ghost@corp.com"]
+    job_id = _create(dynamo, emails)
+
+    result = bulk_update.lambda_handler({"jobId": job_id}, None)
+
+    assert result == {
+        "jobId": job_id,
+        "status": bulk.PARTIAL,
+        "succeeded": 29,
+        "failed": 2,
+    }
+    tagged = [call for call in org.calls if call[0] == "tag_resource"]
+    moved = {call[1]["AccountId"] for call in org.calls if call[0] == "move_account"}
+    assert len(tagged) == 29
+    assert len(moved) == 27 and f"{1:012d}" not in moved
+    # 31 contas em lotes de 25: duas transações no DynamoDB.
+    assert [len(t) for t in dynamo.transactions] == [24, 5]
+    first = dynamo.transactions[0][0]["Update"]
+    assert first["ExpressionAttributeValues"][":ou"] == {"S": DEST_OU}
+    tags = {
+        tag["M"]["Key"]["S"]: tag["M"]["Value"]["S"]
+        for tag in first["ExpressionAttributeValues"][":tags"]["L"]
+    }
+    assert tags == {"team": "core", "env": "prod"}
+    errors = [entry[":errors"]["L"] for entry in dynamo.progress if ":errors" in entry]
+    failed = {e["M"]["AccountEmail"]["S"] for batch in errors for e in batch}
+    assert failed == {"acc5@corp.com", "ghost@corp.com"}
+
+
+def test_worker_continues_in_new_invocation_when_time_runs_low(worker, monkeypatch):
+    dynamo, _ = worker
+    job_id = _create(dynamo, [f"acc{n}@corp.com" for n in range(30)])
+    invocations = []
+    monkeypatch.setattr(
+        bulk_update,
+        "_continue",
+        lambda job, context: invocations.append(job),
+    )
+
+    class Context:
+        def get_remaining_time_in_millis(self):
+            return 1000
+
+    result = bulk_update.lambda_handler({"jobId": job_id}, Context())
+
+    assert result == {"jobId": job_id, "status": bulk.RUNNING, "offset": 25}
+    assert invocations == [job_id]
+    assert len(dynamo.transactions) == 1
+
+
+def test_api_patch_creates_job_and_invokes_worker(monkeypatch):
+    dynamo = FakeDynamo({})
+    invoked = []
+
+    class FakeLambda:
+        def invoke(self, **kwargs):
+            invoked.append(json.loads(kwargs["Payload"]))
+
+    monkeypatch.setattr(api, "dynamo_client", dynamo)
+    monkeypatch.setattr(api, "lambda_client", FakeLambda())
+    monkeypatch.setattr(api, "BULK_FUNCTION", "bulk-update")
+    monkeypatch.setattr(api, "validate_org_unit", lambda path: path == DEST_OU)
+    body = {"selector": {"OrgUnit": "Sandbox"}, "changes": {"OrgUnit": DEST_OU}}
+
+    response = api.lambda_handler(
+        {"httpMethod": "PATCH", "resource": "/accounts/bulk", "body": json.dumps(body)},
+        None,
+    )
+
+    assert response["statusCode"] == 202
+    job_id = json.loads(response["body"])["jobId"]
+    assert invoked == [{"jobId": job_id}]
+    assert response["headers"]["Location"] == f"/accounts/bulk/{job_id}"
+
+    status = api.lambda_handler(
+        {
+            "httpMethod": "GET",
+            "resource": "/accounts/bulk/{jobId}",
+            "pathParameters": {"jobId": job_id},
+        },
+        None,
+    )
+    job = json.loads(status["body"])
+    assert job["Status"] == bulk.PENDING
+    assert job["Request"]["selector"] == {"OrgUnit": "Sandbox"}
+
+    body["changes"]["OrgUnit"] = "Nope"
+    invalid = api.lambda_handler(
+        {"httpMethod": "PATCH", "resource": "/accounts/bulk", "body": json.dumps(body)},
+        None,
+    )
+    assert invalid["statusCode"] == 400
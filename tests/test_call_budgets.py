@@ -0,0 +1,290 @@
+"""Orçamento de chamadas AWS por caminho dos handlers.
+
+Cada caminho roda com caches de container quentes (depois do evento de
+warm-up) e todas as chamadas aos clients fake são contadas, inclusive os
+leases de rate limit na tabela de controle (serviço ``ratelimit``, uma janela
+nova a cada token para contar o pior caso). Uma chamada a mais ou um Scan no
+caminho quente quebra o teste: aumentar o orçamento é uma decisão explícita.
+"""
+
+import itertools
+import json
+import random
+from copy import deepcopy
+
+import pytest
+
+import bootstrap_accounts
+import provision_account
+import validate_fields
+from accfactory import admission, circuit, org_cache, throttling
+from conftest import FakeOrganizations
+from scripts import simulate_workflow
+
+import lambda_src.api.lambda_function as api
+
+# Caminho -> {"total": máximo de chamadas, "<operação>": máximo daquela operação}
+# Nos caminhos da API, 1 das chamadas é o lease do limite por chamador.
+BUDGETS = {
+    "GET by email": {"total": 2, "scan": 0},
+    "GET by id": {"total": 2, "scan": 0},
+    "POST success": {"total": 4, "scan": 0},
+    "POST conflict": {"total": 4, "scan": 0},
+    "validate": {"total": 2, "scan": 0},
+    "provision": {"total": 5, "scan": 0},
+    # Custo marginal de cada conta importada (árvore e páginas ficam de fora)
+    "bootstrap per account": {"total": 5, "scan": 0},
+}
+
+ACCOUNT = {
+    "AccountEmail": "payments@corp.com",
+    "AccountName": "payments-prod",
+    "AccountId": "111122223333",
+    "OrgUnit": "Engineering",
+    "Status": "ACTIVE",
+}
+REQUEST = {
+    "AccountEmail": "new@corp.com",
+    "AccountName": "new-account",
+    "OrgUnit": "Engineering/Platform",
+    "SSOUserEmail": "owner@corp.com",
+    "SSOUserFirstName": "Maria",
+    "SSOUserLastName": "Silva",
+}
+
+
+def assert_within_budget(calls, path):
+    """Falha (listando as chamadas feitas) se o caminho passou do orçamento."""
+    for operation, limit in BUDGETS[path].items():
+        used = calls.count(operation=None if operation == "total" else operation)
+        assert used <= limit, f"{path}: {calls.calls}"
+
+
+# ---------------- Fakes ----------------
+
+
+class FakeTable:
+    """Tabela de contas no formato do resource do boto3 (valores nativos)."""
+
+    def __init__(self, items=()):
+        self.items = {item["AccountEmail"]: deepcopy(item) for item in items}
+
+    def get_item(self, Key, **kwargs):
+        item = self.items.get(Key["AccountEmail"])
+        return {"Item": deepcopy(item)} if item else {}
+
+    def query(self, IndexName, KeyConditionExpression, Select=None, **kwargs):
+        attribute, value = KeyConditionExpression
+        items = [i for i in self.items.values() if i.get(attribute) == value]
+        items = items[: kwargs.get("Limit", len(items))]
+        return {"Count": len(items)} if Select == "COUNT" else {"Items": items}
+
+    def scan(self, **kwargs):
+        return {"Items": list(self.items.values())}
+
+    def put_item(self, Item, ConditionExpression=None, **kwargs):
+        if ConditionExpression and Item["AccountEmail"] in self.items:
+            raise simulate_workflow._client_error(
+                "ConditionalCheckFailedException", "PutItem"
+            )
+        self.items[Item["AccountEmail"]] = deepcopy(Item)
+        return {}
+
+    def update_item(self, Key, **kwargs):
+        self.items.setdefault(Key["AccountEmail"], dict(Key))
+        return {}
+
+
+class FakeStepFunctions:
+    def list_executions(self, **kwargs):
+        return {"executions": []}
+
+
+class FakeLeases:
+    """Tabela de controle: leases de rate limit e item do circuit breaker."""
+
+    def update_item(self, **kwargs):
+        return {}
+
+    def get_item(self, **kwargs):
+        return {}
+
+
+@pytest.fixture
+def limiter(aws_calls):
+    """Limiters com contador compartilhado gravado no ``FakeLeases``."""
+    ticks = itertools.count(1000)
+    leases = aws_calls.wrap("ratelimit", FakeLeases())
+
+    def build(service):
+        return throttling.RateLimiter(
+            service,
+            table_name="accfactory-ddb-control",
+            dynamo_client=leases,
+            clock=lambda: next(ticks),
+            sleep=lambda seconds: None,
+        )
+
+    org_cache.invalidate()
+    yield build
+    org_cache.invalidate()
+
+
+# ---------------- API ----------------
+
+
+@pytest.fixture
+def api_calls(aws_calls, limiter, monkeypatch):
+    table = FakeTable([ACCOUNT])
+    monkeypatch.setattr(api, "table", aws_calls.wrap("dynamodb", table))
+    monkeypatch.setattr(
+        api, "org_client", aws_calls.wrap("organizations", FakeOrganizations())
+    )
+    monkeypatch.setattr(
+        api, "sfn_client", aws_calls.wrap("stepfunctions", FakeStepFunctions())
+    )
+    monkeypatch.setattr(api, "ORG_LIMITER", limiter("organizations"))
+    monkeypatch.setattr(
+        api,
+        "CALLER_LIMITERS",
+        {kind: limiter(f"caller-{kind}") for kind in admission.KINDS},
+    )
+    monkeypatch.setattr(
+        api,
+        "SC_CIRCUIT",
+        circuit.CircuitBreaker(
+            "servicecatalog",
+            table_name="accfactory-ddb-control",
+            dynamo_client=aws_calls.wrap("dynamodb", FakeLeases()),
+            clock=lambda: 1000.0,
+        ),
+    )
+    api.lambda_handler({"warmup": True}, None)
+    aws_calls.clear()
+    return aws_calls
+
+
+def _get(params):
+    return api.lambda_handler(
+        {"httpMethod": "GET", "queryStringParameters": params}, None
+    )
+
+
+def _post(body):
+    return api.lambda_handler({"httpMethod": "POST", "body": json.dumps(body)}, None)
+
+
+def test_get_by_email_budget(api_calls):
+    assert _get({"accountEmail": ACCOUNT["AccountEmail"]})["statusCode"] == 200
+    assert_within_budget(api_calls, "GET by email")
+
+
+def test_get_by_id_budget(api_calls):
+    assert _get({"accountId": ACCOUNT["AccountId"]})["statusCode"] == 200
+    assert_within_budget(api_calls, "GET by id")
+
+
+def test_post_success_budget(api_calls):
+    assert _post(REQUEST)["statusCode"] == 201
+    assert_within_budget(api_calls, "POST success")
+
+
+@pytest.mark.parametrize(
+    "conflict",
+    [
+        {"AccountName": ACCOUNT["AccountName"]},
+        {"AccountEmail": ACCOUNT["AccountEmail"]},
+    ],
+)
+def test_post_conflict_budget(api_calls, conflict):
+    assert _post({**REQUEST, **conflict})["statusCode"] == 409
+    assert_within_budget(api_calls, "POST conflict")
+
+
+# ---------------- Step Functions ----------------
+
+
+def test_validate_budget(aws_calls, limiter, monkeypatch):
+    dynamo = simulate_workflow.FakeDynamoDB()
+    dynamo.items[REQUEST["AccountEmail"]] = {"Status": {"S": "Requested"}}
+    monkeypatch.setattr(validate_fields, "DYNO", aws_calls.wrap("dynamodb", dynamo))
+    monkeypatch.setattr(
+        validate_fields, "ORG", aws_calls.wrap("organizations", FakeOrganizations())
+    )
+    monkeypatch.setattr(validate_fields, "ORG_LIMITER", limiter("organizations"))
+    validate_fields.lambda_handler({"warmup": True}, None)
+    aws_calls.clear()
+
+    result = validate_fields.lambda_handler({**REQUEST, "RequestID": "req-1"}, None)
+
+    assert result["Validation"] is True
+    assert_within_budget(aws_calls, "validate")
+
+
+def test_provision_budget(aws_calls, limiter, monkeypatch):
+    catalog = simulate_workflow.FakeServiceCatalog(
+        simulate_workflow.VirtualClock(),
+        simulate_workflow.FakeOrganizations(),
+        random.Random(0),
+        concurrency=1,
+        minutes=(20, 20, 20),
+        failure_rate=0.0,
+    )
+    dynamo = simulate_workflow.FakeDynamoDB()
+    monkeypatch.setattr(provision_account, "SC", aws_calls.wrap("sc", catalog))
+    monkeypatch.setattr(
+        provision_account, "dynamo_client", aws_calls.wrap("dynamodb", dynamo)
+    )
+    monkeypatch.setattr(provision_account, "SC_LIMITER", limiter("servicecatalog"))
+    monkeypatch.setattr(provision_account, "sleep", lambda seconds: None)
+    monkeypatch.setattr(provision_account, "CATALOG_CACHE", {})
+    provision_account.lambda_handler({"warmup": True}, None)
+    aws_calls.clear()
+
+    result = provision_account.lambda_handler({**REQUEST, "RequestID": "req-1"}, None)
+
+    assert result["Status"] == "IN_PROCESSING"
+    assert_within_budget(aws_calls, "provision")
+
+
+def test_bootstrap_per_account_budget(aws_calls, limiter, monkeypatch):
+    monkeypatch.setattr(
+        bootstrap_accounts, "TABLE", aws_calls.wrap("dynamodb", FakeTable())
+    )
+    monkeypatch.setattr(bootstrap_accounts, "ORG_LIMITER", limiter("organizations"))
+
+    def run(count):
+        """Bootstrap de ``count`` contas; retorna o número de chamadas."""
+        accounts = [
+            {
+                "Id": f"{n:012d}",
+                "Name": f"account-{n}",
+                "Email": f"account-{n}@corp.com",
+                "Status": "ACTIVE",
+            }
+            for n in range(count)
+        ]
+        monkeypatch.setattr(
+            bootstrap_accounts,
+            "ORG",
+            aws_calls.wrap(
+                "organizations",
+                FakeOrganizations(
+                    accounts={account["Id"]: account for account in accounts},
+                    tags={
+                        account["Id"]: [{"Key": "env", "Value": "dev"}]
+                        for account in accounts
+                    },
+                ),
+            ),
+        )
+        aws_calls.clear()
+        assert bootstrap_accounts.lambda_handler({}, None)["inserted"] == count
+        return len(aws_calls.calls)
+
+    # Árvore de OUs e páginas de list_accounts são fixas por execução: a
+    # diferença entre 4 e 1 conta é o custo de 3 contas.
+    fixed = run(1)
+    total = run(4)
+    assert total - fixed <= 3 * BUDGETS["bootstrap per account"]["total"], total
+    assert aws_calls.count(operation="scan") == 0
@@ -0,0 +1,272 @@
+import json
+import random
+import re
+from copy import deepcopy
+
+import pytest
+
+import check_account_status
+import provision_account
+import trigger_sfn
+from accfactory import circuit, errors, metrics
+from conftest import client_error
+from scripts import simulate_workflow
+
+import lambda_src.api.lambda_function as api
+
+
+class FakeControl:
+    """Tabela de controle com o item do circuito e os pedidos segurados."""
+
+    def __init__(self):
+        self.items = {}
+
+    def _key(self, key):
+        return key["PK"]["S"], key["SK"]["S"]
+
+    def get_item(self, TableName, Key, **kwargs):
+        item = self.items.get(self._key(Key))
+        return {"Item": deepcopy(item)} if item else {}
+
+    def put_item(self, TableName, Item, **kwargs):
+        self.items[self._key(Item)] = deepcopy(Item)
+        return {}
+
+    def delete_item(self, TableName, Key, **kwargs):
+        self.items.pop(self._key(Key), None)
+        return {}
+
+    def query(self, TableName, KeyConditionExpression, ExpressionAttributeValues):
+        pk = ExpressionAttributeValues[":pk"]["S"]
+        return {"Items": [i for (p, _), i in self.items.items() if p == pk]}
+
+    def update_item(
+        self,
+        TableName,
+        Key,
+        UpdateExpression,
+        ConditionExpression=None,
+        ExpressionAttributeNames=None,
+        ExpressionAttributeValues=None,
+        ReturnValues=None,
+    ):
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        item = self.items.get(self._key(Key)) or dict(Key)
+        old = deepcopy(item)
+        state = item.get("State")
+        if ConditionExpression == "#state = :seen AND #until <= :now":
+            until = int(item.get(names["#until"], {"N": "0"})["N"])
+            ok = state == values[":seen"] and until <= int(values[":now"]["N"])
+        elif ConditionExpression == "attribute_not_exists(#state) OR #state = :seen":
+            ok = state is None or state == values[":seen"]
+        else:
+            assert ConditionExpression is None, ConditionExpression
+            ok = True
+        if not ok:
+            raise client_error("ConditionalCheckFailedException", "UpdateItem")
+
+        sections = re.findall(
+            r"(SET|ADD|REMOVE) (.*?)(?= SET | ADD | REMOVE |$)", UpdateExpression
+        )
+        for action, body in sections:
+            for clause in (c.strip() for c in body.split(",")):
+                if action == "SET":
+                    target, value = (s.strip() for s in clause.split("="))
+                    item[names.get(target, target)] = values[value]
+                elif action == "ADD":
+                    target, value = clause.split()
+                    total = int(item.get(target, {"N": "0"})["N"])
+                    item[target] = {"N": str(total + int(values[value]["N"]))}
+                else:
+                    item.pop(clause, None)
+        self.items[self._key(Key)] = item
+        return {"Attributes": deepcopy(item if ReturnValues == "ALL_NEW" else old)}
+
+
+@pytest.fixture
+def breakers(monkeypatch):
+    """Dois "containers" com o mesmo circuito e relógio controlado."""
+    monkeypatch.setattr(circuit, "CACHE_SECONDS", 0)
+    table, now = FakeControl(), [1000.0]
+
+    def build():
+        return circuit.CircuitBreaker(
+            "sc-test",
+            table_name="control",
+            dynamo_client=table,
+            threshold=3,
+            open_seconds=600,
+            probe_seconds=1800,
+            clock=lambda: now[0],
+        )
+
+    return build(), build(), now
+
+
+def test_opens_after_consecutive_failures_and_success_resets(breakers):
+    first, second, _ = breakers
+    first.record_failure()
+    first.record_failure()
+    second.record_success()
+    first.record_failure()
+    second.record_failure()
+    assert first.state().state == circuit.CLOSED
+
+    opened = metrics.get_count("CircuitTransitions", Circuit="sc-test", To="OPEN")
+    second.record_failure()
+
+    assert first.state().state == circuit.OPEN
+    assert first.is_open() and not second.allow()
+    assert first.retry_after() == 600
+    assert (
+        metrics.get_count("CircuitTransitions", Circuit="sc-test", To="OPEN")
+        == opened + 1
+    )
+
+
+def test_half_open_lets_a_single_probe_through(breakers):
+    first, second, now = breakers
+    for _ in range(3):
+        first.record_failure()
+
+    now[0] += 601
+    assert [first.allow(), second.allow()] == [True, False]
+    assert second.is_open()
+
+    # Sonda falhou: abre de novo por mais uma janela
+    first.record_failure()
+    assert second.state().state == circuit.OPEN
+    now[0] += 601
+    assert second.allow() and not first.allow()
+
+    # Sonda sem resposta: vencido o prazo, outra é liberada
+    now[0] += 1801
+    assert first.allow()
+    second.record_success()
+    assert first.state() == circuit.State(circuit.CLOSED, 0, 0, 0)
+    assert first.allow() and second.allow()
+
+
+def test_control_tower_conflict_counts_as_a_single_failure(monkeypatch):
+    class BusyCatalog(simulate_workflow.FakeServiceCatalog):
+        def describe_provisioned_product(self, Id):
+            return {
+                "ProvisionedProductDetail": {
+                    "Status": "ERROR",
+                    "StatusMessage": "Another account is being provisioned",
+                }
+            }
+
+    class RecordingBreaker:
+        failures = 0
+
+        def record_failure(self):
+            self.failures += 1
+
+    catalog = BusyCatalog(
+        simulate_workflow.VirtualClock(),
+        simulate_workflow.FakeOrganizations(),
+        random.Random(0),
+        concurrency=1,
+        minutes=(20, 20, 20),
+        failure_rate=0.0,
+    )
+    breaker = RecordingBreaker()
+    for module in (provision_account, check_account_status):
+        monkeypatch.setattr(module, "SC", catalog)
+        monkeypatch.setattr(module, "SC_CIRCUIT", breaker)
+    monkeypatch.setattr(
+        provision_account, "dynamo_client", simulate_workflow.FakeDynamoDB()
+    )
+    monkeypatch.setattr(provision_account, "sleep", lambda seconds: None)
+    monkeypatch.setattr(provision_account, "CATALOG_CACHE", {})
+    monkeypatch.setattr(check_account_status, "DYNAMO_TABLE", None)
+    request = {
+        "AccountEmail": "busy@corp.com",
+        "AccountName": "busy",
+        "OrgUnit": "Engineering",
+        "SSOUserEmail": "owner@corp.com",
+        "SSOUserFirstName": "Maria",
+        "SSOUserLastName": "Silva",
+        "RequestID": "req-1",
+    }
+
+    item = provision_account.lambda_handler(request, None)
+    assert item["Status"] == "RETRYING"
+    # StatusDecision leva o RETRYING ao CheckAccountStatus, que vê o mesmo ERROR
+    with pytest.raises(errors.ProvisionConflictError):
+        check_account_status.check_status(item)
+
+    assert breaker.failures == 1
+
+
+def test_circuit_without_table_stays_closed():
+    breaker = circuit.CircuitBreaker("sc-test", table_name=None)
+    breaker.record_failure()
+    assert breaker.allow() and not breaker.is_open()
+
+
+def _stream_record(email):
+    image = {"AccountEmail": {"S": email}, "Status": {"S": "Requested"}}
+    return {"eventName": "INSERT", "dynamodb": {"NewImage": image}}
+
+
+def test_trigger_holds_requests_while_open_and_releases_in_order(breakers, monkeypatch):
+    breaker, other, now = breakers
+    control = breaker._dynamo
+    started = []
+
+    class FakeSfn:
+        def start_execution(self, stateMachineArn, input):
+            started.append(json.loads(input)["AccountEmail"])
+            return {"executionArn": "arn:execution"}
+
+    monkeypatch.setattr(trigger_sfn, "sfn_client", FakeSfn())
+    monkeypatch.setattr(trigger_sfn, "dynamo_client", control)
+    monkeypatch.setattr(trigger_sfn, "CONTROL_TABLE", "control")
+    monkeypatch.setattr(trigger_sfn, "DYNAMO_TABLE", None)
+    monkeypatch.setattr(trigger_sfn, "SC_CIRCUIT", breaker)
+    for _ in range(3):
+        other.record_failure()
+
+    for email in ("a@corp.com", "b@corp.com"):
+        now[0] += 1
+        trigger_sfn.lambda_handler({"Records": [_stream_record(email)]}, None)
+    assert started == []
+    assert trigger_sfn.release_held() == {"released": 0, "held": 2}
+
+    # Meia-abertura: só a sonda (o pedido mais antigo) sai
+    now[0] += 600
+    assert trigger_sfn.lambda_handler({"release": True}, None) == {
+        "released": 1,
+        "held": 1,
+    }
+    assert started == ["a@corp.com"]
+
+    other.record_success()
+    assert trigger_sfn.lambda_handler({"release": True}, None)["released"] == 1
+    assert started == ["a@corp.com", "b@corp.com"]
+
+
+def test_api_rejects_new_requests_while_open(breakers, monkeypatch):
+    breaker, _, _ = breakers
+    monkeypatch.setattr(api, "SC_CIRCUIT", breaker)
+    monkeypatch.setattr(api, "has_available_capacity", lambda org=None: True)
+    for _ in range(3):
+        breaker.record_failure()
+
+    request = {
+        "AccountEmail": "a@corp.com",
+        "AccountName": "a-account",
+        "OrgUnit": "Engineering",
+        "SSOUserEmail": "owner@corp.com",
+        "SSOUserFirstName": "Jane",
+        "SSOUserLastName": "Doe",
+    }
+    response = api.lambda_handler(
+        {"httpMethod": "POST", "body": json.dumps(request)}, None
+    )
+
+    assert response["statusCode"] == 503
+    assert response["headers"]["Retry-After"] == "600"
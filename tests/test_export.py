@@ -0,0 +1,155 @@
+import csv
+import json
+import threading
+
+import pytest
+
+from accfactory import export
+
+
+def _ddb_item(n):
+    return {
+        "AccountEmail": {"S": f"acc-{n}@example.com"},
+        "AccountName": {"S": f"acc-{n}"},
+        "Status": {"S": "ACTIVE"},
+        "Tags": {"L": [{"M": {"Key": {"S": "env"}, "Value": {"S": "dev"}}}]},
+        "Retries": {"N": "2"},
+    }
+
+
+class SegmentedTable:
+    """Distribui ``total`` itens entre os segmentos, em páginas de ``Limit``."""
+
+    def __init__(self, total, fail_segment=None):
+        self.items = [_ddb_item(n) for n in range(total)]
+        self.fail_segment = fail_segment
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def scan(self, **kwargs):
+        with self._lock:
+            self.calls.append(kwargs)
+        segment, total_segments = kwargs["Segment"], kwargs["TotalSegments"]
+        # Falha numa página de continuação: o upload já começou com a primeira
+        if segment == self.fail_segment and "ExclusiveStartKey" in kwargs:
+            raise RuntimeError("scan failed")
+        mine = self.items[segment::total_segments]
+        start = kwargs.get("ExclusiveStartKey", {}).get("offset", 0)
+        page = mine[start : start + kwargs["Limit"]]
+        response = {"Items": page}
+        if start + kwargs["Limit"] < len(mine):
+            response["LastEvaluatedKey"] = {"offset": start + kwargs["Limit"]}
+        return response
+
+
+class FakeS3:
+    def __init__(self):
+        self.parts = []
+        self.objects = {}
+        self.completed = None
+        self.aborted = False
+
+    def create_multipart_upload(self, Bucket, Key):
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.parts.append(Body)
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.completed = MultipartUpload["Parts"]
+        self.objects[Key] = b"".join(self.parts)
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+
+    def abort_multipart_upload(self, **kwargs):
+        self.aborted = True
+
+
+def test_ndjson_export_uses_parallel_segments_and_writes_manifest(tmp_path):
+    table = SegmentedTable(total=103)
+    out = tmp_path / "inventory.ndjson"
+
+    manifest = export.export_table(
+        table, "accounts", export.FileSink(str(out)), segments=4, page_size=10
+    )
+
+    lines = out.read_text().splitlines()
+    assert len(lines) == 103
+    first = json.loads(lines[0])
+    assert first["Retries"] == 2
+    assert first["Tags"] == [{"Key": "env", "Value": "dev"}]
+    assert manifest["itemCount"] == 103
+    assert sum(manifest["segmentCounts"]) == 103
+    assert {call["Segment"] for call in table.calls} == {0, 1, 2, 3}
+    saved = json.loads((tmp_path / "inventory.ndjson.manifest.json").read_text())
+    assert saved["itemCount"] == 103
+
+
+def test_csv_export_applies_projection(tmp_path):
+    table = SegmentedTable(total=5)
+    out = tmp_path / "inventory.csv"
+
+    export.export_table(
+        table,
+        "accounts",
+        export.FileSink(str(out)),
+        fmt="csv",
+        segments=2,
+        projection=["AccountEmail", "Status"],
+    )
+
+    rows = list(csv.reader(out.open()))
+    assert rows[0] == ["AccountEmail", "Status"]
+    assert len(rows) == 6
+    assert table.calls[0]["ProjectionExpression"] == "#p0, #p1"
+
+
+def test_s3_sink_streams_multipart_upload_in_bounded_parts():
+    s3 = FakeS3()
+    table = SegmentedTable(total=200)
+    sink = export.S3Sink(s3, "bucket", "exports/accounts.ndjson", part_size=4096)
+
+    manifest = export.export_table(
+        table, "accounts", sink, segments=3, page_size=20, chunk_size=1024
+    )
+
+    assert len(s3.completed) == len(s3.parts) > 1
+    assert all(len(part) < 4096 + 1024 * 2 for part in s3.parts)
+    body = s3.objects["exports/accounts.ndjson"].decode().splitlines()
+    assert len(body) == manifest["itemCount"] == 200
+    assert "exports/accounts.ndjson.manifest.json" in s3.objects
+
+
+def test_failed_segment_aborts_the_upload():
+    s3 = FakeS3()
+    table = SegmentedTable(total=400, fail_segment=1)
+    sink = export.S3Sink(s3, "bucket", "key", part_size=1024)
+
+    with pytest.raises(RuntimeError):
+        export.export_table(
+            table, "accounts", sink, segments=2, page_size=50, chunk_size=512
+        )
+    assert s3.aborted
+
+
+@pytest.mark.parametrize("failing", ["upload_part", "complete_multipart_upload"])
+def test_failed_sink_write_aborts_the_upload(failing):
+    s3 = FakeS3()
+
+    def unavailable(**kwargs):
+        raise RuntimeError(f"{failing} failed")
+
+    setattr(s3, failing, unavailable)
+    table = SegmentedTable(total=400)
+    sink = export.S3Sink(s3, "bucket", "key", part_size=10)
+
+    with pytest.raises(RuntimeError, match=failing):
+        export.export_table(
+            table, "accounts", sink, segments=2, page_size=10, chunk_size=10
+        )
+    assert s3.aborted
+    if failing == "upload_part":
+        # Os segmentos param em vez de ler a tabela inteira (40 páginas)
+        assert len(table.calls) < 400 // 10
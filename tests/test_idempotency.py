@@ -0,0 +1,124 @@
+import json
+
+import pytest
+from conftest import client_error
+
+from accfactory import idempotency
+
+
+class ControlTable:
+    def __init__(self):
+        self.items = {}
+        self.calls = []
+
+    def _pk(self, key):
+        return key["PK"]["S"]
+
+    def get_item(self, TableName, Key, ConsistentRead=False):
+        self.calls.append("get_item")
+        item = self.items.get(self._pk(Key))
+        return {"Item": dict(item)} if item else {}
+
+    def put_item(self, TableName, Item, ConditionExpression, ExpressionAttributeValues):
+        self.calls.append("put_item")
+        current = self.items.get(self._pk(Item))
+        now = int(ExpressionAttributeValues[":now"]["N"])
+        if current and int(current["ExpiresAt"]["N"]) > now:
+            raise client_error("ConditionalCheckFailedException", "PutItem")
+        self.items[self._pk(Item)] = dict(Item)
+
+    def update_item(self, TableName, Key, ExpressionAttributeValues, **kwargs):
+        self.calls.append("update_item")
+        values = ExpressionAttributeValues
+        self.items[self._pk(Key)].update(
+            {"Status": values[":done"], "Response": values[":response"]}
+        )
+        self.items[self._pk(Key)]["ExpiresAt"] = values[":exp"]
+
+    def delete_item(self, TableName, Key):
+        self.calls.append("delete_item")
+        self.items.pop(self._pk(Key), None)
+
+
+def test_concurrent_duplicate_is_collapsed_by_in_progress_marker():
+    table = ControlTable()
+    digest = idempotency.body_hash({"AccountEmail": "a@corp.com"})
+
+    assert idempotency.begin(table, "control", "k1", digest, now=100)[0] == "new"
+    assert idempotency.begin(table, "control", "k1", digest, now=101)[0] == (
+        idempotency.IN_PROGRESS
+    )
+    # Marcador abandonado (Lambda morreu) expira e pode ser retomado.
+    later = 100 + idempotency.IN_PROGRESS_SECONDS
+    assert idempotency.begin(table, "control", "k1", digest, now=later)[0] == "new"
+
+
+def test_transient_failures_release_the_key():
+    table = ControlTable()
+    digest = idempotency.body_hash({})
+    idempotency.begin(table, "control", "k1", digest, now=100)
+
+    idempotency.complete(table, "control", "k1", {"statusCode": 503}, now=101)
+
+    assert table.items == {}
+
+
+def test_post_replay_returns_stored_response_with_single_read(monkeypatch):
+    import lambda_src.api.lambda_function as api
+
+    table = ControlTable()
+    created = []
+
+    def fake_post(body):
+        created.append(body)
+        return {"statusCode": 201, "body": json.dumps(body)}
+
+    monkeypatch.setattr(api, "dynamo_client", table)
+    monkeypatch.setattr(api, "handle_post", fake_post)
+    event = {
+        "httpMethod": "POST",
+        "headers": {"idempotency-key": "abc"},
+        "body": json.dumps({"AccountEmail": "a@corp.com"}),
+    }
+
+    first = api.lambda_handler(event, None)
+    table.calls.clear()
+    replay = api.lambda_handler(event, None)
+
+    assert len(created) == 1
+    assert replay["statusCode"] == first["statusCode"] == 201
+    assert replay["body"] == first["body"]
+    assert replay["headers"]["Idempotent-Replayed"] == "true"
+    assert table.calls == ["get_item"]
+
+    event["body"] = json.dumps({"AccountEmail": "b@corp.com"})
+    assert api.lambda_handler(event, None)["statusCode"] == 422
+
+
+def test_post_failures_never_leave_the_key_in_progress(monkeypatch):
+    import lambda_src.api.lambda_function as api
+
+    table = ControlTable()
+
+    def crashing_post(body):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(api, "dynamo_client", table)
+    monkeypatch.setattr(api, "handle_post", crashing_post)
+    event = {
+        "httpMethod": "POST",
+        "headers": {"idempotency-key": "abc"},
+        "body": json.dumps({"AccountEmail": "a@corp.com"}),
+    }
+
+    with pytest.raises(RuntimeError):
+        api.lambda_handler(event, None)
+    assert table.items == {}
+
+    def unavailable(**kwargs):
+        raise client_error("ProvisionedThroughputExceededException", "GetItem")
+
+    monkeypatch.setattr(table, "get_item", unavailable)
+    response = api.lambda_handler(event, None)
+    assert response["statusCode"] == 503
+    assert response["headers"]["Retry-After"] == "1"
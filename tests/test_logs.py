@@ -0,0 +1,74 @@
+import io
+import json
+import logging
+
+import pytest
+
+from accfactory import logs
+
+
+class Context:
+    aws_request_id = "req-1"
+
+
+@pytest.fixture
+def stream():
+    root = logging.getLogger()
+    handler = logging.StreamHandler(io.StringIO())
+    handler.setFormatter(logs.JsonFormatter())
+    root.addHandler(handler)
+    yield handler.stream
+    root.removeHandler(handler)
+
+
+def _lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_payloads_are_lazy_when_not_sampled(stream):
+    evaluated = []
+
+    @logs.handler(sample_rate=0)
+    def handler(event, context):
+        logs.debug_payload(logging.getLogger(), "Event", lambda: evaluated.append(1))
+        logging.getLogger().info("ok")
+
+    handler({"RequestID": "abc"}, Context())
+
+    assert evaluated == []
+    (line,) = _lines(stream)
+    assert line["message"] == "ok"
+    assert line["requestId"] == "req-1"
+    assert line["correlationId"] == "abc"
+
+
+def test_sampled_payloads_are_redacted(stream):
+    @logs.handler(sample_rate=1)
+    def handler(event, context):
+        # Só o payload é amostrado: o DEBUG das bibliotecas segue desligado
+        assert not logging.getLogger("botocore").isEnabledFor(logging.DEBUG)
+        logs.debug_payload(logging.getLogger(), "Event", event)
+
+    handler(
+        {
+            "AccountEmail": "app@corp.com",
+            "SSOUserEmail": "owner@corp.com",
+            "ProvisioningParameters": [{"Key": "SSOUserLastName", "Value": "Silva"}],
+            "headers": {"Authorization": "AWS4-HMAC-SHA256 secret"},
+            "multiValueHeaders": {"authorization": ["AWS4-HMAC-SHA256 secret"]},
+        },
+        Context(),
+    )
+
+    (line,) = _lines(stream)
+    payload = line["payload"]
+    assert payload["AccountEmail"] == "app@corp.com"
+    assert payload["SSOUserEmail"] == logs.MASK
+    assert payload["ProvisioningParameters"][0]["Value"] == logs.MASK
+    assert payload["headers"]["Authorization"] == logs.MASK
+    assert payload["multiValueHeaders"]["authorization"] == logs.MASK
+    assert "owner@corp.com" not in json.dumps(line)
+    assert line["level"] == "DEBUG"
+    # Fora da invocação amostrada o payload não é mais emitido
+    logs.debug_payload(logging.getLogger(), "Event", {})
+    assert len(_lines(stream)) == 1
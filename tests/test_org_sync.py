@@ -0,0 +1,145 @@
+import re
+
+import pytest
+
+import org_sync
+from accfactory import org_cache
+from conftest import DirectLimiter, FakeOrganizations, client_error
+
+
+class FakeTable:
+    """``update_item`` com a condição de status/ordem do ``sync_account``."""
+
+    def __init__(self):
+        self.items = {}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, **kwargs):
+        values, names = ExpressionAttributeValues, kwargs["ExpressionAttributeNames"]
+        existing = self.items.get(Key["AccountEmail"])
+        if existing and "ConditionExpression" in kwargs:
+            allowed = {v for k, v in values.items() if k.startswith(":org")}
+            newer = existing.get("OrgEventTime", "") > values[":eventTime"]
+            if existing["Status"] not in allowed or newer:
+                raise client_error("ConditionalCheckFailedException")
+        item = self.items.setdefault(Key["AccountEmail"], dict(Key))
+        for attr, keep, value in re.findall(
+            r"(#?\w+) = (if_not_exists\(\w+, )?(:\w+)", UpdateExpression
+        ):
+            attr = names.get(attr, attr)
+            if not (keep and attr in item):
+                item[attr] = values[value]
+
+
+class FakeControl:
+    def __init__(self):
+        self.keys = set()
+
+    def put_item(self, TableName, Item, ConditionExpression):
+        if Item["PK"]["S"] in self.keys:
+            raise client_error("ConditionalCheckFailedException")
+        self.keys.add(Item["PK"]["S"])
+
+    def delete_item(self, TableName, Key):
+        self.keys.discard(Key["PK"]["S"])
+
+
+def _event(name, time="2026-01-01T10:00:00Z", event_id="evt-1", **parameters):
+    return {
+        "id": "eb-1",
+        "time": time,
+        "source": "aws.organizations",
+        "detail": {
+            "eventName": name,
+            "eventID": event_id,
+            "eventTime": time,
+            "requestParameters": parameters,
+        },
+    }
+
+
+@pytest.fixture
+def org(monkeypatch):
+    org = FakeOrganizations(
+        ous={
+            "ou-eng": ("r-root", "Engineering"),
+            "ou-plat": ("ou-eng", "Platform"),
+            "ou-sbx": ("r-root", "Sandbox"),
+        },
+        accounts={
+            "111111111111": {"Name": "prod", "Email": "Prod@corp.com", "OU": "ou-plat"},
+            "222222222222": {"Name": "dev", "Email": "dev@corp.com", "OU": "ou-eng"},
+        },
+        tags={"111111111111": [{"Key": "env", "Value": "prod"}]},
+    )
+    monkeypatch.setattr(org_sync, "ORG", org)
+    monkeypatch.setattr(org_sync, "ORG_LIMITER", DirectLimiter())
+    monkeypatch.setattr(org_sync, "TABLE", FakeTable())
+    monkeypatch.setattr(org_sync, "DYNO", FakeControl())
+    org_cache.invalidate()
+    yield org
+    org_cache.invalidate()
+
+
+def test_move_event_updates_the_record_once(org):
+    org.accounts["111111111111"]["OU"] = "ou-sbx"
+    event = _event("MoveAccount", accountId="111111111111")
+
+    result = org_sync.lambda_handler(event, None)
+
+    assert result["accounts"] == {"111111111111": "updated"}
+    record = org_sync.TABLE.items["prod@corp.com"]
+    assert record["OrgUnit"] == "Root/Sandbox"
+    assert record["Tags"] == [{"Key": "env", "Value": "prod"}]
+    assert record["OrgEventTime"] == "2026-01-01T10:00:00Z"
+    # Entrega repetida do EventBridge não relê o Organizations
+    assert org_sync.lambda_handler(event, None)["duplicate"]
+    assert org.count("describe_account") == 1
+
+
+def test_older_events_and_in_flight_records_are_not_overwritten(org):
+    newer = _event("TagResource", "2026-01-01T12:00:00Z", "evt-2", resourceId="1" * 12)
+    older = _event("MoveAccount", "2026-01-01T11:00:00Z", "evt-3", accountId="1" * 12)
+    org_sync.lambda_handler(newer, None)
+
+    assert org_sync.lambda_handler(older, None)["accounts"] == {"1" * 12: "skipped"}
+    assert org_sync.TABLE.items["prod@corp.com"]["OrgEventTime"] == newer["time"]
+
+    # Conta ainda no workflow da fábrica: o Step Function é quem marca ACTIVE
+    org_sync.TABLE.items["dev@corp.com"] = {"Status": "IN_PROCESSING"}
+    created = _event("CreateAccountResult", event_id="evt-4")
+    created["detail"]["serviceEventDetails"] = {
+        "createAccountStatus": {"accountId": "2" * 12, "state": "SUCCEEDED"}
+    }
+    assert org_sync.lambda_handler(created, None)["accounts"] == {"2" * 12: "skipped"}
+    assert org_sync.TABLE.items["dev@corp.com"] == {"Status": "IN_PROCESSING"}
+
+
+def test_ou_rename_resyncs_the_whole_subtree(org):
+    org_cache.ou_tree(org, DirectLimiter())
+    org.ous["ou-eng"] = ("r-root", "Eng")
+
+    result = org_sync.lambda_handler(
+        _event("UpdateOrganizationalUnit", organizationalUnitId="ou-eng"), None
+    )
+
+    assert set(result["accounts"]) == {"111111111111", "222222222222"}
+    assert org_sync.TABLE.items["prod@corp.com"]["OrgUnit"] == "Root/Eng/Platform"
+    assert org_sync.TABLE.items["dev@corp.com"]["OrgUnit"] == "Root/Eng"
+
+
+def test_ignored_events_and_failures(org, monkeypatch):
+    ou_tag = _event("TagResource", resourceId="ou-eng")
+    assert org_sync.lambda_handler(ou_tag, None)["accounts"] == {}
+    failed_call = _event("MoveAccount", event_id="evt-5", accountId="1" * 12)
+    failed_call["detail"]["errorCode"] = "AccessDenied"
+    assert org_sync.lambda_handler(failed_call, None)["ignored"]
+
+    def throttled(**kwargs):
+        raise client_error("TooManyRequestsException")
+
+    monkeypatch.setattr(org, "describe_account", throttled)
+    closed = _event("CloseAccount", event_id="evt-6", accountId="1" * 12)
+    with pytest.raises(Exception):
+        org_sync.lambda_handler(closed, None)
+    # O evento volta a ser aceito no retry do EventBridge
+    assert "ORGEVENT#evt-6" not in org_sync.DYNO.keys
@@ -0,0 +1,249 @@
+import json
+import random
+import types
+from datetime import datetime, timezone
+
+import pytest
+
+import provision_account
+import trigger_sfn
+from accfactory import circuit, org_cache, orgs
+from conftest import FakeOrganizations
+from scripts import simulate_workflow
+
+import lambda_src.api.lambda_function as api
+
+ROLE = "arn:aws:iam::222222222222:role/accfactory-org"
+CLIENTS_SFN = "arn:aws:states:us-east-1:123456789012:stateMachine:CreateAccount-clients"
+CONFIG = json.dumps(
+    {
+        "clients": {
+            "role_arn": ROLE,
+            "sfn_arn": CLIENTS_SFN,
+            "ou_prefixes": ["Clients", "Partners/"],
+        },
+        "clients-eu": {"role_arn": ROLE, "ou_prefixes": ["Clients/EU"]},
+    }
+)
+LATER = datetime(2100, 1, 1, tzinfo=timezone.utc)
+REQUEST = {
+    "AccountEmail": "retail@corp.com",
+    "AccountName": "retail-prod",
+    "OrgUnit": "Clients/Retail",
+    "SSOUserEmail": "owner@corp.com",
+    "SSOUserFirstName": "Maria",
+    "SSOUserLastName": "Silva",
+}
+
+
+class Untouchable:
+    def __getattr__(self, name):
+        raise AssertionError(f"chamada na organização local: {name}")
+
+
+class FakeSTS:
+    def __init__(self, expiration):
+        self.expiration = expiration
+        self.calls = []
+
+    def assume_role(self, **kwargs):
+        self.calls.append(kwargs["RoleSessionName"])
+        return {
+            "Credentials": {
+                "AccessKeyId": f"key-{len(self.calls)}",
+                "SecretAccessKey": "secret",
+                "SessionToken": "token",
+                "Expiration": self.expiration,
+            }
+        }
+
+
+class OrgClients:
+    """Fábrica de clients fake por serviço, com as credenciais recebidas."""
+
+    def __init__(self, **clients):
+        self.clients = clients
+        self.created = []
+
+    def __call__(self, service, **credentials):
+        self.created.append((service, credentials.get("aws_access_key_id")))
+        return self.clients[service]
+
+
+class RecordingSFN:
+    def __init__(self):
+        self.listed, self.started = [], []
+
+    def list_executions(self, **kwargs):
+        self.listed.append(kwargs["stateMachineArn"])
+        return {"executions": []}
+
+    def start_execution(self, **kwargs):
+        self.started.append(kwargs["stateMachineArn"])
+        return {"executionArn": f"{kwargs['stateMachineArn']}:run"}
+
+
+class OpenCircuit:
+    name = "servicecatalog"
+
+    def is_open(self):
+        return True
+
+    def allow(self):
+        return False
+
+    def retry_after(self):
+        return 60
+
+    def state(self):
+        return types.SimpleNamespace(state=circuit.OPEN)
+
+
+class RecordingTable:
+    def __init__(self):
+        self.items = []
+
+    def put_item(self, Item, **kwargs):
+        self.items.append(Item)
+
+    def query(self, **kwargs):
+        return {"Count": 0}
+
+
+def test_routing_by_explicit_field_and_longest_ou_prefix():
+    registry = orgs.load(CONFIG)
+
+    def route(**item):
+        return orgs.route(registry, item).name
+
+    assert route(OrgUnit="Clients/Retail") == "clients"
+    assert route(OrgUnit="clients / eu/Banking") == "clients-eu"
+    assert route(OrgUnit="Partners") == "clients"
+    assert route(OrgUnit="ClientsArchive") == orgs.DEFAULT
+    assert route(OrgUnit="Clients/EU", Organization="default") == orgs.DEFAULT
+    assert registry["clients-eu"].sfn_arn == registry[orgs.DEFAULT].sfn_arn
+    assert registry["clients"].principal_arn == ROLE
+    with pytest.raises(orgs.UnknownOrganization):
+        route(OrgUnit="Clients", Organization="other")
+    with pytest.raises(RuntimeError):
+        orgs.load("{not json")
+
+
+def test_client_pool_shares_one_session_per_org_until_it_expires():
+    expiration = datetime(2026, 10, 19, 13, 0, tzinfo=timezone.utc)
+    now = [expiration.timestamp() - 3600]
+    sts = FakeSTS(expiration)
+    factory = OrgClients(organizations="org", servicecatalog="sc")
+    pool = orgs.ClientPool(factory=factory, sts_client=sts, clock=lambda: now[0])
+    registry = orgs.load(CONFIG)
+
+    assert pool.client(registry["clients"], "organizations") == "org"
+    assert pool.client(registry["clients"], "servicecatalog") == "sc"
+    assert pool.client(registry["clients"], "organizations") == "org"
+    assert sts.calls == ["accfactory-clients"]
+    assert factory.created == [("organizations", "key-1"), ("servicecatalog", "key-1")]
+
+    # Dentro da margem de renovação: nova sessão e clients recriados
+    now[0] = expiration.timestamp() - orgs.REFRESH_MARGIN_SECONDS
+    pool.client(registry["clients"], "organizations")
+    assert sts.calls == ["accfactory-clients"] * 2
+    assert factory.created[-1] == ("organizations", "key-2")
+
+    local = pool.access(registry[orgs.DEFAULT], "organizations", ("org", "limiter"))
+    assert local == orgs.Access("org", "limiter", None)
+
+
+def test_api_checks_and_admits_requests_in_the_routed_org(monkeypatch):
+    registry = orgs.load(CONFIG)
+    # Organizations da landing zone "clients", não o da local
+    clients = FakeOrganizations(
+        root="r-cli",
+        ous={"ou-cli": ("r-cli", "Clients"), "ou-ret": ("ou-cli", "Retail")},
+        accounts={"333333333333": {"Name": "Legacy", "Email": "legacy@corp.com"}},
+    )
+    factory = OrgClients(organizations=clients)
+    sfn, table = RecordingSFN(), RecordingTable()
+    monkeypatch.setattr(api, "ORGS", registry)
+    monkeypatch.setattr(api, "ORG_CLIENTS", orgs.ClientPool(factory, FakeSTS(LATER)))
+    monkeypatch.setattr(api, "org_client", Untouchable())
+    # Local saturada: circuito aberto não segura a outra landing zone
+    monkeypatch.setattr(api, "SC_CIRCUIT", OpenCircuit())
+    monkeypatch.setattr(api, "sfn_client", sfn)
+    monkeypatch.setattr(api, "table", table)
+    monkeypatch.setattr(api, "uses_pool", lambda _: False)
+
+    def post(body):
+        return api.lambda_handler(
+            {"httpMethod": "POST", "body": json.dumps(body)}, None
+        )
+
+    try:
+        created = post(REQUEST)
+        duplicate = post({**REQUEST, "AccountName": "legacy"})
+        missing_ou = post({**REQUEST, "OrgUnit": "Clients/Banking"})
+        local = post({**REQUEST, "OrgUnit": "Engineering"})
+    finally:
+        org_cache.invalidate("clients")
+
+    assert created["statusCode"] == 201
+    assert table.items == [{**table.items[0], "Organization": "clients"}]
+    assert sfn.listed[0] == CLIENTS_SFN
+    assert duplicate["statusCode"] == 409
+    assert missing_ou["statusCode"] == 400
+    assert local["statusCode"] == 503
+
+
+def test_trigger_sends_each_org_to_its_state_machine(monkeypatch):
+    sfn, held = RecordingSFN(), []
+
+    class ControlTable:
+        def put_item(self, **kwargs):
+            held.append(kwargs["Item"]["PK"]["S"])
+
+    monkeypatch.setattr(trigger_sfn, "ORGS", orgs.load(CONFIG))
+    monkeypatch.setattr(trigger_sfn, "sfn_client", sfn)
+    monkeypatch.setattr(trigger_sfn, "dynamo_client", ControlTable())
+    monkeypatch.setattr(trigger_sfn, "DYNAMO_TABLE", None)
+    monkeypatch.setattr(trigger_sfn, "BATCH_SFN_ARN", "arn:batch")
+    monkeypatch.setattr(trigger_sfn, "SC_CIRCUIT", OpenCircuit())
+
+    trigger_sfn.dispatch(
+        [
+            {"AccountEmail": "a@corp.com", "Organization": "clients"},
+            {"AccountEmail": "b@corp.com", "Organization": "clients"},
+            {"AccountEmail": "c@corp.com"},
+        ]
+    )
+
+    assert sfn.started == [CLIENTS_SFN, CLIENTS_SFN]
+    assert held == ["HELD#servicecatalog"]
+
+
+def test_provisioning_uses_the_org_catalog_and_principal(monkeypatch):
+    catalog = simulate_workflow.FakeServiceCatalog(
+        simulate_workflow.VirtualClock(),
+        simulate_workflow.FakeOrganizations(),
+        random.Random(0),
+        concurrency=1,
+        minutes=(20, 20, 20),
+        failure_rate=0.0,
+    )
+    factory = OrgClients(servicecatalog=catalog)
+    monkeypatch.setattr(provision_account, "ORGS", orgs.load(CONFIG))
+    monkeypatch.setattr(
+        provision_account, "SC_CLIENTS", orgs.ClientPool(factory, FakeSTS(LATER))
+    )
+    monkeypatch.setattr(provision_account, "SC", Untouchable())
+    monkeypatch.setattr(
+        provision_account, "dynamo_client", simulate_workflow.FakeDynamoDB()
+    )
+    monkeypatch.setattr(provision_account, "sleep", lambda seconds: None)
+    monkeypatch.setattr(provision_account, "CATALOG_CACHE", {})
+
+    result = provision_account.lambda_handler(
+        {**REQUEST, "RequestID": "req-1", "Organization": "clients"}, None
+    )
+
+    assert result["Status"] == "IN_PROCESSING"
+    assert result["PRINCIPAL_ARN"] == ROLE
+    assert set(provision_account.CATALOG_CACHE) == {"clients"}
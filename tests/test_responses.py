@@ -0,0 +1,64 @@
+import base64
+import gzip
+import json
+from decimal import Decimal
+
+from accfactory import responses
+
+
+def _event(accept_encoding=None, **params):
+    headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+    return {"httpMethod": "GET", "headers": headers, "queryStringParameters": params}
+
+
+def test_large_payload_is_gzipped_in_one_pass():
+    payload = {"Tags": [{"Key": f"k{i}", "Value": "v" * 40} for i in range(100)]}
+
+    response = responses.json_response(200, payload, gzip=True)
+
+    assert response["isBase64Encoded"] is True
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    raw = gzip.decompress(base64.b64decode(response["body"]))
+    assert json.loads(raw) == payload
+    assert len(response["body"]) < len(raw) / 4
+
+
+def test_small_payload_and_refused_gzip_stay_plain():
+    small = responses.json_response(200, {"Status": "ACTIVE"}, gzip=True)
+    assert small["body"] == '{"Status": "ACTIVE"}'
+    assert "Content-Encoding" not in small["headers"]
+
+    assert responses.accepts_gzip(_event("br, gzip;q=0.8"))
+    assert not responses.accepts_gzip(_event("gzip;q=0, identity"))
+    assert not responses.accepts_gzip(_event())
+
+
+def test_fields_become_projection_expression(monkeypatch):
+    import lambda_src.api.lambda_function as api
+
+    calls = []
+
+    class ProjectingTable:
+        def get_item(self, Key, **kwargs):
+            calls.append(kwargs)
+            return {"Item": {"Status": "ACTIVE", "Size": Decimal("3")}}
+
+    monkeypatch.setattr(api, "table", ProjectingTable())
+
+    response = api.lambda_handler(
+        _event(accountEmail="a@corp.com", fields="Status,Size"), None
+    )
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == {"Status": "ACTIVE", "Size": 3}
+    assert calls == [
+        {
+            "ProjectionExpression": "#p0, #p1",
+            "ExpressionAttributeNames": {"#p0": "Status", "#p1": "Size"},
+        }
+    ]
+
+    invalid = api.lambda_handler(
+        _event(accountEmail="a@corp.com", fields="Status; DROP"), None
+    )
+    assert invalid["statusCode"] == 400
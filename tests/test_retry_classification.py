@@ -0,0 +1,180 @@
+import json
+import random
+
+import pytest
+
+import check_account_status
+import provision_account
+import trigger_sfn
+import update_failed_status
+from accfactory import errors
+from accfactory.throttling import ThrottledError
+from conftest import client_error
+from scripts import simulate_workflow
+
+
+def test_classifies_transient_and_permanent_errors():
+    assert errors.is_transient(ThrottledError("servicecatalog", "provision_product"))
+    assert errors.is_transient(client_error("ThrottlingException"))
+    assert errors.is_transient(client_error("ResourceInUseException", message="busy"))
+    assert errors.is_transient(
+        Exception("Another account is being provisioned. Try again later.")
+    )
+    assert not errors.is_transient(client_error("ValidationException"))
+    assert not errors.is_transient(ValueError("AccountName inválido"))
+
+
+def test_task_error_keeps_the_failed_status_contract():
+    transient = errors.task_error(
+        client_error("ThrottlingException"), "ProvisionError", "a@corp.com"
+    )
+    permanent = errors.task_error(
+        ValueError("OU inexistente"), "ProvisionError", "a@corp.com"
+    )
+
+    assert type(transient) is errors.TransientError
+    assert json.loads(str(transient))["errorType"] == "TransientError"
+    assert type(permanent) is Exception
+    assert json.loads(str(permanent)) == {
+        "errorType": "ProvisionError",
+        "errorMessage": "OU inexistente",
+        "account_email": "a@corp.com",
+    }
+
+
+class FakeCatalog:
+    def __init__(self, status, message=""):
+        self.status, self.message = status, message
+
+    def describe_provisioned_product(self, Id):
+        return {
+            "ProvisionedProductDetail": {
+                "Status": self.status,
+                "StatusMessage": self.message,
+            }
+        }
+
+
+def test_check_status_turns_control_tower_conflict_into_requeue(monkeypatch):
+    monkeypatch.setattr(
+        check_account_status,
+        "SC",
+        FakeCatalog("ERROR", "Another account is being provisioned."),
+    )
+    event = {"ProvisionedProductId": "pp-1", "AccountEmail": "a@corp.com"}
+
+    with pytest.raises(errors.ProvisionConflictError):
+        check_account_status.lambda_handler(dict(event), None)
+
+    monkeypatch.setattr(check_account_status, "SC", FakeCatalog("ERROR", "Invalid OU"))
+    with pytest.raises(Exception) as info:
+        check_account_status.lambda_handler(dict(event), None)
+    assert type(info.value) is Exception
+    assert json.loads(str(info.value))["errorType"] == "CheckStatusError"
+
+
+def test_new_attempt_uses_new_token_and_product_name(monkeypatch):
+    catalog = simulate_workflow.FakeServiceCatalog(
+        simulate_workflow.VirtualClock(),
+        simulate_workflow.FakeOrganizations(),
+        random.Random(0),
+        concurrency=1,
+        minutes=(20, 20, 20),
+        failure_rate=0.0,
+    )
+    submitted = []
+    provision = catalog.provision_product
+
+    def recording(**kwargs):
+        submitted.append((kwargs["ProvisionToken"], kwargs["ProvisionedProductName"]))
+        return provision(**kwargs)
+
+    catalog.provision_product = recording
+    monkeypatch.setattr(provision_account, "SC", catalog)
+    monkeypatch.setattr(
+        provision_account, "dynamo_client", simulate_workflow.FakeDynamoDB()
+    )
+    monkeypatch.setattr(provision_account, "sleep", lambda seconds: None)
+    monkeypatch.setattr(provision_account, "CATALOG_CACHE", {})
+    request = {
+        "AccountEmail": "new@corp.com",
+        "AccountName": "new-account",
+        "OrgUnit": "Engineering",
+        "SSOUserEmail": "owner@corp.com",
+        "SSOUserFirstName": "Maria",
+        "SSOUserLastName": "Silva",
+        "RequestID": "req-1",
+    }
+
+    first = provision_account.lambda_handler(dict(request), None)
+    second = provision_account.lambda_handler(
+        {**request, "ProvisionAttempt": first["ProvisionAttempt"], "Error": {}}, None
+    )
+
+    assert (first["ProvisionAttempt"], second["ProvisionAttempt"]) == (1, 2)
+    assert "Error" not in second
+    assert submitted[0][0] == "req-1" and submitted[1][0] == "req-1-2"
+    assert submitted[1][1] == f"{submitted[0][1]}-2"
+
+
+def _failure_event(email):
+    cause = {
+        "errorMessage": json.dumps(
+            {
+                "errorType": "ProvisionError",
+                "errorMessage": "OU inexistente",
+                "account_email": email,
+            }
+        )
+    }
+    return {"Error": {"Error": "Exception", "Cause": json.dumps(cause)}}
+
+
+def test_failed_request_is_kept_with_the_error(monkeypatch):
+    dynamo = simulate_workflow.FakeDynamoDB()
+    dynamo.items["a@corp.com"] = {"Status": {"S": "Requested"}}
+    dynamo.items["b@corp.com"] = {"Status": {"S": "ACTIVE"}}
+    monkeypatch.setattr(update_failed_status, "DYNO", dynamo)
+
+    result = update_failed_status.lambda_handler(_failure_event("a@corp.com"), None)
+    update_failed_status.lambda_handler(_failure_event("b@corp.com"), None)
+
+    assert result["Status"] == "FAILED"
+    item = dynamo.items["a@corp.com"]
+    assert item["Status"] == {"S": "FAILED"}
+    assert item["ErrorMessage"] == {"S": "OU inexistente"}
+    assert item["ErrorType"] == {"S": "ProvisionError"}
+    assert dynamo.items["b@corp.com"]["Status"] == {"S": "ACTIVE"}
+
+
+def test_trigger_restarts_only_requests_resubmitted_over_failed(monkeypatch):
+    started = []
+
+    class FakeSfn:
+        def start_execution(self, stateMachineArn, input):
+            started.append(json.loads(input)["AccountEmail"])
+            return {"executionArn": "arn:execution"}
+
+    monkeypatch.setattr(trigger_sfn, "sfn_client", FakeSfn())
+    monkeypatch.setattr(trigger_sfn, "DYNAMO_TABLE", None)
+
+    def record(name, email, old_status=None):
+        data = {
+            "NewImage": {"AccountEmail": {"S": email}, "Status": {"S": "Requested"}}
+        }
+        if old_status:
+            data["OldImage"] = {"Status": {"S": old_status}}
+        return {"eventName": name, "dynamodb": data}
+
+    trigger_sfn.lambda_handler(
+        {
+            "Records": [
+                record("INSERT", "new@corp.com"),
+                record("MODIFY", "retry@corp.com", "FAILED"),
+                record("MODIFY", "busy@corp.com", "Requested"),
+            ]
+        },
+        None,
+    )
+
+    assert started == ["new@corp.com", "retry@corp.com"]
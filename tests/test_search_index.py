@@ -0,0 +1,145 @@
+import json
+from collections import defaultdict
+
+from accfactory import search_index
+
+
+def _image(name, email, sso=""):
+    return {
+        "AccountName": {"S": name},
+        "AccountEmail": {"S": email},
+        "SSOUserEmail": {"S": sso},
+    }
+
+
+class PostingsTable:
+    def __init__(self):
+        self.postings = defaultdict(set)
+        self.queries = []
+
+    def batch_write_item(self, RequestItems):
+        (requests,) = RequestItems.values()
+        assert len(requests) <= 25
+        for request in requests:
+            if "PutRequest" in request:
+                key = request["PutRequest"]["Item"]
+                self.postings[key["PK"]["S"]].add(key["SK"]["S"])
+            else:
+                key = request["DeleteRequest"]["Key"]
+                self.postings[key["PK"]["S"]].discard(key["SK"]["S"])
+        return {}
+
+    def query(self, **kwargs):
+        pk = kwargs["ExpressionAttributeValues"][":pk"]["S"]
+        self.queries.append(pk)
+        return {"Items": [{"SK": {"S": sk}} for sk in sorted(self.postings[pk])]}
+
+
+def _index(table, *images):
+    records = [{"dynamodb": {"NewImage": image}} for image in images]
+    search_index.apply_records(table, "control", records)
+
+
+def test_normalization_strips_accents_and_splits_tokens():
+    assert search_index.tokenize("Pagamentos-Produção_01") == [
+        "pagamentos",
+        "producao",
+        "01",
+    ]
+
+
+def test_prefix_search_ranks_exact_tokens_first():
+    table = PostingsTable()
+    _index(
+        table,
+        _image("payments-prod", "payments-prod@corp.com"),
+        _image("payments-dev", "payments-dev@corp.com"),
+        _image("pay", "pay@corp.com"),
+        _image("sandbox-01", "sandbox-01@corp.com"),
+    )
+
+    ranked = search_index.search(table, "control", "pay", limit=2)
+
+    assert ranked[0][0] == "pay@corp.com"
+    assert len(ranked) == 2
+    # Com resultados suficientes, nenhum trigrama é consultado.
+    assert not any(pk.startswith("SEARCH#T:") for pk in table.queries)
+
+
+def test_fuzzy_search_tolerates_typos():
+    table = PostingsTable()
+    _index(
+        table,
+        _image("sandbox-team", "sandbox@corp.com"),
+        _image("payments", "payments@corp.com"),
+    )
+
+    ranked = search_index.search(table, "control", "sandbx")
+
+    assert [email for email, _ in ranked] == ["sandbox@corp.com"]
+
+
+def test_modify_only_writes_the_term_difference_and_remove_cleans_up():
+    table = PostingsTable()
+    old = _image("legacy-app", "app@corp.com", "owner@corp.com")
+    new = _image("modern-app", "app@corp.com", "owner@corp.com")
+    _index(table, old)
+
+    result = search_index.apply_records(
+        table, "control", [{"dynamodb": {"OldImage": old, "NewImage": new}}]
+    )
+
+    legacy_terms = search_index.terms_for_token("legacy")
+    modern_terms = search_index.terms_for_token("modern")
+    assert result["postings"] == len(legacy_terms ^ modern_terms)
+    assert search_index.search(table, "control", "modern")[0][0] == "app@corp.com"
+    assert search_index.search(table, "control", "legacy") == []
+
+    search_index.apply_records(table, "control", [{"dynamodb": {"OldImage": new}}])
+    assert not any(table.postings.values())
+
+
+def test_search_endpoint_returns_ranked_accounts(monkeypatch):
+    import lambda_src.api.lambda_function as api
+
+    table = PostingsTable()
+    _index(table, _image("payments-prod", "payments-prod@corp.com"))
+
+    class FakeResource:
+        def __init__(self):
+            self.calls = 0
+
+        def batch_get_item(self, RequestItems):
+            (request,) = RequestItems.values()
+            # Palavras reservadas (Status) só passam com aliases
+            assert "Status" not in request["ProjectionExpression"]
+            assert "Status" in request["ExpressionAttributeNames"].values()
+            self.calls += 1
+            if self.calls == 1:
+                return {"Responses": {}, "UnprocessedKeys": RequestItems}
+            return {
+                "Responses": {
+                    api.TABLE_NAME: [
+                        {"AccountEmail": key["AccountEmail"], "Status": "ACTIVE"}
+                        for key in request["Keys"]
+                    ]
+                }
+            }
+
+    monkeypatch.setattr(api, "dynamo_client", table)
+    monkeypatch.setattr(api, "dynamodb", FakeResource())
+    event = {
+        "httpMethod": "GET",
+        "resource": "/accounts/search",
+        "queryStringParameters": {"q": "payments-"},
+    }
+
+    response = api.lambda_handler(event, None)
+
+    assert response["statusCode"] == 200
+    results = json.loads(response["body"])["results"]
+    assert results[0]["AccountEmail"] == "payments-prod@corp.com"
+    assert results[0]["Score"] > 0
+
+    event["queryStringParameters"]["limit"] = "ten"
+    assert api.lambda_handler(event, None)["statusCode"] == 400
@@ -0,0 +1,75 @@
+from scripts import simulate_workflow
+
+
+def test_definition_placeholders_are_resolved():
+    definition = simulate_workflow.load_definition()
+
+    assert definition["States"]["Validate"]["Resource"] == "validate_lambda"
+
+
+def test_ct_concurrency_bounds_throughput_and_creates_queueing():
+    report = simulate_workflow.simulate(
+        requests=40, ct_concurrency=5, provision_minutes=(20, 20, 20), seed=1
+    )
+
+    assert report["succeeded"] == 40
+    # 40 contas / 5 slots de 20 min = 8 ondas -> ~160 min de makespan.
+    assert 14 <= report["accountsPerHour"] <= 15.5
+    assert report["queueingDelayMinutes"]["max"] >= 139
+    assert report["queueingDelayMinutes"]["p50"] > 0
+    transitions = report["stateTransitions"]["byState"]
+    assert transitions["Validate"] == transitions["UpdateStatusSuccess"] == 40
+    assert transitions["Wait5Minutes"] > 40
+
+
+def test_failures_are_caught_and_routed_to_update_failed():
+    report = simulate_workflow.simulate(
+        requests=30, ct_concurrency=10, failure_rate=0.5, seed=3
+    )
+
+    transitions = report["stateTransitions"]["byState"]
+    assert report["failed"] == transitions["UpdateStatusFailed"] > 0
+    assert report["succeeded"] + report["failed"] == 30
+
+
+def test_control_tower_conflicts_are_requeued_with_a_new_attempt():
+    report = simulate_workflow.simulate(
+        requests=20,
+        ct_concurrency=5,
+        provision_minutes=(20, 20, 20),
+        conflict_rate=0.3,
+        seed=2,
+    )
+
+    transitions = report["stateTransitions"]["byState"]
+    assert transitions["WaitBeforeRequeue"] > 0
+    assert transitions["ProvisionAccount"] == 20 + transitions["WaitBeforeRequeue"]
+    # Sem falhas permanentes: só falha quem esgotou as tentativas de reenfileirar.
+    assert report["succeeded"] + report["failed"] == 20
+    assert report["succeeded"] >= 17
+
+
+def test_batch_workflow_matches_outcomes_with_far_fewer_transitions():
+    kwargs = dict(
+        requests=60,
+        ct_concurrency=5,
+        provision_minutes=(20, 25, 30),
+        failure_rate=0.2,
+        conflict_rate=0.1,
+        seed=4,
+    )
+    single = simulate_workflow.simulate(**kwargs)
+    batched = simulate_workflow.simulate(batch_size=20, **kwargs)
+
+    assert batched["executions"] == 3
+    assert batched["accounts"] == single["accounts"]
+    assert sum(batched["accounts"].values()) == 60
+    # Um poll por lote em vez de um loop de Wait por conta
+    assert (
+        batched["stateTransitions"]["perAccount"] * 5
+        < single["stateTransitions"]["perAccount"]
+    )
+    assert (
+        batched["lambdaInvocations"]["perAccount"] * 5
+        < single["lambdaInvocations"]["perAccount"]
+    )
@@ -0,0 +1,104 @@
+import pytest
+
+import provision_account
+from accfactory import org_cache, snapshot
+from conftest import FakeOrganizations
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.calls = 0
+
+    def call(self, func, **kwargs):
+        self.calls += 1
+        return func(**kwargs)
+
+    def paginate(self, func, **kwargs):
+        self.calls += 1
+        yield func(**kwargs)
+
+
+@pytest.fixture
+def snapshots(monkeypatch, tmp_path):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path))
+    org_cache.invalidate()
+    yield tmp_path
+    org_cache.invalidate()
+
+
+def _restart():
+    """Container reiniciado: a memória se perde, o /tmp fica."""
+    org_cache._TREE.update(loaded_at=None, value=None)
+    org_cache._ACCOUNTS.update(loaded_at=None, value=None)
+
+
+def test_round_trip_ttl_and_disabled_store(snapshots, monkeypatch):
+    assert snapshot.save("ids", ["a", 1], now=1000.0)
+
+    assert snapshot.load("ids", 60, now=1030.0) == (["a", 1], 1000.0)
+    assert snapshot.load("ids", 60, now=1061.0) is None
+    assert snapshot.load("missing", 60, now=1030.0) is None
+
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", "")
+    assert not snapshot.save("ids", ["b"], now=1000.0)
+    assert snapshot.load("ids", 60, now=1030.0) is None
+
+
+def test_corrupt_snapshot_is_discarded(snapshots):
+    snapshot.save("ids", {"key": "value"}, now=1000.0)
+    path = snapshots / "ids.snap"
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    assert snapshot.load("ids", 60, now=1010.0) is None
+    assert not path.exists()
+
+
+def test_org_cache_restores_from_snapshot_after_restart(snapshots, monkeypatch):
+    org = FakeOrganizations(
+        accounts={"111111111111": {"Name": "Prod", "Email": "Prod@corp.com"}}
+    )
+    limiter = CountingLimiter()
+
+    assert org_cache.resolve_ou(org, limiter, "Engineering/Platform") == "ou-plat"
+    assert org_cache.account_index(org, limiter) == ({"prod"}, {"prod@corp.com"})
+    live_calls = limiter.calls
+    _restart()
+
+    assert org_cache.resolve_ou(org, limiter, "engineering/platform") == "ou-plat"
+    assert (
+        org_cache.ou_tree(org, limiter).paths["ou-plat"] == "Root/Engineering/Platform"
+    )
+    assert org_cache.account_index(org, limiter) == ({"prod"}, {"prod@corp.com"})
+    assert limiter.calls == live_calls
+
+    # Snapshot vencido: volta ao Organizations
+    _restart()
+    clock = org_cache.CLOCK
+    monkeypatch.setattr(
+        org_cache, "CLOCK", lambda: clock() + org_cache.ORG_TREE_TTL_SECONDS
+    )
+    org_cache.ou_tree(org, limiter)
+    assert limiter.calls > live_calls
+
+
+def test_catalog_ids_survive_restart(snapshots, monkeypatch):
+    loads = []
+    monkeypatch.setattr(provision_account, "CATALOG_CACHE", {})
+    monkeypatch.setattr(
+        provision_account, "get_product_id", lambda _: loads.append(1) or "prod-1"
+    )
+    monkeypatch.setattr(provision_account, "get_portfolio_id", lambda *_: "port-1")
+    monkeypatch.setattr(
+        provision_account, "associate_principal_portfolio", lambda *_: None
+    )
+    monkeypatch.setattr(
+        provision_account, "get_provisioning_artifact_id", lambda *_: "pa-1"
+    )
+
+    assert provision_account.catalog_ids() == ("prod-1", "port-1", "pa-1")
+    monkeypatch.setattr(provision_account, "CATALOG_CACHE", {})
+
+    assert provision_account.catalog_ids() == ("prod-1", "port-1", "pa-1")
+    assert loads == [1]
@@ -0,0 +1,162 @@
+import json
+
+import pytest
+
+from accfactory import metrics, throttling
+from conftest import client_error
+
+BUDGETS = {
+    "organizations": throttling.Budget(
+        rate=2, burst=2, max_attempts=3, base_delay=0.1, max_delay=1.0
+    )
+}
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeCounterTable:
+    """Implementa o ``update_item`` condicional usado pelos leases."""
+
+    def __init__(self):
+        self.counters = {}
+
+    def update_item(self, **kwargs):
+        key = (kwargs["Key"]["PK"]["S"], kwargs["Key"]["SK"]["S"])
+        values = kwargs["ExpressionAttributeValues"]
+        used = self.counters.get(key)
+        if used is not None and used > int(values[":max"]["N"]):
+            raise client_error("ConditionalCheckFailedException", "UpdateItem")
+        self.counters[key] = (used or 0) + int(values[":n"]["N"])
+        return {}
+
+
+class FakeOrganizations:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+
+    def list_roots(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise client_error("TooManyRequestsException", "ListRoots")
+        return {"Roots": [{"Id": "r-root", "Name": "Root"}]}
+
+    def list_accounts(self, NextToken=None):
+        self.calls += 1
+        pages = {None: ("a", "t1"), "t1": ("b", "t2"), "t2": ("c", None)}
+        account, token = pages[NextToken]
+        page = {"Accounts": [{"Id": account}]}
+        if token:
+            page["NextToken"] = token
+        return page
+
+
+def _limiter(clock, table=None):
+    return throttling.RateLimiter(
+        "organizations",
+        table_name="control" if table else None,
+        budgets=BUDGETS,
+        dynamo_client=table,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+
+def test_local_bucket_waits_when_burst_is_exhausted():
+    clock = FakeClock()
+    limiter = _limiter(clock)
+
+    for _ in range(3):
+        limiter.acquire("list_roots")
+
+    assert len(clock.sleeps) == 1
+    assert clock.sleeps[0] >= 0.5
+
+
+def test_shared_counter_limits_all_containers_in_the_same_window():
+    clock = FakeClock()
+    table = FakeCounterTable()
+    first, second = _limiter(clock, table), _limiter(clock, table)
+
+    first.acquire("list_accounts")
+    second.acquire("list_accounts")
+
+    assert all(
+        used <= BUDGETS["organizations"].rate for used in table.counters.values()
+    )
+    # O primeiro container reservou a janela inteira: o segundo espera a próxima.
+    assert clock.sleeps and clock.now >= 1001
+
+
+def test_call_retries_service_throttling_with_backoff():
+    clock = FakeClock()
+    org = FakeOrganizations(failures=2)
+    before = metrics.get_count(
+        "ThrottleEvents", Service="organizations", Operation="list_roots"
+    )
+
+    response = _limiter(clock).call(org.list_roots)
+
+    assert response["Roots"][0]["Id"] == "r-root"
+    assert org.calls == 3
+    assert (
+        metrics.get_count(
+            "ThrottleEvents", Service="organizations", Operation="list_roots"
+        )
+        == before + 2
+    )
+
+
+def test_call_raises_throttled_error_when_budget_is_exhausted():
+    clock = FakeClock()
+    org = FakeOrganizations(failures=10)
+
+    with pytest.raises(throttling.ThrottledError):
+        _limiter(clock).call(org.list_roots)
+    assert org.calls == BUDGETS["organizations"].max_attempts
+
+
+def test_paginate_follows_next_token():
+    clock = FakeClock()
+    org = FakeOrganizations()
+
+    pages = list(_limiter(clock).paginate(org.list_accounts))
+
+    assert [page["Accounts"][0]["Id"] for page in pages] == ["a", "b", "c"]
+
+
+def test_api_returns_503_when_organizations_is_throttled(monkeypatch):
+    import lambda_src.api.lambda_function as api
+
+    def throttled(_ou_path, org=None):
+        raise throttling.ThrottledError("organizations", "list_roots", retry_after=4)
+
+    monkeypatch.setattr(api, "has_available_capacity", lambda org=None: True)
+    monkeypatch.setattr(api, "validate_account_name", lambda _: True)
+    monkeypatch.setattr(api, "validate_org_unit", throttled)
+    payload = {
+        "AccountEmail": "new@example.com",
+        "AccountName": "new-account",
+        "OrgUnit": "Engineering",
+        "SSOUserEmail": "owner@example.com",
+        "SSOUserFirstName": "Jane",
+        "SSOUserLastName": "Doe",
+    }
+
+    response = api.lambda_handler(
+        {"httpMethod": "POST", "body": json.dumps(payload)}, None
+    )
+
+    assert response["statusCode"] == 503
+    assert response["headers"]["Retry-After"] == "4"
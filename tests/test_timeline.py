@@ -0,0 +1,109 @@
+import json
+
+import update_succeed_status
+from accfactory import timeline
+from conftest import client_error
+from scripts.simulate_workflow import FakeDynamoDB
+
+
+def _item(created, **offsets):
+    base = "2026-01-01T00:{:02d}:00+00:00"
+    item = {"CreatedAt": base.format(created)}
+    for attr, minute in offsets.items():
+        item[attr] = base.format(minute)
+    return item
+
+
+class RecordingDynamo:
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    def update_item(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.error:
+            raise self.error
+        return {}
+
+
+def test_stage_durations_only_include_completed_stages():
+    item = _item(0, TriggeredAt=1, ValidatedAt=3, ProvisionSubmittedAt=4)
+
+    durations = timeline.stage_durations(item)
+
+    assert durations == {
+        "Admission": 60.0,
+        "Validation": 120.0,
+        "ProvisionSubmit": 60.0,
+    }
+
+
+def test_summarize_computes_nearest_rank_percentiles():
+    items = [_item(0, TriggeredAt=minute) for minute in range(1, 11)]
+
+    summary = timeline.summarize(items)
+
+    assert summary["Admission"]["count"] == 10
+    assert summary["Admission"]["p50"] == 300.0
+    assert summary["Admission"]["p95"] == 600.0
+    assert summary["EndToEnd"] == {"count": 0, "p50": None, "p95": None, "p99": None}
+
+
+def test_mark_keeps_first_timestamp_and_never_raises():
+    dynamo = RecordingDynamo()
+    assert timeline.mark(dynamo, "accounts", "a@example.com", timeline.TRIGGERED)
+    call = dynamo.calls[0]
+    assert call["UpdateExpression"] == "SET #stage = if_not_exists(#stage, :ts)"
+    assert call["ExpressionAttributeNames"] == {"#stage": "TriggeredAt"}
+
+    failing = RecordingDynamo(error=client_error("ConditionalCheckFailedException"))
+    assert not timeline.mark(failing, "accounts", "gone@example.com", "ValidatedAt")
+
+
+def test_piggybacked_stamps_survive_a_retried_update():
+    dynamo = FakeDynamoDB()
+    for stamp in ("2026-01-01T00:00:00+00:00", "2026-01-01T00:05:00+00:00"):
+        update_succeed_status.update_dynamodb_fields_with_timestamp(
+            dynamo,
+            "accounts",
+            "AccountEmail",
+            "a@example.com",
+            {"Status": "ACTIVE", timeline.ACTIVATED: stamp},
+        )
+
+    item = dynamo.items["a@example.com"]
+    assert item[timeline.ACTIVATED] == {"S": "2026-01-01T00:00:00+00:00"}
+
+
+def test_latency_endpoint_scans_window_with_projection(monkeypatch):
+    import lambda_src.api.lambda_function as api
+
+    class PagedTable:
+        def __init__(self):
+            self.calls = []
+
+        def scan(self, **kwargs):
+            self.calls.append(kwargs)
+            if "ExclusiveStartKey" not in kwargs:
+                return {
+                    "Items": [_item(0, TriggeredAt=2)],
+                    "LastEvaluatedKey": {"AccountEmail": "x"},
+                }
+            return {"Items": [_item(0, TriggeredAt=4)]}
+
+    stub = PagedTable()
+    monkeypatch.setattr(api, "table", stub)
+    event = {
+        "httpMethod": "GET",
+        "resource": "/stats/latency",
+        "queryStringParameters": {"from": "2026-01-01", "to": "2026-01-02"},
+    }
+
+    response = api.lambda_handler(event, None)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["stages"]["Admission"]["count"] == 2
+    assert body["stages"]["Admission"]["p99"] == 240.0
+    assert len(stub.calls) == 2
+    assert "TriggeredAt" in stub.calls[0]["ProjectionExpression"]
@@ -0,0 +1,72 @@
+import json
+import threading
+import time
+
+import pytest
+
+import validate_fields
+
+ITEM = {
+    "AccountName": "payments-prod",
+    "AccountEmail": "Payments@corp.com",
+    "OrgUnit": "Engineering",
+    "SSOUserEmail": "owner@corp.com",
+    "SSOUserFirstName": "maria",
+    "SSOUserLastName": "silva",
+    "RequestID": "req-1",
+}
+
+
+def _slow(result, seconds):
+    def check(item):
+        time.sleep(seconds)
+        return result
+
+    return check
+
+
+def test_checks_run_concurrently(monkeypatch):
+    monkeypatch.setattr(validate_fields.timeline, "mark", lambda *args: True)
+    monkeypatch.setattr(
+        validate_fields,
+        "CHECKS",
+        [("a", _slow(False, 0.2), "a"), ("b", _slow(False, 0.2), "b")],
+    )
+
+    start = time.perf_counter()
+    item = validate_fields.lambda_handler(dict(ITEM), None)
+
+    assert time.perf_counter() - start < 0.35
+    assert item["Validation"] is True
+    assert item["AccountEmail"] == "payments@corp.com"
+
+
+def test_first_failure_short_circuits_with_same_error_contract(monkeypatch):
+    released = threading.Event()
+
+    def blocked(item):
+        released.wait(2)
+        return False
+
+    monkeypatch.setattr(
+        validate_fields,
+        "CHECKS",
+        [
+            ("slow", blocked, "slow"),
+            ("dynamodb", _slow(True, 0), "Item já foi processado ou está em andamento"),
+        ],
+    )
+
+    try:
+        with pytest.raises(Exception) as error:
+            validate_fields.lambda_handler(dict(ITEM), None)
+        assert not released.is_set()
+    finally:
+        released.set()
+
+    payload = json.loads(str(error.value))
+    assert payload == {
+        "errorType": "ValidationErrorWithData",
+        "errorMessage": "Item já foi processado ou está em andamento",
+        "account_email": "payments@corp.com",
+    }
@@ -0,0 +1,157 @@
+import json
+
+import pytest
+
+import trigger_sfn
+import validate_fields
+from accfactory import org_cache, validation
+from conftest import DirectLimiter, FakeOrganizations
+
+import lambda_src.api.lambda_function as api
+
+REQUEST = {
+    "AccountEmail": " Payments@Corp.com ",
+    "AccountName": "Payments-Prod",
+    "OrgUnit": "Engineering/Platform/",
+    "SSOUserEmail": "Owner@corp.com",
+    "SSOUserFirstName": "maria  clara",
+    "SSOUserLastName": "silva",
+    "Tags": [{"Key": "env", "Value": 1}],
+}
+
+
+class Untouchable:
+    def __getattr__(self, name):
+        raise AssertionError(f"chamada downstream: {name}")
+
+
+def test_normalization_is_shared_and_idempotent():
+    item, errors = validation.validate(REQUEST)
+
+    assert errors == []
+    assert item == {
+        "AccountEmail": "payments@corp.com",
+        "AccountName": "payments-prod",
+        "OrgUnit": "Engineering/Platform",
+        "SSOUserEmail": "owner@corp.com",
+        "SSOUserFirstName": "Maria Clara",
+        "SSOUserLastName": "Silva",
+        "Tags": [{"Key": "env", "Value": "1"}],
+    }
+    # O item gravado pela API passa inalterado pelo workflow
+    assert validation.validate(item) == (item, [])
+
+
+def test_all_errors_are_reported_at_once():
+    request = {
+        **REQUEST,
+        "AccountEmail": "not-an-email",
+        "AccountName": "x" * 51,
+        "Tags": {"env": "dev"},
+    }
+    del request["SSOUserLastName"]
+
+    _, errors = validation.validate(request, required=("RequestID",))
+
+    assert [error["field"] for error in errors] == [
+        "RequestID",
+        "SSOUserLastName",
+        "AccountEmail",
+        "AccountName",
+        "Tags",
+    ]
+    assert validation.summary(errors).startswith(
+        "Missing fields: RequestID, SSOUserLastName; AccountEmail invalid format"
+    )
+
+
+def test_api_rejects_invalid_requests_before_any_call(monkeypatch):
+    for client in ("table", "dynamo_client", "org_client", "sfn_client"):
+        monkeypatch.setattr(api, client, Untouchable())
+    monkeypatch.setattr(api, "has_available_capacity", Untouchable)
+    body = {**REQUEST, "AccountEmail": "bad", "SSOUserEmail": "also bad"}
+
+    response = api.lambda_handler(
+        {"httpMethod": "POST", "body": json.dumps(body)}, None
+    )
+
+    assert response["statusCode"] == 400
+    fields = [error["field"] for error in json.loads(response["body"])["errors"]]
+    assert fields == ["AccountEmail", "SSOUserEmail"]
+
+
+def test_api_rejects_accounts_already_in_organizations(monkeypatch):
+    legacy = {"999999999999": {"Name": "Legacy", "Email": "legacy@corp.com"}}
+    monkeypatch.setattr(api, "org_client", FakeOrganizations(accounts=legacy))
+    monkeypatch.setattr(api, "ORG_LIMITER", DirectLimiter())
+    monkeypatch.setattr(api, "table", Untouchable())
+    monkeypatch.setattr(api, "validate_account_name", lambda _: True)
+    monkeypatch.setattr(api, "validate_org_unit", lambda path, org=None: True)
+    monkeypatch.setattr(api, "has_available_capacity", lambda org=None: True)
+    org_cache.invalidate()
+    body = {**REQUEST, "AccountName": "LEGACY"}
+
+    try:
+        response = api.lambda_handler(
+            {"httpMethod": "POST", "body": json.dumps(body)}, None
+        )
+    finally:
+        org_cache.invalidate()
+
+    assert response["statusCode"] == 409
+    assert "Organizations" in response["body"]
+
+
+def test_tagged_stream_record_passes_validate_fields(monkeypatch):
+    started = []
+
+    class RecordingSFN:
+        def start_execution(self, stateMachineArn, input):
+            started.append(json.loads(input))
+            return {"executionArn": "arn:execution"}
+
+    class Closed:
+        def allow(self):
+            return True
+
+    # NewImage como o stream entrega o item gravado pela API
+    item, _ = validation.validate(REQUEST)
+    image = {
+        name: {"S": value} for name, value in item.items() if isinstance(value, str)
+    }
+    image["Tags"] = {
+        "L": [
+            {"M": {"Key": {"S": tag["Key"]}, "Value": {"S": tag["Value"]}}}
+            for tag in item["Tags"]
+        ]
+    }
+    image.update(RequestID={"S": "req-1"}, Status={"S": "Requested"})
+    monkeypatch.setattr(trigger_sfn, "sfn_client", RecordingSFN())
+    monkeypatch.setattr(trigger_sfn, "SC_CIRCUIT", Closed())
+    monkeypatch.setattr(trigger_sfn, "DYNAMO_TABLE", None)
+    monkeypatch.setattr(validate_fields, "CHECKS", [])
+    monkeypatch.setattr(validate_fields.timeline, "mark", lambda *args: True)
+
+    trigger_sfn.lambda_handler(
+        {"Records": [{"eventName": "INSERT", "dynamodb": {"NewImage": image}}]}, None
+    )
+    (payload,) = started
+    validated = validate_fields.validate_item(payload)
+
+    assert validated["Validation"] is True
+    assert validated["Tags"] == [{"Key": "env", "Value": "1"}]
+
+
+def test_validate_fields_reports_every_rule_failure(monkeypatch):
+    monkeypatch.setattr(validate_fields, "CHECKS", [])
+    item = {**REQUEST, "AccountEmail": "bad@email", "SSOUserEmail": "worse@email"}
+
+    with pytest.raises(Exception) as error:
+        validate_fields.lambda_handler(item, None)
+
+    payload = json.loads(str(error.value))
+    assert payload["errorType"] == "ValidationErrorWithData"
+    assert payload["errorMessage"] == (
+        "Missing fields: RequestID; AccountEmail invalid format; "
+        "SSOUserEmail invalid format"
+    )
@@ -0,0 +1,84 @@
+import pathlib
+
+import pytest
+
+from accfactory import org_cache, warmup
+from conftest import DirectLimiter, FakeOrganizations
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(org_cache, "CLOCK", lambda: now[0])
+    org_cache.invalidate()
+    yield now
+    org_cache.invalidate()
+
+
+def test_ou_tree_is_walked_once_and_refreshed_on_unknown_path(clock):
+    org = FakeOrganizations()
+    limiter = DirectLimiter()
+
+    assert org_cache.resolve_ou(org, limiter, "engineering / Platform") == "ou-plat"
+    walked = org.count()
+    assert org_cache.resolve_ou(org, limiter, "Engineering") == "ou-eng"
+    assert org.count() == walked
+
+    org.ous["ou-sbx"] = ("r-root", "Sandbox")
+    # Miss logo após a carga não recarrega (evita varrer a árvore a cada OU inválida)...
+    assert org_cache.resolve_ou(org, limiter, "Sandbox") is None
+    assert org.count() == walked
+    # ...mas depois de MIN_REFRESH_SECONDS a OU nova é encontrada.
+    clock[0] += org_cache.MIN_REFRESH_SECONDS
+    assert org_cache.resolve_ou(org, limiter, "Sandbox") == "ou-sbx"
+
+
+def test_api_warmup_event_prepopulates_caches(clock, monkeypatch):
+    import lambda_src.api.lambda_function as api
+
+    org = FakeOrganizations()
+    monkeypatch.setattr(api, "org_client", org)
+    monkeypatch.setattr(api, "ORG_LIMITER", DirectLimiter())
+    monkeypatch.setitem(api.WARMERS, "dynamodb", lambda: None)
+
+    report = api.lambda_handler({"warmup": True}, None)
+
+    assert report["warmed"]["ou_tree"]["ok"] is True
+    assert set(report["warmed"]) == {
+        "ou_tree",
+        "org_account_index",
+        "dynamodb",
+        "stepfunctions",
+        "circuit",
+    }
+    assert report["durationMs"] >= 0
+    calls = org.count()
+    assert api.validate_org_unit("Engineering/Platform") is True
+    assert org.count() == calls
+
+
+def test_failing_warmer_is_reported_without_stopping_others():
+    def broken():
+        raise RuntimeError("boom")
+
+    report = warmup.run({"broken": broken, "ok": lambda: None})
+
+    assert report["warmed"]["broken"] == {
+        "ok": False,
+        "error": "boom",
+        "ms": report["warmed"]["broken"]["ms"],
+    }
+    assert report["warmed"]["ok"]["ok"] is True
+
+
+def test_every_handler_with_warmers_runs_them_at_init():
+    # Sem on_init o handler só aquece via evento agendado, não no init de provisioned concurrency.
+    handlers = pathlib.Path(__file__).resolve().parents[1] / "lambda_src"
+    missing = [
+        path.name
+        for path in sorted(handlers.rglob("*.py"))
+        if "\nWARMERS = " in path.read_text(encoding="utf-8")
+        and "\nwarmup.on_init(WARMERS)" not in path.read_text(encoding="utf-8")
+    ]
+
+    assert missing == []
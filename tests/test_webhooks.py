@@ -0,0 +1,248 @@
+import json
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import lambda_src.api.lambda_function as api
+import notify_webhooks
+from accfactory import webhooks
+
+REQUEST = {
+    "AccountEmail": "Team@corp.com",
+    "AccountName": "team-account",
+    "OrgUnit": "Engineering",
+    "SSOUserEmail": "owner@corp.com",
+    "SSOUserFirstName": "Jane",
+    "SSOUserLastName": "Doe",
+}
+
+
+def _record(event_name, old=None, new=None, event_id="evt-1"):
+    images = {"ApproximateCreationDateTime": 1700000000}
+    if old:
+        images["OldImage"] = old
+    if new:
+        images["NewImage"] = new
+    return {"eventID": event_id, "eventName": event_name, "dynamodb": images}
+
+
+def _image(status, email="team@corp.com"):
+    return {
+        "AccountEmail": {"S": email},
+        "Status": {"S": status},
+        "PRINCIPAL_ARN": {"S": "arn:aws:iam::1:role/x"},
+    }
+
+
+class FakeControlTable:
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, TableName, Item):
+        self.items[(Item["PK"]["S"], Item["SK"]["S"])] = Item
+
+    def get_item(self, TableName, Key):
+        item = self.items.get((Key["PK"]["S"], Key["SK"]["S"]))
+        return {"Item": item} if item else {}
+
+    def delete_item(self, TableName, Key):
+        self.items.pop((Key["PK"]["S"], Key["SK"]["S"]), None)
+
+    def query(self, TableName, ExpressionAttributeValues, **kwargs):
+        pk = ExpressionAttributeValues[":pk"]["S"]
+        return {
+            "Items": [item for (p, _), item in sorted(self.items.items()) if p == pk]
+        }
+
+
+@pytest.fixture
+def receiver():
+    """Servidor HTTP local: responde com os status de ``statuses`` em ordem."""
+    received, statuses = [], []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append((self.headers, body))
+            self.send_response(statuses.pop(0) if statuses else 200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/hook", received, statuses
+    server.shutdown()
+
+
+def test_event_only_fires_on_terminal_transitions():
+    activated = _record("MODIFY", _image("IN_PROCESSING"), _image("ACTIVE"))
+    email, payload = webhooks.event_for(activated)
+
+    assert email == "team@corp.com"
+    assert payload["type"] == "account.active"
+    assert payload["id"] == "evt-1"
+    assert payload["occurredAt"] == 1700000000
+    assert "PRINCIPAL_ARN" not in payload["account"]
+    # Reescrita sem troca de status e status intermediários não notificam
+    rewrite = _record("MODIFY", _image("ACTIVE"), _image("ACTIVE"))
+    assert webhooks.event_for(rewrite) is None
+    assert webhooks.event_for(_record("INSERT", None, _image("Requested"))) is None
+    removed = webhooks.event_for(_record("REMOVE", _image("ACTIVE")))
+    assert removed[1]["type"] == webhooks.REMOVED
+
+
+def test_parse_callback_requires_https():
+    assert webhooks.parse_callback({}) is None
+    assert webhooks.parse_callback({"Callback": {"Url": "https://hooks.corp.com/x"}})
+    for callback in (
+        {"Url": "http://hooks.corp.com/x"},
+        {"Url": "https://hooks.corp.com/x", "Secret": ""},
+        "https://hooks.corp.com/x",
+    ):
+        with pytest.raises(ValueError):
+            webhooks.parse_callback({"Callback": callback})
+
+
+def test_deliver_signs_and_retries_server_errors(receiver):
+    url, received, statuses = receiver
+    statuses.extend([500, 429])
+    sleeps = []
+    _, payload = webhooks.event_for(
+        _record("MODIFY", _image("IN_PROCESSING"), _image("ACTIVE"))
+    )
+
+    ok, attempts, error = webhooks.deliver(
+        {"Url": url, "Secret": "s3cr3t"}, payload, sleep=sleeps.append
+    )
+
+    assert (ok, attempts, error) == (True, 3, None)
+    assert len(sleeps) == 2
+    headers, body = received[-1]
+    assert json.loads(body) == payload
+    assert headers[webhooks.DELIVERY_HEADER] == "evt-1"
+    assert webhooks.verify(
+        "s3cr3t",
+        headers[webhooks.TIMESTAMP_HEADER],
+        body,
+        headers[webhooks.SIGNATURE_HEADER],
+    )
+    assert not webhooks.verify(
+        "other",
+        headers[webhooks.TIMESTAMP_HEADER],
+        body,
+        headers[webhooks.SIGNATURE_HEADER],
+    )
+
+
+def test_deliver_does_not_retry_client_errors(receiver):
+    url, received, statuses = receiver
+    statuses.append(404)
+
+    ok, attempts, error = webhooks.deliver(
+        {"Url": url}, {"id": "evt-1"}, sleep=lambda _: None
+    )
+
+    assert (ok, attempts) == (False, 1)
+    assert "404" in error
+    assert webhooks.SIGNATURE_HEADER not in received[0][0]
+
+
+def test_failed_delivery_goes_to_dlq_and_is_redelivered(monkeypatch):
+    control = FakeControlTable()
+    webhooks.register(control, "control", "team@corp.com", {"Url": "https://x"})
+    monkeypatch.setattr(notify_webhooks, "DYNO", control)
+    outcomes = iter([(False, 4, "HTTP Error 503"), (True, 1, None)])
+    monkeypatch.setattr(webhooks, "deliver", lambda *_: next(outcomes))
+    removed = webhooks.event_for(_record("REMOVE", _image("ACTIVE")))
+
+    result = notify_webhooks.lambda_handler({"events": [list(removed)]}, None)
+
+    assert result == {"dead_lettered": 1}
+    (dlq,) = list(webhooks.dead_letters(control, "control"))
+    assert dlq["Attempts"] == {"N": "4"}
+    assert json.loads(dlq["Payload"]["S"]) == removed[1]
+
+    assert notify_webhooks.lambda_handler({"redeliver": True}, None)["delivered"] == 1
+    assert list(webhooks.dead_letters(control, "control")) == []
+    # Conta removida e avisada: o callback sai da tabela de controle
+    assert webhooks.lookup(control, "control", "team@corp.com") is None
+
+
+def test_stream_consumer_forwards_events_asynchronously(monkeypatch):
+    invoked = []
+
+    class FakeLambda:
+        def invoke(self, **kwargs):
+            invoked.append(kwargs)
+
+    monkeypatch.setattr(webhooks, "WEBHOOK_FUNCTION", "notify-webhooks")
+    monkeypatch.setattr(webhooks, "_LAMBDA", FakeLambda())
+    records = [
+        _record("MODIFY", _image("Requested"), _image("IN_PROCESSING")),
+        _record("MODIFY", _image("IN_PROCESSING"), _image("FAILED"), "evt-2"),
+    ]
+
+    assert webhooks.apply_records(None, "control", records) == {"forwarded": 1}
+    (call,) = invoked
+    assert call["InvocationType"] == "Event"
+    (event,) = json.loads(call["Payload"])["events"]
+    assert event[0] == "team@corp.com"
+    assert event[1]["type"] == "account.failed"
+
+
+def test_api_post_validates_and_registers_callback(monkeypatch):
+    control = FakeControlTable()
+    stored = {}
+
+    class Table:
+        def put_item(self, Item, **kwargs):
+            stored[Item["AccountEmail"]] = Item
+
+    monkeypatch.setattr(api, "table", Table())
+    monkeypatch.setattr(api, "dynamo_client", control)
+    monkeypatch.setattr(api, "CONTROL_TABLE", "control")
+    monkeypatch.setattr(api, "provisioning_blocked", lambda org=None: None)
+    monkeypatch.setattr(api, "uses_pool", lambda _: False)
+    monkeypatch.setattr(api, "validate_account_name", lambda _: True)
+    monkeypatch.setattr(api, "validate_org_unit", lambda path, org=None: True)
+
+    insecure = {**REQUEST, "Callback": {"Url": "http://hooks.corp.com/x"}}
+    event = {"httpMethod": "POST", "body": json.dumps(insecure)}
+    assert api.lambda_handler(event, None)["statusCode"] == 400
+    assert stored == {}
+
+    callback = {"Url": "https://hooks.corp.com/x", "Secret": "s3cr3t"}
+    event["body"] = json.dumps({**REQUEST, "Callback": callback})
+    response = api.lambda_handler(event, None)
+
+    assert response["statusCode"] == 201
+    assert "Callback" not in stored["team@corp.com"]
+    assert "s3cr3t" not in response["body"]
+    assert webhooks.lookup(control, "control", "team@corp.com") == callback
+    assert "CallbackRegistered" not in json.loads(response["body"])
+
+    # Falha ao registrar o callback não desfaz o 201 da conta já gravada
+    def unavailable(**kwargs):
+        raise RuntimeError("control table unavailable")
+
+    monkeypatch.setattr(control, "put_item", unavailable)
+    event["body"] = json.dumps(
+        {**REQUEST, "AccountEmail": "ops@corp.com", "Callback": callback}
+    )
+    response = api.lambda_handler(event, None)
+
+    assert response["statusCode"] == 201
+    assert json.loads(response["body"])["CallbackRegistered"] is False
+    assert "ops@corp.com" in stored
+
+
+def test_unreachable_callback_is_retryable():
+    assert webhooks._retryable(urllib.error.URLError("connection refused"))
+    assert not webhooks._retryable(
+        urllib.error.HTTPError("https://x", 400, "Bad Request", {}, None)
+    )